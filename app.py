@@ -5,6 +5,7 @@ A delightful Streamlit-based video downloader with cat theme!
 """
 
 import streamlit as st
+import pandas as pd
 import os
 import sys
 import subprocess
@@ -19,6 +20,52 @@ import urllib.parse
 from pathlib import Path
 from threading import Thread
 import json
+import uuid
+
+from meowdown_engine import (
+    DEFAULT_CHUNK_SIZE,
+    FAILURE_EXTRACTOR,
+    FAILURE_FORBIDDEN,
+    FAILURE_GEO_BLOCKED,
+    FAILURE_NETWORK,
+    FAILURE_RATE_LIMITED,
+    FAILURE_REMOVED,
+    FAILURE_UNKNOWN,
+    JOB_CANCELLED,
+    JOB_PAUSED,
+    JOB_RUNNING,
+    DISK_RESERVE_BYTES,
+    MAX_FILESIZE_LIMITS,
+    DownloadEngine,
+    JobManifest,
+    OutputCapture,
+    QuotaExceeded,
+    SessionLimits,
+    build_download_command,
+    build_mix_command,
+    ffmpeg_available,
+    free_disk_space,
+    get_app_dir,
+    get_data_dir,
+    get_ffmpeg_path,
+    mix_file_name,
+    parse_time_ranges,
+    plan_download,
+    run_captured,
+    write_concat_list,
+)
+from meowdown_cluster import ClusterQueue
+from meowdown_delivery import FileLinks, is_loopback_host, start_delivery_server
+from meowdown_formats import FormatCache, parse_size
+from meowdown_library import LibraryIndex
+from meowdown_metrics import MetricsRegistry, start_metrics_server
+from meowdown_runner import shared_runner
+from meowdown_segments import SEGMENT_CONNECTIONS
+from meowdown_staging import StagingArea
+from meowdown_subscriptions import SubscriptionRegistry, SubscriptionScheduler
+from meowdown_tagging import HAS_MUTAGEN
+from meowdown_transcode import VIDEO_EXTENSIONS, CompressionError, Compressor
+from meowdown_workers import WorkerPool
 
 # Optional imports - graceful fallback if not available
 try:
@@ -36,6 +83,52 @@ APP_NAME = "MeowDown"
 VERSION = "3.0.0"
 GITHUB_URL = "https://github.com/yourusername/MeowDown"
 
+# Stop a yt-dlp run that has printed nothing for this long (paused runs excepted)
+DOWNLOAD_IDLE_TIMEOUT = 15 * 60
+
+# Prometheus scrape endpoint for download metrics ("off" disables it)
+METRICS_HOST = os.environ.get("MEOWDOWN_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = os.environ.get("MEOWDOWN_METRICS_PORT", "9464")
+
+# Limits of the download engine shared by every browser session on this
+# server (sizes like "20M"; unset = unlimited)
+MAX_PARALLEL_DOWNLOADS = int(os.environ.get("MEOWDOWN_MAX_DOWNLOADS", "2"))
+BANDWIDTH_LIMIT = os.environ.get("MEOWDOWN_BANDWIDTH_LIMIT")
+SESSION_MAX_RUNNING = os.environ.get("MEOWDOWN_SESSION_MAX_RUNNING")
+SESSION_MAX_QUEUED = os.environ.get("MEOWDOWN_SESSION_MAX_QUEUED")
+SESSION_DAILY_LIMIT = os.environ.get("MEOWDOWN_SESSION_DAILY_LIMIT")
+
+# Shared queue of worker nodes (see meowdown_cluster.py); unset = download here only
+CLUSTER_QUEUE = os.environ.get("MEOWDOWN_CLUSTER_QUEUE")
+
+# File delivery endpoint for browsers on other machines ("off" disables it).
+# MEOWDOWN_DELIVERY_URL is its address as users reach it (e.g. behind a
+# proxy); a fixed MEOWDOWN_DELIVERY_SECRET keeps links valid across restarts.
+# It only listens on this machine unless MEOWDOWN_DELIVERY_HOST says otherwise
+# (0.0.0.0 for every interface); until then, or until MEOWDOWN_DELIVERY_URL
+# is set, browsers on other machines get no links
+DELIVERY_HOST = os.environ.get("MEOWDOWN_DELIVERY_HOST", "127.0.0.1")
+DELIVERY_PORT = os.environ.get("MEOWDOWN_DELIVERY_PORT", "8502")
+DELIVERY_URL = os.environ.get("MEOWDOWN_DELIVERY_URL")
+DELIVERY_SECRET = os.environ.get("MEOWDOWN_DELIVERY_SECRET")
+
+# Local scratch folder (tmpfs or an SSD) downloads work in before their
+# finished files are moved into the download folder; unset = download
+# straight into the folder
+STAGING_DIR = os.environ.get("MEOWDOWN_STAGING_DIR")
+
+# Polling of subscribed channels and playlists while the app runs ("off"
+# leaves it to `meowdown_subscriptions.py run`)
+SUBSCRIPTIONS = os.environ.get("MEOWDOWN_SUBSCRIPTIONS", "on")
+
+# "Check for new videos" choices when subscribing, in seconds
+SUBSCRIPTION_INTERVALS = {
+    "⏰ Every hour": 3600,
+    "🌗 Every 6 hours": 6 * 3600,
+    "☀️ Daily": 24 * 3600,
+    "📅 Weekly": 7 * 24 * 3600,
+}
+
 # Cat emojis for different moods
 CAT_EMOJIS = {
     "happy": "😸",
@@ -54,6 +147,17 @@ CAT_EMOJIS = {
     "thinking": "🤔"
 }
 
+# Friendly explanations for classified download failures
+FAILURE_MESSAGES = {
+    FAILURE_RATE_LIMITED: "🐢 The site is rate-limiting us",
+    FAILURE_FORBIDDEN: "🔒 The site refused access (HTTP 403)",
+    FAILURE_GEO_BLOCKED: "🌍 Not available in your country",
+    FAILURE_REMOVED: "🗑️ Removed, private or doesn't exist",
+    FAILURE_EXTRACTOR: "🔧 yt-dlp couldn't read this site - try updating yt-dlp",
+    FAILURE_NETWORK: "📡 Network trouble",
+    FAILURE_UNKNOWN: "🤔 Something unexpected went wrong",
+}
+
 # Platform-specific FFmpeg URLs
 FFMPEG_URLS = {
     "Windows": "https://github.com/BtbN/FFmpeg-Builds/releases/download/latest/ffmpeg-master-latest-win64-gpl.zip",
@@ -322,16 +426,109 @@ def load_custom_css():
 # 🛠️ UTILITY FUNCTIONS
 # =============================================================================
 
-def get_app_dir():
-    """Get application directory for storing binaries."""
-    if getattr(sys, 'frozen', False):
-        app_dir = Path(sys.executable).parent
-    else:
-        app_dir = Path(__file__).parent
-    
-    bin_dir = app_dir / "bin"
-    bin_dir.mkdir(exist_ok=True)
-    return bin_dir
+@st.cache_resource
+def get_format_cache():
+    """Formats negotiated in earlier downloads, for local size estimates."""
+    return FormatCache(get_data_dir() / "formats.sqlite3")
+
+@st.cache_resource
+def get_library():
+    """Searchable index of everything MeowDown has downloaded."""
+    return LibraryIndex(get_data_dir() / "library.sqlite3")
+
+@st.cache_resource
+def get_download_engine():
+    """Background download engine shared by every script rerun."""
+    metrics = MetricsRegistry(log_path=get_data_dir() / "metrics.jsonl")
+    limits = SessionLimits(
+        max_running=int(SESSION_MAX_RUNNING) if SESSION_MAX_RUNNING else None,
+        max_pending=int(SESSION_MAX_QUEUED) if SESSION_MAX_QUEUED else None,
+        max_daily_bytes=parse_size(SESSION_DAILY_LIMIT) if SESSION_DAILY_LIMIT else None,
+    )
+    return DownloadEngine(max_workers=MAX_PARALLEL_DOWNLOADS, metrics=metrics, log_dir=get_data_dir() / "logs",
+                          idle_timeout=DOWNLOAD_IDLE_TIMEOUT, format_cache=get_format_cache(),
+                          workers=WorkerPool(), limits=limits,
+                          bandwidth_limit=parse_size(BANDWIDTH_LIMIT) if BANDWIDTH_LIMIT else None,
+                          staging=StagingArea(STAGING_DIR) if STAGING_DIR else None)
+
+def get_session_id():
+    """This browser session's ID, the owner of the downloads it queues."""
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex[:8]
+    return st.session_state.session_id
+
+@st.cache_resource
+def get_cluster_queue():
+    """Queue shared with the worker nodes, or None when no cluster is configured."""
+    return ClusterQueue(CLUSTER_QUEUE) if CLUSTER_QUEUE else None
+
+@st.cache_resource
+def get_subscriptions():
+    """Subscribed channels and playlists; their scheduler runs on the app's engine."""
+    registry = SubscriptionRegistry(get_data_dir() / "subscriptions.sqlite3")
+    if SUBSCRIPTIONS.lower() != "off":
+        SubscriptionScheduler(registry, get_download_engine()).start()
+    return registry
+
+@st.cache_resource
+def get_metrics_endpoint():
+    """Start the metrics endpoint once per server; returns its URL or None."""
+    if METRICS_PORT.lower() == "off":
+        return None
+    engine = get_download_engine()
+    try:
+        server = start_metrics_server(engine.metrics, engine.gauges, METRICS_HOST, int(METRICS_PORT))
+    except ValueError:
+        return None
+    if server is None:
+        return None
+    return f"http://{METRICS_HOST}:{server.server_address[1]}/metrics"
+
+@st.cache_resource
+def get_file_links():
+    """Start the file delivery endpoint once per server; returns its FileLinks or None."""
+    if DELIVERY_PORT.lower() == "off":
+        return None
+    try:
+        links = FileLinks(DELIVERY_URL or f"http://127.0.0.1:{int(DELIVERY_PORT)}", secret=DELIVERY_SECRET)
+    except ValueError:
+        return None
+    if start_delivery_server(links, DELIVERY_HOST, int(DELIVERY_PORT)) is None:
+        return None
+    return links
+
+def delivery_base_url():
+    """Where this browser reaches the delivery endpoint: same host as the app, delivery port.
+
+    None if it can't: the endpoint only listens on this machine and the
+    browser is on another one.
+    """
+    if DELIVERY_URL:
+        return DELIVERY_URL
+    context = getattr(st, "context", None)  # Streamlit 1.37+
+    host = (context.headers.get("Host") if context is not None else None) or "127.0.0.1"
+    hostname = urllib.parse.urlsplit(f"//{host}").hostname or "127.0.0.1"
+    if is_loopback_host(DELIVERY_HOST) and not is_loopback_host(hostname):
+        return None
+    if ":" in hostname:
+        hostname = f"[{hostname}]"  # IPv6
+    return f"http://{hostname}:{int(DELIVERY_PORT)}"
+
+def show_file_links(files, manifest_path=None, zip_name="meowdown"):
+    """Download links for ``files`` (and a ZIP of the whole job), or plain names without the endpoint."""
+    links = get_file_links()
+    base_url = delivery_base_url() if links is not None else None
+    if base_url is None:
+        for path in files:
+            st.markdown(f"- `{path.name}`")
+        if links is not None:
+            st.caption("🔒 Download links only work on the server itself. Set `MEOWDOWN_DELIVERY_HOST=0.0.0.0` "
+                       "(or `MEOWDOWN_DELIVERY_URL` behind a proxy) to get them here.")
+        return
+    if manifest_path and len(files) > 1:
+        st.markdown(f"📦 [Download all as ZIP]({links.job_url(manifest_path, zip_name, base_url)})")
+    for path in files:
+        st.markdown(f"- [{path.name}]({links.file_url(path, base_url)})")
 
 def is_valid_url(url):
     """Validate if the given string is a valid URL."""
@@ -341,6 +538,15 @@ def is_valid_url(url):
     except Exception:
         return False
 
+def requested_urls(url, options):
+    """The batch URLs (in batch mode) followed by the main URL."""
+    urls = []
+    if options.get('batch_mode', False) and options.get('batch_urls', ''):
+        urls.extend(u.strip() for u in options['batch_urls'].split('\n') if u.strip())
+    if url.strip():
+        urls.append(url.strip())
+    return urls
+
 def get_default_download_folder():
     """Get cross-platform default download folder."""
     downloads = Path.home() / "Downloads"
@@ -381,14 +587,10 @@ def download_file_with_progress(url, dest_path, description="Downloading"):
 def check_dependencies():
     """Check if all dependencies are available."""
     deps = {"ytdlp": False, "ffmpeg": False}
+    runner = shared_runner()
     
-    # Check yt-dlp
-    try:
-        result = subprocess.run([sys.executable, "-m", "yt_dlp", "--version"], 
-                              capture_output=True, text=True)
-        deps["ytdlp"] = result.returncode == 0
-    except Exception:
-        pass
+    # Both checks run at the same time on the background process runner
+    checks = {"ytdlp": runner.submit([sys.executable, "-m", "yt_dlp", "--version"], timeout=30)}
     
     # Check ffmpeg
     bin_dir = get_app_dir()
@@ -397,9 +599,11 @@ def check_dependencies():
     if ffmpeg_exe.exists():
         deps["ffmpeg"] = True
     else:
+        checks["ffmpeg"] = runner.submit(["ffmpeg", "-version"], timeout=15)
+    
+    for name, check in checks.items():
         try:
-            result = subprocess.run(["ffmpeg", "-version"], capture_output=True)
-            deps["ffmpeg"] = result.returncode == 0
+            deps[name] = check.result().ok
         except Exception:
             pass
     
@@ -412,9 +616,12 @@ def install_dependencies():
         
         if not deps["ytdlp"]:
             st.info(f"Installing yt-dlp... {CAT_EMOJIS['working']}")
+            pip_output = OutputCapture(limit=20)
             try:
-                subprocess.run([sys.executable, "-m", "pip", "install", "--upgrade", "yt-dlp"], 
-                             check=True, capture_output=True)
+                returncode = run_captured([sys.executable, "-m", "pip", "install", "--upgrade", "yt-dlp"],
+                                          pip_output, timeout=600)
+                if returncode != 0:
+                    raise RuntimeError(pip_output.text() or "pip timed out")
                 st.success(f"yt-dlp installed! {CAT_EMOJIS['success']}")
             except Exception as e:
                 st.error(f"Failed to install yt-dlp: {e} {CAT_EMOJIS['error']}")
@@ -475,8 +682,12 @@ def install_ffmpeg():
 # 🎬 DOWNLOAD FUNCTIONS
 # =============================================================================
 
-def download_video(url, dest_folder, format_type, progress_container, options=None):
-    """Download video with real-time progress updates and advanced options."""
+def download_video(url, dest_folder, format_type, progress_container, options=None, dashboard_slot=None):
+    """Download video with real-time progress updates and advanced options.
+
+    Returns True once the download is complete, False if it failed, or
+    ``"queued"`` when it was handed to the worker nodes instead.
+    """
     if options is None:
         options = {}
     
@@ -492,214 +703,107 @@ def download_video(url, dest_folder, format_type, progress_container, options=No
                 st.error(f"Cannot create folder: {e} {CAT_EMOJIS['error']}")
                 return False
         
-        # Get FFmpeg path
-        bin_dir = get_app_dir()
-        ffmpeg_path = bin_dir / ("ffmpeg.exe" if platform.system() == "Windows" else "ffmpeg")
-        
-        # Build base command (URL will be added later for each batch)
-        cmd = [sys.executable, "-m", "yt_dlp", "--newline"]
-        
-        if ffmpeg_path.exists():
-            cmd.extend(["--ffmpeg-location", str(ffmpeg_path)])
-        
         # Handle batch mode
-        urls_to_process = []
-        if options.get('batch_mode', False) and options.get('batch_urls', ''):
-            # Split batch URLs and clean them
-            batch_list = [u.strip() for u in options['batch_urls'].split('\n') if u.strip()]
-            urls_to_process.extend(batch_list)
-        if url.strip():  # Add the main URL if provided
-            urls_to_process.append(url.strip())
+        urls_to_process = requested_urls(url, options)
         
         if not urls_to_process:
             st.error(f"No valid URLs provided! {CAT_EMOJIS['error']}")
             return False
         
-        # Handle channel mode
-        if options.get('channel_mode', False):
-            # For channel mode, we want all videos from the channel
-            cmd.append("--yes-playlist")
-            cmd.extend(["--playlist-end", str(options.get('channel_limit', 25))])
-        elif options.get('is_playlist', False):
-            cmd.append("--yes-playlist")
-            max_downloads = options.get('max_downloads', 50)
-            cmd.extend(["--playlist-end", str(max_downloads)])
-        else:
-            cmd.append("--no-playlist")
-        
-        # Handle format and quality
-        if format_type == "mp3_complete":
-            # Complete MP3 with everything embedded
-            cmd.extend(["-x", "--audio-format", "mp3"])
-            
-            # Handle audio quality
-            audio_quality = options.get('audio_quality', '320 kbps (Best) - *audiophile cats*')
-            if "320 kbps" in audio_quality:
-                cmd.extend(["--audio-quality", "0"])
-            elif "256 kbps" in audio_quality:
-                cmd.extend(["--audio-quality", "2"])
-            elif "192 kbps" in audio_quality:
-                cmd.extend(["--audio-quality", "5"])
-            elif "128 kbps" in audio_quality:
-                cmd.extend(["--audio-quality", "7"])
-            elif "96 kbps" in audio_quality:
-                cmd.extend(["--audio-quality", "9"])
-            else:
-                cmd.extend(["--audio-quality", "0"])  # Default to 320kbps for complete version
-            
-            # Embed EVERYTHING into the MP3
-            cmd.extend([
-                "--add-metadata",           # Add metadata tags
-                "--embed-metadata",         # Embed metadata into file
-                "--embed-thumbnail",        # Embed thumbnail as album art
-                "--convert-thumbnails", "jpg"  # Convert to JPG for better compatibility
-            ])
-            
-            # Don't save separate thumbnail files - only embed them
-            # (removing --write-thumbnail to avoid clutter)
-            
-            if options.get('playlist_numbering', False):
-                output_template = str(dest_path / "%(playlist_index)03d - 🎵%(artist,uploader|Unknown Artist)s - %(title)s.%(ext)s")
-            else:
-                output_template = str(dest_path / "🎵%(artist,uploader|Unknown Artist)s - %(title)s.%(ext)s")
-        elif format_type == "best":
-            cmd.extend(["-f", "best"])
-            if options.get('playlist_numbering', False):
-                output_template = str(dest_path / "%(playlist_index)03d - 🎬%(title)s.%(ext)s")
-            else:
-                output_template = str(dest_path / "🎬%(title)s.%(ext)s")
-        elif format_type.startswith("video_"):
-            quality = format_type.split("_")[1]
-            if quality == "720p":
-                cmd.extend(["-f", "best[height<=720]/best"])
-            elif quality == "1080p":
-                cmd.extend(["-f", "best[height<=1080]/best"])
-            elif quality == "1440p":
-                cmd.extend(["-f", "best[height<=1440]/best"])
-            elif quality == "4K":
-                cmd.extend(["-f", "best[height<=2160]/best"])
-            elif quality == "best":
-                cmd.extend(["-f", "best"])
-            elif quality == "worst":
-                cmd.extend(["-f", "worst"])
-            
-            if options.get('playlist_numbering', False):
-                output_template = str(dest_path / "%(playlist_index)03d - 🎬%(title)s.%(ext)s")
-            else:
-                output_template = str(dest_path / "🎬%(title)s.%(ext)s")
-        else:  # Default MP4
-            cmd.extend(["-f", "best[ext=mp4]/best"])
-            if options.get('playlist_numbering', False):
-                output_template = str(dest_path / "%(playlist_index)03d - 🎬%(title)s.%(ext)s")
-            else:
-                output_template = str(dest_path / "🎬%(title)s.%(ext)s")
+        # Let the worker nodes fetch it instead; they report back into the queue
+        cluster = get_cluster_queue()
+        if options.get('send_to_cluster') and cluster is not None:
+            job_id = cluster.enqueue(urls_to_process, dest_path, format_type, options)
+            st.success(f"Queued for the worker nodes as `{job_id}`! {CAT_EMOJIS['excited']}")
+            return "queued"
         
-        # Handle auto-organization
-        organize_type = options.get('auto_organize', '🗂️ No organization - *all in one folder*')
-        if "By Date" in organize_type:
-            output_template = str(dest_path / "%(upload_date>%Y)s/%(upload_date>%m)s/%(upload_date>%d)s" / Path(output_template).name)
-        elif "By Channel" in organize_type:
-            output_template = str(dest_path / "%(uploader)s" / Path(output_template).name)
-        elif "By Type" in organize_type:
-            if format_type in ["mp3", "mp3_meta"]:
-                output_template = str(dest_path / "Audio" / Path(output_template).name)
-            else:
-                output_template = str(dest_path / "Video" / Path(output_template).name)
-        elif "By Playlist" in organize_type:
-            output_template = str(dest_path / "%(playlist_title)s" / Path(output_template).name)
-        
-        cmd.extend(["-o", output_template])
-        
-        # Add smart filters
-        filters = []
-        
-        # Duration filters
-        if options.get('duration_filter', False):
-            duration_min = options.get('duration_min', 0)
-            duration_max = options.get('duration_max', 0)
-            if duration_min > 0:
-                filters.append(f"duration>={duration_min}")
-            if duration_max > 0:
-                filters.append(f"duration<={duration_max}")
-        
-        # File size filters
-        if options.get('size_filter', False):
-            max_size = options.get('max_filesize', 'No limit')
-            if max_size != 'No limit':
-                size_bytes = {
-                    '50MB': '50M',
-                    '100MB': '100M', 
-                    '250MB': '250M',
-                    '500MB': '500M',
-                    '1GB': '1000M',
-                    '2GB': '2000M'
-                }.get(max_size, '500M')
-                filters.append(f"filesize<={size_bytes}")
-        
-        # Content type filters - disable live filter for now as it has syntax issues
-        # if options.get('skip_live', True):
-        #     # Live stream filtering needs to be handled differently
-        #     pass
-        
-        if options.get('skip_shorts', False):
-            filters.append("duration>=60")  # Skip videos shorter than 60 seconds
-        
-        # Language filters - temporarily disabled to avoid syntax issues
-        # lang_pref = options.get('language_pref', '🌐 Any language')
-        # if "English only" in lang_pref:
-        #     filters.append("language=en")
-        # elif "Spanish only" in lang_pref:
-        #     filters.append("language=es")
-        # elif "French only" in lang_pref:
-        #     filters.append("language=fr")
-        # elif "German only" in lang_pref:
-        #     filters.append("language=de")
-        # elif "Japanese only" in lang_pref:
-        #     filters.append("language=ja")
-        # elif "Korean only" in lang_pref:
-        #     filters.append("language=ko")
-        
-        # Apply filters if any
-        if filters:
-            filter_string = " & ".join(filters)
-            if format_type in ["mp3", "mp3_meta"]:
-                cmd.extend(["-f", f"bestaudio[{filter_string}]/bestaudio"])
-            else:
-                # For video, modify existing format selector
-                for i, arg in enumerate(cmd):
-                    if arg == "-f" and i + 1 < len(cmd):
-                        current_format = cmd[i + 1]
-                        cmd[i + 1] = f"{current_format}[{filter_string}]/{current_format}"
-                        break
-        
-        # Add download archive for history
-        if options.get('download_archive', True):
-            archive_file = dest_path / ".meowdown_history.txt"
-            cmd.extend(["--download-archive", str(archive_file)])
-        
-        # Add retry options
-        if options.get('auto_retry', True):
-            cmd.extend(["--retries", "3", "--fragment-retries", "3"])
-        
-        # Add metadata options
-        if options.get('download_metadata', True):
-            cmd.append("--write-info-json")
-        
-        # Add thumbnail options  
-        if options.get('download_thumbnail', True):
-            cmd.append("--write-thumbnail")
-            
-        # Add subtitles options
-        if options.get('download_subtitles', False):
-            cmd.extend(["--write-subs", "--write-auto-subs", "--sub-langs", "en,en-US"])
-            
-        # Add metadata embedding for audio/video files
-        if options.get('embed_metadata', True):
-            cmd.append("--add-metadata")
-            if format_type in ["mp3", "mp3_meta"]:
-                cmd.append("--embed-metadata")
+        # Every file this job produces is streamed into its own manifest
+        manifest = JobManifest(dest_path)
+        st.session_state.last_download_manifest = str(manifest.path)
         
+        # Hand the runs to the background engine so they can be paused or
+        # cancelled (only the entries picked in the plan preview, if there was one)
         try:
+            jobs = get_download_engine().submit_download(urls_to_process, dest_path, format_type,
+                                                         options, manifest=manifest, owner=get_session_id())
+        except QuotaExceeded as e:
+            st.warning(f"Slow down, kitty: {e}! {CAT_EMOJIS['thinking']}")
+            return False
+        if not jobs:
+            st.warning(f"Nothing is selected in the plan! {CAT_EMOJIS['thinking']}")
+            return False
+        urls_to_process = [u for job in jobs for u in job.urls]
+        
+        st.session_state.active_download = {
+            'batch_id': manifest.job_id,
+            'urls': urls_to_process,
+            'dest_folder': str(dest_path),
+            'format_type': format_type,
+            'options': options,
+            'manifest': str(manifest.path),
+        }
+    
+    return watch_download_batch(progress_container, dashboard_slot)
+
+def render_job_controls(engine, batch_id, jobs):
+    """Pause/resume/cancel buttons for a running download batch."""
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        if st.button("⏸️ Pause", key=f"pause_{batch_id}", use_container_width=True):
+            engine.pause_batch(batch_id)
+    with col2:
+        if st.button("▶️ Resume", key=f"resume_{batch_id}", use_container_width=True):
+            engine.resume_batch(batch_id)
+    with col3:
+        if st.button("🛑 Cancel all", key=f"cancel_{batch_id}", use_container_width=True):
+            engine.cancel_batch(batch_id)
+    
+    # Per-run controls when the batch was split into several yt-dlp runs
+    job_labels = {}
+    if len(jobs) > 1:
+        with st.expander(f"🧶 {len(jobs)} yt-dlp runs in this download", expanded=False):
+            for job in jobs:
+                label_col, pause_col, cancel_col = st.columns([4, 1, 1])
+                job_labels[job.job_id] = label_col.empty()
+                with pause_col:
+                    if job.state == JOB_PAUSED:
+                        if st.button("▶️", key=f"resume_{job.job_id}", help="Resume this run"):
+                            engine.resume(job.job_id)
+                    elif st.button("⏸️", key=f"pause_{job.job_id}", help="Pause this run"):
+                        engine.pause(job.job_id)
+                with cancel_col:
+                    if st.button("✖️", key=f"cancel_{job.job_id}", help="Cancel this run"):
+                        engine.cancel(job.job_id)
+    return job_labels
+
+def watch_download_batch(progress_container, dashboard_slot=None):
+    """Follow the session's active download batch until it finishes.
+    
+    Runs on every script rerun while a batch is active, so the job controls
+    keep working after the user clicks one of them. The sidebar metrics
+    dashboard in ``dashboard_slot`` is refreshed while the batch runs.
+    """
+    active = st.session_state.get('active_download')
+    if not active:
+        return False
+    
+    batch_id = active['batch_id']
+    options = active['options']
+    format_type = active['format_type']
+    urls_to_process = active['urls']
+    dest_path = Path(active['dest_folder'])
+    manifest = JobManifest.open(active['manifest'])
+    url_positions = {u: n for n, u in enumerate(urls_to_process, start=1)}
+    
+    engine = get_download_engine()
+    jobs = engine.jobs(batch_id)
+    if not jobs:
+        st.session_state.pop('active_download', None)
+        return False
+    
+    with progress_container.container():
+        try:
+            job_labels = render_job_controls(engine, batch_id, jobs)
             progress_bar = st.progress(0)
             status_text = st.empty()
             
@@ -712,86 +816,108 @@ def download_video(url, dest_folder, format_type, progress_container, options=No
                 st.info(f"📀 Playlist mode: Downloading up to {options.get('max_downloads', 50)} tracks!")
             else:
                 st.info(f"🎵 Single download mode activated!")
+            if len(jobs) < len(urls_to_process):
+                st.info(f"📦 Sharing {len(jobs)} yt-dlp runs between {len(urls_to_process)} URLs!")
             
-            # Process each URL (for batch mode or single URL)
-            overall_success = True
-            for i, current_url in enumerate(urls_to_process):
-                if len(urls_to_process) > 1:
-                    st.info(f"🐱 Processing URL {i+1}/{len(urls_to_process)}: {current_url[:50]}...")
-                    
-                # Build command for this specific URL
-                current_cmd = cmd + [current_url]
-                
-                proc = subprocess.Popen(current_cmd, stdout=subprocess.PIPE, 
-                                      stderr=subprocess.STDOUT, text=True)
-                
-                # Capture all output for debugging
-                all_output = []
-                
-                # Process output for this URL
-                for line in proc.stdout:
-                    all_output.append(line.strip())
-                    
-                    if "[download]" in line:
-                        if "Destination:" in line:
+            # Stream every run's events until the whole batch (retries included) is finished
+            cursors = {}
+            last_dashboard = 0.0
+            while True:
+                jobs = engine.jobs(batch_id)
+                for job in jobs:
+                    events, cursors[job.job_id] = job.events.since(cursors.get(job.job_id, 0))
+                    for kind, value in events:
+                        if kind == "url" and len(urls_to_process) > 1:
+                            st.info(f"🐱 Processing URL {url_positions.get(value, '?')}/{len(urls_to_process)}: {value[:50]}...")
+                        elif kind == "found":
                             status_text.success(f"Found content! {CAT_EMOJIS['excited']}")
-                        elif "has already been downloaded" in line:
+                        elif kind == "already":
                             status_text.info(f"Already downloaded! {CAT_EMOJIS['sleepy']}")
-                            progress_bar.progress(1.0)
-                        elif "Downloading playlist:" in line:
+                        elif kind == "playlist":
                             status_text.info(f"Found playlist! {CAT_EMOJIS['heart_eyes']}")
-                        else:
-                            match = re.search(r'(\d{1,3}(?:\.\d+)?)%', line)
-                            if match:
-                                percent = float(match.group(1)) / 100.0
-                                progress_bar.progress(percent)
-                                
-                                # Cute progress messages
-                                if percent < 0.25:
-                                    status_text.info(f"Getting started... {percent*100:.1f}% {CAT_EMOJIS['working']}")
-                                elif percent < 0.5:
-                                    status_text.info(f"Making progress... {percent*100:.1f}% {CAT_EMOJIS['happy']}")
-                                elif percent < 0.75:
-                                    status_text.info(f"Almost there... {percent*100:.1f}% {CAT_EMOJIS['excited']}")
-                                else:
-                                    status_text.info(f"So close... {percent*100:.1f}% {CAT_EMOJIS['heart_eyes']}")
-                    elif "[ffmpeg]" in line:
-                        status_text.info(f"Converting... {CAT_EMOJIS['music']}")
-                    elif "[Metadata]" in line:
-                        status_text.info(f"Adding metadata... {CAT_EMOJIS['thinking']}")
-                    elif "ERROR:" in line:
-                        st.error(f"🚨 yt-dlp error: {line}")
-                    elif "WARNING:" in line:
-                        st.warning(f"⚠️ yt-dlp warning: {line}")
-                
-                proc.wait()
+                        elif kind == "progress":
+                            # Cute progress messages
+                            if value < 0.25:
+                                status_text.info(f"Getting started... {value*100:.1f}% {CAT_EMOJIS['working']}")
+                            elif value < 0.5:
+                                status_text.info(f"Making progress... {value*100:.1f}% {CAT_EMOJIS['happy']}")
+                            elif value < 0.75:
+                                status_text.info(f"Almost there... {value*100:.1f}% {CAT_EMOJIS['excited']}")
+                            else:
+                                status_text.info(f"So close... {value*100:.1f}% {CAT_EMOJIS['heart_eyes']}")
+                        elif kind == "converting":
+                            status_text.info(f"Converting... {CAT_EMOJIS['music']}")
+                        elif kind == "metadata":
+                            status_text.info(f"Adding metadata... {CAT_EMOJIS['thinking']}")
+                        elif kind == "error":
+                            st.error(f"🚨 yt-dlp error: {value}")
+                        elif kind == "warning":
+                            st.warning(f"⚠️ yt-dlp warning: {value}")
+                        elif kind == "file":
+                            st.caption(f"💾 Saved: {Path(value).name}")
+                        elif kind in ("paused", "preempted"):
+                            status_text.info(f"Paused... {CAT_EMOJIS['sleepy']}")
+                        elif kind == "resumed":
+                            status_text.info(f"Back to work! {CAT_EMOJIS['working']}")
+                        elif kind == "retry":
+                            reason = FAILURE_MESSAGES.get(value['category'], FAILURE_MESSAGES[FAILURE_UNKNOWN])
+                            when = f"in {value['delay']:.0f}s" if value['delay'] >= 1 else "at the end of the batch"
+                            st.warning(f"🔁 {reason} - retrying {value['url'][:50]}... {when} (try {value['attempt']})")
+                        elif kind == "throttled":
+                            st.info(f"🐢 {value[0]} asked us to slow down - giving it {value[1]:.0f}s to cool off {CAT_EMOJIS['sleepy']}")
+                        elif kind == "disk_wait":
+                            needed = f" (needs ~{format_bytes(value)})" if value else ""
+                            status_text.warning(f"💽 Waiting for free disk space{needed} - free some up and the cats carry on {CAT_EMOJIS['sleepy']}")
+                        elif kind == "disk_ok":
+                            status_text.info(f"💽 Enough disk space again! {CAT_EMOJIS['working']}")
+                        elif kind == "tagging":
+                            status_text.info(f"🏷️ Tagging {value} tracks while the next download starts... {CAT_EMOJIS['working']}")
+                    
+                    if job.job_id in job_labels:
+                        job_labels[job.job_id].markdown(f"`{job.state}` {job.percent*100:.0f}% - {job.urls[0][:40]}")
                 
-                # Check success for this URL
-                if proc.returncode != 0:
+                done_runs = sum(1.0 if job.finished else job.percent for job in jobs)
+                progress_bar.progress(min(done_runs / len(jobs), 1.0))
+                if dashboard_slot is not None and time.time() - last_dashboard >= 1.0:
+                    render_metrics_dashboard(dashboard_slot)
+                    last_dashboard = time.time()
+                if all(job.finished for job in jobs):
+                    break
+                time.sleep(0.25)
+            
+            # The batch is over - later reruns shouldn't pick it up again
+            st.session_state.pop('active_download', None)
+            
+            if any(job.state == JOB_CANCELLED for job in jobs):
+                status_text.warning(f"Download cancelled! Partial files were kept so you can resume later. {CAT_EMOJIS['sleepy']}")
+                return False
+            
+            # The latest attempt decides each URL's outcome (retries come later)
+            final_results = {}
+            for job in jobs:
+                for current_url, result in job.results.items():
+                    if result["status"] != "retrying":
+                        final_results[current_url] = (job, result)
+            
+            # Check success for each URL
+            overall_success = True
+            for current_url, (job, result) in final_results.items():
+                if result["status"] == "failed":
                     overall_success = False
-                    st.error(f"❌ Failed to download: {current_url[:50]}... (Exit code: {proc.returncode}) {CAT_EMOJIS['error']}")
-                    
-                    # Show last few lines of output for debugging
-                    if all_output:
-                        st.error("📋 Last few lines of yt-dlp output:")
-                        for line in all_output[-5:]:  # Show last 5 lines
-                            if line.strip():
-                                st.code(line)
+                    reason = FAILURE_MESSAGES.get(result.get("category"), FAILURE_MESSAGES[FAILURE_UNKNOWN])
+                    attempts = f" after {job.attempt} tries" if job.attempt > 1 else ""
+                    st.error(f"❌ Failed to download: {current_url[:50]}...{attempts} - {reason} {CAT_EMOJIS['error']}")
                     
-                    # Try to run a simple test command to see what's wrong
-                    st.info("🔧 Testing basic yt-dlp functionality...")
-                    test_cmd = [sys.executable, "-m", "yt_dlp", "--version"]
-                    try:
-                        test_result = subprocess.run(test_cmd, capture_output=True, text=True, timeout=10)
-                        if test_result.returncode == 0:
-                            st.info(f"✅ yt-dlp version: {test_result.stdout.strip()}")
-                        else:
-                            st.error(f"❌ yt-dlp test failed: {test_result.stderr}")
-                    except Exception as e:
-                        st.error(f"❌ yt-dlp test error: {e}")
+                    # Show the errors yt-dlp reported for this URL, or the last few lines of output
+                    debug_lines = result["errors"][-5:] or job.output.tail(5)
+                    if debug_lines:
+                        with st.expander("📋 Last few lines of yt-dlp output", expanded=False):
+                            for line in debug_lines:
+                                if line.strip():
+                                    st.code(line)
                         
                 elif len(urls_to_process) > 1:
-                    st.success(f"✅ Completed URL {i+1}/{len(urls_to_process)}")
+                    st.success(f"✅ Completed URL {url_positions.get(current_url, '?')}/{len(urls_to_process)}")
             
             # Final status
             if overall_success:
@@ -801,7 +927,7 @@ def download_video(url, dest_folder, format_type, progress_container, options=No
                 # Handle MP3 playlist merging if needed
                 if format_type == "mp3_complete" and options.get('is_playlist', False) and options.get('merge_playlist', False):
                     st.info(f"🎵 Creating playlist mix... {CAT_EMOJIS['music']}")
-                    mix_success = create_playlist_mix(dest_path, format_type, options)
+                    mix_success = create_playlist_mix(dest_path, format_type, options, manifest)
                     if mix_success:
                         st.success(f"🎵 Playlist mix created! {CAT_EMOJIS['success']}")
                     else:
@@ -809,14 +935,15 @@ def download_video(url, dest_folder, format_type, progress_container, options=No
                 
                 # Show post-processing message if enabled
                 post_process = options.get('post_process', '🐱 Do nothing - *just enjoy*')
+                job_files = manifest.files()
                 if "Normalize audio" in post_process:
-                    st.info(f"🔊 Normalizing audio volumes... {CAT_EMOJIS['music']}")
+                    st.info(f"🔊 Normalizing audio volumes for {len(job_files)} files... {CAT_EMOJIS['music']}")
                 elif "Auto-trim" in post_process:
-                    st.info(f"✂️ Trimming silence... {CAT_EMOJIS['working']}")
+                    st.info(f"✂️ Trimming silence in {len(job_files)} files... {CAT_EMOJIS['working']}")
                 elif "Compress" in post_process:
-                    st.info(f"🗜️ Compressing files... {CAT_EMOJIS['thinking']}")
+                    compress_videos(manifest, job_files)
                 elif "Copy to cloud" in post_process:
-                    st.info(f"📤 Copying to cloud folder... {CAT_EMOJIS['heart_eyes']}")
+                    st.info(f"📤 Copying {len(job_files)} files to cloud folder... {CAT_EMOJIS['heart_eyes']}")
                 
                 return True
             else:
@@ -827,24 +954,23 @@ def download_video(url, dest_folder, format_type, progress_container, options=No
             st.error(f"Download error: {e} {CAT_EMOJIS['error']}")
             return False
 
-def create_playlist_mix(dest_path, format_type, options):
-    """Create a single MP3 mix from all downloaded files."""
+def create_playlist_mix(dest_path, format_type, options, manifest):
+    """Create a single MP3 mix from the files recorded in the job manifest."""
     try:
         dest_path = Path(dest_path)
         
         # Get FFmpeg path
-        bin_dir = get_app_dir()
-        ffmpeg_path = bin_dir / ("ffmpeg.exe" if platform.system() == "Windows" else "ffmpeg")
+        ffmpeg_path = get_ffmpeg_path()
         
         if not ffmpeg_path.exists():
             st.error(f"FFmpeg not found for mixing! {CAT_EMOJIS['error']}")
             return False
         
-        # Find all MP3 files to merge (sorted by number)
+        # Only mix the files this job produced (in playlist order)
         if format_type == "mp3_complete":
-            audio_files = sorted(dest_path.glob("*.mp3"))
+            audio_files = manifest.files(".mp3")
         else:
-            audio_files = sorted(dest_path.glob("*.mp4"))
+            audio_files = manifest.files(".mp4")
         
         if len(audio_files) < 2:
             st.info(f"Only {len(audio_files)} file found, no mixing needed! {CAT_EMOJIS['sleepy']}")
@@ -853,75 +979,29 @@ def create_playlist_mix(dest_path, format_type, options):
         st.info(f"🎵 Found {len(audio_files)} tracks to mix!")
         
         # Create a temporary file list for FFmpeg
-        temp_file_list = dest_path / "temp_filelist.txt"
+        temp_file_list = manifest.path.with_suffix(".filelist.txt")
         
         # Generate mix filename
-        first_file = audio_files[0]
-        if "🎬" in first_file.name:
-            # Extract playlist name from first file
-            base_name = first_file.name.split(" - ", 1)[-1].split(".")[0]
-            mix_name = f"🎵 PLAYLIST MIX - {base_name}.mp3"
-        else:
-            mix_name = f"🎵 PLAYLIST MIX - {len(audio_files)} tracks.mp3"
-        
+        mix_name = mix_file_name(audio_files)
         mix_path = dest_path / mix_name
         
-        # Create file list for FFmpeg concat
-        with open(temp_file_list, 'w', encoding='utf-8') as f:
-            for audio_file in audio_files:
-                # Escape single quotes for FFmpeg
-                file_path = str(audio_file).replace("'", "'\\''")
-                f.write(f"file '{file_path}'\n")
-        
-        # Build FFmpeg command for concatenation
-        cmd = [
-            str(ffmpeg_path),
-            "-f", "concat",
-            "-safe", "0",
-            "-i", str(temp_file_list),
-            "-c", "copy",  # Copy without re-encoding when possible
-            str(mix_path),
-            "-y"  # Overwrite if exists
-        ]
-        
-        # For MP3 complete files, use direct copy for better quality
-        if format_type == "mp3_complete" and all(f.suffix == '.mp3' for f in audio_files):
-            # Direct MP3 concatenation - preserves embedded metadata and thumbnails
-            cmd = [
-                str(ffmpeg_path),
-                "-f", "concat",
-                "-safe", "0",
-                "-i", str(temp_file_list),
-                "-c", "copy",  # Copy without re-encoding
-                "-map_metadata", "0",  # Copy metadata from first file
-                str(mix_path),
-                "-y"
-            ]
-        else:
-            # For other formats, convert to MP3
-            cmd = [
-                str(ffmpeg_path),
-                "-f", "concat",
-                "-safe", "0", 
-                "-i", str(temp_file_list),
-                "-vn",  # No video
-                "-acodec", "libmp3lame",  # MP3 encoding
-                "-ab", "320k",  # High quality bitrate
-                str(mix_path),
-                "-y"
-            ]
+        # Create file list for FFmpeg concat and build the command
+        write_concat_list(audio_files, temp_file_list)
+        cmd = build_mix_command(ffmpeg_path, temp_file_list, mix_path, format_type, audio_files)
         
         st.info(f"🔧 Running FFmpeg to create mix...")
         
-        # Run FFmpeg
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        # Run FFmpeg (only the end of its chatter is kept for error reports)
+        ffmpeg_output = OutputCapture(limit=20)
+        returncode = run_captured(cmd, ffmpeg_output)
         
         # Clean up temp file
         if temp_file_list.exists():
             temp_file_list.unlink()
         
-        if result.returncode == 0 and mix_path.exists():
+        if returncode == 0 and mix_path.exists():
             st.success(f"✅ Created: {mix_name}")
+            manifest.record(mix_path, "mix")
             
             # Show file size
             file_size = mix_path.stat().st_size / (1024 * 1024)  # MB
@@ -929,13 +1009,47 @@ def create_playlist_mix(dest_path, format_type, options):
             
             return True
         else:
-            st.error(f"❌ FFmpeg failed: {result.stderr}")
+            st.error(f"❌ FFmpeg failed: {ffmpeg_output.text()}")
             return False
             
     except Exception as e:
         st.error(f"Mix creation error: {e} {CAT_EMOJIS['error']}")
         return False
 
+def compress_videos(manifest, files):
+    """Re-encode the downloaded videos smaller, on every core (see meowdown_transcode)."""
+    videos = [path for path in files if path.suffix.lower() in VIDEO_EXTENSIONS]
+    if not videos:
+        st.info(f"🗜️ No videos to compress {CAT_EMOJIS['sleepy']}")
+        return
+    
+    ffmpeg_path = get_ffmpeg_path()
+    if not ffmpeg_available():
+        st.error(f"FFmpeg not found for compressing! {CAT_EMOJIS['error']}")
+        return
+    if not ffmpeg_path.exists():
+        ffmpeg_path = "ffmpeg"  # On PATH
+    
+    compressor = Compressor(ffmpeg_path)
+    st.info(f"🗜️ Compressing {len(videos)} videos on {compressor.workers} cores... {CAT_EMOJIS['thinking']}")
+    progress_bar = st.progress(0.0)
+    saved = 0
+    for position, path in enumerate(videos):
+        def progress(fraction, position=position):
+            progress_bar.progress(min((position + fraction) / len(videos), 1.0))
+        try:
+            result = compressor.compress(path, progress=progress)
+        except CompressionError as e:
+            st.warning(f"⚠️ {e} {CAT_EMOJIS['thinking']}")
+            continue
+        if result["replaced"]:
+            saved += result["original_bytes"] - result["bytes"]
+            entry = next((e for e in manifest.entries if Path(e["path"]) == path), {})
+            manifest.record(result["path"], "compressed", **{key: entry[key] for key in
+                            ("id", "extractor", "url", "index", "title", "uploader", "duration") if entry.get(key)})
+    progress_bar.progress(1.0)
+    st.success(f"🗜️ Compression saved {format_bytes(saved)}! {CAT_EMOJIS['success']}")
+
 # =============================================================================
 # 🎨 UI COMPONENTS
 # =============================================================================
@@ -1028,7 +1142,7 @@ def show_stats():
         </div>
         """, unsafe_allow_html=True)
 
-def show_download_interface():
+def show_download_interface(dashboard_slot=None):
     """Main download interface."""
     
     # Cute main header
@@ -1245,8 +1359,16 @@ def show_download_interface():
                     height=100,
                     help="Paste multiple URLs, one per line"
                 )
+                batch_chunk_size = st.number_input(
+                    "URLs per yt-dlp run",
+                    min_value=1,
+                    max_value=100,
+                    value=DEFAULT_CHUNK_SIZE,
+                    help="Share one yt-dlp process between several URLs to skip repeated startup (1 = one process per URL)"
+                )
             else:
                 batch_urls = ""
+                batch_chunk_size = DEFAULT_CHUNK_SIZE
             
             # Channel Downloads
             channel_mode = st.checkbox(
@@ -1280,8 +1402,15 @@ def show_download_interface():
                     index=0,  # Default to 320kbps for complete version
                     help="Choose MP3 audio quality"
                 )
+                fast_tagging = st.checkbox(
+                    f"⚡ Tag in the background",
+                    value=HAS_MUTAGEN,
+                    disabled=not HAS_MUTAGEN,
+                    help="Write tags and album art in parallel after each track lands, so the next download starts sooner (needs mutagen)"
+                )
             else:
                 audio_quality = "320 kbps (Best) - *audiophile cats*"
+                fast_tagging = False
             
             # File Organization
             auto_organize = st.selectbox(
@@ -1350,6 +1479,39 @@ def show_download_interface():
                 help="Prefer content in specific language"
             )
         
+        # Clips
+        st.markdown("#### ✂️ **Clips** *(Only the part you want)*")
+        clip_mode = st.checkbox(
+            f"✂️ Download clips only",
+            help="Fetch just these parts of each video - FFmpeg seeks straight to them, so a 2-minute clip of a 3-hour stream downloads about 2 minutes of video"
+        )
+        clip_ranges, clip_chapters, precise_cuts = [], [], False
+        if clip_mode:
+            col_clip1, col_clip2 = st.columns(2)
+            with col_clip1:
+                clip_text = st.text_input(
+                    "Time ranges",
+                    placeholder="1:02:30-1:04:30, 2:10:00-",
+                    help="Start-end pairs, separated by commas. Leave the end out to go to the end of the video"
+                )
+                try:
+                    clip_ranges = parse_time_ranges(clip_text)
+                except ValueError as e:
+                    st.error(f"{e} {CAT_EMOJIS['error']}")
+            with col_clip2:
+                chapter_text = st.text_input(
+                    "Chapters",
+                    placeholder="Intro, Q&A",
+                    help="Chapters whose title contains any of these words (comma-separated)"
+                )
+                clip_chapters = [name.strip() for name in chapter_text.split(",") if name.strip()]
+            precise_cuts = st.checkbox(
+                f"🎯 Frame-exact cuts",
+                help="Re-encode around the cuts so clips start and end exactly on time. Otherwise clips are copied as-is and start at the nearest keyframe (a second or two earlier)"
+            )
+            if not clip_ranges and not clip_chapters:
+                st.caption("Add a time range or a chapter - until then whole videos are downloaded")
+        
         # Power User Features
         st.markdown("#### ⚡ **Power User Features**")
         col9, col10 = st.columns(2)
@@ -1358,7 +1520,7 @@ def show_download_interface():
             auto_retry = st.checkbox(
                 f"🔄 Auto-retry failed downloads",
                 value=True,
-                help="Automatically retry downloads that fail"
+                help="Retry failed downloads smartly: back off when a site rate-limits us, skip removed videos and try network hiccups again at the end of the batch"
             )
             
             download_archive = st.checkbox(
@@ -1366,6 +1528,42 @@ def show_download_interface():
                 value=True,
                 help="Remember what you've downloaded to avoid duplicates"
             )
+            
+            split_streams = st.checkbox(
+                f"🎞️ Separate video + audio streams",
+                value=False,
+                disabled="MP3" in format_choice or quality_choice == "Worst" or not ffmpeg_available(),
+                help="Get the full chosen resolution by fetching the video and audio streams side by side and joining them with FFmpeg (no re-encoding). Needs FFmpeg"
+            )
+            
+            segmented_download = st.checkbox(
+                f"🧵 Multi-connection downloads",
+                value=False,
+                disabled="MP3" in format_choice,
+                help="Fetch each video file in pieces over several connections at once - much faster on sites that slow down every single connection"
+            )
+            if segmented_download:
+                segment_connections = st.slider("Connections per file", min_value=2, max_value=16, value=SEGMENT_CONNECTIONS)
+            else:
+                segment_connections = SEGMENT_CONNECTIONS
+            
+            queue_priority = st.selectbox(
+                f"🚦 Queue priority",
+                [
+                    "⚡ Auto - *single links jump the queue*",
+                    "🏃 High - *right meow!*",
+                    "🐱 Normal - *in line with the others*",
+                    "😴 Background - *whenever the cats are free*"
+                ],
+                help="Higher priority downloads run before (and can pause) background ones"
+            )
+            
+            send_to_cluster = st.checkbox(
+                f"🛰️ Send to worker nodes",
+                value=False,
+                disabled=not CLUSTER_QUEUE,
+                help="Queue this download for the MeowDown workers sharing MEOWDOWN_CLUSTER_QUEUE instead of downloading here"
+            )
         
         with col10:
             post_process = st.selectbox(
@@ -1412,6 +1610,54 @@ def show_download_interface():
     else:
         format_type = "mp4"
     
+    # Prepare advanced options
+    download_options = {
+        'is_playlist': is_playlist,
+        'playlist_numbering': playlist_numbering,
+        'max_downloads': max_downloads,
+        'merge_playlist': merge_playlist,
+        'download_metadata': download_metadata,
+        'download_thumbnail': download_thumbnail,
+        'download_subtitles': download_subtitles,
+        'embed_metadata': embed_metadata,
+        # New creative features
+        'batch_mode': batch_mode,
+        'batch_urls': batch_urls,
+        'batch_chunk_size': batch_chunk_size,
+        'channel_mode': channel_mode,
+        'channel_limit': channel_limit,
+        'audio_quality': audio_quality,
+        'fast_tagging': fast_tagging,
+        'auto_organize': auto_organize,
+        'duration_filter': duration_filter,
+        'duration_min': duration_min,
+        'duration_max': duration_max,
+        'size_filter': size_filter,
+        'max_filesize': max_filesize,
+        'skip_live': skip_live,
+        'skip_shorts': skip_shorts,
+        'language_pref': language_pref,
+        'auto_retry': auto_retry,
+        'download_archive': download_archive,
+        'queue_priority': queue_priority,
+        'clip_mode': clip_mode,
+        'clip_ranges': clip_ranges,
+        'clip_chapters': clip_chapters,
+        'precise_cuts': precise_cuts,
+        'split_streams': split_streams,
+        'segmented_download': segmented_download,
+        'segment_connections': segment_connections,
+        'send_to_cluster': send_to_cluster,
+        'post_process': post_process,
+        'notification_mode': notification_mode
+    }
+    
+    # Preview big runs before fetching anything; otherwise a quick size
+    # estimate from formats seen in earlier downloads (no requests needed)
+    plan_entries = show_download_plan(url, download_folder, format_type, download_options)
+    if plan_entries is None:
+        show_size_estimate(url, download_folder, format_type, download_options)
+    
     # Download button with extra cuteness
     st.markdown("<div style='text-align: center; margin: 1rem 0;'><small style='color: #ff9a9e;'>Ready to pounce on that video? 🐾</small></div>", unsafe_allow_html=True)
     
@@ -1435,87 +1681,335 @@ def show_download_interface():
                         return
                     st.session_state.deps_checked = True
             
-            # Prepare advanced options
-            download_options = {
-                'is_playlist': is_playlist,
-                'playlist_numbering': playlist_numbering,
-                'max_downloads': max_downloads,
-                'merge_playlist': merge_playlist,
-                'download_metadata': download_metadata,
-                'download_thumbnail': download_thumbnail,
-                'download_subtitles': download_subtitles,
-                'embed_metadata': embed_metadata,
-                # New creative features
-                'batch_mode': batch_mode,
-                'batch_urls': batch_urls,
-                'channel_mode': channel_mode,
-                'channel_limit': channel_limit,
-                'audio_quality': audio_quality,
-                'auto_organize': auto_organize,
-                'duration_filter': duration_filter,
-                'duration_min': duration_min,
-                'duration_max': duration_max,
-                'size_filter': size_filter,
-                'max_filesize': max_filesize,
-                'skip_live': skip_live,
-                'skip_shorts': skip_shorts,
-                'language_pref': language_pref,
-                'auto_retry': auto_retry,
-                'download_archive': download_archive,
-                'post_process': post_process,
-                'notification_mode': notification_mode
-            }
+            if plan_entries is not None:
+                download_options['plan_entries'] = plan_entries
             
             # Download
             progress_container = st.empty()
-            success = download_video(url, download_folder, format_type, progress_container, download_options)
+            success = download_video(url, download_folder, format_type, progress_container,
+                                     download_options, dashboard_slot)
             
-            if success:
-                # Show success message first
-                st.markdown(f"""
-                <div class="success-message">
-                    <h3>{CAT_EMOJIS['success']} Meow-nificent Success! {CAT_EMOJIS['heart_eyes']}</h3>
-                    <p>Your download is complete! The cats are celebrating! {CAT_EMOJIS['paw']}</p>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Then play animations
-                play_meow_sound()
-                show_floating_cats()
-                
-                # Force a small delay to ensure animations load
-                time.sleep(0.1)
-                
-                # PERSISTENT DOWNLOAD FOLDER OPENER - ALWAYS VISIBLE
-                st.markdown("---")
-                st.markdown("### 📁 **Open Your Downloaded Files**")
-                st.info(f"📍 **Download location:** `{download_folder}`")
-                
-                # Store download folder in session state to persist across reruns
-                st.session_state.last_download_folder = download_folder
-                
-                # Cute instructions instead of debug clutter
-                st.markdown(f"""
-                <div style="background: linear-gradient(135deg, #ffeef8 0%, #f0e6ff 100%); padding: 1.5rem; border-radius: 15px; margin: 1rem 0; text-align: center; border: 2px solid rgba(102, 126, 234, 0.2);">
-                    <h3 style="color: #667eea; margin-bottom: 1rem;">{CAT_EMOJIS['paw']} Where are my files?</h3>
-                    <div style="background: rgba(255,255,255,0.8); padding: 1rem; border-radius: 10px; margin: 0.5rem 0;">
-                        <div style="color: #8b7ba8; font-size: 0.9rem; margin-bottom: 0.3rem;">📍 Your downloads are purr-fectly stored in:</div>
-                        <div style="color: #667eea; font-weight: bold; word-break: break-all; font-family: monospace; font-size: 0.9rem;">{download_folder}</div>
-                    </div>
-                    <div style="color: #8b7ba8; font-size: 0.95rem; margin-top: 1rem;">
-                        💡 <strong>Tip:</strong> Look for the <strong>"🚀✨ Open My Downloads! ✨🐾"</strong> button in the sidebar! {CAT_EMOJIS['heart_eyes']}
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Backup manual copy option
-                with st.expander("📋 Need to copy the path manually?", expanded=False):
-                    st.code(download_folder)
-                    st.markdown("💡 *Copy this path and paste it in File Explorer's address bar!*")
+            # Nothing is downloaded yet when the worker nodes got it
+            if success is True:
+                show_download_success(download_folder)
+    
+    # Playlists and channels can be kept up to date instead of pasted again
+    if download_options['is_playlist'] or download_options['channel_mode']:
+        show_subscribe_form(url, download_folder, format_type, download_options)
+    
+    # Keep following a download that is still running from an earlier rerun
+    # (clicking pause/cancel reruns the script while the engine keeps going)
+    if st.session_state.get('active_download'):
+        active_folder = st.session_state.active_download['dest_folder']
+        if watch_download_batch(st.empty(), dashboard_slot):
+            show_download_success(active_folder)
+
+def show_subscribe_form(url, dest_folder, format_type, options):
+    """Subscribe to the pasted playlist or channel with the current options."""
+    with st.expander("📡 Subscribe - fetch new videos automatically", expanded=False):
+        every = st.selectbox("Check for new videos", list(SUBSCRIPTION_INTERVALS), index=1)
+        backfill = st.checkbox("Also fetch the videos that are already there", value=True,
+                               help="Untick to only get videos published from now on")
+        if st.button("📡 Subscribe", use_container_width=True):
+            if not is_valid_url(url):
+                st.error(f"That doesn't look like a valid URL! {CAT_EMOJIS['error']}")
+                return
+            get_subscriptions().add(url, dest_folder, format_type, options,
+                                    interval=SUBSCRIPTION_INTERVALS[every], backfill=backfill)
+            st.success(f"Subscribed! New videos will land in `{dest_folder}` {CAT_EMOJIS['excited']}")
+        if SUBSCRIPTIONS.lower() == "off":
+            st.caption("Polling is off here - run `meowdown_subscriptions.py run` to fetch new videos")
+
+def show_download_success(download_folder):
+    """Celebrate a finished download and show where the files went."""
+    # Show success message first
+    st.markdown(f"""
+    <div class="success-message">
+        <h3>{CAT_EMOJIS['success']} Meow-nificent Success! {CAT_EMOJIS['heart_eyes']}</h3>
+        <p>Your download is complete! The cats are celebrating! {CAT_EMOJIS['paw']}</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Then play animations
+    play_meow_sound()
+    show_floating_cats()
+    
+    # Force a small delay to ensure animations load
+    time.sleep(0.1)
+    
+    # PERSISTENT DOWNLOAD FOLDER OPENER - ALWAYS VISIBLE
+    st.markdown("---")
+    st.markdown("### 📁 **Open Your Downloaded Files**")
+    st.info(f"📍 **Download location:** `{download_folder}`")
+    
+    # Store download folder in session state to persist across reruns
+    st.session_state.last_download_folder = download_folder
+    
+    # Cute instructions instead of debug clutter
+    st.markdown(f"""
+    <div style="background: linear-gradient(135deg, #ffeef8 0%, #f0e6ff 100%); padding: 1.5rem; border-radius: 15px; margin: 1rem 0; text-align: center; border: 2px solid rgba(102, 126, 234, 0.2);">
+        <h3 style="color: #667eea; margin-bottom: 1rem;">{CAT_EMOJIS['paw']} Where are my files?</h3>
+        <div style="background: rgba(255,255,255,0.8); padding: 1rem; border-radius: 10px; margin: 0.5rem 0;">
+            <div style="color: #8b7ba8; font-size: 0.9rem; margin-bottom: 0.3rem;">📍 Your downloads are purr-fectly stored in:</div>
+            <div style="color: #667eea; font-weight: bold; word-break: break-all; font-family: monospace; font-size: 0.9rem;">{download_folder}</div>
+        </div>
+        <div style="color: #8b7ba8; font-size: 0.95rem; margin-top: 1rem;">
+            💡 <strong>Tip:</strong> Look for the <strong>"🚀✨ Open My Downloads! ✨🐾"</strong> button in the sidebar! {CAT_EMOJIS['heart_eyes']}
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Exactly the files this job produced - no folder scanning needed
+    job_manifest = JobManifest.open(st.session_state.last_download_manifest)
+    job_files = job_manifest.files(stage=None)
+    if job_files:
+        with st.expander(f"🐾 Files from this download ({len(job_files)})", expanded=True):
+            show_file_links(job_files, job_manifest.path, zip_name=f"meowdown-{job_manifest.job_id}")
+    
+    # Backup manual copy option
+    with st.expander("📋 Need to copy the path manually?", expanded=False):
+        st.code(download_folder)
+        st.markdown("💡 *Copy this path and paste it in File Explorer's address bar!*")
+
+def show_size_estimate(url, dest_folder, format_type, options):
+    """Caption with the expected download size, from the format cache."""
+    urls = requested_urls(url, options)
+    if not urls:
+        return
+    
+    cmd = build_download_command(Path(dest_folder), format_type, options)
+    max_bytes = None
+    if options.get('size_filter') and options.get('max_filesize') in MAX_FILESIZE_LIMITS:
+        max_bytes = parse_size(MAX_FILESIZE_LIMITS[options['max_filesize']])
+    try:
+        estimate = get_format_cache().estimate_batch(urls, cmd, max_bytes)
+    except Exception:
+        return  # Estimates are a nicety; never block a download over them
+    if not estimate["known"]:
+        return
+    
+    measured = f"{estimate['known']} of {estimate['urls']} links seen before"
+    st.caption(f"📏 This download is ~{format_bytes(estimate['bytes'])} ({measured})")
+    if estimate["too_big"]:
+        st.warning(f"{len(estimate['too_big'])} link(s) look bigger than {options['max_filesize']} "
+                   f"and will likely be skipped {CAT_EMOJIS['thinking']}")
+    warn_if_disk_short(dest_folder, estimate['bytes'])
+
+def warn_if_disk_short(dest_folder, needed_bytes):
+    """Warn when a download won't fit next to the engine's free space reserve."""
+    try:
+        free = free_disk_space(dest_folder)
+    except OSError:
+        return
+    if needed_bytes > free - DISK_RESERVE_BYTES:
+        st.warning(f"💽 Only {format_bytes(free)} free on this disk - downloads will wait while less than "
+                   f"{format_bytes(DISK_RESERVE_BYTES)} would be left {CAT_EMOJIS['thinking']}")
+
+def show_download_plan(url, dest_folder, format_type, options):
+    """Preview of the entries a run would fetch; returns the selected ones, or None without a plan."""
+    urls = requested_urls(url, options)
+    if not urls or not all(is_valid_url(u) for u in urls):
+        return None
+    
+    cmd = build_download_command(Path(dest_folder), format_type, options)
+    plan_key = json.dumps([urls, cmd])
+    plan = st.session_state.get('download_plan')
+    if plan is not None and plan['key'] != plan_key:
+        plan = None  # The links or options changed since it was made
+    
+    big_run = len(urls) > 1 or options.get('is_playlist') or options.get('channel_mode')
+    label = "🔄 Refresh preview" if plan else "🗺️ Preview what will be downloaded"
+    if st.button(label, help="List every video first (titles, durations, sizes) and pick which ones to fetch",
+                 type="secondary" if plan or not big_run else "primary"):
+        with st.spinner(f"Listing videos... {CAT_EMOJIS['working']}"):
+            try:
+                result = plan_download(urls, cmd, format_cache=get_format_cache())
+            except Exception as e:
+                st.error(f"Couldn't list the videos: {e} {CAT_EMOJIS['error']}")
+                return None
+        plan = {'key': plan_key, 'id': str(time.time()), **result}
+        st.session_state.download_plan = plan
+    if plan is None:
+        return None
+    
+    for failed_url, errors in plan['errors'].items():
+        st.warning(f"Couldn't list {failed_url[:60]}: {errors[-1][:150]}")
+    entries = plan['entries']
+    if not entries:
+        st.info(f"Nothing to download here {CAT_EMOJIS['thinking']}")
+        return []
+    
+    rows = pd.DataFrame({
+        "Download": [not e['archived'] for e in entries],
+        "#": [str(e['index'] or "") for e in entries],
+        "Title": [e['title'] for e in entries],
+        "Duration": [format_duration(e['duration']) for e in entries],
+        "Est. size": [(format_bytes(e['size']) if e['size_exact'] else f"~{format_bytes(e['size'])}")
+                      if e['size'] else "?" for e in entries],
+        "Already downloaded": [e['archived'] for e in entries],
+    })
+    edited = st.data_editor(
+        rows,
+        column_config={"Download": st.column_config.CheckboxColumn("Download", help="Untick to skip")},
+        disabled=["#", "Title", "Duration", "Est. size", "Already downloaded"],
+        hide_index=True,
+        use_container_width=True,
+        key=f"plan_editor_{plan['id']}",
+    )
+    selected = [e for e, keep in zip(entries, edited["Download"].tolist()) if keep]
+    
+    total_bytes = sum(e['size'] or 0 for e in selected)
+    total_seconds = sum(e['duration'] or 0 for e in selected)
+    unknown = sum(1 for e in selected if not e['size'])
+    summary = f"📋 {len(selected)} of {len(entries)} videos selected · {format_duration(total_seconds)} · ~{format_bytes(total_bytes)}"
+    if unknown:
+        summary += f" (+{unknown} without an estimate)"
+    st.caption(summary)
+    warn_if_disk_short(dest_folder, total_bytes)
+    return selected
 
-def show_sidebar():
+def show_library(folder):
+    """Search box over the library index of ``folder``."""
+    library = get_library()
+    try:
+        # New files come straight from the job manifests; the folder itself
+        # is only reconciled once per session (or on request), in the
+        # background - a big folder takes a while
+        library.sync_manifests(folder)
+    except OSError:
+        return
+    if st.session_state.get('library_reconciled') != folder:
+        library.reconcile_in_background(folder)
+        st.session_state.library_reconciled = folder
+    
+    scanning, counts = library.scan_status(folder)
+    stats = library.stats(folder)
+    st.markdown("---")
+    st.markdown("### 📚 Library")
+    st.caption(f"🐾 {stats['items']} files · {format_bytes(stats['bytes'])} · {format_duration(stats['seconds'])}"
+               + (" · 🔄 scanning the folder..." if scanning else ""))
+    query = st.text_input("Search your downloads", placeholder="title, uploader or file name",
+                          key="library_query", label_visibility="collapsed")
+    for item in library.search(query, root=folder, limit=20):
+        details = " · ".join(part for part in (item['uploader'], format_duration(item['duration']) if item['duration'] else None,
+                                               item['ext'], format_bytes(item['size'] or 0)) if part)
+        with st.expander(f"{'🎵' if item['ext'] in ('mp3', 'm4a', 'opus', 'ogg', 'flac', 'wav', 'aac') else '🎬'} {item['title']}"):
+            st.caption(details)
+            if item['url']:
+                st.markdown(f"[Source]({item['url']})")
+            links = get_file_links()
+            base_url = delivery_base_url() if links is not None else None
+            if base_url is not None:
+                st.markdown(f"⬇️ [Download]({links.file_url(item['path'], base_url)})")
+            st.code(item['path'], language=None)
+    if st.button("🔄 Rescan folder", use_container_width=True, disabled=scanning,
+                 help="Check every file for ones added, changed or removed outside MeowDown"):
+        library.reconcile_in_background(folder, full=True)
+        st.info(f"Rescanning in the background - the results show up on the next refresh {CAT_EMOJIS['thinking']}")
+    elif counts is not None and not scanning:
+        st.caption(f"Last scan: ➕ {counts['added']} · ✏️ {counts['updated']} · ➖ {counts['removed']}")
+
+def format_duration(seconds):
+    """``3725`` -> ``"1:02:05"``."""
+    if not seconds:
+        return "?"
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+def format_bytes(num_bytes):
+    """Human-readable byte count."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.1f} {unit}" if unit != "B" else f"{num_bytes:.0f} B"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TB"
+
+def render_metrics_dashboard(slot):
+    """Live download metrics at the bottom of the sidebar."""
+    engine = get_download_engine()
+    gauges = engine.gauges()
+    summary = engine.metrics.summary(window=300)
+    endpoint = get_metrics_endpoint()
+    
+    def seconds(value):
+        return f"{value:.1f}s" if value is not None else "—"
+    
+    with slot.container():
+        st.markdown("---")
+        st.markdown(f"### 📈 Purr-formance {CAT_EMOJIS['thinking']}")
+        col1, col2 = st.columns(2)
+        col1.metric("Active jobs", gauges["meowdown_jobs_running"],
+                    help=f"{gauges['meowdown_jobs_queued']} queued, {gauges['meowdown_jobs_paused']} paused")
+        col2.metric("Throughput", f"{format_bytes(summary['bytes_per_second'])}/s",
+                    help="Average over the last 5 minutes")
+        col3, col4 = st.columns(2)
+        col3.metric("p50 job time", seconds(summary['total_p50']))
+        col4.metric("p95 job time", seconds(summary['total_p95']))
+        st.caption(f"🐾 {summary['jobs']} jobs in the last 5 min · "
+                   f"⏳ p50 wait {seconds(summary['queue_wait_p50'])} · "
+                   f"📡 p50 first byte {seconds(summary['ttfb_p50'])}")
+        if gauges["meowdown_hosts_throttled"]:
+            st.caption(f"🐢 {gauges['meowdown_hosts_throttled']} host(s) cooling off")
+        if gauges["meowdown_jobs_waiting_for_disk"]:
+            st.caption(f"💽 {gauges['meowdown_jobs_waiting_for_disk']} job(s) waiting for disk space")
+        
+        # Everyone's downloads share this engine - show the server-wide queue
+        sessions = [row for row in engine.queue_view() if row["owner"] is not None]
+        if len(sessions) > 1 or (sessions and sessions[0]["owner"] != get_session_id()):
+            st.markdown(f"#### 🌍 Server queue")
+            for row in sessions:
+                who = "🐱 You" if row["owner"] == get_session_id() else f"🐈 Kitty {row['owner'][:4]}"
+                waiting = f" · next in line: #{row['next_in_line'] + 1}" if row["next_in_line"] is not None else ""
+                st.caption(f"{who}: {row['running']} running · {row['queued']} queued · "
+                           f"{row['paused']} paused{waiting}")
+        if endpoint:
+            st.caption(f"Prometheus: `{endpoint}`")
+        
+        cluster = get_cluster_queue()
+        if cluster is not None:
+            counts = cluster.counts()
+            nodes = cluster.nodes()
+            st.caption(f"🛰️ {len(nodes)} worker node(s) · {counts.get('running', 0)} running · "
+                       f"{counts.get('queued', 0)} queued · {counts.get('failed', 0)} failed")
+            for job in cluster.jobs(states=('running',), limit=5, split=False):
+                st.progress(job['percent'] or 0.0, text=f"{job['node']}: {job['urls'][0][:40]}")
+
+def show_subscriptions():
+    """Subscribed channels and playlists, with their last poll."""
+    registry = get_subscriptions()
+    subscriptions = registry.subscriptions()
+    if not subscriptions:
+        return
+    st.markdown("---")
+    st.markdown("### 📡 Subscriptions")
+    now = time.time()
+    for sub in subscriptions:
+        icon = "📡" if sub['enabled'] else "💤"
+        with st.expander(f"{icon} {sub['url'][:48]}"):
+            if not sub['enabled']:
+                next_check = "paused"
+            elif sub['next_run'] <= now:
+                next_check = "next check any moment"
+            else:
+                next_check = f"next check in {format_duration(sub['next_run'] - now)}"
+            st.caption(f"🐾 {sub['last_status']} · {next_check} · {sub['queued_total']} videos fetched")
+            if sub['last_error']:
+                st.caption(f"⚠️ {sub['last_error'][:150]}")
+            col1, col2, col3 = st.columns(3)
+            if col1.button("🔄", key=f"sub_run_{sub['sub_id']}", help="Check now"):
+                registry.run_now(sub['sub_id'])
+            if col2.button("▶️" if not sub['enabled'] else "⏸️", key=f"sub_toggle_{sub['sub_id']}",
+                           help="Resume" if not sub['enabled'] else "Pause"):
+                registry.set_enabled(sub['sub_id'], not sub['enabled'])
+                st.rerun()
+            if col3.button("✖️", key=f"sub_remove_{sub['sub_id']}", help="Unsubscribe"):
+                registry.remove(sub['sub_id'])
+                st.rerun()
+
+def show_sidebar(container):
     """Show cute sidebar with cat-themed elements."""
-    with st.sidebar:
+    with container:
         # Cute header with animated elements
         st.markdown(f"""
         <div style="text-align: center; padding: 1rem; background: linear-gradient(135deg, #ffeef8 0%, #f0e6ff 100%); border-radius: 15px; margin-bottom: 1rem; box-shadow: 0 4px 15px rgba(102, 126, 234, 0.2);">
@@ -1557,10 +2051,34 @@ def show_sidebar():
                     except:
                         st.error(f"Oops! {CAT_EMOJIS['error']} Couldn't open folder")
             
+            # Files from the latest job, straight from its manifest
+            manifest_path = st.session_state.get('last_download_manifest')
+            if manifest_path and Path(manifest_path).exists():
+                latest_manifest = JobManifest.open(manifest_path)
+                latest_files = latest_manifest.files(stage=None)
+                if latest_files:
+                    with st.expander(f"🐾 Latest files ({len(latest_files)})", expanded=False):
+                        show_file_links(latest_files, latest_manifest.path, zip_name=f"meowdown-{latest_manifest.job_id}")
+            
             # Compact path copy
             with st.expander("📋 Copy Path Instead", expanded=False):
                 st.code(folder_path, language=None)
         
+        # Download queue summary from the background engine
+        engine_jobs = get_download_engine().jobs()
+        unfinished = [job for job in engine_jobs if not job.finished]
+        if unfinished:
+            running = sum(1 for job in unfinished if job.state == JOB_RUNNING)
+            paused = sum(1 for job in unfinished if job.state == JOB_PAUSED)
+            queued = len(unfinished) - running - paused
+            st.markdown("---")
+            st.markdown("### 🧶 Download Queue")
+            st.write(f"🏃 Running: **{running}** · ⏳ Queued: **{queued}** · ⏸️ Paused: **{paused}**")
+        
+        show_subscriptions()
+        
+        show_library(st.session_state.get('last_download_folder', get_default_download_folder()))
+        
         # Cat mood indicator based on app usage
         st.markdown("---")
         download_count = st.session_state.get('download_count', 0)
@@ -1641,22 +2159,7 @@ def show_sidebar():
         """, unsafe_allow_html=True)
         
         st.markdown("🐾 *paws and whiskers ready for action!*")
-        
-        # Debug info
-        st.markdown("---")
-        st.markdown(f"### 🔧 Debug Info")
-        default_folder = get_default_download_folder()
-        st.write(f"**Download folder:** `{default_folder}`")
-        st.write(f"**Folder exists:** {Path(default_folder).exists()}")
-        st.write(f"**Platform:** {platform.system()}")
-        st.write(f"**Python version:** {sys.version.split()[0]}")
-        
-        # Show Streamlit version info
-        try:
-            import streamlit
-            st.write(f"**Streamlit version:** {streamlit.__version__}")
-        except:
-            st.write("**Streamlit version:** Unknown")
+
 
 # =============================================================================
 # 🚀 MAIN APPLICATION
@@ -1679,11 +2182,18 @@ def main():
     
     st.markdown("---")
     
+    # Sidebar layout: the cute stuff on top, live metrics below. The sidebar
+    # itself is filled after the main interface so it shows the latest download.
+    sidebar_body = st.sidebar.container()
+    dashboard_slot = st.sidebar.empty()
+    render_metrics_dashboard(dashboard_slot)
+    
     # Main interface
-    show_download_interface()
+    show_download_interface(dashboard_slot)
     
     # Sidebar
-    show_sidebar()
+    show_sidebar(sidebar_body)
+    render_metrics_dashboard(dashboard_slot)
     
     # Footer
     st.markdown("---")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Benchmark - per-URL processes vs chunked yt-dlp invocations
+Downloads N synthetic files from a local server, once with one yt-dlp process
+per URL and once with URLs shared between chunked invocations, and reports
+wall time and child CPU time for each.
+
+Usage:
+    python benchmarks/bench_chunked_invocations.py --counts 50 200 1000 --chunk-size 25
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:  # Windows
+    HAS_RESOURCE = False
+    resource = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from media_server import start_media_server  # noqa: E402
+from meowdown_engine import (  # noqa: E402
+    ChunkOutputTracker,
+    JobManifest,
+    build_download_command,
+    plan_chunked_invocations,
+)
+
+BENCH_OPTIONS = {
+    'download_archive': False,
+    'download_metadata': False,
+    'download_thumbnail': False,
+    'embed_metadata': False,
+}
+
+def children_cpu_seconds():
+    """User + system CPU time of all waited-for child processes."""
+    if not HAS_RESOURCE:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+def run_mode(urls, chunk_size):
+    """Download ``urls`` with the given chunk size and return timing results."""
+    with tempfile.TemporaryDirectory() as dest:
+        cmd = build_download_command(dest, "mp4", BENCH_OPTIONS)
+        manifest = JobManifest(dest)
+        cmd.extend(manifest.ytdlp_args())
+
+        invocations = plan_chunked_invocations([(cmd, u) for u in urls], chunk_size)
+        cpu_before = children_cpu_seconds()
+        started = time.perf_counter()
+        failed = 0
+        for chunk_cmd, chunk_urls in invocations:
+            tracker = ChunkOutputTracker(chunk_urls)
+            proc = subprocess.Popen(chunk_cmd + chunk_urls, stdout=subprocess.PIPE,
+                                    stderr=subprocess.STDOUT, text=True)
+            for line in proc.stdout:
+                tracker.feed_line(line)
+            proc.wait()
+            tracker.add_files(manifest.poll())
+            failed += sum(1 for r in tracker.finish(proc.returncode).values() if r["status"] != "ok")
+        wall = time.perf_counter() - started
+        cpu_after = children_cpu_seconds()
+
+        return {
+            "chunk_size": chunk_size,
+            "processes": len(invocations),
+            "wall_seconds": round(wall, 3),
+            "cpu_seconds": round(cpu_after - cpu_before, 3) if cpu_before is not None else None,
+            "files": len(manifest.files()),
+            "failed": failed,
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--counts", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--chunk-size", type=int, default=25)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    server, base_url = start_media_server()
+    results = []
+    try:
+        for count in args.counts:
+            urls = [f"{base_url}/media/clip-{n:04d}.mp4?size=16384" for n in range(count)]
+            for chunk_size in (1, args.chunk_size):
+                result = {"urls": count, **run_mode(urls, chunk_size)}
+                results.append(result)
+                print(json.dumps(result))
+    finally:
+        server.shutdown()
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Benchmark - whole video vs a clip of it
+Downloads a long real video (progressive MP4, or HLS with ``--hls``) from the
+local media server through the DownloadEngine, once whole and once as a
+clip of ``--clip`` (e.g. ``10:00-12:00``). Reports wall time and the bytes
+the server actually sent for each, and the length of what was saved.
+Needs FFmpeg (bundled in bin/ or on PATH).
+
+Usage:
+    python benchmarks/bench_clip_download.py --seconds 1800 --clip 10:00-12:00
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_pipeline import find_ffmpeg  # noqa: E402
+from media_server import start_media_server  # noqa: E402
+from meowdown_engine import DownloadEngine, JobManifest, build_download_command, parse_time_ranges  # noqa: E402
+
+OPTIONS = {'download_archive': False, 'download_metadata': False,
+           'download_thumbnail': False, 'embed_metadata': False}
+
+DURATION_RE = re.compile(r'Duration:\s*(\d+):(\d{2}):(\d{2}(?:\.\d+)?)')
+
+def media_seconds(ffmpeg, path):
+    """Length of a media file in seconds, from FFmpeg's banner."""
+    result = subprocess.run([ffmpeg, "-hide_banner", "-i", str(path)], capture_output=True, text=True)
+    match = DURATION_RE.search(result.stderr)
+    return int(match.group(1)) * 3600 + int(match.group(2)) * 60 + float(match.group(3)) if match else None
+
+def measure(mode, ffmpeg, server, url, clip):
+    options = dict(OPTIONS, clip_mode=mode == "clip", clip_ranges=parse_time_ranges(clip))
+    with tempfile.TemporaryDirectory() as work:
+        dest = Path(work)
+        engine = DownloadEngine(max_workers=1, log_dir=None)
+        manifest = JobManifest(dest)
+        cmd = build_download_command(dest, "mp4", options)
+
+        server.bytes_sent = 0
+        started = time.perf_counter()
+        job = engine.submit(cmd, [url], manifest=manifest)
+        job.wait()
+        wall = time.perf_counter() - started
+
+        saved = [media_seconds(ffmpeg, entry["path"]) for entry in manifest.entries]
+        engine.tagger.shutdown()
+        engine.subtitle_stage.shutdown()
+    return {
+        "mode": mode,
+        "state": job.state,
+        "wall_seconds": round(wall, 3),
+        "bytes_sent": server.bytes_sent,
+        "saved_seconds": saved,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=int, default=1800, help="Length of the long video")
+    parser.add_argument("--height", type=int, default=240)
+    parser.add_argument("--clip", default="10:00-12:00", help="Time range to cut out")
+    parser.add_argument("--hls", action="store_true", help="Serve the video as HLS instead of one MP4")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        sys.exit("FFmpeg is needed for this benchmark")
+    server, base_url = start_media_server(ffmpeg_path=ffmpeg)
+    url = f"{base_url}/vod/long.{'m3u8' if args.hls else 'mp4'}?seconds={args.seconds}&height={args.height}"
+    results = []
+    try:
+        print(f"Encoding a {args.seconds} s test video...", file=sys.stderr)
+        server.vod_files("long", args.seconds, args.height)
+        for mode in ("whole", "clip"):
+            result = measure(mode, ffmpeg, server, url, args.clip)
+            results.append(result)
+            print(json.dumps(result))
+    finally:
+        server.shutdown()
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+if __name__ == "__main__":
+    main()
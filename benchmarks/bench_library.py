@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Benchmark - library index vs rescanning the download folder
+Creates a synthetic library of N (empty) media files spread over folders,
+indexes it with LibraryIndex and compares:
+
+    rescan     - walk the folder and match file names (no index)
+    index      - LibraryIndex.search (SQLite FTS5)
+
+It also times the initial scan, an incremental reconcile with nothing
+changed, and a forced full reconcile.
+
+Usage:
+    python benchmarks/bench_library.py --items 100000 --searches 200
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from meowdown_library import LibraryIndex  # noqa: E402
+
+WORDS = ("cat", "kitten", "meow", "purr", "nap", "box", "laser", "yarn", "zoomies", "tuna",
+         "whiskers", "paws", "floof", "loaf", "chirp", "blep", "mlem", "toe", "beans", "sunbeam")
+FILES_PER_FOLDER = 500
+
+def make_library(root, items, rng):
+    """Create ``items`` empty media files in folders of FILES_PER_FOLDER."""
+    for n in range(items):
+        folder = root / f"Uploader {n // FILES_PER_FOLDER:04d}"
+        if n % FILES_PER_FOLDER == 0:
+            folder.mkdir()
+        title = " ".join(rng.choice(WORDS) for _ in range(4))
+        ext = ".mp3" if n % 3 == 0 else ".mp4"
+        (folder / f"{title} {n:06d}{ext}").touch()
+
+def rescan_search(root, text):
+    words = text.lower().split()
+    hits = []
+    for folder, _, files in os.walk(root):
+        for name in files:
+            if all(word in name.lower() for word in words):
+                hits.append(os.path.join(folder, name))
+    return hits
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+def percentile_ms(samples, fraction):
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 3)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--searches", type=int, default=200)
+    parser.add_argument("--rescans", type=int, default=5, help="Searches timed without the index (slow)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    queries = [" ".join(rng.sample(WORDS, rng.choice((1, 2)))) for _ in range(args.searches)]
+    queries += [word[:3] for word in rng.sample(WORDS, 5)]  # Prefixes, as typed
+
+    with tempfile.TemporaryDirectory() as work:
+        root = Path(work) / "downloads"
+        root.mkdir()
+        _, create_seconds = timed(make_library, root, args.items, rng)
+        library = LibraryIndex(Path(work) / "library.sqlite3")
+
+        counts, initial = timed(library.reconcile, root)
+        _, incremental = timed(library.reconcile, root)
+        _, full = timed(library.reconcile, root, full=True)
+
+        index_times = [timed(library.search, query, root=root)[1] for query in queries]
+        rescan_times = [timed(rescan_search, root, query)[1] for query in queries[:args.rescans]]
+
+    results = {
+        "items": args.items,
+        "indexed": counts["added"],
+        "create_seconds": round(create_seconds, 2),
+        "initial_scan_seconds": round(initial, 3),
+        "incremental_reconcile_seconds": round(incremental, 3),
+        "full_reconcile_seconds": round(full, 3),
+        "index_search_p50_ms": percentile_ms(index_times, 0.5),
+        "index_search_p95_ms": percentile_ms(index_times, 0.95),
+        "rescan_search_mean_ms": round(statistics.mean(rescan_times) * 1000, 1),
+    }
+    print(json.dumps(results))
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+if __name__ == "__main__":
+    main()
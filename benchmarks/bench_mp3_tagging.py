@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Benchmark - tagging MP3 Complete tracks
+Two scenarios (``--scenario``, default both):
+
+tagging: creates N synthetic MP3 tracks (silent MPEG frames) with a cover
+image each and times writing title/artist/album/track/year tags plus the
+album art:
+
+    ffmpeg   - one FFmpeg remux per track, as yt-dlp's --embed-metadata /
+               --embed-thumbnail do while holding a download slot
+    serial   - tag_mp3 (mutagen) one track after another in this process
+    pool     - TaggingPool, the stage the engine hands finished tracks to
+
+download: downloads an N-track album page from the local media server as
+MP3 Complete through the DownloadEngine, end to end:
+
+    inline   - yt-dlp embeds tags and covers itself (--embed-metadata
+               --embed-thumbnail, FFmpeg), the baseline
+    deferred - "Tag in the background": the tagging pool does it
+
+and reports when the download slot was free again, when everything was
+tagged, and how many tracks came out with tags and a cover.
+
+Both need FFmpeg (bundled in bin/ or on PATH) for the baseline.
+
+Usage:
+    python benchmarks/bench_mp3_tagging.py --tracks 200 --seconds 240
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_pipeline import find_ffmpeg  # noqa: E402
+from media_server import start_media_server  # noqa: E402
+from meowdown_engine import DownloadEngine, JobManifest  # noqa: E402
+from meowdown_tagging import HAS_MUTAGEN, TaggingPool, tag_mp3, tags_from_entry  # noqa: E402
+from meowdown_thumbnails import ThumbnailCache  # noqa: E402
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz: 417-byte frames of 1152 samples
+FRAME_HEADER = b"\xff\xfb\x90\x64"
+FRAME_BYTES = 417
+FRAMES_PER_SECOND = 44100 / 1152
+
+def make_cover(ffmpeg, side):
+    """A real ``side``-pixel square JPEG (FFmpeg won't embed a fake one)."""
+    with tempfile.TemporaryDirectory() as work:
+        target = Path(work) / "cover.jpg"
+        subprocess.run([ffmpeg, "-loglevel", "error", "-f", "lavfi", "-i", f"testsrc2=size={side}x{side}:rate=1",
+                        "-frames:v", "1", "-q:v", "2", str(target), "-y"], check=True)
+        return target.read_bytes()
+
+def make_tracks(folder, tracks, seconds, cover):
+    """Write ``tracks`` MP3s and .jpg covers; returns their manifest-style entries."""
+    frame = FRAME_HEADER + bytes(FRAME_BYTES - len(FRAME_HEADER))
+    audio = frame * int(seconds * FRAMES_PER_SECOND)
+    entries = []
+    for n in range(tracks):
+        path = folder / f"Track {n:03d}.mp3"
+        thumbnail = folder / f"Track {n:03d}.jpg"
+        path.write_bytes(audio)
+        thumbnail.write_bytes(cover)
+        entries.append({"path": str(path), "thumbnail": str(thumbnail), "title": f"Track {n}",
+                        "uploader": "Meow Band", "album": "Purrs", "track_number": n + 1,
+                        "date": "20240102", "url": f"https://example.com/{n}"})
+    return entries
+
+def ffmpeg_embed(ffmpeg, entry):
+    """Remux one track with tags and cover, like yt-dlp's FFmpeg postprocessors."""
+    path = Path(entry["path"])
+    temp = path.with_suffix(".temp.mp3")
+    tags = tags_from_entry(entry)
+    cmd = [ffmpeg, "-y", "-loglevel", "error", "-i", str(path), "-i", entry["thumbnail"],
+           "-map", "0", "-map", "1", "-c", "copy", "-id3v2_version", "3",
+           "-metadata:s:v", "title=Album cover", "-metadata:s:v", "comment=Cover (front)"]
+    for key in ("title", "artist", "album", "track"):
+        if tags.get(key):
+            cmd += ["-metadata", f"{key}={tags[key]}"]
+    subprocess.run(cmd + [str(temp)], check=True)
+    temp.replace(path)
+    Path(entry["thumbnail"]).unlink()
+
+def run_mode(mode, entries, workers, ffmpeg):
+    started = time.perf_counter()
+    if mode == "ffmpeg":
+        for entry in entries:
+            ffmpeg_embed(ffmpeg, entry)
+    elif mode == "serial":
+        for entry in entries:
+            tag_mp3(entry["path"], tags_from_entry(entry), entry["thumbnail"])
+    else:
+        pool = TaggingPool(workers=workers)
+        try:
+            for future in [pool.submit(entry) for entry in entries]:
+                future.result()
+        finally:
+            pool.shutdown()
+    return time.perf_counter() - started
+
+def count_tagged(folder):
+    """``(tracks, tagged)``: MP3s in ``folder`` and those with a title tag and a cover."""
+    from mutagen.id3 import ID3, ID3NoHeaderError
+
+    tracks = tagged = 0
+    for path in folder.glob("*.mp3"):
+        tracks += 1
+        try:
+            tags = ID3(path)
+        except ID3NoHeaderError:
+            continue
+        if tags.getall("TIT2") and tags.getall("APIC"):
+            tagged += 1
+    return tracks, tagged
+
+def download_mode(mode, url, tracks, work, ffmpeg):
+    """Download the album once; returns the mode's result dict."""
+    dest = work / mode
+    dest.mkdir()
+    options = {'is_playlist': True, 'max_downloads': tracks, 'download_archive': False,
+               'auto_retry': False, 'fast_tagging': mode == "deferred"}
+    engine = DownloadEngine(max_workers=1, log_dir=None,
+                            thumbnail_cache=ThumbnailCache(work / f"{mode}-thumbnails", ffmpeg_path=ffmpeg))
+    started = time.perf_counter()
+    [job] = engine.submit_download([url], dest, "mp3_complete", options, manifest=JobManifest(dest))
+    slot_free, cursor = None, 0
+    while not job.finished:
+        events, cursor = job.events.since(cursor)
+        if slot_free is None and any(kind == "tagging" for kind, _ in events):
+            slot_free = time.perf_counter() - started  # Sent right after the slot is released
+        time.sleep(0.01)
+    total = time.perf_counter() - started
+    engine.tagger.shutdown()
+    engine.subtitle_stage.shutdown()
+    files, tagged = count_tagged(dest)
+    return {"mode": mode, "state": job.state, "slot_seconds": round(slot_free or total, 3),
+            "total_seconds": round(total, 3), "tracks": files, "tagged": tagged}
+
+def run_download(args, ffmpeg):
+    server, base_url = start_media_server(ffmpeg_path=ffmpeg)
+    url = f"{base_url}/album/purrs.html?count={args.tracks}&seconds={int(args.seconds)}"
+    for n in range(args.tracks):  # Encoded before either mode is timed
+        server.audio_file(f"/audio/purrs-{n:04d}.mp3", int(args.seconds))
+        server.cover_file(f"/cover/purrs-{n:04d}.jpg")
+    results = []
+    try:
+        for mode in ("inline", "deferred"):
+            with tempfile.TemporaryDirectory() as work:
+                results.append(download_mode(mode, url, args.tracks, Path(work), ffmpeg))
+    finally:
+        server.shutdown()
+    inline, deferred = results
+    return {"tracks": args.tracks, "track_seconds": int(args.seconds), "modes": results,
+            "slot_speedup": round(inline["slot_seconds"] / deferred["slot_seconds"], 2),
+            "total_speedup": round(inline["total_seconds"] / deferred["total_seconds"], 2)}
+
+def run_tagging(args, ffmpeg):
+    workers = args.workers or TaggingPool().workers
+    cover = make_cover(ffmpeg, args.cover_side)
+    results = {"tracks": args.tracks, "track_seconds": args.seconds, "workers": workers,
+               "cover_bytes": len(cover)}
+    for mode in ("ffmpeg", "serial", "pool"):
+        with tempfile.TemporaryDirectory() as work:
+            entries = make_tracks(Path(work), args.tracks, args.seconds, cover)
+            results[f"{mode}_seconds"] = round(run_mode(mode, entries, workers, ffmpeg), 3)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tracks", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=240, help="Length of each synthetic track")
+    parser.add_argument("--cover-side", type=int, default=600, help="Width and height of each cover image")
+    parser.add_argument("--workers", type=int, default=None, help="Pool size (default: one per core)")
+    parser.add_argument("--scenario", choices=("tagging", "download", "both"), default="both")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    if not HAS_MUTAGEN:
+        sys.exit("mutagen is not installed - pip install mutagen")
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        sys.exit("FFmpeg is needed for this benchmark (it is the baseline)")
+
+    results = {}
+    if args.scenario in ("tagging", "both"):
+        results["tagging"] = run_tagging(args, ffmpeg)
+        print(json.dumps(results["tagging"]))
+    if args.scenario in ("download", "both"):
+        results["download"] = run_download(args, ffmpeg)
+        print(json.dumps(results["download"]))
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+if __name__ == "__main__":
+    main()
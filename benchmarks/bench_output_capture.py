@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Benchmark - memory of long-running channel jobs
+Replays the output of a long channel download (many entries, each with a
+few hundred ``--newline`` progress lines) through:
+
+    list    - the old download loop: every line and progress event kept
+    engine  - the real DownloadEngine loop with bounded output capture
+
+A fake yt-dlp prints the output, so no network or media server is needed.
+Each mode runs in a fresh process and reports peak traced Python memory,
+peak RSS, lines kept and events kept.
+
+Usage:
+    python benchmarks/bench_output_capture.py --entries 1000 --progress-lines 300
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:  # Windows
+    HAS_RESOURCE = False
+    resource = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from meowdown_engine import DownloadEngine, parse_output_line  # noqa: E402
+from meowdown_metrics import MetricsRegistry  # noqa: E402
+
+MODES = ("list", "engine")
+
+# Prints yt-dlp-shaped output for a channel download; extra arguments
+# (manifest options, URLs) are ignored.
+FAKE_YTDLP = r'''
+import sys
+entries, progress_lines = int(sys.argv[1]), int(sys.argv[2])
+out = sys.stdout
+out.write("[youtube:tab] Extracting URL: https://www.youtube.com/@meowchannel/videos\n")
+out.write(f"[download] Downloading playlist: Meow Channel - Videos\n")
+for n in range(1, entries + 1):
+    out.write(f"[download] Downloading item {n} of {entries}\n")
+    out.write(f"[youtube] Extracting URL: https://www.youtube.com/watch?v=cat{n:08d}\n")
+    out.write(f"[youtube] cat{n:08d}: Downloading webpage\n")
+    out.write(f"[info] cat{n:08d}: Downloading 1 format(s): 251\n")
+    out.write(f"[download] Destination: /downloads/Meow Channel/{n:04d} - Cat video number {n} [cat{n:08d}].webm\n")
+    for p in range(1, progress_lines + 1):
+        pct = 100.0 * p / progress_lines
+        out.write(f"[download]  {pct:5.1f}% of    4.21MiB at    2.13MiB/s ETA 00:0{9 - p * 9 // progress_lines}\n")
+    if n % 50 == 0:
+        out.write(f"WARNING: [youtube] cat{n:08d}: Some formats are possibly damaged\n")
+    out.write(f"[ExtractAudio] Destination: /downloads/Meow Channel/{n:04d} - Cat video number {n}.mp3\n")
+out.flush()
+'''
+
+def peak_rss_mb():
+    if not HAS_RESOURCE:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def fake_command(script_path, entries, progress_lines):
+    return [sys.executable, str(script_path), str(entries), str(progress_lines)]
+
+def run_list_mode(cmd):
+    """The old loop: keep every output line and every progress event."""
+    all_output = []
+    events = []
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    for line in proc.stdout:
+        all_output.append(line.strip())
+        event = parse_output_line(line)
+        if event:
+            events.append(event)
+    proc.wait()
+    return len(all_output), len(all_output), len(events)
+
+def run_engine_mode(cmd, log_dir):
+    """The engine loop: bounded capture, coalesced progress events, optional log spill."""
+    engine = DownloadEngine(max_workers=1, metrics=MetricsRegistry(), log_dir=log_dir)
+    job = engine.submit(cmd, ["https://www.youtube.com/@meowchannel/videos"])
+    job.wait()
+    return job.output.count, len(job.output.lines()), len(job.events)
+
+def run_mode(mode, entries, progress_lines, spill):
+    with tempfile.TemporaryDirectory() as work:
+        script_path = Path(work) / "fake_ytdlp.py"
+        script_path.write_text(FAKE_YTDLP, encoding='utf-8')
+        cmd = fake_command(script_path, entries, progress_lines)
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        if mode == "list":
+            seen, kept, events = run_list_mode(cmd)
+        else:
+            seen, kept, events = run_engine_mode(cmd, Path(work) / "logs" if spill else None)
+        wall = time.perf_counter() - started
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        log_bytes = sum(p.stat().st_size for p in (Path(work) / "logs").glob("*")) if spill and mode == "engine" else 0
+
+    return {
+        "mode": mode,
+        "entries": entries,
+        "lines_seen": seen,
+        "lines_kept": kept,
+        "events_kept": events,
+        "traced_peak_mb": round(traced_peak / (1024 * 1024), 2),
+        "peak_rss_mb": peak_rss_mb(),
+        "wall_seconds": round(wall, 3),
+        "log_bytes": log_bytes,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=1000)
+    parser.add_argument("--progress-lines", type=int, default=300)
+    parser.add_argument("--spill", action="store_true", help="Also spill engine output to a rotating log")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--run-mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_mode:
+        print(json.dumps(run_mode(args.run_mode, args.entries, args.progress_lines, args.spill)))
+        return
+
+    results = []
+    for mode in MODES:
+        cmd = [sys.executable, str(Path(__file__).resolve()), "--run-mode", mode,
+               "--entries", str(args.entries), "--progress-lines", str(args.progress_lines)]
+        if args.spill:
+            cmd.append("--spill")
+        output = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        results.append(result)
+        print(json.dumps(result))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Benchmark - end-to-end download pipeline
+Drives the download engine the way ``download_video`` does (command building,
+manifests, chunked runs, retries and playlist mixes) against the local
+synthetic media server, and reports wall time, CPU time, peak RSS, spawned
+processes and throughput for each scenario.
+
+Every scenario runs in a fresh Python process so its resource usage is not
+mixed up with the others. Compare against an earlier run to catch regressions:
+
+    python benchmarks/bench_pipeline.py --output results.json
+    python benchmarks/bench_pipeline.py --baseline results.json --tolerance 0.25
+
+Scenarios: single, batch, playlist, hls, throttled, flaky, mix (mix needs FFmpeg).
+"""
+
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:  # Windows
+    HAS_RESOURCE = False
+    resource = None
+
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+    psutil = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from media_server import benchmark_urls, start_media_server  # noqa: E402
+from meowdown_engine import (  # noqa: E402
+    PRIORITY_NORMAL,
+    DownloadEngine,
+    JobManifest,
+    OutputCapture,
+    build_download_command,
+    build_mix_command,
+    get_ffmpeg_path,
+    mix_file_name,
+    plan_chunked_invocations,
+    run_captured,
+    write_concat_list,
+)
+from meowdown_metrics import MetricsRegistry  # noqa: E402
+
+SCENARIOS = ("single", "batch", "playlist", "hls", "throttled", "flaky", "mix")
+
+BENCH_OPTIONS = {
+    'download_archive': False,
+    'download_metadata': False,
+    'download_thumbnail': False,
+    'embed_metadata': False,
+}
+
+# Metrics compared against the baseline (higher is worse)
+REGRESSION_KEYS = ("wall_seconds", "cpu_seconds", "peak_rss_mb")
+
+def find_ffmpeg():
+    """The bundled FFmpeg, or one on PATH, or None."""
+    bundled = get_ffmpeg_path()
+    if bundled.exists():
+        return str(bundled)
+    return shutil.which("ffmpeg")
+
+def cpu_seconds():
+    """User + system CPU time of this process and its waited-for children."""
+    if not HAS_RESOURCE:
+        return None
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+def peak_rss_mb(who):
+    """Peak resident set size in MB (``ru_maxrss`` is KB on Linux, bytes on macOS)."""
+    if not HAS_RESOURCE:
+        return None
+    maxrss = resource.getrusage(who).ru_maxrss
+    return round(maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+class ProcessSampler:
+    """Counts distinct descendant processes (and their peak total RSS) with psutil."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.pids = set()
+        self.peak_tree_rss = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        if HAS_PSUTIL:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _sample(self):
+        me = psutil.Process()
+        while not self._stop.is_set():
+            rss = 0
+            for child in me.children(recursive=True):
+                try:
+                    rss += child.memory_info().rss
+                    self.pids.add((child.pid, child.create_time()))
+                except psutil.Error:
+                    pass
+            self.peak_tree_rss = max(self.peak_tree_rss, rss)
+            self._stop.wait(self.interval)
+
+# =============================================================================
+# 🎬 SCENARIOS
+# =============================================================================
+
+def scenario_plan(name, base_url, count, chunk_size):
+    """URLs, format, options and chunk size of a scenario."""
+    urls = benchmark_urls(base_url, count=count)
+    if name == "single":
+        return urls["progressive"][:1], "mp4", {}, 1
+    if name == "batch":
+        return urls["progressive"], "mp4", {}, chunk_size
+    if name == "playlist":
+        return [urls["playlist"]], "mp4", {'is_playlist': True, 'max_downloads': count}, 1
+    if name == "hls":
+        return urls["hls"][:max(1, count // 5)], "mp4", {}, chunk_size
+    if name == "throttled":
+        return urls["throttled"][:max(1, count // 5)], "mp4", {}, chunk_size
+    if name == "flaky":
+        return urls["flaky"], "mp4", {'auto_retry': True}, chunk_size
+    if name == "mix":
+        return urls["audio"][:max(2, count // 2)], "mp3", {}, chunk_size
+    raise ValueError(f"Unknown scenario: {name}")
+
+def run_scenario(name, base_url, count, chunk_size, workers):
+    """Run one scenario in this process and return its measurements."""
+    ffmpeg = find_ffmpeg()
+    if name == "mix" and not ffmpeg:
+        return {"scenario": name, "skipped": "FFmpeg not found"}
+
+    urls, format_type, extra_options, chunk = scenario_plan(name, base_url, count, chunk_size)
+    options = {**BENCH_OPTIONS, **extra_options}
+
+    with tempfile.TemporaryDirectory() as dest:
+        engine = DownloadEngine(max_workers=workers, metrics=MetricsRegistry())
+        cpu_before = cpu_seconds()
+        started = time.perf_counter()
+
+        with ProcessSampler() as sampler:
+            # Same steps as download_video, minus the UI
+            cmd = build_download_command(dest, format_type, options)
+            manifest = JobManifest(dest)
+            for chunk_cmd, chunk_urls in plan_chunked_invocations([(cmd, u) for u in urls], chunk):
+                engine.submit(chunk_cmd, chunk_urls, priority=PRIORITY_NORMAL, batch_id=manifest.job_id,
+                              manifest=manifest, auto_retry=options.get('auto_retry', False))
+            while True:
+                jobs = engine.jobs(manifest.job_id)
+                if all(job.finished for job in jobs):
+                    break
+                for job in jobs:
+                    job.wait()
+
+            mixes = 0
+            if name == "mix":
+                tracks = manifest.files(".mp3")
+                if len(tracks) >= 2:
+                    list_path = manifest.path.with_suffix(".filelist.txt")
+                    write_concat_list(tracks, list_path)
+                    mix_path = Path(dest) / mix_file_name(tracks)
+                    mix_cmd = build_mix_command(ffmpeg, list_path, mix_path, "mp3_complete", tracks)
+                    if run_captured(mix_cmd, OutputCapture(limit=20)) == 0:
+                        manifest.record(mix_path, "mix")
+                        mixes = 1
+
+        wall = time.perf_counter() - started
+        cpu_after = cpu_seconds()
+
+        files = manifest.files()
+        downloaded = sum(f.stat().st_size for f in files)
+        failed_urls = set()
+        for job in jobs:
+            for url, result in job.results.items():
+                if result["status"] == "failed":
+                    failed_urls.add(url)
+                elif result["status"] == "ok":
+                    failed_urls.discard(url)
+        summary = engine.metrics.summary(window=wall + 60)
+
+        return {
+            "scenario": name,
+            "urls": len(urls),
+            "processes": len(sampler.pids) if HAS_PSUTIL else len(jobs) + mixes,
+            "jobs": len(jobs),
+            "retries": sum(1 for job in jobs if job.attempt > 1),
+            "files": len(files),
+            "failed": len(failed_urls),
+            "bytes": downloaded,
+            "wall_seconds": round(wall, 3),
+            "cpu_seconds": round(cpu_after - cpu_before, 3) if cpu_before is not None else None,
+            "peak_rss_mb": peak_rss_mb(resource.RUSAGE_SELF) if HAS_RESOURCE else None,
+            "peak_child_rss_mb": (round(sampler.peak_tree_rss / (1024 * 1024), 1) if HAS_PSUTIL
+                                  else peak_rss_mb(resource.RUSAGE_CHILDREN) if HAS_RESOURCE else None),
+            "throughput_mb_s": round(downloaded / wall / (1024 * 1024), 3) if wall else None,
+            "ttfb_p50": summary["ttfb_p50"],
+            "total_p95": summary["total_p95"],
+        }
+
+# =============================================================================
+# 📊 RUNNER
+# =============================================================================
+
+def run_isolated(name, base_url, args):
+    """Run a scenario in a fresh interpreter and parse its JSON result."""
+    cmd = [sys.executable, str(Path(__file__).resolve()), "--run-scenario", name, "--base-url", base_url,
+           "--count", str(args.count), "--chunk-size", str(args.chunk_size), "--workers", str(args.workers)]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        return {"scenario": name, "error": result.stderr.strip().splitlines()[-1:] or ["unknown error"]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def find_regressions(results, baseline, tolerance):
+    """Scenario metrics that got worse than the baseline by more than ``tolerance``."""
+    previous = {r["scenario"]: r for r in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(result["scenario"])
+        if not before:
+            continue
+        for key in REGRESSION_KEYS:
+            old, new = before.get(key), result.get(key)
+            if old and new is not None and new > old * (1 + tolerance):
+                regressions.append(f"{result['scenario']}.{key}: {old} -> {new} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--count", type=int, default=20, help="URLs (or playlist entries) per scenario")
+    parser.add_argument("--chunk-size", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Earlier --output file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown before a metric counts as a regression")
+    parser.add_argument("--run-scenario", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_scenario:
+        print(json.dumps(run_scenario(args.run_scenario, args.base_url, args.count, args.chunk_size, args.workers)))
+        return
+
+    server, base_url = start_media_server(ffmpeg_path=find_ffmpeg())
+    results = []
+    try:
+        for name in args.scenarios:
+            result = run_isolated(name, base_url, args)
+            results.append(result)
+            print(json.dumps(result))
+    finally:
+        server.shutdown()
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+        regressions = find_regressions(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
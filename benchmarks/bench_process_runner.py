@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Benchmark - thread-per-pipe vs the asyncio process runner
+Starts N concurrent children that print yt-dlp-like progress lines on both
+stdout and stderr, and reads them either with:
+
+    threads - Popen plus one reader thread per pipe (2 per child)
+    runner  - the shared ProcessRunner event loop (no per-child threads)
+
+Reports wall time, CPU time, peak thread count and lines per second.
+
+Usage:
+    python benchmarks/bench_process_runner.py --children 8 32 64 --lines 2000
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from meowdown_runner import ProcessRunner  # noqa: E402
+
+MODES = ("threads", "runner")
+
+# Progress on stdout, the odd warning on stderr, with a small pause every
+# 100 lines like a real transfer
+CHILD_SCRIPT = r'''
+import sys, time
+lines = int(sys.argv[1])
+for n in range(lines):
+    sys.stdout.write(f"[download] {100.0 * n / lines:5.1f}% of 10.00MiB at 1.00MiB/s ETA 00:10\n")
+    if n % 100 == 0:
+        sys.stderr.write(f"WARNING: synthetic warning {n}\n")
+        sys.stdout.flush()
+        time.sleep(0.005)
+'''
+
+class ThreadSampler:
+    """Tracks the peak number of live threads in this process."""
+
+    def __init__(self):
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, threading.active_count())
+            self._stop.wait(0.01)
+
+def child_command(lines):
+    return [sys.executable, "-c", CHILD_SCRIPT, str(lines)]
+
+def run_threads(children, lines):
+    counts = [0] * children
+    lock = threading.Lock()
+
+    def pump(index, stream):
+        for _ in stream:
+            with lock:
+                counts[index] += 1
+
+    procs, readers = [], []
+    for index in range(children):
+        proc = subprocess.Popen(child_command(lines), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        procs.append(proc)
+        for stream in (proc.stdout, proc.stderr):
+            reader = threading.Thread(target=pump, args=(index, stream), daemon=True)
+            reader.start()
+            readers.append(reader)
+    for reader in readers:
+        reader.join()
+    for proc in procs:
+        proc.wait()
+    return sum(counts)
+
+def run_runner(children, lines):
+    runner = ProcessRunner()
+    counts = [0] * children
+
+    def counter(index):
+        def on_line(line):
+            counts[index] += 1
+        return on_line
+
+    futures = [runner.submit(child_command(lines), on_line=counter(index)) for index in range(children)]
+    for future in futures:
+        future.result()
+    runner.shutdown()
+    return sum(counts)
+
+def cpu_seconds():
+    times = __import__("os").times()
+    return times.user + times.system + times.children_user + times.children_system
+
+def measure(mode, children, lines):
+    with ThreadSampler() as sampler:
+        cpu_before = cpu_seconds()
+        started = time.perf_counter()
+        total = run_threads(children, lines) if mode == "threads" else run_runner(children, lines)
+        wall = time.perf_counter() - started
+        cpu = cpu_seconds() - cpu_before
+    return {
+        "mode": mode,
+        "children": children,
+        "lines": total,
+        "wall_seconds": round(wall, 3),
+        "cpu_seconds": round(cpu, 3),
+        "peak_threads": sampler.peak,
+        "lines_per_second": round(total / wall) if wall else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--children", type=int, nargs="+", default=[8, 32, 64])
+    parser.add_argument("--lines", type=int, default=2000, help="Output lines per child")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    for children in args.children:
+        for mode in MODES:
+            result = measure(mode, children, args.lines)
+            results.append(result)
+            print(json.dumps(result))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Benchmark - download-then-merge vs one FFmpeg pass
+Downloads DASH videos (a video-only and an audio-only stream, each
+throttled to ``--rate`` bytes/s) from the local media server through the
+DownloadEngine with:
+
+    sequential  - yt-dlp fetches the video, then the audio, then merges them
+    ffmpeg      - FFmpeg reads both streams at once and copies them into
+                  one file in a single pass (the split-streams mode)
+
+Reports wall time per mode and checks that every file has both streams.
+Needs FFmpeg (bundled in bin/ or on PATH).
+
+Usage:
+    python benchmarks/bench_split_streams.py --videos 2 --seconds 20 --height 360
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_pipeline import find_ffmpeg  # noqa: E402
+from media_server import start_media_server  # noqa: E402
+from meowdown_engine import DownloadEngine, JobManifest, build_download_command  # noqa: E402
+
+OPTIONS = {'download_archive': False, 'download_metadata': False,
+           'download_thumbnail': False, 'embed_metadata': False, 'split_streams': True}
+
+def stream_count(ffmpeg, path):
+    """Number of streams FFmpeg finds in ``path``."""
+    result = subprocess.run([ffmpeg, "-hide_banner", "-i", str(path)], capture_output=True, text=True)
+    return sum(1 for line in result.stderr.splitlines() if line.strip().startswith("Stream #"))
+
+def measure(mode, ffmpeg, base_url, videos, seconds, height, rate):
+    with tempfile.TemporaryDirectory() as work:
+        dest = Path(work)
+        engine = DownloadEngine(max_workers=1, log_dir=None)
+        manifest = JobManifest(dest)
+        cmd = build_download_command(dest, "video_1080p", OPTIONS)
+        if mode == "sequential":
+            at = cmd.index("--downloader")
+            del cmd[at:at + 2]  # yt-dlp's own downloader, one stream after the other
+
+        started = time.perf_counter()
+        submitted = [engine.submit(cmd, [f"{base_url}/dash/{mode}-{n}.mpd?seconds={seconds}&height={height}&rate={rate}"],
+                                   manifest=manifest)
+                     for n in range(videos)]
+        for job in submitted:
+            job.wait()
+        wall = time.perf_counter() - started
+
+        merged = sum(1 for entry in manifest.entries if stream_count(ffmpeg, entry["path"]) == 2)
+        progress = sum(1 for job in submitted for kind, _ in job.events if kind == "progress")
+        engine.tagger.shutdown()
+        engine.subtitle_stage.shutdown()
+    return {
+        "mode": mode,
+        "videos": videos,
+        "ok": sum(1 for job in submitted if job.state == "done"),
+        "merged": merged,
+        "progress_events": progress,
+        "wall_seconds": round(wall, 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--videos", type=int, default=2)
+    parser.add_argument("--seconds", type=int, default=20, help="Length of each video")
+    parser.add_argument("--height", type=int, default=360, help="Height of the video stream")
+    parser.add_argument("--rate", type=int, default=300_000, help="Bytes/s the server allows per stream")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        sys.exit("FFmpeg is needed for this benchmark")
+    server, base_url = start_media_server(ffmpeg_path=ffmpeg)
+    results = []
+    try:
+        for mode in ("sequential", "ffmpeg"):
+            result = measure(mode, ffmpeg, base_url, args.videos, args.seconds, args.height, args.rate)
+            results.append(result)
+            print(json.dumps(result))
+    finally:
+        server.shutdown()
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+if __name__ == "__main__":
+    main()
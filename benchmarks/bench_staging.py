@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Benchmark - downloading straight into a slow folder vs staging
+Downloads ``--videos`` DASH videos (separate video and audio streams) from
+the local media server into a folder on a simulated slow filesystem (see
+``slow_fs.py``: per-request latency and a bandwidth cap, like a network
+share) and embeds their metadata, in two modes:
+
+    direct  - yt-dlp writes both .part streams, FFmpeg's merge output and
+              the metadata remux in the folder
+    staged  - all of that happens in a local scratch folder; only the
+              finished files are copied into the folder, in one piece
+
+Reports wall time, the requests the slow filesystem served (writes, renames,
+metadata lookups) and how many names that never made it into the finished
+folder (.part files and other intermediates) showed up there meanwhile.
+Needs FFmpeg (bundled in bin/ or on PATH). The simulated filesystem is
+Linux only and needs root; ``--target DIR`` uses a real slow mount instead.
+
+Usage:
+    python benchmarks/bench_staging.py --videos 4 --seconds 60 --height 480 --latency-ms 5
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_pipeline import find_ffmpeg  # noqa: E402
+from media_server import start_media_server  # noqa: E402
+from meowdown_engine import DownloadEngine, JobManifest, build_download_command  # noqa: E402
+from meowdown_staging import PARTIAL_PREFIX, StagingArea  # noqa: E402
+from slow_fs import mount_slow_fs  # noqa: E402
+
+OPTIONS = {'download_archive': False, 'download_metadata': True, 'download_thumbnail': False,
+           'embed_metadata': True, 'split_streams': True}
+
+def watch_names(folder, stop, seen):
+    """Collect every file name that appears in ``folder`` until ``stop`` is set."""
+    while not stop.is_set():
+        for root, _, files in os.walk(folder):
+            seen.update(name for name in files if not name.startswith(PARTIAL_PREFIX))
+        time.sleep(0.02)
+
+def measure(mode, urls, target, scratch):
+    dest = Path(target) / f"{mode}-{int(time.time() * 1000)}"
+    dest.mkdir()
+    staging = StagingArea(scratch) if mode == "staged" else None
+    engine = DownloadEngine(max_workers=2, log_dir=None, staging=staging)
+    manifest = JobManifest(dest)
+    cmd = build_download_command(dest, "video_1080p", OPTIONS)
+    at = cmd.index("--downloader")
+    del cmd[at:at + 2]  # yt-dlp's own downloader: both streams to .part files, then a merge
+
+    seen, stop = set(), threading.Event()
+    watcher = threading.Thread(target=watch_names, args=(dest, stop, seen), daemon=True)
+    watcher.start()
+    started = time.perf_counter()
+    submitted = [engine.submit(cmd, [url], manifest=manifest) for url in urls]
+    for job in submitted:
+        job.wait()
+    wall = time.perf_counter() - started
+    stop.set()
+    watcher.join()
+
+    final = {path.name for path in dest.rglob("*") if path.is_file()}
+    engine.tagger.shutdown()
+    engine.subtitle_stage.shutdown()
+    return {
+        "mode": mode,
+        "ok": sum(1 for job in submitted if job.state == "done"),
+        "wall_seconds": round(wall, 3),
+        "videos": len(manifest.files()),
+        "intermediates_seen": len(seen - final),
+    }
+
+@contextlib.contextmanager
+def slow_target(args, work):
+    """The folder to download into and, for the simulated one, its counters."""
+    if args.target:
+        yield Path(args.target), None
+        return
+    backing = work / "backing"
+    backing.mkdir()
+    with mount_slow_fs(backing, work / "slow", args.latency_ms / 1000, args.bandwidth) as stats_path:
+        yield work / "slow", stats_path
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--videos", type=int, default=4)
+    parser.add_argument("--seconds", type=int, default=60, help="Length of each video")
+    parser.add_argument("--height", type=int, default=480, help="Height of the video stream")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Added to every filesystem request")
+    parser.add_argument("--bandwidth", type=float, default=100e6, help="Bytes per second to the slow folder")
+    parser.add_argument("--scratch", help="Local scratch folder (default: a temporary one)")
+    parser.add_argument("--target", help="Download into this (slow) folder instead of a simulated one")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        sys.exit("FFmpeg is needed for this benchmark")
+    server, base_url = start_media_server(ffmpeg_path=ffmpeg)
+    urls = [f"{base_url}/dash/video-{n}.mpd?seconds={args.seconds}&height={args.height}" for n in range(args.videos)]
+    for n in range(args.videos):  # Encoded before either mode is timed
+        server.dash_file(f"/dash/video-{n}", "video", args.seconds, args.height)
+        server.dash_file(f"/dash/video-{n}", "audio", args.seconds, 0)
+    results = []
+    try:
+        for mode in ("direct", "staged"):
+            with tempfile.TemporaryDirectory() as work:
+                work = Path(work)
+                with slow_target(args, work) as (target, stats_path):
+                    result = measure(mode, urls, target, args.scratch or work / "scratch")
+                if stats_path is not None:
+                    result["slow_fs"] = json.loads(stats_path.read_text(encoding='utf-8'))
+                results.append(result)
+                print(json.dumps(result))
+    finally:
+        server.shutdown()
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Benchmark - polling subscriptions with and without the change probe
+Subscribes to ``--subscriptions`` channels on the local media server (each
+with a few videos already there), takes a first poll, then publishes one new
+video on ``--changed`` percent of the channels and polls everything again:
+
+    listing      - every subscription runs a flat yt-dlp listing
+    conditional  - a conditional GET first; only changed channels are listed
+
+Reports the wall time of the second poll, the yt-dlp listings it took (full
+channel pages served), the 304s and how many new videos were queued (the
+small synthetic files are really downloaded).
+
+Usage:
+    python benchmarks/bench_subscriptions.py --subscriptions 200 --changed 5
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from media_server import start_media_server  # noqa: E402
+from meowdown_engine import DownloadEngine  # noqa: E402
+from meowdown_subscriptions import SubscriptionRegistry, SubscriptionScheduler  # noqa: E402
+
+OPTIONS = {'download_archive': False, 'download_metadata': False,
+           'download_thumbnail': False, 'embed_metadata': False, 'max_downloads': 50}
+
+def poll_all(registry, scheduler):
+    for sub in registry.subscriptions():
+        registry.run_now(sub["sub_id"])
+    scheduler.run(until_idle=True)
+
+def measure(mode, server, base_url, args):
+    names = [f"{mode}-{n:05d}" for n in range(args.subscriptions)]
+    for name in names:
+        server.publish(name, args.videos)
+    with tempfile.TemporaryDirectory() as work:
+        work = Path(work)
+        registry = SubscriptionRegistry(work / "subscriptions.sqlite3")
+        for name in names:
+            registry.add(f"{base_url}/channel/{name}.html", work / "downloads", "mp4", OPTIONS, backfill=False)
+        engine = DownloadEngine(max_workers=2, log_dir=None)
+        scheduler = SubscriptionScheduler(registry, engine, concurrency=args.concurrency,
+                                          host_spacing=0, probe=mode == "conditional")
+        poll_all(registry, scheduler)  # Remembers what is already there
+
+        changed = names[:max(1, args.subscriptions * args.changed // 100)]
+        for name in changed:
+            server.publish(name, args.videos + 1)
+        pages, not_modified = server.channel_pages, server.channel_not_modified
+        started = time.perf_counter()
+        poll_all(registry, scheduler)
+        wall = time.perf_counter() - started
+
+        queued = sum(sub["queued_total"] for sub in registry.subscriptions())
+        engine.tagger.shutdown()
+        engine.subtitle_stage.shutdown()
+    return {
+        "mode": mode,
+        "subscriptions": args.subscriptions,
+        "changed": len(changed),
+        "wall_seconds": round(wall, 3),
+        "pages_served": server.channel_pages - pages,
+        "not_modified": server.channel_not_modified - not_modified,
+        "queued": queued,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscriptions", type=int, default=200)
+    parser.add_argument("--videos", type=int, default=3, help="Videos on every channel to start with")
+    parser.add_argument("--changed", type=int, default=5, help="Percent of channels with a new video")
+    parser.add_argument("--concurrency", type=int, default=4, help="Polls at once")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    server, base_url = start_media_server()
+    results = []
+    try:
+        for mode in ("listing", "conditional"):
+            result = measure(mode, server, base_url, args)
+            results.append(result)
+            print(json.dumps(result))
+    finally:
+        server.shutdown()
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Benchmark - one x264 encode vs chunked parallel compression
+Generates a local sample video with FFmpeg and compresses it with the
+Compressor, restricted (by CPU affinity, where the OS allows it) to each of
+``--cores``:
+
+    single   - one FFmpeg process, x264 threading on its own
+    chunked  - split at keyframes, one FFmpeg per core, joined by stream copy
+
+Reports wall time, output size and whether the duration matched, per mode
+and core count. CPU-only; needs FFmpeg (bundled in bin/ or on PATH).
+
+Usage:
+    python benchmarks/bench_transcode.py --seconds 120 --height 720 --cores 1 2 4 8
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_pipeline import find_ffmpeg  # noqa: E402
+from meowdown_transcode import COMPRESS_PRESET, Compressor, durations_match, probe_media  # noqa: E402
+
+def make_sample(ffmpeg, path, seconds, height):
+    """A near-lossless test video with audio and a keyframe every 2 s (like most downloads)."""
+    subprocess.run([ffmpeg, "-loglevel", "error", "-y",
+                    "-f", "lavfi", "-i", f"testsrc2=size={height * 16 // 9}x{height}:rate=30:duration={seconds}",
+                    "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+                    "-c:v", "libx264", "-preset", "ultrafast", "-qp", "12", "-g", "60",
+                    "-c:a", "aac", "-b:a", "192k", "-shortest", str(path)], check=True)
+
+def measure(mode, cores, ffmpeg, sample, work, preset):
+    source = work / f"{mode}-{cores}.mp4"
+    shutil.copy(sample, source)
+    compressor = Compressor(ffmpeg, workers=cores, preset=preset)
+    started = time.perf_counter()
+    result = compressor.compress(source, chunked=mode == "chunked", replace=False)
+    wall = time.perf_counter() - started
+    duration = probe_media(ffmpeg, sample)["duration"]
+    output = {
+        "mode": mode,
+        "cores": cores,
+        "chunks": result["chunks"],
+        "wall_seconds": round(wall, 3),
+        "original_mb": round(result["original_bytes"] / 1e6, 2),
+        "compressed_mb": round(result["bytes"] / 1e6, 2),
+        "duration_ok": durations_match(duration, result["duration"]),
+    }
+    result["path"].unlink()
+    source.unlink()
+    return output
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=int, default=120, help="Length of the sample video")
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--cores", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--preset", default=COMPRESS_PRESET, help="x264 preset")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        sys.exit("FFmpeg is needed for this benchmark")
+    available = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else None
+    results = []
+    with tempfile.TemporaryDirectory() as work:
+        work = Path(work)
+        sample = work / "sample.mp4"
+        make_sample(ffmpeg, sample, args.seconds, args.height)
+        try:
+            for cores in args.cores:
+                if available is not None:
+                    if cores > len(available):
+                        print(f"Skipping {cores} cores: only {len(available)} available", file=sys.stderr)
+                        continue
+                    os.sched_setaffinity(0, available[:cores])  # FFmpeg children inherit it
+                for mode in ("single", "chunked"):
+                    result = measure(mode, cores, ffmpeg, sample, work, args.preset)
+                    results.append(result)
+                    print(json.dumps(result))
+        finally:
+            if available is not None:
+                os.sched_setaffinity(0, available)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Benchmark - fresh yt-dlp process per job vs the warm worker pool
+Downloads N small files from the local media server, one URL per job, through
+the DownloadEngine with:
+
+    fresh  - a new `python -m yt_dlp` process for every job
+    pool   - the WorkerPool's pre-started workers (yt-dlp already imported)
+
+Reports wall time, mean/p95 job time and how many workers the pool started
+and recycled.
+
+Usage:
+    python benchmarks/bench_worker_pool.py --jobs 40 --concurrency 1 2 4
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from media_server import start_media_server  # noqa: E402
+from meowdown_engine import DownloadEngine, JobManifest, build_download_command  # noqa: E402
+from meowdown_workers import WorkerPool  # noqa: E402
+
+MODES = ("fresh", "pool")
+OPTIONS = {'download_archive': False, 'download_metadata': False,
+           'download_thumbnail': False, 'embed_metadata': False}
+
+def measure(mode, base_url, jobs, concurrency, size, max_jobs):
+    pool = WorkerPool(max_jobs=max_jobs) if mode == "pool" else None
+    with tempfile.TemporaryDirectory() as work:
+        dest = Path(work)
+        engine = DownloadEngine(max_workers=concurrency, workers=pool, log_dir=None)
+        manifest = JobManifest(dest)
+        cmd = build_download_command(dest, "mp4", OPTIONS)
+        if pool is not None:
+            deadline = time.time() + 60
+            while pool.stats()["idle"] < min(concurrency, pool.size) and time.time() < deadline:
+                time.sleep(0.05)  # Measure steady state: the pool warms up with the app
+
+        started = time.perf_counter()
+        submitted = [engine.submit(cmd, [f"{base_url}/media/{mode}-{concurrency}-{n}.mp4?size={size}"],
+                                   manifest=manifest) for n in range(jobs)]
+        for job in submitted:
+            job.wait()
+        wall = time.perf_counter() - started
+
+        durations = sorted(job.finished_at - job.started_at for job in submitted)
+        result = {
+            "mode": mode,
+            "jobs": jobs,
+            "concurrency": concurrency,
+            "ok": sum(1 for job in submitted if job.state == "done"),
+            "wall_seconds": round(wall, 3),
+            "job_mean_seconds": round(statistics.mean(durations), 3),
+            "job_p95_seconds": round(durations[int(0.95 * (len(durations) - 1))], 3),
+        }
+        if pool is not None:
+            stats = pool.stats()
+            result.update(workers_started=stats["started"], workers_retired=stats["retired"],
+                          warm_jobs=stats["warm_jobs"], cold_jobs=stats["cold_jobs"])
+            pool.shutdown()
+        engine.tagger.shutdown()
+        engine.subtitle_stage.shutdown()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--size", type=int, default=200_000, help="Bytes per file")
+    parser.add_argument("--max-jobs", type=int, default=25, help="Jobs per worker before it is recycled")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    server, base_url = start_media_server()
+    results = []
+    try:
+        for concurrency in args.concurrency:
+            for mode in MODES:
+                result = measure(mode, base_url, args.jobs, concurrency, args.size, args.max_jobs)
+                results.append(result)
+                print(json.dumps(result))
+    finally:
+        server.shutdown()
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+if __name__ == "__main__":
+    main()
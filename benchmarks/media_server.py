@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Benchmark Media Server
+A tiny local HTTP server that serves synthetic media files, so benchmarks can
+drive yt-dlp's generic extractor without touching the internet.
+
+Endpoints (all take an optional ``size=<bytes>``):
+    /media/<name>.mp4                  progressive MP4 download
+        ?rate=<bytes/s>                throttle the transfer (per connection)
+        Range: bytes=a-b               serve a byte range (206)
+        ?fail=<n>&status=<code>        fail the first n requests (default 503)
+    /hls/<name>.m3u8?segments=<n>      HLS media playlist with n segments
+    /hls/<name>/<i>.ts                 one HLS segment
+    /playlist/<name>.html?count=<n>    page with n <video> tags (a generic playlist)
+    /channel/<name>.html               playlist page that grows with ``server.publish(name, n)``;
+                                       has an ETag and answers If-None-Match with 304
+    /audio/<name>.mp3?seconds=<s>      real MP3 tone (needs FFmpeg, else 404)
+    /album/<name>.html?count=<n>&seconds=<s>
+                                       page with n <audio> tracks, each with a cover
+    /cover/<name>.jpg                  real JPEG cover image (needs FFmpeg, else 404)
+    /dash/<name>.mpd?seconds=<s>&height=<h>
+                                       DASH manifest with a video-only and an
+                                       audio-only stream (needs FFmpeg, else 404)
+    /dash/<name>/<h>.mp4, audio.m4a    the streams themselves (?rate= throttles)
+    /vod/<name>.mp4?seconds=<s>&height=<h>
+                                       long real video with audio (needs FFmpeg)
+    /vod/<name>.m3u8?seconds=<s>&height=<h>
+                                       the same video as HLS, 6 s segments
+    /vod/<name>/<i>.ts                 one segment of it
+
+The server counts the bytes it sends in ``bytes_sent``, and full and 304
+channel page responses in ``channel_pages`` and ``channel_not_modified``.
+"""
+
+import hashlib
+import re
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_SIZE = 64 * 1024
+DEFAULT_SEGMENT_SECONDS = 2
+THROTTLE_CHUNK = 16 * 1024
+SEND_CHUNK = 256 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d+)-(\d*)$')
+
+def synthetic_bytes(name, size):
+    """Deterministic pseudo-random payload for a given file name."""
+    seed = hashlib.sha256(name.encode('utf-8')).digest()
+    repeats = size // len(seed) + 1
+    return (seed * repeats)[:size]
+
+def benchmark_urls(base_url, count=10, size=DEFAULT_SIZE):
+    """Named URL sets that yt-dlp's generic extractor can handle."""
+    return {
+        "progressive": [f"{base_url}/media/clip-{n:04d}.mp4?size={size}" for n in range(count)],
+        "hls": [f"{base_url}/hls/stream-{n:04d}.m3u8?segments=50&size={size // 8 or 1}" for n in range(count)],
+        "playlist": f"{base_url}/playlist/set.html?count={count}&size={size}",
+        "throttled": [f"{base_url}/media/slow-{n:04d}.mp4?size={size}&rate={size * 4}" for n in range(count)],
+        "flaky": [f"{base_url}/media/flaky-{n:04d}.mp4?size={size}&fail=1" for n in range(count)],
+        "audio": [f"{base_url}/audio/tone-{n:04d}.mp3?seconds=5" for n in range(count)],
+    }
+
+class MediaHandler(BaseHTTPRequestHandler):
+    """Serves the synthetic endpoints listed in the module docstring."""
+
+    # Keep-alive, like a CDN: clients can reuse a connection for several ranges
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+    def do_HEAD(self):
+        self._serve(head_only=True)
+
+    def do_GET(self):
+        self._serve(head_only=False)
+
+    def _serve(self, head_only):
+        parsed = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        path = parsed.path
+
+        if path.startswith("/media/"):
+            if self._should_fail(path, query):
+                self.send_error(int(query.get("status", 503)), "Synthetic failure")
+                return
+            body = synthetic_bytes(path, int(query.get("size", DEFAULT_SIZE)))
+            self._send(body, "video/mp4", head_only, rate=int(query.get("rate", 0)), ranges=True)
+        elif path.startswith("/hls/") and path.endswith(".m3u8"):
+            self._send(self._hls_playlist(path, query).encode('utf-8'),
+                       "application/vnd.apple.mpegurl", head_only)
+        elif path.startswith("/hls/") and path.endswith(".ts"):
+            body = synthetic_bytes(path, int(query.get("size", DEFAULT_SIZE)))
+            self._send(body, "video/mp2t", head_only)
+        elif path.startswith("/album/"):
+            self._send(self._album_page(path, query).encode('utf-8'), "text/html; charset=utf-8", head_only)
+        elif path.startswith("/cover/"):
+            cover = self.server.cover_file(path)
+            if cover is None:
+                self.send_error(404, "FFmpeg is needed for cover images")
+                return
+            self._send(cover.read_bytes(), "image/jpeg", head_only)
+        elif path.startswith("/playlist/"):
+            self._send(self._playlist_page(path, query).encode('utf-8'), "text/html; charset=utf-8", head_only)
+        elif path.startswith("/channel/"):
+            self._channel_page(path, head_only)
+        elif path.startswith("/dash/") and path.endswith(".mpd"):
+            seconds = int(query.get("seconds", 10))
+            height = int(query.get("height", 1080))
+            if self.server.dash_file(path[:-len(".mpd")], "video", seconds, height) is None:
+                self.send_error(404, "FFmpeg is needed for DASH streams")
+                return
+            self._send(self._dash_manifest(path, seconds, height, query).encode('utf-8'),
+                       "application/dash+xml", head_only)
+        elif path.startswith("/dash/"):
+            name, stream = path.rsplit("/", 1)
+            kind = "audio" if stream.startswith("audio") else "video"
+            seconds = int(query.get("seconds", 10))
+            height = int(Path(stream).stem) if kind == "video" else 0
+            media = self.server.dash_file(name, kind, seconds, height)
+            if media is None:
+                self.send_error(404, "FFmpeg is needed for DASH streams")
+                return
+            self._send(media.read_bytes(), f"{kind}/mp4", head_only,
+                       rate=int(query.get("rate", 0)), ranges=True)
+        elif path.startswith("/vod/"):
+            name, _, extra = path[len("/vod/"):].partition("/")
+            name = name.rsplit(".", 1)[0]
+            vod = self.server.vod_files(name, int(query.get("seconds", 600)), int(query.get("height", 240)))
+            if vod is None:
+                self.send_error(404, "FFmpeg is needed for VOD streams")
+                return
+            if path.endswith(".mp4"):
+                self._send((vod / "video.mp4").read_bytes(), "video/mp4", head_only,
+                           rate=int(query.get("rate", 0)), ranges=True)
+            elif path.endswith(".m3u8"):
+                playlist = (vod / "index.m3u8").read_text(encoding='utf-8')
+                playlist = re.sub(r'^(\d+\.ts)$', lambda m: f"{name}/{m.group(1)}?{parsed.query}", playlist, flags=re.M)
+                self._send(playlist.encode('utf-8'), "application/vnd.apple.mpegurl", head_only)
+            elif (vod / extra).is_file():
+                self._send((vod / extra).read_bytes(), "video/mp2t", head_only, rate=int(query.get("rate", 0)))
+            else:
+                self.send_error(404)
+        elif path.startswith("/audio/"):
+            audio = self.server.audio_file(path, int(query.get("seconds", 5)))
+            if audio is None:
+                self.send_error(404, "FFmpeg is needed for real audio")
+                return
+            self._send(audio.read_bytes(), "audio/mpeg", head_only)
+        else:
+            self.send_error(404, "File not found")
+
+    def _should_fail(self, path, query):
+        """Flaky endpoints fail their first ``fail`` requests (per path)."""
+        fail = int(query.get("fail", 0))
+        if not fail:
+            return False
+        with self.server.lock:
+            seen = self.server.request_counts.get(path, 0)
+            self.server.request_counts[path] = seen + 1
+        return seen < fail
+
+    def _hls_playlist(self, path, query):
+        name = path[len("/hls/"):-len(".m3u8")]
+        segments = int(query.get("segments", 20))
+        size = int(query.get("size", DEFAULT_SIZE))
+        lines = ["#EXTM3U", "#EXT-X-VERSION:3",
+                 f"#EXT-X-TARGETDURATION:{DEFAULT_SEGMENT_SECONDS}", "#EXT-X-MEDIA-SEQUENCE:0"]
+        for i in range(segments):
+            lines.append(f"#EXTINF:{DEFAULT_SEGMENT_SECONDS}.0,")
+            lines.append(f"/hls/{name}/{i:05d}.ts?size={size}")
+        lines.append("#EXT-X-ENDLIST")
+        return "\n".join(lines) + "\n"
+
+    def _playlist_page(self, path, query):
+        name = Path(path).stem
+        count = int(query.get("count", 5))
+        size = int(query.get("size", DEFAULT_SIZE))
+        videos = "\n".join(f'<video src="/media/{name}-{i:04d}.mp4?size={size}"></video>' for i in range(count))
+        return f"<html><head><title>{name}</title></head><body>\n{videos}\n</body></html>\n"
+
+    def _album_page(self, path, query):
+        name = Path(path).stem
+        count = int(query.get("count", 5))
+        seconds = int(query.get("seconds", 5))
+        tracks = "\n".join(f'<audio src="/audio/{name}-{i:04d}.mp3?seconds={seconds}" '
+                           f'poster="/cover/{name}-{i:04d}.jpg"></audio>' for i in range(count))
+        return f"<html><head><title>{name}</title></head><body>\n{tracks}\n</body></html>\n"
+
+    def _channel_page(self, path, head_only):
+        name = Path(path).stem
+        with self.server.lock:
+            count = self.server.channel_counts.get(name, 0)
+        etag = f'"{name}-{count}"'
+        if self.headers.get("If-None-Match") == etag:
+            with self.server.lock:
+                self.server.channel_not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        with self.server.lock:
+            self.server.channel_pages += 1
+        page = self._playlist_page(path, {"count": count})
+        self._send(page.encode('utf-8'), "text/html; charset=utf-8", head_only, headers={"ETag": etag})
+
+    def _dash_manifest(self, path, seconds, height, query):
+        name = path[:-len(".mpd")]
+        extra = f"?seconds={seconds}" + (f"&amp;rate={query['rate']}" if query.get("rate") else "")
+        width = height * 16 // 9
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="static" '
+            f'mediaPresentationDuration="PT{seconds}S" minBufferTime="PT2S" '
+            'profiles="urn:mpeg:dash:profile:isoff-on-demand:2011"><Period>'
+            '<AdaptationSet mimeType="video/mp4" contentType="video">'
+            f'<Representation id="video-{height}" codecs="avc1.64001f" width="{width}" height="{height}" '
+            f'bandwidth="2000000"><BaseURL>{name}/{height}.mp4{extra}</BaseURL></Representation>'
+            '</AdaptationSet>'
+            '<AdaptationSet mimeType="audio/mp4" contentType="audio" lang="en">'
+            '<Representation id="audio-128" codecs="mp4a.40.2" audioSamplingRate="44100" bandwidth="128000">'
+            f'<BaseURL>{name}/audio.m4a{extra}</BaseURL></Representation>'
+            '</AdaptationSet></Period></MPD>\n'
+        )
+
+    def _send(self, body, content_type, head_only, rate=0, ranges=False, headers=None):
+        byte_range = RANGE_RE.match(self.headers.get("Range", "")) if ranges else None
+        if byte_range:
+            total = len(body)
+            start = int(byte_range.group(1))
+            end = min(int(byte_range.group(2) or total - 1), total - 1)
+            body = body[start:end + 1]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{total}")
+        else:
+            self.send_response(200)
+        if ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if head_only:
+            return
+        chunk = THROTTLE_CHUNK if rate else SEND_CHUNK
+        try:
+            for start in range(0, len(body), chunk):
+                self.wfile.write(body[start:start + chunk])
+                with self.server.lock:
+                    self.server.bytes_sent += len(body[start:start + chunk])
+                if rate:
+                    time.sleep(THROTTLE_CHUNK / rate)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client gave up (e.g. a cancelled download, or FFmpeg seeking)
+
+class MediaServer(ThreadingHTTPServer):
+    """Threaded server with per-path request counters and an audio cache."""
+
+    daemon_threads = True
+
+    def __init__(self, address, ffmpeg_path=None):
+        super().__init__(address, MediaHandler)
+        self.lock = threading.Lock()
+        self.request_counts = {}
+        self.ffmpeg_path = str(ffmpeg_path) if ffmpeg_path else None
+        self._audio_dir = Path(tempfile.mkdtemp(prefix="meowdown-bench-audio-"))
+        self.bytes_sent = 0
+        self.channel_counts = {}
+        self.channel_pages = 0
+        self.channel_not_modified = 0
+
+    def publish(self, name, count):
+        """Make ``/channel/<name>.html`` list ``count`` videos."""
+        with self.lock:
+            self.channel_counts[name] = count
+
+    def vod_files(self, name, seconds, height):
+        """Generate (once) a long video with audio as ``video.mp4`` and as an HLS
+        ``index.m3u8`` with ``<i>.ts`` segments; returns their folder, or None without FFmpeg."""
+        if not self.ffmpeg_path:
+            return None
+        target = self._audio_dir / hashlib.sha1(f'vod:{name}:{seconds}:{height}'.encode()).hexdigest()
+        with self.lock:
+            if not (target / "index.m3u8").exists():
+                target.mkdir(exist_ok=True)
+                encode = [self.ffmpeg_path, "-loglevel", "error",
+                          "-f", "lavfi", "-i", f"testsrc2=size={height * 16 // 9}x{height}:rate=10:duration={seconds}",
+                          "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+                          "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", "-g", "20",
+                          "-c:a", "aac", "-b:a", "64k", "-movflags", "+faststart", str(target / "video.mp4"), "-y"]
+                segment = [self.ffmpeg_path, "-loglevel", "error", "-i", str(target / "video.mp4"), "-c", "copy",
+                           "-f", "hls", "-hls_time", "6", "-hls_list_size", "0", "-hls_playlist_type", "vod",
+                           "-hls_segment_filename", str(target / "%d.ts"), str(target / "index.m3u8"), "-y"]
+                for cmd in (encode, segment):
+                    if subprocess.run(cmd, capture_output=True).returncode != 0:
+                        return None
+        return target
+
+    def dash_file(self, name, kind, seconds, height):
+        """Generate (once) a video-only MP4 or audio-only M4A for ``name``, or None without FFmpeg."""
+        if not self.ffmpeg_path:
+            return None
+        key = hashlib.sha1(f'{name}:{kind}:{seconds}:{height}'.encode()).hexdigest()
+        target = self._audio_dir / f"{key}.{'m4a' if kind == 'audio' else 'mp4'}"
+        if kind == "audio":
+            source = ["-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}", "-c:a", "aac", "-b:a", "128k"]
+        else:
+            source = ["-f", "lavfi", "-i", f"testsrc2=size={height * 16 // 9}x{height}:rate=25:duration={seconds}",
+                      "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", "-an"]
+        with self.lock:
+            if not target.exists():
+                result = subprocess.run([self.ffmpeg_path, "-loglevel", "error", *source,
+                                         "-movflags", "+faststart", str(target), "-y"], capture_output=True)
+                if result.returncode != 0:
+                    return None
+        return target
+
+    def cover_file(self, path):
+        """Generate (once) a 600x600 JPEG for ``path``, or None without FFmpeg."""
+        if not self.ffmpeg_path:
+            return None
+        target = self._audio_dir / f"{hashlib.sha1(f'cover:{path}'.encode()).hexdigest()}.jpg"
+        with self.lock:
+            if not target.exists():
+                result = subprocess.run(
+                    [self.ffmpeg_path, "-loglevel", "error", "-f", "lavfi",
+                     "-i", "testsrc2=size=600x600:rate=1:duration=1", "-frames:v", "1", str(target), "-y"],
+                    capture_output=True)
+                if result.returncode != 0:
+                    return None
+        return target
+
+    def audio_file(self, path, seconds):
+        """Generate (once) a real MP3 tone for ``path``, or None without FFmpeg."""
+        if not self.ffmpeg_path:
+            return None
+        target = self._audio_dir / f"{hashlib.sha1(f'{path}:{seconds}'.encode()).hexdigest()}.mp3"
+        with self.lock:
+            if not target.exists():
+                frequency = 220 + int(hashlib.sha1(path.encode()).hexdigest(), 16) % 660
+                result = subprocess.run(
+                    [self.ffmpeg_path, "-loglevel", "error", "-f", "lavfi",
+                     "-i", f"sine=frequency={frequency}:duration={seconds}",
+                     "-b:a", "128k", str(target), "-y"],
+                    capture_output=True)
+                if result.returncode != 0:
+                    return None
+        return target
+
+def start_media_server(host="127.0.0.1", port=0, ffmpeg_path=None):
+    """Start the server on a background thread and return ``(server, base_url)``."""
+    server = MediaServer((host, port), ffmpeg_path=ffmpeg_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+if __name__ == "__main__":
+    server, base_url = start_media_server(port=8765)
+    print(f"🐱 Serving synthetic media at {base_url} (Ctrl+C to stop)")
+    for name, urls in benchmark_urls(base_url, count=2).items():
+        print(f"   {name}: {urls[0] if isinstance(urls, list) else urls}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
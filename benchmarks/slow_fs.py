@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Benchmark Slow Filesystem
+Mounts a folder somewhere else as a deliberately slow filesystem, to stand
+in for a network share or a busy spinning disk: every request waits
+``--latency-ms`` and data moves at no more than ``--bandwidth`` bytes per
+second, one request at a time like a single link to a NAS.
+
+It speaks the FUSE kernel protocol over ``/dev/fuse`` directly, so no FUSE
+library is needed - but it is Linux only and mounting needs root. Only what
+downloads need is there (files and folders; no links or extended
+attributes).
+
+Usage:
+    python benchmarks/slow_fs.py BACKING_DIR MOUNTPOINT --latency-ms 5 --bandwidth 20000000
+
+    with mount_slow_fs(backing, mountpoint, latency=0.005) as stats_path:
+        ...  # counters are written to stats_path on unmount
+"""
+
+import argparse
+import contextlib
+import ctypes
+import errno
+import json
+import os
+import stat
+import struct
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Opcodes (linux/fuse.h)
+LOOKUP, FORGET, GETATTR, SETATTR = 1, 2, 3, 4
+MKDIR, UNLINK, RMDIR, RENAME = 9, 10, 11, 12
+OPEN, READ, WRITE, STATFS, RELEASE, FSYNC = 14, 15, 16, 17, 18, 20
+FLUSH, INIT, OPENDIR, READDIR, RELEASEDIR, FSYNCDIR = 25, 26, 27, 28, 29, 30
+CREATE, INTERRUPT, DESTROY, BATCH_FORGET, RENAME2 = 35, 36, 38, 42, 45
+NO_REPLY = {FORGET, INTERRUPT, BATCH_FORGET}
+
+IN_HEADER = struct.Struct("<IIQQIIIHH")
+OUT_HEADER = struct.Struct("<IiQ")
+ATTR = struct.Struct("<QQQQQQIIIIIIIIII")
+FATTR_MODE, FATTR_UID, FATTR_GID, FATTR_SIZE = 1, 2, 4, 8
+FATTR_ATIME, FATTR_MTIME, FATTR_FH, FATTR_ATIME_NOW, FATTR_MTIME_NOW = 16, 32, 64, 128, 256
+
+MAX_WRITE = 128 * 1024
+CACHE_SECONDS = 1
+
+def _name(data):
+    return os.fsdecode(data.split(b"\0", 1)[0])
+
+class SlowFS:
+    """Passthrough of ``backing`` served on ``/dev/fuse`` with added latency."""
+
+    def __init__(self, backing, latency=0.005, bandwidth=None):
+        self.backing = Path(backing).resolve()
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.paths = {1: self.backing}
+        self.nodes = {self.backing: 1}
+        self.next_node = 2
+        self.stats = {"requests": 0, "writes": 0, "bytes_written": 0, "reads": 0, "bytes_read": 0,
+                      "creates": 0, "renames": 0, "unlinks": 0, "fsyncs": 0, "metadata": 0}
+
+    def mount(self, mountpoint):
+        self.fd = os.open("/dev/fuse", os.O_RDWR)
+        options = f"fd={self.fd},rootmode=40000,user_id=0,group_id=0,default_permissions,allow_other"
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.mount(b"slowfs", os.fsencode(mountpoint), b"fuse.slowfs", 0, options.encode()) != 0:
+            raise OSError(ctypes.get_errno(), f"could not mount {mountpoint}")
+
+    def serve(self):
+        """Answer requests until the filesystem is unmounted."""
+        while True:
+            try:
+                request = os.read(self.fd, MAX_WRITE + 64 * 1024)
+            except OSError as e:
+                if e.errno == errno.ENODEV:
+                    return  # Unmounted
+                if e.errno in (errno.EINTR, errno.ENOENT):
+                    continue  # Interrupted request
+                raise
+            length, opcode, unique, nodeid = IN_HEADER.unpack_from(request)[:4]
+            body = request[IN_HEADER.size:length]
+            if opcode in NO_REPLY:
+                continue
+            self.stats["requests"] += 1
+            try:
+                reply = self.handle(opcode, nodeid, body)
+                error = 0
+            except OSError as e:
+                reply, error = b"", -(e.errno or errno.EIO)
+            self.wait(len(body) if opcode == WRITE else len(reply) if opcode == READ else 0)
+            try:
+                os.write(self.fd, OUT_HEADER.pack(OUT_HEADER.size + len(reply), error, unique) + reply)
+            except OSError as e:
+                if e.errno != errno.ENOENT:  # The request was interrupted meanwhile
+                    raise
+            if opcode == DESTROY:
+                return
+
+    def wait(self, size):
+        delay = self.latency + (size / self.bandwidth if self.bandwidth else 0)
+        if delay:
+            time.sleep(delay)
+
+    # --- nodes -------------------------------------------------------------
+
+    def node(self, path):
+        if path not in self.nodes:
+            self.nodes[path] = self.next_node
+            self.paths[self.next_node] = path
+            self.next_node += 1
+        return self.nodes[path]
+
+    def moved(self, old, new):
+        for path in [p for p in self.nodes if p == old or old in p.parents]:
+            nodeid = self.nodes.pop(path)
+            self.paths[nodeid] = new / path.relative_to(old)
+            self.nodes[self.paths[nodeid]] = nodeid
+
+    def attr(self, path):
+        st = os.lstat(path)
+        return ATTR.pack(self.nodes.get(path, st.st_ino), st.st_size, st.st_blocks,
+                         int(st.st_atime), int(st.st_mtime), int(st.st_ctime),
+                         st.st_atime_ns % 10**9, st.st_mtime_ns % 10**9, st.st_ctime_ns % 10**9,
+                         st.st_mode, st.st_nlink, st.st_uid, st.st_gid, st.st_rdev, 4096, 0)
+
+    def entry(self, path):
+        return struct.pack("<QQQQII", self.node(path), 0, CACHE_SECONDS, CACHE_SECONDS, 0, 0) + self.attr(path)
+
+    def attr_out(self, path):
+        return struct.pack("<QII", CACHE_SECONDS, 0, 0) + self.attr(path)
+
+    # --- requests ----------------------------------------------------------
+
+    def handle(self, opcode, nodeid, body):
+        path = self.paths.get(nodeid)
+        if opcode == INIT:
+            major, minor, readahead = struct.unpack_from("<III", body)
+            flags = 1 | (1 << 5)  # ASYNC_READ, BIG_WRITES
+            return struct.pack("<IIIIHHIIHHII24x", 7, min(minor, 31), readahead, flags,
+                               16, 12, MAX_WRITE, 1, 0, 0, 0, 0)
+        if opcode == DESTROY:
+            return b""
+        if path is None:
+            raise OSError(errno.ESTALE, "unknown node")
+
+        if opcode == LOOKUP:
+            self.stats["metadata"] += 1
+            return self.entry(path / _name(body))
+        if opcode == GETATTR:
+            self.stats["metadata"] += 1
+            return self.attr_out(path)
+        if opcode == SETATTR:
+            self.stats["metadata"] += 1
+            valid, _, fh, size = struct.unpack_from("<IIQQ", body)
+            atime, mtime, _, atime_ns, mtime_ns, _, mode, _, uid, gid = struct.unpack_from("<QQQIIIIIII", body, 32)
+            if valid & FATTR_SIZE:
+                os.ftruncate(fh, size) if valid & FATTR_FH else os.truncate(path, size)
+            if valid & FATTR_MODE:
+                os.chmod(path, stat.S_IMODE(mode))
+            if valid & (FATTR_UID | FATTR_GID):
+                os.chown(path, uid if valid & FATTR_UID else -1, gid if valid & FATTR_GID else -1)
+            if valid & (FATTR_ATIME | FATTR_MTIME):
+                current = os.stat(path)
+                now = time.time_ns()
+                times = (now if valid & FATTR_ATIME_NOW else atime * 10**9 + atime_ns if valid & FATTR_ATIME
+                         else current.st_atime_ns,
+                         now if valid & FATTR_MTIME_NOW else mtime * 10**9 + mtime_ns if valid & FATTR_MTIME
+                         else current.st_mtime_ns)
+                os.utime(path, ns=times)
+            return self.attr_out(path)
+        if opcode == MKDIR:
+            self.stats["metadata"] += 1
+            mode, umask = struct.unpack_from("<II", body)
+            target = path / _name(body[8:])
+            os.mkdir(target, mode & ~umask)
+            return self.entry(target)
+        if opcode in (UNLINK, RMDIR):
+            self.stats["unlinks"] += 1
+            target = path / _name(body)
+            (os.unlink if opcode == UNLINK else os.rmdir)(target)
+            if target in self.nodes:
+                self.paths.pop(self.nodes.pop(target), None)
+            return b""
+        if opcode in (RENAME, RENAME2):
+            self.stats["renames"] += 1
+            header = 8 if opcode == RENAME else 16
+            newdir, = struct.unpack_from("<Q", body)
+            if opcode == RENAME2 and struct.unpack_from("<I", body, 8)[0]:
+                raise OSError(errno.EINVAL, "rename flags")
+            old_name, new_name = body[header:].split(b"\0")[:2]
+            old, new = path / os.fsdecode(old_name), self.paths[newdir] / os.fsdecode(new_name)
+            os.replace(old, new)
+            if new in self.nodes:
+                self.paths.pop(self.nodes.pop(new), None)
+            self.moved(old, new)
+            return b""
+        if opcode == CREATE:
+            self.stats["creates"] += 1
+            flags, mode, umask = struct.unpack_from("<III", body)
+            target = path / _name(body[16:])
+            fd = os.open(target, flags | os.O_CREAT, mode & ~umask)
+            return self.entry(target) + struct.pack("<QII", fd, 0, 0)
+        if opcode in (OPEN, OPENDIR):
+            flags, = struct.unpack_from("<I", body)
+            fd = os.open(path, flags & ~os.O_CREAT if opcode == OPEN else os.O_RDONLY | os.O_DIRECTORY)
+            return struct.pack("<QII", fd, 0, 0)
+        if opcode == READ:
+            fh, offset, size = struct.unpack_from("<QQI", body)
+            data = os.pread(fh, size, offset)
+            self.stats["reads"] += 1
+            self.stats["bytes_read"] += len(data)
+            return data
+        if opcode == WRITE:
+            fh, offset, size = struct.unpack_from("<QQI", body)
+            written = os.pwrite(fh, body[40:40 + size], offset)
+            self.stats["writes"] += 1
+            self.stats["bytes_written"] += written
+            return struct.pack("<II", written, 0)
+        if opcode in (RELEASE, RELEASEDIR):
+            os.close(struct.unpack_from("<Q", body)[0])
+            return b""
+        if opcode in (FSYNC, FSYNCDIR):
+            self.stats["fsyncs"] += 1
+            os.fsync(struct.unpack_from("<Q", body)[0])
+            return b""
+        if opcode == FLUSH:
+            return b""
+        if opcode == READDIR:
+            self.stats["metadata"] += 1
+            _, offset, size = struct.unpack_from("<QQI", body)
+            names = [".", ".."] + sorted(os.listdir(path))
+            out = b""
+            for position, name in enumerate(names[offset:], offset + 1):
+                raw = os.fsencode(name)
+                child = path if name in (".", "..") else path / name
+                kind = stat.S_IFDIR >> 12 if name in (".", "..") else stat.S_IFMT(os.lstat(child).st_mode) >> 12
+                dirent = struct.pack("<QQII", self.nodes.get(child, 0xFFFFFFFF), position, len(raw), kind) + raw
+                dirent += b"\0" * (-len(dirent) % 8)
+                if len(out) + len(dirent) > size:
+                    break
+                out += dirent
+            return out
+        if opcode == STATFS:
+            st = os.statvfs(path)
+            return struct.pack("<QQQQQIIII24x", st.f_blocks, st.f_bfree, st.f_bavail, st.f_files, st.f_ffree,
+                               st.f_bsize, st.f_namemax, st.f_frsize, 0)
+        raise OSError(errno.ENOSYS, "not supported")
+
+# =============================================================================
+# 🔌 MOUNT HELPER
+# =============================================================================
+
+@contextlib.contextmanager
+def mount_slow_fs(backing, mountpoint, latency=0.005, bandwidth=None):
+    """Mount ``backing`` slowly at ``mountpoint`` in a child process for the ``with`` block.
+
+    Yields the path the filesystem's counters (JSON) are written to once it
+    is unmounted.
+    """
+    mountpoint = Path(mountpoint)
+    mountpoint.mkdir(parents=True, exist_ok=True)
+    stats_path = mountpoint.with_name(mountpoint.name + ".stats.json")
+    device = mountpoint.stat().st_dev
+    command = [sys.executable, __file__, str(backing), str(mountpoint), "--latency-ms", str(latency * 1000),
+               "--stats", str(stats_path)]
+    if bandwidth:
+        command += ["--bandwidth", str(bandwidth)]
+    server = subprocess.Popen(command)
+    try:
+        while mountpoint.stat().st_dev == device:
+            if server.poll() is not None:
+                raise RuntimeError("the slow filesystem could not be mounted (Linux and root only)")
+            time.sleep(0.05)
+        yield stats_path
+    finally:
+        subprocess.run(["umount", "-l", str(mountpoint)], check=False)
+        server.wait(timeout=30)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("backing")
+    parser.add_argument("mountpoint")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Added to every request")
+    parser.add_argument("--bandwidth", type=float, help="Bytes per second for reads and writes")
+    parser.add_argument("--stats", help="Write the request counters here (JSON) on unmount")
+    args = parser.parse_args()
+
+    fs = SlowFS(args.backing, latency=args.latency_ms / 1000, bandwidth=args.bandwidth)
+    fs.mount(args.mountpoint)
+    server = threading.Thread(target=fs.serve, daemon=True)
+    server.start()
+    try:
+        server.join()
+    except KeyboardInterrupt:
+        subprocess.run(["umount", "-l", args.mountpoint], check=False)
+    if args.stats:
+        Path(args.stats).write_text(json.dumps(fs.stats), encoding='utf-8')
+
+if __name__ == "__main__":
+    main()
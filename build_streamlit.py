@@ -288,6 +288,21 @@ block_cipher = None
 added_files = [
     ('bin', 'bin'),  # Include FFmpeg binary
     ('app.py', '.'),  # Include main app script
+    ('meowdown_engine.py', '.'),  # Download engine used by app.py
+    ('meowdown_metrics.py', '.'),  # Download metrics used by the engine
+    ('meowdown_runner.py', '.'),  # Async process runner used by the engine
+    ('meowdown_formats.py', '.'),  # Format cache for size estimates
+    ('meowdown_library.py', '.'),  # Library index of downloaded files
+    ('meowdown_tagging.py', '.'),  # MP3 tagging pool used by the engine
+    ('meowdown_thumbnails.py', '.'),  # Shared thumbnail/album art cache
+    ('meowdown_subtitles.py', '.'),  # Subtitle fetch/convert stage
+    ('meowdown_workers.py', '.'),  # Pre-started yt-dlp worker processes
+    ('meowdown_segments.py', '.'),  # Multi-connection range downloader
+    ('meowdown_cluster.py', '.'),  # Shared queue for worker nodes
+    ('meowdown_transcode.py', '.'),  # Chunked parallel compression
+    ('meowdown_delivery.py', '.'),  # File delivery endpoint (ranges, job ZIPs)
+    ('meowdown_subscriptions.py', '.'),  # Scheduled channel/playlist subscriptions
+    ('meowdown_staging.py', '.'),  # Local scratch staging for downloads
 ]
 
 # Get streamlit path
@@ -309,6 +324,7 @@ a = Analysis(
         'streamlit.runtime.state',
         'streamlit.components.v1.components',
         'yt_dlp',
+        'mutagen',
         'requests',
         'urllib3',
         'certifi',
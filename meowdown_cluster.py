@@ -0,0 +1,644 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Cluster
+Coordinator/worker mode for spreading big downloads over several machines.
+The app (or ``meowdown_cluster.py enqueue``) puts download requests into a
+SQLite queue on a shared volume; ``meowdown_cluster.py worker`` processes on
+any number of nodes claim them, build and run the yt-dlp commands locally
+with their own DownloadEngine, and report progress, output manifests and
+results back into the same database.
+
+A shared download archive in the queue makes sure no two nodes fetch the
+same video: a worker lists what a request covers first, claims every video
+ID it is going to download and only downloads the IDs it won. Claims belong
+to one attempt at a request; a node whose request was requeued meanwhile
+(it went quiet for too long) can no longer win, report or finish anything
+for it and stops.
+
+A big request (a channel mirror, a long playlist) doesn't stay on the node
+that listed it: its videos are split into slices that go back into the
+queue, so every node takes some. The request finishes with its last slice.
+
+Usage:
+    python meowdown_cluster.py worker --queue /shared/meowdown-queue.sqlite3 --slots 2
+    python meowdown_cluster.py enqueue --queue /shared/meowdown-queue.sqlite3 --dest /shared/Downloads URL...
+    python meowdown_cluster.py status --queue /shared/meowdown-queue.sqlite3
+"""
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from meowdown_engine import (
+    JOB_CANCELLED,
+    JOB_DONE,
+    JOB_FAILED,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    PRIORITY_NORMAL,
+    DownloadEngine,
+    JobManifest,
+    build_download_command,
+    get_data_dir,
+    new_job_id,
+    plan_download,
+    resolve_job_priority,
+)
+from meowdown_staging import StagingArea
+
+# =============================================================================
+# 🐱 CONFIGURATION & CONSTANTS
+# =============================================================================
+
+CLUSTER_POLL_SECONDS = 2.0
+CLUSTER_HEARTBEAT_SECONDS = 5.0
+
+# A claimed request whose node hasn't been heard from for this long goes
+# back to the queue (its video claims are released)
+CLUSTER_STALE_SECONDS = 60.0
+CLUSTER_MAX_ATTEMPTS = 3
+
+# Events of requests that finished this long ago are deleted when the next
+# request is queued (the requests themselves stay listed)
+CLUSTER_EVENTS_TTL = 24 * 3600
+
+# Requests listing more videos than this are split into slices of this
+# many, each claimed by whichever node is free
+CLUSTER_SLICE_VIDEOS = 25
+
+# Waiting for another node's write lock on the queue
+CLUSTER_LOCK_TIMEOUT = 30.0
+
+# Progress is reported as the request's percent, not as events
+RELAYED_EVENT_SKIP = ("progress", "found")
+
+ARCHIVE_CLAIMED = "claimed"
+ARCHIVE_DONE = "done"
+
+def archive_key(extractor, video_id):
+    """yt-dlp's download archive key for a video (``"youtube dQw4w9WgXcQ"``)."""
+    return f"{(extractor or 'generic').lower()} {video_id}"
+
+def merge_results(parts):
+    """One results dict (URL -> status, errors, files) out of those of a request's slices."""
+    merged = {}
+    for results in parts:
+        for url, result in results.items():
+            if not isinstance(result, dict):
+                merged[url] = result
+                continue
+            into = merged.setdefault(url, {"status": "ok", "errors": [], "files": []})
+            into["errors"].extend(result.get("errors", []))
+            into["files"].extend(result.get("files", []))
+            if result.get("status") == "failed":
+                into["status"] = "failed"
+    return merged
+
+# =============================================================================
+# 🗃️ SHARED QUEUE
+# =============================================================================
+
+class ClusterQueue:
+    """Download requests, their progress and the shared archive in one SQLite file.
+
+    Every node opens the same file, so it must live on a volume whose file
+    locks work for all of them (a local disk shared by several workers on
+    one host, or a network share with locking). Writes that must not race,
+    such as claiming a request or a video, run in ``BEGIN IMMEDIATE``
+    transactions.
+    """
+
+    def __init__(self, path, timeout=CLUSTER_LOCK_TIMEOUT):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), timeout=timeout, isolation_level=None,
+                                   check_same_thread=False)
+        with self._write():
+            self._db.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY, urls TEXT, dest TEXT, format_type TEXT, options TEXT,
+                priority INTEGER, state TEXT, node TEXT, attempts INTEGER DEFAULT 0,
+                cancel_requested INTEGER DEFAULT 0, percent REAL DEFAULT 0, results TEXT,
+                created_at REAL, claimed_at REAL, heartbeat REAL, finished_at REAL,
+                parent TEXT, parts INTEGER DEFAULT 0)""")
+            self._add_columns("jobs", {"parent": "TEXT", "parts": "INTEGER DEFAULT 0"})
+            self._db.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (state, priority, created_at)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS jobs_parent ON jobs (parent)")
+            self._db.execute("""CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT, node TEXT, kind TEXT,
+                value TEXT, at REAL)""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS events_job ON events (job_id, id)")
+            self._db.execute("""CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT, node TEXT, entry TEXT)""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS files_job ON files (job_id)")
+            self._db.execute("""CREATE TABLE IF NOT EXISTS archive (
+                key TEXT PRIMARY KEY, job_id TEXT, node TEXT, state TEXT, updated_at REAL,
+                attempt INTEGER)""")
+            self._db.execute("""CREATE TABLE IF NOT EXISTS nodes (
+                node TEXT PRIMARY KEY, slots INTEGER, started_at REAL, seen_at REAL)""")
+            self._add_columns("archive", {"attempt": "INTEGER"})
+
+    def _add_columns(self, table, columns):
+        """Add ``columns`` a queue made by an older version doesn't have yet."""
+        existing = {row[1] for row in self._db.execute(f"PRAGMA table_info({table})")}
+        for name, kind in columns.items():
+            if name not in existing:
+                self._db.execute(f"ALTER TABLE {table} ADD COLUMN {name} {kind}")
+
+    @contextmanager
+    def _write(self):
+        """An IMMEDIATE transaction: other nodes wait rather than interleave."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    # --- coordinator side ---------------------------------------------------
+
+    def enqueue(self, urls, dest, format_type, options=None, priority=None):
+        """Queue a download request for the workers; returns its job ID.
+
+        ``options`` are the app's download options (including a plan
+        preview's ``plan_entries``); they must be JSON-serialisable.
+        """
+        urls = list(urls)
+        options = dict(options or {})
+        if priority is None:
+            priority = resolve_job_priority(options, len(urls)) if options else PRIORITY_NORMAL
+        job_id = new_job_id()
+        with self._write():
+            self._db.execute(
+                "INSERT INTO jobs (job_id, urls, dest, format_type, options, priority, state, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, json.dumps(urls), str(dest), format_type, json.dumps(options, default=str),
+                 priority, JOB_QUEUED, time.time()))
+            self._prune_events(time.time() - CLUSTER_EVENTS_TTL)
+        return job_id
+
+    def _prune_events(self, before):
+        """Delete events of requests (and their slices) that finished before ``before``.
+
+        A slice's events go with its request, so a running request keeps
+        those of slices that finished long ago.
+        """
+        settled = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+        self._db.execute(
+            "DELETE FROM events WHERE job_id IN (SELECT job_id FROM jobs WHERE parent IS NULL "
+            "AND state IN (?, ?, ?) AND finished_at < ? "
+            "UNION SELECT s.job_id FROM jobs s JOIN jobs p ON p.job_id = s.parent "
+            "WHERE p.state IN (?, ?, ?) AND p.finished_at < ?)",
+            settled + (before,) + settled + (before,))
+
+    def cancel(self, job_id):
+        """Cancel a queued request, or ask the node running it to stop (and so for its slices)."""
+        with self._write():
+            self._db.execute("UPDATE jobs SET state = ?, finished_at = ? "
+                             "WHERE (job_id = ? OR parent = ?) AND state = ?",
+                             (JOB_CANCELLED, time.time(), job_id, job_id, JOB_QUEUED))
+            self._db.execute("UPDATE jobs SET cancel_requested = 1 WHERE (job_id = ? OR parent = ?) AND state = ?",
+                             (job_id, job_id, JOB_RUNNING))
+            self._settle(job_id)
+
+    def jobs(self, states=None, limit=200, split=True):
+        """Requests (newest first) as dicts, optionally only in ``states``.
+
+        ``split=False`` leaves out requests that were split into slices
+        (their slices are listed instead).
+        """
+        sql = "SELECT * FROM jobs"
+        conditions, params = [], ()
+        if states:
+            conditions.append(f"state IN ({','.join('?' * len(states))})")
+            params = tuple(states)
+        if not split:
+            conditions.append("parts = 0")
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return self._jobs(sql + " ORDER BY created_at DESC LIMIT ?", params + (limit,))
+
+    def job(self, job_id):
+        """One request as a dict, or None."""
+        found = self._jobs("SELECT * FROM jobs WHERE job_id = ?", (job_id,))
+        return found[0] if found else None
+
+    def _jobs(self, sql, params):
+        with self._lock:
+            cursor = self._db.execute(sql, params)
+            columns = [c[0] for c in cursor.description]
+            rows = cursor.fetchall()
+        jobs = []
+        for row in rows:
+            job = dict(zip(columns, row))
+            job["urls"] = json.loads(job["urls"])
+            job["options"] = json.loads(job["options"])
+            job["results"] = json.loads(job["results"]) if job["results"] else None
+            jobs.append(job)
+        return jobs
+
+    def events(self, job_id, after=0):
+        """``[(event_id, node, kind, value)]`` a request (or its slices) reported after ``after``."""
+        rows = self._query("SELECT id, node, kind, value FROM events WHERE id > ? AND "
+                           "(job_id = ? OR job_id IN (SELECT job_id FROM jobs WHERE parent = ?)) ORDER BY id",
+                           (after, job_id, job_id))
+        return [(event_id, node, kind, json.loads(value)) for event_id, node, kind, value in rows]
+
+    def files(self, job_id):
+        """Manifest entries of the files a request (or its slices) produced, on whichever node."""
+        rows = self._query("SELECT node, entry FROM files WHERE "
+                           "job_id = ? OR job_id IN (SELECT job_id FROM jobs WHERE parent = ?) ORDER BY id",
+                           (job_id, job_id))
+        return [dict(json.loads(entry), node=node) for node, entry in rows]
+
+    def nodes(self, within=CLUSTER_STALE_SECONDS):
+        """Worker nodes heard from in the last ``within`` seconds."""
+        rows = self._query("SELECT node, slots, seen_at FROM nodes WHERE seen_at >= ? ORDER BY node",
+                           (time.time() - within,))
+        return [{"node": node, "slots": slots, "seen_at": seen_at} for node, slots, seen_at in rows]
+
+    def counts(self):
+        """Number of requests per state (a split request counts as its slices)."""
+        return dict(self._query("SELECT state, COUNT(*) FROM jobs WHERE parts = 0 GROUP BY state"))
+
+    # --- worker side ----------------------------------------------------------
+
+    def register(self, node, slots):
+        now = time.time()
+        with self._write():
+            self._db.execute("INSERT OR REPLACE INTO nodes VALUES (?, ?, ?, ?)", (node, slots, now, now))
+
+    def claim(self, node):
+        """Take the most urgent queued request for ``node``; returns it or None."""
+        now = time.time()
+        with self._write():
+            self._db.execute("UPDATE nodes SET seen_at = ? WHERE node = ?", (now, node))
+            row = self._db.execute("SELECT job_id FROM jobs WHERE state = ? ORDER BY priority, created_at LIMIT 1",
+                                   (JOB_QUEUED,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE jobs SET state = ?, node = ?, attempts = attempts + 1, claimed_at = ?, heartbeat = ? "
+                "WHERE job_id = ?", (JOB_RUNNING, node, now, now, row[0]))
+        return self.job(row[0])
+
+    def _holds(self, job_id, node, attempt):
+        """True if ``node``'s claim ``attempt`` is still the one running the request."""
+        return self._db.execute("SELECT 1 FROM jobs WHERE job_id = ? AND node = ? AND attempts = ? AND state = ?",
+                                (job_id, node, attempt, JOB_RUNNING)).fetchone() is not None
+
+    def heartbeat(self, job_id, node, attempt, percent, events=()):
+        """Report progress and events of claim ``attempt``.
+
+        Returns True if the node should stop: the request was cancelled, or
+        it was requeued and belongs to another attempt now.
+        """
+        now = time.time()
+        with self._write():
+            self._db.execute("UPDATE nodes SET seen_at = ? WHERE node = ?", (now, node))
+            if not self._holds(job_id, node, attempt):
+                return True
+            self._db.execute("UPDATE jobs SET heartbeat = ?, percent = ? WHERE job_id = ?",
+                             (now, percent, job_id))
+            self._settle(self._parent(job_id))
+            self._db.executemany("INSERT INTO events (job_id, node, kind, value, at) VALUES (?, ?, ?, ?, ?)",
+                                 [(job_id, node, kind, json.dumps(value, default=str), now)
+                                  for kind, value in events])
+            row = self._db.execute("SELECT cancel_requested FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def claim_ids(self, job_id, node, attempt, keys):
+        """Claim video archive ``keys`` for claim ``attempt`` of a request; returns the ones it won.
+
+        Keys that are already downloaded, or claimed by another request, are
+        not won. Keys an earlier attempt of this request claimed are won
+        again. An attempt that no longer holds the request wins nothing.
+        """
+        keys = list(keys)
+        now = time.time()
+        with self._write():
+            if not self._holds(job_id, node, attempt):
+                return set()
+            self._db.executemany("INSERT OR IGNORE INTO archive VALUES (?, ?, ?, ?, ?, ?)",
+                                 [(key, job_id, node, ARCHIVE_CLAIMED, now, attempt) for key in keys])
+            self._db.execute("UPDATE archive SET node = ?, attempt = ? WHERE job_id = ? AND state = ?",
+                             (node, attempt, job_id, ARCHIVE_CLAIMED))
+            won = {key for (key,) in self._db.execute(
+                "SELECT key FROM archive WHERE job_id = ? AND state = ?", (job_id, ARCHIVE_CLAIMED))}
+        return won & set(keys)
+
+    def finish(self, job_id, node, attempt, state, results, files=(), done_keys=()):
+        """Record the outcome of claim ``attempt``, its files and the videos it downloaded.
+
+        Claimed videos it didn't download are released for other requests.
+        Returns False (and records nothing) if the attempt no longer holds
+        the request.
+        """
+        now = time.time()
+        with self._write():
+            if not self._holds(job_id, node, attempt):
+                return False
+            self._db.executemany("INSERT INTO files (job_id, node, entry) VALUES (?, ?, ?)",
+                                 [(job_id, node, json.dumps(entry, default=str)) for entry in files])
+            self._db.executemany(
+                "UPDATE archive SET state = ?, updated_at = ? WHERE key = ? AND job_id = ? AND attempt = ?",
+                [(ARCHIVE_DONE, now, key, job_id, attempt) for key in done_keys])
+            self._db.execute("DELETE FROM archive WHERE job_id = ? AND attempt = ? AND state = ?",
+                             (job_id, attempt, ARCHIVE_CLAIMED))
+            self._db.execute(
+                "UPDATE jobs SET state = ?, percent = ?, results = ?, finished_at = ? WHERE job_id = ?",
+                (state, 1.0 if state == JOB_DONE else None, json.dumps(results, default=str), now, job_id))
+            self._settle(self._parent(job_id))
+        return True
+
+    def split(self, job_id, node, attempt, slices, results=None):
+        """Turn claim ``attempt``'s request into queued slices, one per list of plan entries.
+
+        The request stays running without a node until its last slice has
+        finished; ``results`` (e.g. URLs that failed to list) are merged
+        into its outcome. Returns False if the attempt no longer holds it.
+        """
+        now = time.time()
+        with self._write():
+            if not self._holds(job_id, node, attempt):
+                return False
+            urls, dest, format_type, options, priority, created_at = self._db.execute(
+                "SELECT urls, dest, format_type, options, priority, created_at FROM jobs WHERE job_id = ?",
+                (job_id,)).fetchone()
+            options = json.loads(options)
+            for position, entries in enumerate(slices):
+                # Slices keep the request's place in the queue, in playlist order
+                self._db.execute(
+                    "INSERT INTO jobs (job_id, urls, dest, format_type, options, priority, state, created_at, parent) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (new_job_id(), urls, dest, format_type,
+                     json.dumps(dict(options, plan_entries=entries), default=str),
+                     priority, JOB_QUEUED, created_at + position * 1e-6, job_id))
+            self._db.execute("UPDATE jobs SET parts = ?, node = NULL, heartbeat = NULL, percent = 0, results = ? "
+                             "WHERE job_id = ?", (len(slices), json.dumps(results or {}, default=str), job_id))
+            self._db.execute("INSERT INTO events (job_id, node, kind, value, at) VALUES (?, ?, ?, ?, ?)",
+                             (job_id, node, "split", json.dumps({"slices": len(slices),
+                                                                 "videos": sum(map(len, slices))}), now))
+        return True
+
+    def _parent(self, job_id):
+        row = self._db.execute("SELECT parent FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def _settle(self, job_id):
+        """Update a split request's progress from its slices; finish it with the last one."""
+        if job_id is None:
+            return
+        slices = self._db.execute("SELECT state, percent, results FROM jobs WHERE parent = ?", (job_id,)).fetchall()
+        if not slices:
+            return
+        unfinished = (JOB_QUEUED, JOB_RUNNING)
+        percent = sum((done or 0.0) if state in unfinished else 1.0 for state, done, _ in slices) / len(slices)
+        if any(state in unfinished for state, _, _ in slices):
+            self._db.execute("UPDATE jobs SET percent = ? WHERE job_id = ?", (percent, job_id))
+            return
+        own = self._db.execute("SELECT results FROM jobs WHERE job_id = ?", (job_id,)).fetchone()[0]
+        results = merge_results([json.loads(r) for r in [own] + [r for _, _, r in slices] if r])
+        states = {state for state, _, _ in slices}
+        if JOB_CANCELLED in states:
+            state = JOB_CANCELLED
+        elif JOB_FAILED in states or any(isinstance(result, dict) and result.get("status") == "failed"
+                                         for result in results.values()):
+            state = JOB_FAILED
+        else:
+            state = JOB_DONE
+        self._db.execute("UPDATE jobs SET state = ?, percent = ?, results = ?, finished_at = ? "
+                         "WHERE job_id = ? AND state = ?",
+                         (state, 1.0 if state == JOB_DONE else None, json.dumps(results, default=str),
+                          time.time(), job_id, JOB_RUNNING))
+
+    def requeue_stale(self, stale_after=CLUSTER_STALE_SECONDS, max_attempts=CLUSTER_MAX_ATTEMPTS):
+        """Put requests of nodes that went silent back in the queue; returns how many."""
+        cutoff = time.time() - stale_after
+        with self._write():
+            stale = self._db.execute(
+                "SELECT job_id, parent FROM jobs WHERE state = ? AND heartbeat < ? AND parts = 0",
+                (JOB_RUNNING, cutoff)).fetchall()
+            for job_id, parent in stale:
+                self._db.execute("DELETE FROM archive WHERE job_id = ? AND state = ?", (job_id, ARCHIVE_CLAIMED))
+                self._db.execute(
+                    "UPDATE jobs SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, node = NULL "
+                    "WHERE job_id = ?", (max_attempts, JOB_FAILED, JOB_QUEUED, job_id))
+                self._settle(parent)
+        return len(stale)
+
+# =============================================================================
+# 👷 WORKER NODE
+# =============================================================================
+
+class ClusterWorker:
+    """Claims requests from a :class:`ClusterQueue` and downloads them locally.
+
+    ``slots`` requests run at once, each on this node's ``engine``.
+    ``dest_root`` replaces the folder a request names (keeping its last
+    part), for nodes that mount the shared download folder elsewhere.
+    """
+
+    def __init__(self, queue, node=None, slots=2, engine=None, dest_root=None):
+        self.queue = queue
+        self.node = node or f"{socket.gethostname()}-{os.getpid()}"
+        self.slots = slots
+        self.engine = engine or DownloadEngine(max_workers=slots, log_dir=get_data_dir() / "logs")
+        self.dest_root = Path(dest_root) if dest_root else None
+        self._active = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self, drain=False):
+        """Claim and run requests until :meth:`stop` (or, with ``drain``, until the queue is empty)."""
+        self.queue.register(self.node, self.slots)
+        while not self._stop.is_set():
+            self.queue.requeue_stale()
+            claimed = False
+            while len(self._active) < self.slots:
+                job = self.queue.claim(self.node)
+                if job is None:
+                    break
+                claimed = True
+                thread = threading.Thread(target=self._process, args=(job,),
+                                          name=f"meowdown-cluster-{job['job_id']}", daemon=True)
+                with self._lock:
+                    self._active.add(thread)
+                thread.start()
+            if drain and not claimed and not self._active:
+                break
+            self._stop.wait(CLUSTER_POLL_SECONDS)
+
+    def destination(self, job):
+        dest = Path(job["dest"])
+        return self.dest_root / dest.name if self.dest_root else dest
+
+    def _process(self, job):
+        try:
+            self._download(job)
+        except Exception as e:
+            self.queue.finish(job["job_id"], self.node, job["attempts"], JOB_FAILED, {"error": str(e)})
+        finally:
+            with self._lock:
+                self._active.discard(threading.current_thread())
+
+    @contextmanager
+    def _keepalive(self, job):
+        """Heartbeat ``job`` while the block runs (a listing can outlast the stale timeout).
+
+        Yields an event that is set once the request is cancelled or taken over.
+        """
+        done, stopped = threading.Event(), threading.Event()
+
+        def beat():
+            while not done.wait(CLUSTER_HEARTBEAT_SECONDS):
+                if self.queue.heartbeat(job["job_id"], self.node, job["attempts"], 0.0):
+                    stopped.set()
+
+        thread = threading.Thread(target=beat, name=f"meowdown-keepalive-{job['job_id']}", daemon=True)
+        thread.start()
+        try:
+            yield stopped
+        finally:
+            done.set()
+            thread.join()
+
+    def _download(self, job):
+        job_id = job["job_id"]
+        attempt = job["attempts"]
+        dest = self.destination(job)
+        dest.mkdir(parents=True, exist_ok=True)
+        options = job["options"]
+        cmd = build_download_command(dest, job["format_type"], options)
+
+        # List first, then download only the videos this node won
+        entries = options.get("plan_entries")
+        errors = {}
+        if entries is None:
+            with self._keepalive(job) as stopped:
+                plan = plan_download(job["urls"], cmd, runner=self.engine.runner)
+            if stopped.is_set():
+                self.queue.finish(job_id, self.node, attempt, JOB_CANCELLED, {})
+                return
+            entries = [entry for entry in plan["entries"] if not entry["archived"]]
+            errors = plan["errors"]
+        if job["parent"] is None and len(entries) > CLUSTER_SLICE_VIDEOS:
+            # Too big for one node: every node takes slices of it
+            slices = [entries[at:at + CLUSTER_SLICE_VIDEOS] for at in range(0, len(entries), CLUSTER_SLICE_VIDEOS)]
+            self.queue.split(job_id, self.node, attempt, slices,
+                             {url: {"status": "failed", "errors": lines, "files": []} for url, lines in errors.items()})
+            return
+        keys = {archive_key(entry["extractor"], entry["id"]) for entry in entries if entry.get("id")}
+        won = self.queue.claim_ids(job_id, self.node, attempt, keys)
+        picked = [entry for entry in entries
+                  if not entry.get("id") or archive_key(entry["extractor"], entry["id"]) in won]
+        if self.queue.heartbeat(job_id, self.node, attempt, 0.0,
+                                [("claimed", {"videos": len(picked), "elsewhere": len(entries) - len(picked)})]):
+            self.queue.finish(job_id, self.node, attempt, JOB_CANCELLED, {})
+            return
+
+        manifest = JobManifest(dest, job_id=job_id)
+        if picked:
+            self.engine.submit_download(job["urls"], dest, job["format_type"],
+                                        dict(options, plan_entries=picked), manifest=manifest)
+        local = self._relay(job_id, attempt, manifest.job_id)
+
+        manifest.poll()
+        files = [entry for entry in manifest.entries if entry.get("path")]
+        done_keys = {archive_key(entry.get("extractor"), entry["id"]) for entry in files if entry.get("id")}
+        results = {url: {"status": "failed", "errors": lines, "files": []} for url, lines in errors.items()}
+        for local_job in local:  # Retries come later and override what they retried
+            results.update(local_job.results)
+        if any(local_job.state == JOB_CANCELLED for local_job in local):
+            state = JOB_CANCELLED
+        elif any(result.get("status") == "failed" for result in results.values()):
+            state = JOB_FAILED
+        else:
+            state = JOB_DONE
+        self.queue.finish(job_id, self.node, attempt, state, results, files=files, done_keys=done_keys)
+
+    def _relay(self, job_id, attempt, batch_id):
+        """Forward a batch's events and progress until all its runs (and retries) finish.
+
+        Returns the batch's local jobs.
+        """
+        cursors = {}
+        while True:
+            local = self.engine.jobs(batch_id=batch_id)
+            finished = all(local_job.finished for local_job in local)
+            events = []
+            for local_job in local:
+                new, cursors[local_job.job_id] = local_job.events.since(cursors.get(local_job.job_id, 0))
+                events.extend((kind, value) for kind, value in new if kind not in RELAYED_EVENT_SKIP)
+            percent = sum(1.0 if j.finished else j.percent for j in local) / len(local) if local else 1.0
+            if self.queue.heartbeat(job_id, self.node, attempt, percent, events):
+                self.engine.cancel_batch(batch_id)
+            if finished:
+                return local
+            time.sleep(CLUSTER_HEARTBEAT_SECONDS / 5)
+
+# =============================================================================
+# 🖥️ COMMAND LINE
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queue", required=True, help="Queue database on the shared volume")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    worker = commands.add_parser("worker", help="Claim and run queued downloads on this node")
+    worker.add_argument("--slots", type=int, default=2, help="Requests run at once")
+    worker.add_argument("--node", help="Node name (default: host-pid)")
+    worker.add_argument("--dest-root", help="Where this node mounts the shared download folder")
+    worker.add_argument("--drain", action="store_true", help="Exit once the queue is empty")
+    worker.add_argument("--staging-dir", help="Local scratch folder to download in before moving files to the share")
+
+    enqueue = commands.add_parser("enqueue", help="Queue a download")
+    enqueue.add_argument("--dest", required=True)
+    enqueue.add_argument("--format", default="mp4", help="mp4, mp3_complete, best, video_720p, ...")
+    enqueue.add_argument("--playlist", action="store_true", help="Download whole playlists")
+    enqueue.add_argument("--max-downloads", type=int, default=50)
+    enqueue.add_argument("urls", nargs="+")
+
+    commands.add_parser("status", help="Show nodes and requests")
+    args = parser.parse_args(argv)
+
+    queue = ClusterQueue(args.queue)
+    if args.command == "worker":
+        engine = None
+        if args.staging_dir:
+            engine = DownloadEngine(max_workers=args.slots, log_dir=get_data_dir() / "logs",
+                                    staging=StagingArea(args.staging_dir))
+        node = ClusterWorker(queue, node=args.node, slots=args.slots, engine=engine, dest_root=args.dest_root)
+        print(f"MeowDown worker {node.node} ({args.slots} slots) on {args.queue}", flush=True)
+        try:
+            node.run(drain=args.drain)
+        except KeyboardInterrupt:
+            node.stop()
+    elif args.command == "enqueue":
+        options = {"is_playlist": args.playlist, "max_downloads": args.max_downloads}
+        print(queue.enqueue(args.urls, args.dest, args.format, options))
+    else:
+        print(json.dumps({"nodes": queue.nodes(), "jobs": queue.counts()}, indent=2))
+        for job in queue.jobs(limit=20):
+            print(f"{job['job_id']}  {job['state']:<9}  {job['node'] or '-':<24}  "
+                  f"{(job['percent'] or 0) * 100:5.1f}%  {job['urls'][0]}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown File Delivery
+Serves finished downloads to the browser, for when MeowDown runs on a
+server and "Open My Downloads" can't open anything on the user's machine.
+Files are streamed straight from disk with ``sendfile`` (zero-copy where
+the OS has it), with byte ranges for resuming and seeking and ETags for
+caching. A whole job comes as a ZIP written on the fly into the response,
+with no temporary archive. Nothing is ever read into memory whole.
+
+Every link is signed and expires, so the endpoint only hands out files
+MeowDown itself linked to.
+"""
+
+import base64
+import hashlib
+import hmac
+import ipaddress
+import json
+import mimetypes
+import os
+import re
+import secrets
+import threading
+import time
+import urllib.parse
+import zipfile
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from meowdown_engine import JobManifest
+
+# =============================================================================
+# 🐱 CONFIGURATION & CONSTANTS
+# =============================================================================
+
+# Links stay valid this long (a paused browser download can still resume)
+DELIVERY_LINK_TTL = 7 * 24 * 3600
+
+# Files of these MIME types are served to play in the browser, not to save
+INLINE_MEDIA_TYPES = ("video", "audio", "image")
+
+# ZIP members are copied in blocks of this size
+ZIP_COPY_BYTES = 1024 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode('ascii')
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+def file_etag(stat):
+    """Strong ETag of a file version (size and modification time)."""
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+def parse_range(header, size):
+    """``(start, end)`` (inclusive) of a single ``Range: bytes=...`` header.
+
+    Returns None for no (or an unsupported multi-range) header and raises
+    ValueError if the range can't be satisfied.
+    """
+    match = RANGE_RE.match((header or "").strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        length = int(last)  # The last n bytes
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError("range outside the file")
+    return start, end
+
+# =============================================================================
+# 🔏 SIGNED LINKS
+# =============================================================================
+
+class FileLinks:
+    """Makes and checks expiring, HMAC-signed links to files and job ZIPs.
+
+    ``secret`` defaults to a random one, so links stop working when the
+    server restarts; set one to share links between restarts or processes.
+    """
+
+    def __init__(self, base_url, secret=None, ttl=DELIVERY_LINK_TTL):
+        self.base_url = base_url.rstrip("/")
+        self.secret = (secret or secrets.token_hex(32)).encode('utf-8')
+        self.ttl = ttl
+
+    def file_url(self, path, base_url=None):
+        """Link that downloads (or, for media, plays) one file."""
+        path = Path(path)
+        return self._url("file", {"p": str(path.resolve())}, path.name, base_url)
+
+    def job_url(self, manifest_path, name, base_url=None):
+        """Link to a ZIP of every file a job's manifest recorded, named ``name``.zip."""
+        return self._url("job", {"m": str(Path(manifest_path).resolve())}, f"{name}.zip", base_url)
+
+    def verify(self, token):
+        """The payload of a valid, unexpired token, or None."""
+        body, _, signature = token.partition(".")
+        expected = _b64(hmac.new(self.secret, body.encode('ascii'), hashlib.sha256).digest())
+        if not hmac.compare_digest(signature, expected):
+            return None
+        try:
+            payload = json.loads(_unb64(body))
+        except (ValueError, UnicodeDecodeError):
+            return None
+        return payload if payload.get("e", 0) >= time.time() else None
+
+    def _url(self, kind, payload, name, base_url):
+        body = _b64(json.dumps({**payload, "e": int(time.time() + self.ttl)}).encode('utf-8'))
+        signature = _b64(hmac.new(self.secret, body.encode('ascii'), hashlib.sha256).digest())
+        return f"{(base_url or self.base_url).rstrip('/')}/{kind}/{body}.{signature}/{urllib.parse.quote(name)}"
+
+# =============================================================================
+# 📦 STREAMING ZIP
+# =============================================================================
+
+def zip_member_names(paths):
+    """Archive names for ``paths``: file names, numbered where they repeat."""
+    names, seen = [], set()
+    for path in paths:
+        name, number = path.name, 1
+        while name in seen:
+            number += 1
+            name = f"{path.stem} ({number}){path.suffix}"
+        seen.add(name)
+        names.append(name)
+    return names
+
+def write_zip(out, paths):
+    """Write a ZIP of ``paths`` to the unseekable stream ``out``.
+
+    Media is already compressed, so members are stored as they are; each
+    one is copied in blocks as it is written (sizes and CRCs follow it in
+    data descriptors), and ZIP64 keeps files over 4 GB working.
+    """
+    with zipfile.ZipFile(out, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for path, name in zip(paths, zip_member_names(paths)):
+            stat = path.stat()
+            info = zipfile.ZipInfo(name, time.localtime(stat.st_mtime)[:6])
+            info.file_size = stat.st_size
+            with open(path, 'rb') as source, archive.open(info, 'w', force_zip64=stat.st_size > 0x7FFFFFFF) as member:
+                while True:
+                    block = source.read(ZIP_COPY_BYTES)
+                    if not block:
+                        break
+                    member.write(block)
+
+# =============================================================================
+# 🌐 DELIVERY ENDPOINT
+# =============================================================================
+
+class DeliveryHandler(BaseHTTPRequestHandler):
+    """``/file/<token>/<name>`` and ``/job/<token>/<name>.zip``."""
+
+    server_version = "MeowDown"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._serve(head_only=True)
+
+    def do_GET(self):
+        self._serve(head_only=False)
+
+    def _serve(self, head_only):
+        parts = urllib.parse.urlsplit(self.path).path.split("/")
+        payload = self.server.links.verify(parts[2]) if len(parts) == 4 else None
+        if payload is None:
+            self.send_error(404, "Unknown or expired link")
+            return
+        try:
+            if parts[1] == "file" and "p" in payload:
+                self._send_file(Path(payload["p"]), head_only)
+            elif parts[1] == "job" and "m" in payload:
+                self._send_job(Path(payload["m"]), urllib.parse.unquote(parts[3]), head_only)
+            else:
+                self.send_error(404, "Not found")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The browser stopped the download
+
+    def _send_file(self, path, head_only):
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            self.send_error(404, "File is gone")
+            return
+        with f:
+            stat = os.fstat(f.fileno())
+            etag = file_etag(stat)
+            if self._not_modified(etag, stat.st_mtime):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            byte_range = None
+            if self._range_applies(etag, stat.st_mtime):
+                try:
+                    byte_range = parse_range(self.headers.get("Range"), stat.st_size)
+                except ValueError:
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{stat.st_size}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+            start, end = byte_range or (0, stat.st_size - 1)
+
+            self.send_response(206 if byte_range else 200)
+            if byte_range:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{stat.st_size}")
+            content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", formatdate(stat.st_mtime, usegmt=True))
+            # Media plays in the browser; everything else is saved
+            inline = content_type.split("/")[0] in INLINE_MEDIA_TYPES
+            self.send_header("Content-Disposition", self._disposition(path.name, inline))
+            self.end_headers()
+            if not head_only and end >= start:
+                self.connection.sendfile(f, start, end - start + 1)
+
+    def _send_job(self, manifest_path, name, head_only):
+        try:
+            paths = JobManifest.open(manifest_path).files(stage=None)
+        except OSError:
+            paths = []
+        if not paths:
+            self.send_error(404, "No files in this download")
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Disposition", self._disposition(name))
+        self.send_header("Connection", "close")  # The archive ends when the connection does
+        self.end_headers()
+        self.close_connection = True
+        if not head_only:
+            write_zip(self.wfile, paths)
+
+    def _not_modified(self, etag, mtime):
+        if "If-None-Match" in self.headers:
+            return etag in [tag.strip() for tag in self.headers["If-None-Match"].split(",")] or \
+                self.headers["If-None-Match"].strip() == "*"
+        return self._unchanged_since(self.headers.get("If-Modified-Since"), mtime)
+
+    def _range_applies(self, etag, mtime):
+        """False if ``If-Range`` says the client's partial copy is of another version."""
+        condition = self.headers.get("If-Range")
+        if not condition:
+            return True
+        if condition.strip().startswith(('"', 'W/')):
+            return condition.strip() == etag
+        return self._unchanged_since(condition, mtime)
+
+    @staticmethod
+    def _unchanged_since(date, mtime):
+        if not date:
+            return False
+        try:
+            return int(mtime) <= parsedate_to_datetime(date).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    @staticmethod
+    def _disposition(name, inline=False):
+        fallback = name.encode('ascii', 'replace').decode('ascii').replace('"', "'").replace("?", "_")
+        kind = "inline" if inline else "attachment"
+        return f"{kind}; filename=\"{fallback}\"; filename*=UTF-8''{urllib.parse.quote(name)}"
+
+def is_loopback_host(host):
+    """True if ``host`` (a name or address) only reaches this machine."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host.strip("[]")).is_loopback
+    except ValueError:
+        return False
+
+def start_delivery_server(links, host="127.0.0.1", port=8502):
+    """Serve the signed links of ``links`` on a background thread.
+
+    Only this machine can reach it unless ``host`` is another interface
+    (``0.0.0.0`` for all of them). Returns the server, or None if the port
+    is not available.
+    """
+    try:
+        server = ThreadingHTTPServer((host, port), DeliveryHandler)
+    except OSError:
+        return None
+    server.daemon_threads = True
+    server.links = links
+    threading.Thread(target=server.serve_forever, name="meowdown-delivery", daemon=True).start()
+    return server
@@ -0,0 +1,2099 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Download Engine
+Streamlit-free pieces of the download pipeline: yt-dlp command building,
+per-job output manifests, the background job engine and its metrics. Shared
+by the web UI and any headless runners.
+"""
+
+import asyncio
+import collections
+import heapq
+import itertools
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+from pathlib import Path
+
+from meowdown_formats import output_profile
+from meowdown_metrics import JobMetrics, MetricsRegistry
+from meowdown_runner import (
+    TIMEOUT_IDLE,
+    resume_process_tree,
+    shared_runner,
+    suspend_process_tree,
+)
+from meowdown_segments import DOWNLOADER_NAME, SEGMENT_CONNECTIONS, SEGMENTED_SCRIPT
+from meowdown_subtitles import SUBTITLE_LANGS, SubtitleStage
+from meowdown_tagging import HAS_MUTAGEN, TaggingPool
+from meowdown_thumbnails import COVER_MAX_SIDE, ThumbnailCache
+
+# =============================================================================
+# 🐱 CONFIGURATION & CONSTANTS
+# =============================================================================
+
+# Per-job manifests live next to the download history file
+MANIFEST_DIR_NAME = ".meowdown_jobs"
+
+# yt-dlp writes one JSON object per finished file (after it has been moved
+# into its final place), so the manifest is streamed as files complete.
+# Missing fields fall back to a literal JSON null.
+MANIFEST_TEMPLATE = (
+    '{"id": %(id|null)j, "extractor": %(extractor_key|null)j, '
+    '"url": %(original_url|null)j, "index": %(playlist_index|null)j, '
+    '"title": %(title|null)j, "uploader": %(uploader,channel|null)j, '
+    '"duration": %(duration|null)j, "format": %(format|null)j, '
+    '"artist": %(artist,creator|null)j, "album": %(album|null)j, '
+    '"track_number": %(track_number|null)j, "date": %(release_date,upload_date|null)j, '
+    '"thumbnail": %(thumbnails.-1.filepath|null)j, "thumbnail_url": %(thumbnail|null)j, '
+    '"path": %(filepath)j}'
+)
+
+# =============================================================================
+# 🛠️ UTILITY FUNCTIONS
+# =============================================================================
+
+def get_app_dir():
+    """Get application directory for storing binaries."""
+    if getattr(sys, 'frozen', False):
+        app_dir = Path(sys.executable).parent
+    else:
+        app_dir = Path(__file__).parent
+
+    bin_dir = app_dir / "bin"
+    bin_dir.mkdir(exist_ok=True)
+    return bin_dir
+
+def get_data_dir():
+    """Per-user directory for logs and other state shared between runs."""
+    data_dir = Path.home() / ".meowdown"
+    data_dir.mkdir(exist_ok=True)
+    return data_dir
+
+def get_ffmpeg_path():
+    """Get the path of the bundled FFmpeg binary (it may not exist yet)."""
+    return get_app_dir() / ("ffmpeg.exe" if platform.system() == "Windows" else "ffmpeg")
+
+def ffmpeg_available():
+    """True if FFmpeg is bundled or on the PATH."""
+    return get_ffmpeg_path().exists() or shutil.which("ffmpeg") is not None
+
+def add_ffmpeg_to_path():
+    """Put the bundled FFmpeg's folder on this process's PATH (inherited by children).
+
+    yt-dlp only looks on the PATH when it decides whether FFmpeg can
+    download and merge formats in one pass (``--ffmpeg-location`` isn't
+    consulted there).
+    """
+    bin_dir = str(get_ffmpeg_path().parent)
+    paths = os.environ.get("PATH", "").split(os.pathsep)
+    if bin_dir not in paths:
+        os.environ["PATH"] = os.pathsep.join([bin_dir] + [p for p in paths if p])
+
+def new_job_id():
+    """Create a sortable, unique job id."""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+# =============================================================================
+# 📜 JOB MANIFESTS
+# =============================================================================
+
+class JobManifest:
+    """JSON-lines record of the exact files a single download job produced.
+
+    yt-dlp appends an entry for every file as soon as it lands (via
+    ``--print-to-file after_move:...``); later stages such as the playlist
+    mixer append their own outputs with :meth:`record`. Downstream code reads
+    the manifest instead of scanning the destination folder.
+    """
+
+    def __init__(self, dest_path, job_id=None):
+        self.job_id = job_id or new_job_id()
+        self.path = Path(dest_path) / MANIFEST_DIR_NAME / f"{self.job_id}.jsonl"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.touch()
+        self.entries = []
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, manifest_path):
+        """Re-open an existing manifest file and load its entries."""
+        manifest_path = Path(manifest_path)
+        manifest = cls(manifest_path.parent.parent, job_id=manifest_path.stem)
+        manifest.poll()
+        return manifest
+
+    def ytdlp_args(self, tag=None):
+        """Extra yt-dlp arguments that stream finished files into this manifest.
+
+        ``tag`` is written into every entry, so several yt-dlp processes can
+        share one manifest and still tell their files apart.
+        """
+        template = MANIFEST_TEMPLATE
+        if tag:
+            template = '{"job": "%s", %s' % (tag, template[1:])
+        # The FILE argument is itself an output template, so escape any '%'
+        target = str(self.path).replace("%", "%%")
+        return ["--print-to-file", f"after_move:{template}", target]
+
+    def poll(self):
+        """Read entries appended since the last poll and return the new ones."""
+        with self._lock:
+            return self._poll_locked()
+
+    def _poll_locked(self):
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(self._offset)
+                chunk = f.read()
+        except FileNotFoundError:
+            return []
+
+        # Only consume complete lines; a partial line is picked up next time
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            return []
+        self._offset += end + 1
+
+        new_entries = []
+        for raw in chunk[:end].splitlines():
+            try:
+                entry = json.loads(raw.decode('utf-8'))
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                continue
+            if not isinstance(entry, dict) or not entry.get("path"):
+                continue
+            if not isinstance(entry.get("index"), int):
+                entry["index"] = None
+            entry.setdefault("stage", "download")
+            new_entries.append(entry)
+
+        self.entries.extend(new_entries)
+        return new_entries
+
+    def record(self, path, stage, **fields):
+        """Append a file produced by a later pipeline stage (mix, post-process...)."""
+        entry = {"path": str(path), "stage": stage, "index": None, **fields}
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.poll()
+        return entry
+
+    def files(self, suffix=None, stage="download"):
+        """Existing files from this job in playlist order, optionally filtered by suffix."""
+        self.poll()
+        seen = set()
+        ordered = []
+        for position, entry in enumerate(self.entries):
+            if stage and entry.get("stage") != stage:
+                continue
+            path = Path(entry["path"])
+            if path in seen or (suffix and path.suffix.lower() != suffix.lower()):
+                continue
+            seen.add(path)
+            index = entry.get("index")
+            ordered.append((index if index is not None else float('inf'), position, path))
+
+        ordered.sort(key=lambda item: (item[0], item[1]))
+        return [path for _, _, path in ordered if path.exists()]
+
+# =============================================================================
+# 🎬 COMMAND BUILDING
+# =============================================================================
+
+# "Max file size" choices in the UI as yt-dlp filter sizes
+MAX_FILESIZE_LIMITS = {
+    '50MB': '50M',
+    '100MB': '100M',
+    '250MB': '250M',
+    '500MB': '500M',
+    '1GB': '1000M',
+    '2GB': '2000M'
+}
+
+# "video_<quality>" -> height limit of its streams
+SPLIT_STREAM_HEIGHTS = {"720p": 720, "1080p": 1080, "1440p": 1440, "4K": 2160}
+
+def uses_deferred_tagging(format_type, options):
+    """True if MP3 tags and cover art are written by the tagging pool instead of yt-dlp."""
+    return format_type == "mp3_complete" and options.get('fast_tagging', False) and HAS_MUTAGEN
+
+def uses_thumbnail_cache(format_type, options):
+    """True if thumbnails and album art come from the engine's shared ThumbnailCache.
+
+    yt-dlp then skips ``--write-thumbnail`` and the engine fetches each
+    thumbnail URL once, converts it once and reuses it for every track.
+    """
+    if not options.get('cache_thumbnails', True):
+        return False
+    if format_type == "mp3_complete":
+        return uses_deferred_tagging(format_type, options)
+    return options.get('download_thumbnail', True)
+
+def uses_segmented_download(format_type, options):
+    """True if progressive video files are fetched as byte ranges over several connections.
+
+    yt-dlp then runs through the segmented downloader's launcher with
+    ``--downloader http:meowdown``; formats it can't split (HLS, DASH
+    fragments, live streams) still use yt-dlp's own downloaders, and
+    split video+audio streams and clips are left to FFmpeg (see
+    :func:`uses_split_streams` and :func:`uses_clip_sections`).
+    """
+    return (options.get('segmented_download', False) and not format_type.startswith("mp3")
+            and not uses_split_streams(format_type, options) and not uses_clip_sections(options))
+
+def uses_split_streams(format_type, options):
+    """True if video-only and audio-only streams are fetched together and merged by FFmpeg.
+
+    Pre-muxed formats often top out at 720p; separate streams reach the
+    requested resolution. FFmpeg reads both streams at once and copies
+    them into one file in a single pass (no re-encode).
+    """
+    return (options.get('split_streams', False) and ffmpeg_available()
+            and (format_type in ("mp4", "best")
+                 or (format_type.startswith("video_") and format_type.lower() != "video_worst")))
+
+def split_stream_selector(format_type):
+    """yt-dlp format selector for a video+audio pair, with a pre-muxed fallback."""
+    if format_type == "mp4":
+        return "bv*[ext=mp4]+ba[ext=m4a]/bv*+ba/best[ext=mp4]/best"
+    height = SPLIT_STREAM_HEIGHTS.get(format_type.split("_", 1)[-1])
+    if height is None:
+        return "bv*+ba/best"
+    return f"bv*[height<={height}]+ba/best[height<={height}]/best"
+
+TIMESTAMP_RE = re.compile(r'^(?:(\d+):)??(?:(\d+):)?(\d+(?:\.\d+)?)$')
+
+# Clips are saved next to the full video, named after where they start and end
+CLIP_NAME_SUFFIX = " ✂️%(section_start>%H-%M-%S)s-%(section_end>%H-%M-%S|end)s"
+
+def parse_timestamp(text):
+    """Seconds in ``"1:02:30"``, ``"2:30"`` or ``"150"``; raises ValueError."""
+    match = TIMESTAMP_RE.match(text.strip())
+    if not match:
+        raise ValueError(f"'{text.strip()}' is not a time like 1:02:30, 2:30 or 150")
+    hours, minutes, seconds = match.groups()
+    return int(hours or 0) * 3600 + int(minutes or 0) * 60 + float(seconds)
+
+def parse_time_ranges(text):
+    """``[(start, end), ...]`` in seconds from ``"1:02:30-1:04:30, 90-120"``.
+
+    An open end (``"2:00:00-"``) runs to the end of the video (``end`` is
+    None). Raises ValueError for anything else.
+    """
+    ranges = []
+    for part in re.split(r'[,;\n]', text or ""):
+        if not part.strip():
+            continue
+        start, dash, end = part.partition("-")
+        if not dash:
+            raise ValueError(f"'{part.strip()}' needs a start and an end, like 1:00-2:30")
+        start = parse_timestamp(start) if start.strip() else 0.0
+        end = parse_timestamp(end) if end.strip() else None
+        if end is not None and end <= start:
+            raise ValueError(f"'{part.strip()}' ends before it starts")
+        ranges.append((start, end))
+    return ranges
+
+def uses_clip_sections(options):
+    """True if only time ranges or chapters of each video are downloaded.
+
+    yt-dlp hands those to FFmpeg, which seeks with HTTP range requests (or
+    only fetches the HLS segments it needs) and cuts at keyframes with a
+    stream copy; ``precise_cuts`` re-encodes around the cuts instead.
+    """
+    return options.get('clip_mode', False) and bool(options.get('clip_ranges') or options.get('clip_chapters'))
+
+def _section_seconds(value):
+    """``12345.678`` -> ``"12345.678"``: plain decimal seconds, never rounded to a few digits."""
+    return format(value, ".6f").rstrip("0").rstrip(".")
+
+def clip_section_args(options):
+    """``--download-sections`` arguments for the clip options."""
+    args = []
+    for start, end in options.get('clip_ranges') or []:
+        end = "inf" if end is None else _section_seconds(end)
+        args.extend(["--download-sections", f"*{_section_seconds(start)}-{end}"])
+    for chapter in options.get('clip_chapters') or []:
+        args.extend(["--download-sections", f"(?i){re.escape(chapter)}"])  # Chapter titles containing it
+    if options.get('precise_cuts', False):
+        args.append("--force-keyframes-at-cuts")
+    return args
+
+def uses_subtitle_stage(options):
+    """True if subtitles are fetched by the engine's SubtitleStage instead of yt-dlp.
+
+    The stage fetches them while the media downloads, prefers manual
+    subtitles over automatic captions, saves them as SRT and caches them.
+    """
+    return options.get('download_subtitles', False) and options.get('subtitle_stage', True)
+
+def build_download_command(dest_path, format_type, options=None):
+    """Build the yt-dlp command for a download job (URLs are appended by the caller)."""
+    if options is None:
+        options = {}
+    dest_path = Path(dest_path)
+
+    # Get FFmpeg path
+    ffmpeg_path = get_ffmpeg_path()
+
+    # Build base command (URL will be added later for each batch)
+    cmd = [sys.executable, "-m", "yt_dlp", "--newline"]
+    if uses_segmented_download(format_type, options):
+        # Same yt-dlp, started through the launcher that registers the downloader
+        connections = options.get('segment_connections', SEGMENT_CONNECTIONS)
+        cmd = [sys.executable, str(SEGMENTED_SCRIPT), "--newline",
+               "--downloader", f"http:{DOWNLOADER_NAME}", "-N", str(connections)]
+
+    if ffmpeg_path.exists():
+        cmd.extend(["--ffmpeg-location", str(ffmpeg_path)])
+
+    # Handle channel mode
+    if options.get('channel_mode', False):
+        # For channel mode, we want all videos from the channel
+        cmd.append("--yes-playlist")
+        cmd.extend(["--playlist-end", str(options.get('channel_limit', 25))])
+    elif options.get('is_playlist', False):
+        cmd.append("--yes-playlist")
+        max_downloads = options.get('max_downloads', 50)
+        cmd.extend(["--playlist-end", str(max_downloads)])
+    else:
+        cmd.append("--no-playlist")
+
+    # Handle format and quality
+    if format_type == "mp3_complete":
+        # Complete MP3 with everything embedded
+        cmd.extend(["-x", "--audio-format", "mp3"])
+
+        # Handle audio quality
+        audio_quality = options.get('audio_quality', '320 kbps (Best) - *audiophile cats*')
+        if "320 kbps" in audio_quality:
+            cmd.extend(["--audio-quality", "0"])
+        elif "256 kbps" in audio_quality:
+            cmd.extend(["--audio-quality", "2"])
+        elif "192 kbps" in audio_quality:
+            cmd.extend(["--audio-quality", "5"])
+        elif "128 kbps" in audio_quality:
+            cmd.extend(["--audio-quality", "7"])
+        elif "96 kbps" in audio_quality:
+            cmd.extend(["--audio-quality", "9"])
+        else:
+            cmd.extend(["--audio-quality", "0"])  # Default to 320kbps for complete version
+
+        if uses_deferred_tagging(format_type, options):
+            # Tags and cover art are written by the tagging pool once the
+            # track lands, freeing the download slot; the cover comes from
+            # the thumbnail cache unless that is switched off
+            if not uses_thumbnail_cache(format_type, options):
+                cmd.append("--write-thumbnail")
+        else:
+            # Embed EVERYTHING into the MP3
+            cmd.extend([
+                "--add-metadata",           # Add metadata tags
+                "--embed-metadata",         # Embed metadata into file
+                "--embed-thumbnail",        # Embed thumbnail as album art
+                "--convert-thumbnails", "jpg"  # Convert to JPG for better compatibility
+            ])
+
+        # Don't save separate thumbnail files - only embed them
+        # (removing --write-thumbnail to avoid clutter)
+
+        if options.get('playlist_numbering', False):
+            output_template = str(dest_path / "%(playlist_index)03d - 🎵%(artist,uploader|Unknown Artist)s - %(title)s.%(ext)s")
+        else:
+            output_template = str(dest_path / "🎵%(artist,uploader|Unknown Artist)s - %(title)s.%(ext)s")
+    elif format_type == "best":
+        cmd.extend(["-f", "best"])
+        if options.get('playlist_numbering', False):
+            output_template = str(dest_path / "%(playlist_index)03d - 🎬%(title)s.%(ext)s")
+        else:
+            output_template = str(dest_path / "🎬%(title)s.%(ext)s")
+    elif format_type.startswith("video_"):
+        quality = format_type.split("_")[1]
+        if quality == "720p":
+            cmd.extend(["-f", "best[height<=720]/best"])
+        elif quality == "1080p":
+            cmd.extend(["-f", "best[height<=1080]/best"])
+        elif quality == "1440p":
+            cmd.extend(["-f", "best[height<=1440]/best"])
+        elif quality == "4K":
+            cmd.extend(["-f", "best[height<=2160]/best"])
+        elif quality == "best":
+            cmd.extend(["-f", "best"])
+        elif quality == "worst":
+            cmd.extend(["-f", "worst"])
+
+        if options.get('playlist_numbering', False):
+            output_template = str(dest_path / "%(playlist_index)03d - 🎬%(title)s.%(ext)s")
+        else:
+            output_template = str(dest_path / "🎬%(title)s.%(ext)s")
+    else:  # Default MP4
+        cmd.extend(["-f", "best[ext=mp4]/best"])
+        if options.get('playlist_numbering', False):
+            output_template = str(dest_path / "%(playlist_index)03d - 🎬%(title)s.%(ext)s")
+        else:
+            output_template = str(dest_path / "🎬%(title)s.%(ext)s")
+
+    # Separate video and audio streams, fetched and stream-copied together by FFmpeg
+    if uses_split_streams(format_type, options):
+        cmd[cmd.index("-f") + 1] = split_stream_selector(format_type)
+        cmd.extend(["--merge-output-format", "mp4" if format_type == "mp4" else "mp4/mkv",
+                    "--downloader", "http:ffmpeg"])
+
+    # Handle auto-organization
+    organize_type = options.get('auto_organize', '🗂️ No organization - *all in one folder*')
+    if "By Date" in organize_type:
+        output_template = str(dest_path / "%(upload_date>%Y)s/%(upload_date>%m)s/%(upload_date>%d)s" / Path(output_template).name)
+    elif "By Channel" in organize_type:
+        output_template = str(dest_path / "%(uploader)s" / Path(output_template).name)
+    elif "By Type" in organize_type:
+        if format_type in ["mp3", "mp3_meta"]:
+            output_template = str(dest_path / "Audio" / Path(output_template).name)
+        else:
+            output_template = str(dest_path / "Video" / Path(output_template).name)
+    elif "By Playlist" in organize_type:
+        output_template = str(dest_path / "%(playlist_title)s" / Path(output_template).name)
+
+    # Only the chosen time ranges / chapters, each saved as its own file
+    if uses_clip_sections(options):
+        cmd.extend(clip_section_args(options))
+        output_template = output_template[:-len(".%(ext)s")] + CLIP_NAME_SUFFIX + ".%(ext)s"
+
+    cmd.extend(["-o", output_template])
+
+    # Add smart filters
+    filters = []
+
+    # Duration filters
+    if options.get('duration_filter', False):
+        duration_min = options.get('duration_min', 0)
+        duration_max = options.get('duration_max', 0)
+        if duration_min > 0:
+            filters.append(f"duration>={duration_min}")
+        if duration_max > 0:
+            filters.append(f"duration<={duration_max}")
+
+    # File size filters
+    if options.get('size_filter', False):
+        max_size = options.get('max_filesize', 'No limit')
+        if max_size != 'No limit':
+            size_bytes = MAX_FILESIZE_LIMITS.get(max_size, '500M')
+            filters.append(f"filesize<={size_bytes}")
+
+    # Content type filters - disable live filter for now as it has syntax issues
+    # if options.get('skip_live', True):
+    #     # Live stream filtering needs to be handled differently
+    #     pass
+
+    if options.get('skip_shorts', False):
+        filters.append("duration>=60")  # Skip videos shorter than 60 seconds
+
+    # Language filters - temporarily disabled to avoid syntax issues
+    # lang_pref = options.get('language_pref', '🌐 Any language')
+    # if "English only" in lang_pref:
+    #     filters.append("language=en")
+    # elif "Spanish only" in lang_pref:
+    #     filters.append("language=es")
+    # elif "French only" in lang_pref:
+    #     filters.append("language=fr")
+    # elif "German only" in lang_pref:
+    #     filters.append("language=de")
+    # elif "Japanese only" in lang_pref:
+    #     filters.append("language=ja")
+    # elif "Korean only" in lang_pref:
+    #     filters.append("language=ko")
+
+    # Apply filters if any
+    if filters:
+        filter_string = " & ".join(filters)
+        if format_type in ["mp3", "mp3_meta"]:
+            cmd.extend(["-f", f"bestaudio[{filter_string}]/bestaudio"])
+        else:
+            # For video, modify existing format selector
+            for i, arg in enumerate(cmd):
+                if arg == "-f" and i + 1 < len(cmd):
+                    current_format = cmd[i + 1]
+                    cmd[i + 1] = f"{current_format}[{filter_string}]/{current_format}"
+                    break
+
+    # Add download archive for history (a clip doesn't make a video downloaded)
+    if options.get('download_archive', True) and not uses_clip_sections(options):
+        archive_file = dest_path / ".meowdown_history.txt"
+        cmd.extend(["--download-archive", str(archive_file)])
+
+    # Add retry options
+    if options.get('auto_retry', True):
+        cmd.extend(["--retries", "3", "--fragment-retries", "3"])
+
+    # Add metadata options
+    if options.get('download_metadata', True):
+        cmd.append("--write-info-json")
+
+    # Add thumbnail options (cached thumbnails are saved by the engine)
+    if options.get('download_thumbnail', True) and not uses_thumbnail_cache(format_type, options):
+        cmd.append("--write-thumbnail")
+
+    # Add subtitles options (the subtitle stage fetches them itself)
+    if options.get('download_subtitles', False) and not uses_subtitle_stage(options):
+        cmd.extend(["--write-subs", "--write-auto-subs", "--sub-langs", ",".join(SUBTITLE_LANGS)])
+
+    # Add metadata embedding for audio/video files
+    if options.get('embed_metadata', True):
+        cmd.append("--add-metadata")
+        if format_type in ["mp3", "mp3_meta"]:
+            cmd.append("--embed-metadata")
+
+    return cmd
+
+# =============================================================================
+# 🎵 PLAYLIST MIXES
+# =============================================================================
+
+def mix_file_name(files):
+    """Name of the playlist mix made from ``files``."""
+    first_file = files[0]
+    if "🎬" in first_file.name:
+        # Extract playlist name from first file
+        base_name = first_file.name.split(" - ", 1)[-1].split(".")[0]
+        return f"🎵 PLAYLIST MIX - {base_name}.mp3"
+    return f"🎵 PLAYLIST MIX - {len(files)} tracks.mp3"
+
+def write_concat_list(files, list_path):
+    """Write an FFmpeg concat demuxer file list."""
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for media_file in files:
+            # Escape single quotes for FFmpeg
+            file_path = str(media_file).replace("'", "'\\''")
+            f.write(f"file '{file_path}'\n")
+
+def build_mix_command(ffmpeg_path, list_path, mix_path, format_type, files):
+    """FFmpeg command that concatenates the files in ``list_path`` into one MP3."""
+    # For MP3 complete files, use direct copy for better quality
+    if format_type == "mp3_complete" and all(f.suffix == '.mp3' for f in files):
+        # Direct MP3 concatenation - preserves embedded metadata and thumbnails
+        return [
+            str(ffmpeg_path),
+            "-f", "concat",
+            "-safe", "0",
+            "-i", str(list_path),
+            "-c", "copy",  # Copy without re-encoding
+            "-map_metadata", "0",  # Copy metadata from first file
+            str(mix_path),
+            "-y"
+        ]
+    # For other formats, convert to MP3
+    return [
+        str(ffmpeg_path),
+        "-f", "concat",
+        "-safe", "0",
+        "-i", str(list_path),
+        "-vn",  # No video
+        "-acodec", "libmp3lame",  # MP3 encoding
+        "-ab", "320k",  # High quality bitrate
+        str(mix_path),
+        "-y"
+    ]
+
+# =============================================================================
+# 📦 CHUNKED MULTI-URL INVOCATIONS
+# =============================================================================
+
+# How many batch URLs share one yt-dlp process by default
+DEFAULT_CHUNK_SIZE = 10
+
+def plan_chunked_invocations(jobs, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Group ``(cmd, url)`` jobs with identical commands into chunks of URLs.
+
+    Returns a list of ``(cmd, urls)`` pairs in first-seen order, so every
+    chunk can be run as a single ``cmd + urls`` yt-dlp invocation.
+    """
+    chunk_size = max(1, int(chunk_size or 1))
+    groups = {}
+    for cmd, url in jobs:
+        groups.setdefault(tuple(cmd), []).append(url)
+
+    invocations = []
+    for cmd, urls in groups.items():
+        for start in range(0, len(urls), chunk_size):
+            invocations.append((list(cmd), urls[start:start + chunk_size]))
+    return invocations
+
+def _display_url(url):
+    """Mirror how yt-dlp shortens URLs in its 'Extracting URL' lines."""
+    if len(url) <= 120:
+        return url
+    return f"{url[:97]}...{url[-20:]}"
+
+class ChunkOutputTracker:
+    """Attribute the output of one multi-URL yt-dlp run back to its input URLs.
+
+    yt-dlp handles its URLs strictly in order and announces each one with an
+    ``Extracting URL:`` line, so errors are charged to the URL being worked
+    on and finished files come from the job manifest.
+    """
+
+    EXTRACTING_RE = re.compile(r'^\[[^\]]+\] Extracting URL: (.+)$')
+
+    def __init__(self, urls):
+        self.urls = list(urls)
+        self.results = {url: {"status": "pending", "errors": [], "files": []} for url in self.urls}
+        self._pending = {}
+        for url in self.urls:
+            self._pending.setdefault(_display_url(url), []).append(url)
+        self.current = self.urls[0] if self.urls else None
+        self._last_started = -1
+
+    def feed_line(self, line):
+        """Process one output line; returns the URL if work just moved on to it."""
+        line = line.strip()
+        match = self.EXTRACTING_RE.match(line)
+        if match and self._pending.get(match.group(1)):
+            url = self._pending[match.group(1)].pop(0)
+            self.current = url
+            self._last_started = max(self._last_started, self.urls.index(url))
+            return url
+        if "ERROR:" in line and self.current is not None:
+            self.results[self.current]["errors"].append(line)
+        return None
+
+    def add_files(self, entries):
+        """Attribute manifest entries to the URL that produced them."""
+        for entry in entries:
+            url = entry.get("url") if entry.get("url") in self.results else self.current
+            if url is not None:
+                self.results[url]["files"].append(entry["path"])
+
+    def finish(self, returncode):
+        """Settle every URL's status once the process has exited."""
+        unexplained = returncode != 0 and not any(r["errors"] for r in self.results.values())
+        first_unreached = max(self._last_started, 0)
+        for position, url in enumerate(self.urls):
+            result = self.results[url]
+            if result["errors"]:
+                result["status"] = "failed"
+            elif unexplained and position >= first_unreached and not result["files"]:
+                result["status"] = "failed"
+                result["errors"].append(f"yt-dlp exited with code {returncode} before finishing this URL")
+            else:
+                result["status"] = "ok"
+        return self.results
+
+# =============================================================================
+# 🗺️ DOWNLOAD PLANS
+# =============================================================================
+
+# Printed by yt-dlp for every entry of a flat (metadata-only) extraction;
+# playlists and channels are listed without visiting each video
+PLAN_TEMPLATE = (
+    '{"id": %(id|null)j, "extractor": %(ie_key,extractor_key|null)j, '
+    '"title": %(title|null)j, "duration": %(duration|null)j, '
+    '"index": %(playlist_index|null)j, "playlist": %(playlist_title|null)j, '
+    '"url": %(webpage_url,url|null)j}'
+)
+
+# Even a 1000-video channel lists in well under this
+PLAN_TIMEOUT = 300
+
+def build_plan_command(download_cmd):
+    """yt-dlp command listing what ``download_cmd`` would fetch (URLs are appended by the caller)."""
+    cmd = [sys.executable, "-m", "yt_dlp", "--flat-playlist", "--ignore-errors",
+           "--no-quiet", "--print", PLAN_TEMPLATE]
+    # Same playlist scope as the download itself
+    for i, arg in enumerate(download_cmd):
+        if arg in ("--yes-playlist", "--no-playlist"):
+            cmd.append(arg)
+        elif arg == "--playlist-end" and i + 1 < len(download_cmd):
+            cmd.extend([arg, download_cmd[i + 1]])
+    return cmd
+
+def read_download_archive(path):
+    """Entries (``"<extractor> <id>"``) already recorded in a yt-dlp download archive."""
+    try:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            return {line.strip() for line in f if line.strip()}
+    except OSError:
+        return set()
+
+def plan_download(urls, download_cmd, format_cache=None, runner=None, timeout=PLAN_TIMEOUT):
+    """List what downloading ``urls`` with ``download_cmd`` would fetch, without fetching it.
+
+    Returns ``{"entries": [...], "errors": {url: [lines]}}``. Every entry
+    has the ``source`` URL it came from, its playlist ``index`` (None for a
+    single video), ``id``, ``extractor``, ``title``, ``duration``, whether
+    it is ``archived`` already and its estimated ``size`` in bytes under
+    ``download_cmd`` (``size_exact`` if the video is in ``format_cache``).
+    """
+    archive = set()
+    if "--download-archive" in download_cmd:
+        archive = read_download_archive(download_cmd[download_cmd.index("--download-archive") + 1])
+
+    cmd = build_plan_command(download_cmd)
+    tag = f"plan-{new_job_id()}"
+    if format_cache is not None:
+        # Single videos are fully extracted anyway - keep their formats
+        cmd.extend(format_cache.ytdlp_args(tag=tag))
+
+    tracker = ChunkOutputTracker(urls)
+    entries = []
+
+    def on_line(line):
+        tracker.feed_line(line)
+        if not line.startswith("{"):
+            return
+        try:
+            info = json.loads(line)
+        except json.JSONDecodeError:
+            return
+        extractor = info.get("extractor") or "Generic"
+        entries.append({
+            "source": tracker.current,
+            "index": info.get("index"),
+            "id": info.get("id"),
+            "extractor": extractor,
+            "title": info.get("title") or info.get("url") or info.get("id"),
+            "duration": info.get("duration"),
+            "playlist": info.get("playlist"),
+            "url": info.get("url"),
+            "archived": f"{extractor.lower()} {info.get('id')}" in archive,
+            "size": None,
+            "size_exact": False,
+        })
+
+    result = (runner or shared_runner()).run_sync(cmd + list(urls), on_line=on_line, timeout=timeout)
+    results = tracker.finish(result.returncode)
+    if result.timed_out:
+        results[tracker.current]["errors"].append("ERROR: listing timed out")
+
+    if format_cache is not None:
+        format_cache.ingest(tag)
+        for entry in entries:
+            entry["size"], entry["size_exact"] = format_cache.estimate_video(
+                entry["extractor"], entry["id"], download_cmd, entry["duration"])
+    errors = {url: r["errors"] for url, r in results.items() if r["errors"]}
+    return {"entries": entries, "errors": errors}
+
+def playlist_items_spec(indices):
+    """``[1, 2, 3, 7, 9, 10]`` -> ``"1-3,7,9-10"`` for ``--playlist-items``."""
+    ranges = []
+    for index in sorted(set(indices)):
+        if ranges and index == ranges[-1][1] + 1:
+            ranges[-1][1] = index
+        else:
+            ranges.append([index, index])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+def planned_invocations(download_cmd, entries):
+    """``(cmd, url)`` jobs that download exactly the selected plan ``entries``.
+
+    Playlists keep their URL (so numbering and playlist folders still work)
+    and are narrowed with ``--playlist-items``; sources with nothing
+    selected are left out.
+    """
+    by_source = {}
+    for entry in entries:
+        by_source.setdefault(entry["source"], []).append(entry["index"])
+
+    jobs = []
+    for source, indices in by_source.items():
+        cmd = list(download_cmd)
+        if None not in indices:
+            cmd.extend(["--playlist-items", playlist_items_spec(indices)])
+        jobs.append((cmd, source))
+    return jobs
+
+# =============================================================================
+# 🔁 FAILURE CLASSIFICATION & RETRIES
+# =============================================================================
+
+FAILURE_RATE_LIMITED = "rate_limited"
+FAILURE_FORBIDDEN = "forbidden"
+FAILURE_GEO_BLOCKED = "geo_blocked"
+FAILURE_REMOVED = "removed"
+FAILURE_EXTRACTOR = "extractor_broken"
+FAILURE_NETWORK = "network"
+FAILURE_UNKNOWN = "unknown"
+
+# Checked in order - the first matching category wins
+FAILURE_PATTERNS = [
+    (FAILURE_RATE_LIMITED, re.compile(
+        r"HTTP Error 429|Too Many Requests|rate[- ]?limit|confirm you.re not a bot", re.I)),
+    (FAILURE_FORBIDDEN, re.compile(r"HTTP Error 403|Forbidden", re.I)),
+    (FAILURE_GEO_BLOCKED, re.compile(
+        r"not available (?:in|from) your (?:country|location)|geo[- ]?restrict|geo[- ]?block", re.I)),
+    (FAILURE_REMOVED, re.compile(
+        r"Video unavailable|has been removed|no longer available|is private|Private video|"
+        r"account (?:has been|was) terminated|does not exist|HTTP Error 404|HTTP Error 410", re.I)),
+    (FAILURE_EXTRACTOR, re.compile(
+        r"Unsupported URL|Unable to extract|please report this issue|Unable to parse|"
+        r"\bKeyError\b|\bTypeError\b|\bIndexError\b", re.I)),
+    (FAILURE_NETWORK, re.compile(
+        r"timed out|Connection (?:reset|refused|aborted)|Temporary failure in name resolution|"
+        r"Name or service not known|getaddrinfo failed|urlopen error|IncompleteRead|"
+        r"HTTP Error 5\d\d|SSL|Remote end closed|Network is unreachable|Unable to download", re.I)),
+]
+
+# What to do about each kind of failure:
+#   backoff - retry after an exponential, jittered delay and slow the host down
+#   requeue - retry once the rest of the batch has had its turn
+#   skip    - give up straight away, retrying can't help
+RETRY_POLICIES = {
+    FAILURE_RATE_LIMITED: {"action": "backoff", "max_attempts": 5, "base_delay": 30.0},
+    FAILURE_FORBIDDEN: {"action": "backoff", "max_attempts": 3, "base_delay": 10.0},
+    FAILURE_GEO_BLOCKED: {"action": "skip"},
+    FAILURE_REMOVED: {"action": "skip"},
+    FAILURE_EXTRACTOR: {"action": "skip"},
+    FAILURE_NETWORK: {"action": "requeue", "max_attempts": 3},
+    FAILURE_UNKNOWN: {"action": "requeue", "max_attempts": 2},
+}
+
+MAX_BACKOFF_SECONDS = 15 * 60
+
+def classify_failure(lines):
+    """Sort yt-dlp error output into one of the FAILURE_* categories."""
+    for category, pattern in FAILURE_PATTERNS:
+        if any(pattern.search(line) for line in lines):
+            return category
+    return FAILURE_UNKNOWN
+
+def backoff_delay(attempt, base_delay, cap=MAX_BACKOFF_SECONDS):
+    """Exponential backoff with "equal jitter" for the given (1-based) attempt."""
+    delay = min(cap, base_delay * (2 ** (attempt - 1)))
+    return random.uniform(delay / 2, delay)
+
+def url_host(url):
+    """Host name used to group jobs for per-host throttling."""
+    host = (urllib.parse.urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+class HostThrottle:
+    """Remembers which hosts told us to slow down, and until when."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready_at = {}
+        self._strikes = {}
+
+    def penalize(self, host, delay=None, base_delay=RETRY_POLICIES[FAILURE_RATE_LIMITED]["base_delay"]):
+        """Record a rate-limit signal; returns the pause applied to the host."""
+        with self._lock:
+            strikes = self._strikes.get(host, 0) + 1
+            self._strikes[host] = strikes
+            if delay is None:
+                delay = backoff_delay(strikes, base_delay)
+            self._ready_at[host] = max(self._ready_at.get(host, 0.0), time.time() + delay)
+            return delay
+
+    def reward(self, host):
+        """A job on this host went through, so forget earlier strikes."""
+        with self._lock:
+            self._strikes.pop(host, None)
+
+    def ready_at(self, host):
+        """Timestamp before which no new job should hit ``host``."""
+        with self._lock:
+            return self._ready_at.get(host, 0.0)
+
+    def snapshot(self):
+        """Hosts that are currently being held back, with seconds remaining."""
+        now = time.time()
+        with self._lock:
+            return {host: ready - now for host, ready in self._ready_at.items() if ready > now}
+
+# =============================================================================
+# 💽 DISK SPACE
+# =============================================================================
+
+# New jobs are held while a download disk has less than this left over
+# (after the remaining size of the jobs already writing to it)
+DISK_RESERVE_BYTES = 2 * 1024 ** 3
+
+# How often jobs held for disk space look again
+DISK_RECHECK_SECONDS = 10.0
+
+def _existing_path(path):
+    """``path`` or its nearest parent that exists (the folder may not be created yet)."""
+    path = Path(path).absolute()
+    while not path.exists() and path.parent != path:
+        path = path.parent
+    return path
+
+def free_disk_space(path):
+    """Free bytes on the disk that holds ``path``."""
+    return shutil.disk_usage(_existing_path(path)).free
+
+class DiskSpaceGuard:
+    """Admits jobs only while their download disk has room for them.
+
+    Each running job is counted with its estimated size minus what it has
+    already written, so a batch can't be admitted into space that's
+    already spoken for. Jobs of unknown size only need the reserve.
+    """
+
+    def __init__(self, reserve=DISK_RESERVE_BYTES):
+        self.reserve = reserve
+        self._lock = threading.Lock()
+        self._low = {}  # device -> free bytes when admission stopped
+
+    def admits(self, job, running):
+        """True if ``job`` fits on its disk next to the ``running`` jobs."""
+        if job.work_path is None:
+            return True
+        try:
+            where = _existing_path(job.work_path)
+            device = where.stat().st_dev
+            free = shutil.disk_usage(where).free
+        except OSError:
+            return True  # Can't tell - let yt-dlp find out
+        committed = sum(j.remaining_bytes() for j in running
+                        if j.work_path is not None and self._device(j.work_path) == device)
+        available = free - committed - self.reserve
+        with self._lock:
+            if available <= 0:
+                self._low[device] = free
+            else:
+                self._low.pop(device, None)
+        return available > 0 and available >= (job.estimated_bytes or 0)
+
+    @staticmethod
+    def _device(path):
+        try:
+            return _existing_path(path).stat().st_dev
+        except OSError:
+            return None
+
+    def low_disks(self):
+        """Number of disks below the reserve at the last check."""
+        with self._lock:
+            return len(self._low)
+
+# =============================================================================
+# 📝 OUTPUT CAPTURE
+# =============================================================================
+
+# Lines of tool output kept in memory per job (ERROR/WARNING lines are kept apart)
+OUTPUT_TAIL_LINES = 200
+MAX_IMPORTANT_LINES = 1000
+
+# Optional on-disk spill of the full output, rotated per job
+JOB_LOG_MAX_BYTES = 2 * 1024 * 1024
+JOB_LOG_BACKUPS = 2
+JOB_LOGS_KEPT = 200
+
+IMPORTANT_MARKERS = ("ERROR", "WARNING")
+
+class OutputCapture:
+    """Bounded capture of a subprocess's output.
+
+    Keeps the last ``limit`` lines plus every ERROR/WARNING line (up to
+    :data:`MAX_IMPORTANT_LINES`). With ``log_path`` the full output is also
+    written to disk, rotating at :data:`JOB_LOG_MAX_BYTES`.
+    """
+
+    def __init__(self, limit=OUTPUT_TAIL_LINES, log_path=None):
+        self._tail = collections.deque(maxlen=limit)
+        self._important = collections.deque(maxlen=MAX_IMPORTANT_LINES)
+        self.count = 0
+        self.log_path = Path(log_path) if log_path else None
+        self._log = None
+        self._log_bytes = 0
+        if self.log_path:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def __len__(self):
+        return self.count
+
+    def append(self, line):
+        line = line.rstrip("\r\n")
+        entry = (self.count, line)
+        self.count += 1
+        self._tail.append(entry)
+        if any(marker in line for marker in IMPORTANT_MARKERS):
+            self._important.append(entry)
+        if self.log_path:
+            self._spill(line)
+
+    def tail(self, n=None):
+        """The last ``n`` captured lines (all kept tail lines by default)."""
+        lines = [line for _, line in self._tail]
+        return lines[-n:] if n else lines
+
+    @property
+    def important(self):
+        return [line for _, line in self._important]
+
+    def lines(self):
+        """Every kept line (important lines plus the tail) in output order."""
+        merged = dict(self._important)
+        merged.update(self._tail)
+        return [merged[n] for n in sorted(merged)]
+
+    def text(self):
+        return "\n".join(self.lines())
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _spill(self, line):
+        try:
+            if self._log is None:
+                self._log = open(self.log_path, 'a', encoding='utf-8')
+                self._log_bytes = self._log.tell()
+            if self._log_bytes > JOB_LOG_MAX_BYTES:
+                self._rotate()
+            self._log.write(line + "\n")
+            self._log_bytes += len(line) + 1
+        except OSError:
+            self.log_path = None  # Disk trouble must never break a download
+
+    def _rotate(self):
+        self._log.close()
+        for n in range(JOB_LOG_BACKUPS, 0, -1):
+            source = self.log_path.with_name(f"{self.log_path.name}.{n - 1}") if n > 1 else self.log_path
+            if source.exists():
+                source.replace(self.log_path.with_name(f"{self.log_path.name}.{n}"))
+        self._log = open(self.log_path, 'w', encoding='utf-8')
+        self._log_bytes = 0
+
+def prune_job_logs(log_dir, keep=JOB_LOGS_KEPT):
+    """Delete all but the newest ``keep`` job logs (with their rotated parts)."""
+    log_dir = Path(log_dir)
+    if not log_dir.exists():
+        return
+    logs = sorted(log_dir.glob("*.log"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old_log in logs[keep:]:
+        for part in log_dir.glob(old_log.name + "*"):
+            try:
+                part.unlink()
+            except OSError:
+                pass
+
+def run_captured(cmd, capture, timeout=None, runner=None):
+    """Run ``cmd`` streaming its combined output into ``capture``.
+
+    Returns the exit code, or None if the command timed out.
+    """
+    try:
+        result = (runner or shared_runner()).run_sync(cmd, on_line=capture.append, timeout=timeout)
+    finally:
+        capture.close()
+    return None if result.timed_out else result.returncode
+
+# =============================================================================
+# 🧶 JOB CONTROL
+# =============================================================================
+
+# Lower numbers run first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 5
+PRIORITY_BACKGROUND = 10
+
+def resolve_job_priority(options, url_count=1):
+    """Pick a queue priority from the download options.
+
+    In auto mode a single link jumps ahead of bulk work, playlists and
+    batches run normally and channel syncs run in the background.
+    """
+    choice = options.get('queue_priority', '⚡ Auto')
+    if "High" in choice:
+        return PRIORITY_INTERACTIVE
+    if "Normal" in choice:
+        return PRIORITY_NORMAL
+    if "Background" in choice:
+        return PRIORITY_BACKGROUND
+    if options.get('channel_mode', False):
+        return PRIORITY_BACKGROUND
+    if url_count > 1 or options.get('is_playlist', False):
+        return PRIORITY_NORMAL
+    return PRIORITY_INTERACTIVE
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_PAUSED = "paused"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATES = {JOB_DONE, JOB_FAILED, JOB_CANCELLED}
+
+# =============================================================================
+# 👥 SHARED SESSIONS
+# =============================================================================
+
+# Daily download quotas look back this far
+QUOTA_WINDOW_SECONDS = 24 * 60 * 60
+
+# Finished jobs are forgotten this long after their whole batch finished
+# (what they downloaded still counts towards their session's quota)
+FINISHED_JOB_TTL = 3600
+
+class QuotaExceeded(RuntimeError):
+    """A session asked for more than its share of a shared engine."""
+
+class SessionLimits:
+    """Per-session limits of an engine shared by several users; None is unlimited.
+
+    ``max_running`` caps a session's jobs running at once, ``max_pending``
+    its unfinished jobs (queued, running or paused) and ``max_daily_bytes``
+    what its jobs downloaded in the last 24 hours. Jobs without an owner
+    (the cluster worker, benchmarks, retries' bookkeeping) are not limited.
+    """
+
+    def __init__(self, max_running=None, max_pending=None, max_daily_bytes=None):
+        self.max_running = max_running
+        self.max_pending = max_pending
+        self.max_daily_bytes = max_daily_bytes
+
+PROGRESS_RE = re.compile(r'(\d{1,3}(?:\.\d+)?)%')
+
+# Progress events are only emitted when the percentage moves this much
+# (yt-dlp --newline prints a line for every few KB)
+PROGRESS_EVENT_STEP = 0.01
+
+# Events a job keeps for its watchers; older ones are dropped (watchers
+# read them within seconds, long before that many more arrive)
+JOB_EVENTS_KEPT = 500
+
+class JobEvents:
+    """A job's bounded event log, read with cursors by any number of watchers.
+
+    A progress event replaces the one before it if nothing else came in
+    between, so the log grows with what happens rather than with every
+    percent. Each event has a sequence number; :meth:`since` returns the
+    events after a watcher's cursor and the cursor to pass next time.
+    """
+
+    def __init__(self, limit=JOB_EVENTS_KEPT):
+        self._events = collections.deque(maxlen=limit)
+        self._lock = threading.Lock()
+        self._next = 0
+
+    def append(self, event):
+        with self._lock:
+            if event[0] == "progress" and self._events and self._events[-1][1] == "progress":
+                self._events.pop()  # Superseded
+            self._events.append((self._next, *event))
+            self._next += 1
+
+    def since(self, cursor=0):
+        """``(events, cursor)``: the kept events numbered ``cursor`` or later, and the next cursor."""
+        with self._lock:
+            return [(kind, value) for seq, kind, value in self._events if seq >= cursor], self._next
+
+    def __iter__(self):
+        return iter(self.since()[0])
+
+    def __len__(self):
+        return len(self._events)
+
+def parse_output_line(line):
+    """Classify a yt-dlp output line as a ``(kind, value)`` progress event."""
+    if "[download]" in line:
+        if "Destination:" in line:
+            return ("found", line)
+        if "has already been downloaded" in line:
+            return ("already", line)
+        if "Downloading playlist:" in line:
+            return ("playlist", line)
+        match = PROGRESS_RE.search(line)
+        if match:
+            return ("progress", float(match.group(1)) / 100.0)
+        return None
+    if "[ffmpeg]" in line:
+        return ("converting", line)
+    if "[Metadata]" in line:
+        return ("metadata", line)
+    if "ERROR:" in line:
+        return ("error", line)
+    if "WARNING:" in line:
+        return ("warning", line)
+    return None
+
+FFMPEG_DURATION_RE = re.compile(r'^\s*Duration:\s*(\d+):(\d{2}):(\d{2}(?:\.\d+)?)')
+FFMPEG_TIME_RE = re.compile(r'\btime=\s*(\d+):(\d{2}):(\d{2}(?:\.\d+)?)')
+
+FFMPEG_RANGE_RE = re.compile(r'(\d+(?:\.\d+)?)-(\d+(?:\.\d+)?|inf)')
+
+def _section_length(time_range):
+    start, end = time_range
+    return None if end == "inf" else float(end) - float(start)
+
+def _hms_seconds(match):
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+class StreamMergeProgress:
+    """Progress of FFmpeg downloading and merging streams in one pass.
+
+    yt-dlp prints no percentages while FFmpeg does the download, but FFmpeg
+    prints every input's ``Duration:`` and then redraws a ``time=`` line;
+    the fraction is the time written so far over the longest input. Clips
+    are measured against their own length, from yt-dlp's list of time
+    ranges (one file per range, in that order).
+    """
+
+    def __init__(self):
+        self.duration = None
+        self.sections = []
+        self._section = -1
+
+    def feed(self, line):
+        """The merge's progress (0-1) after ``line``, or None if it says nothing about it."""
+        if "[info]" in line and "Downloading" in line:
+            if "format(s):" in line:
+                self.sections, self._section = [], -1  # Next video
+            elif "time ranges:" in line:
+                self.sections = [_section_length(r) for r in FFMPEG_RANGE_RE.findall(line.split("time ranges:", 1)[1])]
+            return None
+        if "[download] Destination:" in line:
+            self.duration = None  # Next file
+            self._section += 1
+            return None
+        match = FFMPEG_DURATION_RE.match(line)
+        if match:
+            self.duration = max(self.duration or 0, _hms_seconds(match))
+            if self.sections:
+                clip = self.sections[self._section % len(self.sections)]
+                self.duration = min(self.duration, clip or self.duration)
+            return None
+        match = FFMPEG_TIME_RE.search(line)
+        if match and self.duration:
+            return min(1.0, _hms_seconds(match) / self.duration)
+        return None
+
+class DownloadJob:
+    """A single yt-dlp invocation (one URL or a chunk of URLs) run by the engine."""
+
+    def __init__(self, cmd, urls, priority=PRIORITY_NORMAL, batch_id=None, manifest=None,
+                 auto_retry=False, attempt=1, not_before=0.0, log_dir=None, format_cache=None,
+                 dest_path=None, estimated_bytes=None, tag_files=False, thumbnails=False,
+                 subtitle_stage=None, owner=None, rate_limit=None, staging=None):
+        self.job_id = new_job_id()
+        self.batch_id = batch_id or self.job_id
+        self.cmd = list(cmd)
+        self.urls = list(urls)
+        self.host = url_host(self.urls[0]) if self.urls else ""
+        self.priority = priority
+        self.manifest = manifest
+        self.format_cache = format_cache
+        if dest_path is None and manifest is not None:
+            dest_path = manifest.path.parent.parent
+        self.dest_path = Path(dest_path) if dest_path is not None else None
+        # Work in the staging area's scratch folders and publish finished files
+        self.staging = staging if manifest is not None and self.dest_path is not None else None
+        self.staged_manifest = None
+        self.staging_kept = False
+        if estimated_bytes is None and format_cache is not None:
+            estimated_bytes = sum(format_cache.estimate(url, self.cmd) or 0 for url in self.urls)
+        self.estimated_bytes = estimated_bytes
+        self.tag_files = tag_files
+        self.thumbnails = thumbnails
+        self.subtitle_stage = subtitle_stage
+        self.owner = owner
+        self.rate_limit = rate_limit
+        self.auto_retry = auto_retry
+        self.attempt = attempt
+        self.not_before = not_before
+        self.state = JOB_QUEUED
+        self.percent = 0.0
+        self.events = JobEvents()
+        self.output = OutputCapture(log_path=Path(log_dir) / f"{self.job_id}.log" if log_dir else None)
+        self._last_progress = None
+        self._disk_held = False
+        self.results = {}
+        self.returncode = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.process = None
+        self.cancel_requested = False
+        self.pause_requested = False
+        self.preempted = False
+        self._task = None
+        self._counted = False
+        self._tagging = []
+        self._thumbnails = []
+        self._subtitles = []
+        self._publishing = []
+        self._subtitle_fetches = {}
+        self.metrics = JobMetrics(self.created_at)
+        self._manifest_cursor = 0
+        self._done = threading.Event()
+
+    @property
+    def finished(self):
+        return self.state in FINISHED_STATES
+
+    def wait(self, timeout=None):
+        """Block until the job has finished; returns False on timeout."""
+        return self._done.wait(timeout)
+
+    def emit(self, kind, value=None):
+        """Append a progress event for the UI (and any other watchers)."""
+        if kind == "progress":
+            if (self._last_progress is not None and value < 1.0
+                    and abs(value - self._last_progress) < PROGRESS_EVENT_STEP):
+                return
+            self._last_progress = value
+        elif kind == "found":
+            self._last_progress = None
+        self.events.append((kind, value))
+
+    def command(self):
+        """Full yt-dlp command line for this job."""
+        cmd = list(self.cmd)
+        if self.staging is not None:
+            # Finished files are listed in a manifest of the batch's scratch
+            # folder until they have been published
+            key = self.manifest.job_id
+            cmd = self.staging.command(cmd, self.dest_path, key)
+            self.staged_manifest = JobManifest(self.staging.batch_dir(key), job_id=key)
+            cmd.extend(self.staged_manifest.ytdlp_args(tag=self.job_id))
+        elif self.manifest is not None:
+            cmd.extend(self.manifest.ytdlp_args(tag=self.job_id))
+        if self.format_cache is not None:
+            cmd.extend(self.format_cache.ytdlp_args(tag=self.job_id))
+        if self.subtitle_stage is not None:
+            cmd.extend(self.subtitle_stage.ytdlp_args(tag=self.job_id))
+        if self.rate_limit:
+            cmd.extend(["--limit-rate", str(int(self.rate_limit))])
+        return cmd + self.urls
+
+    def remaining_bytes(self):
+        """Estimated bytes this job has yet to write."""
+        return max(0, (self.estimated_bytes or 0) - self.metrics.bytes)
+
+    @property
+    def work_path(self):
+        """Folder yt-dlp writes into: the staging area for staged jobs."""
+        return self.staging.root if self.staging is not None else self.dest_path
+
+    def collect_files(self):
+        """Pick this job's new entries out of the (possibly shared) manifest.
+
+        Staged jobs read the scratch manifest, so their entries still
+        point into the staging area.
+        """
+        manifest = self.staged_manifest or self.manifest
+        if manifest is None:
+            return []
+        manifest.poll()
+        entries = manifest.entries[self._manifest_cursor:]
+        self._manifest_cursor += len(entries)
+        return [entry for entry in entries if entry.get("job") == self.job_id]
+
+class DownloadEngine:
+    """Runs download jobs in the background with priorities and job control.
+
+    A dispatcher thread picks the next job and the :class:`ProcessRunner`
+    event loop runs it, so any number of yt-dlp children share one loop
+    instead of needing a thread each. Jobs outlive the Streamlit script run
+    that submitted them, so the UI can cancel, pause or resume them from any
+    later rerun. Every finished job is recorded in :attr:`metrics`. With
+    ``log_dir`` every job's full output is also spilled to
+    ``<log_dir>/<job_id>.log``. ``job_timeout`` and ``idle_timeout``
+    (seconds without output, paused time excluded) stop stuck runs. With a
+    ``format_cache`` every job records the formats yt-dlp negotiated and the
+    sizes it actually downloaded, for local estimates next time. Jobs only
+    start while their disk keeps ``disk_reserve`` bytes free after their
+    estimated size (see :class:`DiskSpaceGuard`). Jobs submitted with
+    ``tag_files`` hand every MP3 to the ``tagger`` pool as it lands and give
+    their worker slot back as soon as yt-dlp exits. Jobs submitted with
+    ``thumbnails`` take thumbnails and album art from ``thumbnail_cache``
+    (saved next to videos, or handed to the tagger as cover art), and jobs
+    submitted with ``subtitles`` get theirs from ``subtitle_stage``. With a
+    ``workers`` pool, yt-dlp runs in pre-started worker processes instead
+    of a fresh interpreter per job. With a ``staging`` area
+    (:class:`~meowdown_staging.StagingArea`) jobs with a manifest download
+    into local scratch folders and only their finished files are moved into
+    the download folder.
+
+    One engine can serve every session of a Streamlit server. Jobs carry
+    the ``owner`` (session) that submitted them; among jobs of the same
+    priority the session with the fewest running jobs goes first (round
+    robin on ties), ``limits`` (:class:`SessionLimits`) cap what a single
+    session may queue and run, and ``bandwidth_limit`` (bytes/s) is split
+    evenly over the worker slots so all downloads together stay below it.
+    """
+
+    def __init__(self, max_workers=2, metrics=None, log_dir=None, runner=None,
+                 job_timeout=None, idle_timeout=None, format_cache=None,
+                 disk_reserve=DISK_RESERVE_BYTES, tagger=None, thumbnail_cache=None,
+                 subtitle_stage=None, workers=None, limits=None, bandwidth_limit=None, staging=None):
+        self.max_workers = max_workers
+        self.limits = limits or SessionLimits()
+        self.bandwidth_limit = bandwidth_limit
+        self.runner = runner or shared_runner()
+        self.job_timeout = job_timeout
+        self.idle_timeout = idle_timeout
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        self.format_cache = format_cache
+        self.tagger = tagger or TaggingPool(ffmpeg_path=get_ffmpeg_path())
+        self.thumbnail_cache = thumbnail_cache or ThumbnailCache(get_data_dir() / "thumbnails",
+                                                                 ffmpeg_path=get_ffmpeg_path())
+        self.subtitle_stage = subtitle_stage or SubtitleStage(get_data_dir() / "subtitles")
+        add_ffmpeg_to_path()  # Before any yt-dlp child starts (see uses_split_streams)
+        self.workers = workers
+        if workers is not None:
+            workers.prewarm(min(max_workers, workers.size))
+        self.log_dir = Path(log_dir) if log_dir else None
+        if self.log_dir:
+            prune_job_logs(self.log_dir)
+        self.staging = staging
+        if staging is not None:
+            staging.collect_garbage()  # Left behind by a crash
+        self._cond = threading.Condition()
+        self._queue = []
+        self._held = []
+        self._seq = itertools.count()
+        self._jobs = {}
+        self._forgotten_bytes = {}  # owner -> [(finished_at, bytes)] of forgotten jobs, for quotas
+        self._running = set()
+        self._active = 0
+        self._served = {}
+        self.host_throttle = HostThrottle()
+        self.disk_guard = DiskSpaceGuard(disk_reserve)
+        threading.Thread(target=self._dispatch, name="meowdown-dispatcher", daemon=True).start()
+
+    # --- submitting & inspecting -------------------------------------------
+
+    def submit(self, cmd, urls, priority=PRIORITY_NORMAL, batch_id=None, manifest=None,
+               auto_retry=False, attempt=1, not_before=0.0, dest_path=None, estimated_bytes=None,
+               tag_files=False, thumbnails=False, subtitles=False, owner=None):
+        """Queue a yt-dlp invocation and return its :class:`DownloadJob`.
+
+        With ``auto_retry`` failed URLs are classified and retried according
+        to :data:`RETRY_POLICIES`. ``dest_path`` (default: the manifest's
+        folder) and ``estimated_bytes`` (default: from the format cache)
+        are used for disk space admission. ``tag_files`` sends finished MP3s
+        to the tagging pool (see :func:`uses_deferred_tagging`) and
+        ``thumbnails`` fetches thumbnails through the thumbnail cache (see
+        :func:`uses_thumbnail_cache`). ``subtitles`` fetches subtitles
+        through the subtitle stage (see :func:`uses_subtitle_stage`).
+        ``owner`` is the submitting session; raises :class:`QuotaExceeded`
+        if it is over its :class:`SessionLimits` (retries never are).
+        """
+        if attempt == 1:
+            self.check_quota(owner)
+        rate_limit = self.bandwidth_limit / self.max_workers if self.bandwidth_limit else None
+        job = DownloadJob(cmd, urls, priority=priority, batch_id=batch_id, manifest=manifest,
+                          auto_retry=auto_retry, attempt=attempt, not_before=not_before,
+                          log_dir=self.log_dir, format_cache=self.format_cache,
+                          dest_path=dest_path, estimated_bytes=estimated_bytes, tag_files=tag_files,
+                          thumbnails=thumbnails, subtitle_stage=self.subtitle_stage if subtitles else None,
+                          owner=owner, rate_limit=rate_limit, staging=self.staging)
+        with self._cond:
+            self._forget_finished(time.time())
+            self._jobs[job.job_id] = job
+            # Interactive work jumps the queue: borrow the slot of the
+            # lowest-priority running job until this one is finished - if
+            # that job can really be frozen, or both would run
+            victim = self._preemption_victim(job)
+            if victim is not None and suspend_process_tree(victim.process):
+                victim.preempted = True
+                victim.state = JOB_PAUSED
+                job.state = JOB_RUNNING
+                self._running.add(job)
+            else:
+                victim = None
+                heapq.heappush(self._queue, (job.priority, next(self._seq), job))
+                self._cond.notify()
+        if victim is not None:
+            victim.emit("preempted")
+            self._start(job, victim=victim)
+        return job
+
+    def submit_download(self, urls, dest_path, format_type, options, manifest=None, owner=None):
+        """Queue every yt-dlp run one download request needs, the way the app builds them.
+
+        ``options`` are the app's download options; a plan preview's picks in
+        ``plan_entries`` narrow the runs to those videos. The runs share one
+        batch (the manifest's job ID). Returns the submitted jobs, which is
+        empty if nothing was picked. Raises :class:`QuotaExceeded` before
+        submitting anything if ``owner`` can't queue all of the runs.
+        """
+        cmd = build_download_command(dest_path, format_type, options)
+        manifest = manifest or JobManifest(dest_path)
+        jobs = [(cmd, url) for url in urls]
+        if options.get('plan_entries') is not None:
+            jobs = planned_invocations(cmd, options['plan_entries'])
+
+        # Group the URLs into chunked yt-dlp runs to amortise extractor startup
+        chunk_size = options.get('batch_chunk_size', 1) if len(jobs) > 1 else 1
+        invocations = plan_chunked_invocations(jobs, chunk_size)
+        self.check_quota(owner, len(invocations))
+
+        # Planned sizes let disk admission hold runs that won't fit
+        planned_sizes = {}
+        for entry in options.get('plan_entries') or []:
+            planned_sizes[entry['source']] = planned_sizes.get(entry['source'], 0) + (entry['size'] or 0)
+
+        priority = resolve_job_priority(options, len(jobs))
+        submitted = []
+        for chunk_cmd, chunk_urls in invocations:
+            estimated = sum(planned_sizes.get(u, 0) for u in chunk_urls) if planned_sizes else None
+            submitted.append(self.submit(
+                chunk_cmd, chunk_urls, priority=priority, batch_id=manifest.job_id, manifest=manifest,
+                auto_retry=options.get('auto_retry', True), estimated_bytes=estimated,
+                tag_files=uses_deferred_tagging(format_type, options),
+                thumbnails=uses_thumbnail_cache(format_type, options),
+                subtitles=uses_subtitle_stage(options), owner=owner))
+        return submitted
+
+    def check_quota(self, owner, jobs=1):
+        """Raise :class:`QuotaExceeded` if ``owner`` may not queue ``jobs`` more jobs."""
+        if owner is None:
+            return
+        usage = self.session_usage(owner)
+        limits = self.limits
+        if limits.max_pending is not None and usage["pending"] + jobs > limits.max_pending:
+            raise QuotaExceeded(f"{usage['pending']} downloads are already waiting; "
+                                f"a session may have {limits.max_pending} at once")
+        if limits.max_daily_bytes is not None and usage["bytes_today"] >= limits.max_daily_bytes:
+            raise QuotaExceeded(f"today's download allowance of {limits.max_daily_bytes} bytes is used up")
+
+    def session_usage(self, owner):
+        """A session's unfinished jobs and the bytes its jobs downloaded in the last 24 hours."""
+        since = time.time() - QUOTA_WINDOW_SECONDS
+        with self._cond:
+            jobs = [job for job in self._jobs.values() if job.owner == owner]
+            forgotten = sum(spent for at, spent in self._forgotten_bytes.get(owner, ()) if at >= since)
+        return {
+            "pending": sum(1 for job in jobs if not job.finished),
+            "bytes_today": forgotten + sum(job.metrics.bytes for job in jobs
+                                           if not job.finished or (job.finished_at or 0) >= since),
+        }
+
+    def _forget_finished(self, now):
+        """Drop batches that finished over :data:`FINISHED_JOB_TTL` ago (call with the lock held).
+
+        Their events and output go with them; only what they downloaded is
+        remembered, for the owners' daily quotas.
+        """
+        batches = {}
+        for job in self._jobs.values():
+            batches.setdefault(job.batch_id, []).append(job)
+        for jobs in batches.values():
+            if not all(job.finished and now - (job.finished_at or now) >= FINISHED_JOB_TTL for job in jobs):
+                continue
+            for job in jobs:
+                del self._jobs[job.job_id]
+                if job.owner is not None and job.metrics.bytes:
+                    self._forgotten_bytes.setdefault(job.owner, []).append((job.finished_at, job.metrics.bytes))
+        since = now - QUOTA_WINDOW_SECONDS
+        for owner, spent in list(self._forgotten_bytes.items()):
+            spent[:] = [entry for entry in spent if entry[0] >= since]
+            if not spent:
+                del self._forgotten_bytes[owner]
+
+    def queue_view(self):
+        """The whole server's queue, one row per session with unfinished jobs.
+
+        Rows have the session's ``running``, ``paused`` and ``queued`` job
+        counts, ``next_in_line`` (how many queued jobs of the same or higher
+        priority are ahead of its first queued one, ignoring fair-share
+        reordering) and ``bytes_today``; busiest sessions first.
+        """
+        with self._cond:
+            jobs = list(self._jobs.values())
+            queued = [entry[2] for entry in sorted(self._queue, key=lambda entry: entry[:2])
+                      if entry[2].state == JOB_QUEUED]
+        rows = {}
+        for job in jobs:
+            if job.finished:
+                continue
+            row = rows.setdefault(job.owner, {"owner": job.owner, "running": 0, "paused": 0,
+                                              "queued": 0, "next_in_line": None})
+            if job.state == JOB_RUNNING:
+                row["running"] += 1
+            elif job.state == JOB_PAUSED:
+                row["paused"] += 1
+            else:
+                row["queued"] += 1
+        for position, job in enumerate(queued):
+            row = rows.get(job.owner)
+            if row is not None and row["next_in_line"] is None:
+                row["next_in_line"] = position
+        for row in rows.values():
+            row["bytes_today"] = self.session_usage(row["owner"])["bytes_today"]
+        return sorted(rows.values(), key=lambda row: (-row["running"], -row["queued"], str(row["owner"])))
+
+    def jobs(self, batch_id=None):
+        """Known jobs (optionally of one batch) in submission order.
+
+        Batches are forgotten :data:`FINISHED_JOB_TTL` after they finished.
+        """
+        with self._cond:
+            return [job for job in self._jobs.values() if batch_id is None or job.batch_id == batch_id]
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def gauges(self):
+        """Point-in-time queue sizes for the metrics endpoint and dashboard."""
+        with self._cond:
+            jobs = list(self._jobs.values())
+        return {
+            "meowdown_jobs_running": sum(1 for job in jobs if job.state == JOB_RUNNING),
+            "meowdown_jobs_queued": sum(1 for job in jobs if job.state == JOB_QUEUED),
+            "meowdown_jobs_paused": sum(1 for job in jobs if job.state == JOB_PAUSED),
+            "meowdown_jobs_waiting_for_disk": sum(1 for job in jobs if job.state == JOB_QUEUED and job._disk_held),
+            "meowdown_hosts_throttled": len(self.host_throttle.snapshot()),
+            "meowdown_disks_low": self.disk_guard.low_disks(),
+            "meowdown_sessions_active": len({job.owner for job in jobs
+                                             if job.owner is not None and not job.finished}),
+        }
+
+    # --- job control ---------------------------------------------------------
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job. Partial downloads are kept."""
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return False
+        with self._cond:
+            job.cancel_requested = True
+            if job.state in (JOB_QUEUED, JOB_PAUSED) and job.process is None:
+                if job in self._held:
+                    self._held.remove(job)
+                self._finish(job, JOB_CANCELLED)
+                return True
+        # The runner stops the child cleanly when its task is cancelled; a
+        # job that hasn't reached the runner yet sees cancel_requested instead
+        task = job._task
+        if task is not None:
+            self.runner.loop.call_soon_threadsafe(task.cancel)
+        return True
+
+    def cancel_batch(self, batch_id):
+        """Cancel every unfinished job of a batch."""
+        return [job.job_id for job in self.jobs(batch_id) if self.cancel(job.job_id)]
+
+    def pause(self, job_id):
+        """Pause a job: queued jobs are held back, running ones are frozen."""
+        job = self._jobs.get(job_id)
+        if job is not None and job.preempted:
+            job.pause_requested = True  # Stay frozen after the interactive job
+            return True
+        if job is None or job.finished or job.state == JOB_PAUSED:
+            return False
+        with self._cond:
+            job.pause_requested = True
+            if job.state == JOB_QUEUED:
+                job.state = JOB_PAUSED
+                self._held.append(job)
+                return True
+            if job.process is None:
+                job.pause_requested = False
+                return False  # Still starting up
+        if suspend_process_tree(job.process):
+            job.state = JOB_PAUSED
+            job.emit("paused")
+            return True
+        job.pause_requested = False
+        return False
+
+    def resume(self, job_id):
+        """Resume a job paused with :meth:`pause`."""
+        job = self._jobs.get(job_id)
+        if job is None or job.state != JOB_PAUSED:
+            return False
+        with self._cond:
+            job.pause_requested = False
+            if job in self._held:
+                self._held.remove(job)
+                job.state = JOB_QUEUED
+                heapq.heappush(self._queue, (job.priority, next(self._seq), job))
+                self._cond.notify()
+                return True
+        if job.preempted:
+            return True  # Resumes on its own once the interactive job is done
+        if resume_process_tree(job.process):
+            job.state = JOB_RUNNING
+            job.emit("resumed")
+            return True
+        return False
+
+    def pause_batch(self, batch_id):
+        return [job.job_id for job in self.jobs(batch_id) if self.pause(job.job_id)]
+
+    def resume_batch(self, batch_id):
+        return [job.job_id for job in self.jobs(batch_id) if self.resume(job.job_id)]
+
+    # --- dispatching ---------------------------------------------------------
+
+    def _dispatch(self):
+        """Start queued jobs on the runner whenever a worker slot is free."""
+        while True:
+            with self._cond:
+                while True:
+                    wait = None
+                    if self._active < self.max_workers:
+                        job, wait = self._next_runnable_locked()
+                        if job is not None:
+                            break
+                    self._cond.wait(timeout=wait)
+                job.state = JOB_RUNNING
+                self._running.add(job)
+                self._active += 1
+            self._start(job, counted=True)
+
+    def _start(self, job, counted=False, victim=None):
+        """Run ``job`` on the runner's loop; ``counted`` jobs hold a worker slot."""
+        job._counted = counted
+        future = self.runner.submit_coroutine(self._run(job))
+        future.add_done_callback(lambda f: self._job_done(job, f, victim))
+
+    def _release_slot(self, job):
+        """Give a job's worker slot back (once) so the next job can start."""
+        with self._cond:
+            if job._counted:
+                job._counted = False
+                self._active -= 1
+                self._cond.notify_all()
+
+    def _job_done(self, job, future, victim):
+        error = future.exception()
+        if error is not None and not job.finished:
+            job.emit("error", f"ERROR: {error}")
+            self._finish(job, JOB_FAILED)
+        self._release_slot(job)
+        with self._cond:
+            self._running.discard(job)
+            self._cond.notify_all()
+        if victim is not None and victim.preempted:
+            victim.preempted = False
+            if not victim.pause_requested and not victim.finished and resume_process_tree(victim.process):
+                victim.state = JOB_RUNNING
+                victim.emit("resumed")
+
+    def _next_runnable_locked(self):
+        """Pop the best job allowed to start now.
+
+        Among the runnable jobs of the best priority, each session's oldest
+        one is a candidate and the session with the fewest running jobs wins
+        (the one served longest ago on a tie), so one big batch can't hold
+        up everyone else's downloads. Returns ``(job, None)``, or
+        ``(None, seconds)`` when every queued job is waiting on a retry
+        delay, a throttled host, disk space or its session's running limit
+        (``None`` seconds means nothing to wait for but a finished job).
+        """
+        now = time.time()
+        running = collections.Counter(job.owner for job in self._running)
+        max_running = self.limits.max_running
+        popped = []
+        candidates = {}
+        best = None
+        wait = None
+        while self._queue:
+            if best is not None and self._queue[0][0] > best:
+                break  # Lower priorities only get a turn when nothing here can run
+            entry = heapq.heappop(self._queue)
+            job = entry[2]
+            if job.state != JOB_QUEUED:
+                continue  # Cancelled, held or already picked up
+            popped.append(entry)
+            if job.owner in candidates:
+                continue  # Its session's older job is already a candidate
+            if job.owner is not None and max_running is not None and running[job.owner] >= max_running:
+                continue  # Its session has enough running; retried when one finishes
+            ready = max(job.not_before, self.host_throttle.ready_at(job.host))
+            if ready <= now and not self.disk_guard.admits(job, self._running):
+                if not job._disk_held:
+                    job._disk_held = True
+                    job.emit("disk_wait", job.estimated_bytes)
+                ready = now + DISK_RECHECK_SECONDS
+            if ready > now:
+                wait = ready - now if wait is None else min(wait, ready - now)
+                continue
+            candidates[job.owner] = job
+            best = entry[0]
+
+        chosen = None
+        if candidates:
+            chosen = min(candidates.values(),
+                         key=lambda job: (running[job.owner], self._served.get(job.owner, -1)))
+            self._served[chosen.owner] = next(self._seq)
+            if chosen._disk_held:
+                chosen._disk_held = False
+                chosen.emit("disk_ok")
+        for entry in popped:
+            if entry[2] is not chosen:
+                heapq.heappush(self._queue, entry)
+        return chosen, wait
+
+    def _preemption_victim(self, job):
+        """Pick a running lower-priority job to freeze for an interactive one."""
+        if job.priority > PRIORITY_INTERACTIVE or job.attempt > 1 or self._active < self.max_workers:
+            return None
+        if not self.disk_guard.admits(job, self._running):
+            return None  # Queue it; it's held like any other job that doesn't fit
+        max_running = self.limits.max_running
+        if (job.owner is not None and max_running is not None
+                and sum(1 for j in self._running if j.owner == job.owner) >= max_running):
+            return None  # Its session already runs all it may
+        candidates = [j for j in self._running
+                      if j.priority > job.priority and j.state == JOB_RUNNING
+                      and j.process is not None and j.process.returncode is None]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda j: j.priority)
+
+    def _finish(self, job, state):
+        job.state = state
+        job.finished_at = time.time()
+        job.metrics.finish(job.finished_at)
+        self.metrics.record(job)
+        if job.staging is not None:
+            self._release_staging(job)
+        job.emit("finished", state)
+        job._done.set()
+
+    def _release_staging(self, job):
+        """Remove a batch's scratch folder once its last job is finished.
+
+        Folders holding files that couldn't be published are kept (until
+        garbage collection) so the files can still be rescued.
+        """
+        key = job.manifest.job_id
+        with self._cond:
+            staged = [j for j in self._jobs.values() if j.staging is not None]
+            batch = [j for j in staged if j.manifest.job_id == key]
+            if not all(j.finished for j in batch) or any(j.staging_kept for j in batch):
+                return
+            active = {j.manifest.job_id for j in staged if not j.finished}
+        self.staging.release(key)
+        self.staging.collect_garbage(active=active)
+
+    async def _run(self, job):
+        """Run one job to completion on the runner's loop, streaming its output into events."""
+        job._task = asyncio.current_task()
+        if job.cancel_requested:
+            self._finish(job, JOB_CANCELLED)
+            return
+        job.state = JOB_RUNNING
+        job.started_at = time.time()
+        job.metrics.start(job.started_at)
+        tracker = ChunkOutputTracker(job.urls)
+        produced = []
+        throttled = False
+        merge_progress = StreamMergeProgress()
+
+        def on_start(proc):
+            job.process = proc
+
+        async def tag_track(entry):
+            cover = None
+            if job.thumbnails and entry.get("thumbnail_url"):
+                try:
+                    cover = await asyncio.wrap_future(
+                        self.thumbnail_cache.prepare(entry["thumbnail_url"], COVER_MAX_SIDE))
+                except Exception as e:
+                    job.emit("warning", f"WARNING: could not fetch the album art: {e}")
+            try:
+                await asyncio.wrap_future(self.tagger.submit(entry, cover=cover))
+            except Exception as e:
+                job.emit("warning", f"WARNING: could not tag a track: {e}")
+
+        async def save_thumbnail(entry):
+            try:
+                cached = await asyncio.wrap_future(self.thumbnail_cache.prepare(entry["thumbnail_url"]))
+                dest = Path(entry["path"]).with_suffix(".jpg")
+                if not dest.exists():
+                    shutil.copyfile(cached, dest)
+            except Exception as e:
+                job.emit("warning", f"WARNING: could not save the thumbnail: {e}")
+
+        async def save_subtitles(entry, fetch):
+            try:
+                found = await asyncio.wrap_future(fetch)
+                for lang, cached in found.items():
+                    dest = Path(entry["path"]).with_suffix(f".{lang}.srt")
+                    if not dest.exists():
+                        shutil.copyfile(cached, dest)
+            except Exception as e:
+                job.emit("warning", f"WARNING: could not fetch subtitles: {e}")
+
+        async def publish(entry):
+            # Copying out of scratch can take a while on a slow folder - off the loop
+            key = job.manifest.job_id
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, job.staging.publish, key, job.dest_path)
+            except OSError as e:
+                job.staging_kept = True
+                url = entry.get("url") if entry.get("url") in tracker.results else tracker.current
+                message = (f"ERROR: could not move {Path(entry['path']).name} into the download folder "
+                           f"(it is kept in {job.staging.root / key}): {e}")
+                tracker.results[url]["errors"].append(message)
+                job.emit("error", message)
+                return
+            fields = {k: v for k, v in entry.items() if k not in ("path", "stage")}
+            if fields.get("thumbnail"):
+                fields["thumbnail"] = str(job.staging.final_path(key, job.dest_path, fields["thumbnail"]))
+            add_file(job.manifest.record(job.staging.final_path(key, job.dest_path, entry["path"]),
+                                         "download", **fields))
+
+        def land(entry):
+            if job.staged_manifest is not None:
+                job._publishing.append(asyncio.ensure_future(publish(entry)))
+            else:
+                add_file(entry)
+
+        def poll_subtitles():
+            # Each video is announced before its media downloads, so its
+            # subtitles are fetched in the meantime
+            for info in job.subtitle_stage.poll(job.job_id):
+                job._subtitle_fetches[(info["extractor"], info["id"])] = job.subtitle_stage.prepare(info)
+
+        def add_file(entry):
+            produced.append(entry)
+            tracker.add_files([entry])
+            job.emit("file", entry["path"])
+            if job.tag_files and entry["path"].lower().endswith(".mp3"):
+                job._tagging.append(asyncio.ensure_future(tag_track(entry)))
+            elif job.thumbnails and entry.get("thumbnail_url"):
+                job._thumbnails.append(asyncio.ensure_future(save_thumbnail(entry)))
+            fetch = job._subtitle_fetches.get((entry.get("extractor"), entry.get("id")))
+            if fetch is not None:
+                job._subtitles.append(asyncio.ensure_future(save_subtitles(entry, fetch)))
+
+        def on_line(line):
+            nonlocal throttled
+            job.output.append(line)
+
+            started_url = tracker.feed_line(line)
+            if started_url:
+                job.emit("url", started_url)
+
+            event = parse_output_line(line)
+            if event is None:
+                merged = merge_progress.feed(line)
+                if merged is not None:
+                    event = ("progress", merged)
+            elif event[0] == "found":
+                merge_progress.feed(line)
+            job.metrics.observe(*(event or (None, None)), line)
+            if event:
+                if event[0] == "progress":
+                    job.percent = event[1]
+                job.emit(*event)
+
+                # The host is throttling us: hold back its other queued jobs
+                if (event[0] in ("error", "warning") and not throttled
+                        and classify_failure([line]) == FAILURE_RATE_LIMITED):
+                    throttled = True
+                    job.emit("throttled", (job.host, self.host_throttle.penalize(job.host)))
+
+            # Finished files land between progress lines - stream them from the manifest
+            if "%" not in line:
+                if job.subtitle_stage is not None:
+                    poll_subtitles()
+                for entry in job.collect_files():
+                    land(entry)
+
+        run = self.runner.run
+        if self.workers is not None and self.workers.accepts(job.cmd):
+            run = self.workers.run
+        try:
+            result = await run(job.command(), on_line=on_line, on_start=on_start,
+                               timeout=self.job_timeout, idle_timeout=self.idle_timeout,
+                               is_idle_allowed=lambda: job.state == JOB_PAUSED)
+            job.returncode = result.returncode
+            if result.timed_out:
+                # Charged to the URL being worked on, and retried like a network failure
+                silence = "went quiet" if result.timed_out == TIMEOUT_IDLE else "ran too long"
+                on_line(f"ERROR: yt-dlp {silence} and was stopped (timed out)")
+        except asyncio.CancelledError:
+            job.returncode = job.process.returncode if job.process is not None else None
+        except Exception as e:
+            job.output.close()
+            job.emit("error", f"ERROR: could not start yt-dlp: {e}")
+            job.results = {url: {"status": "failed", "errors": [str(e)], "files": []} for url in job.urls}
+            self._finish(job, JOB_FAILED)
+            return
+
+        job.output.close()
+        job.process = None  # A pooled worker may already be running the next job
+        if job.subtitle_stage is not None:
+            poll_subtitles()
+            job.subtitle_stage.finish(job.job_id)
+        for entry in job.collect_files():
+            land(entry)
+        if job._publishing:
+            # The download slot isn't needed to copy files out of scratch
+            self._release_slot(job)
+            publishing = asyncio.gather(*job._publishing)
+            try:
+                await asyncio.shield(publishing)
+            except asyncio.CancelledError:
+                await publishing  # Cancelled while publishing; files being moved still get there
+        job.results = tracker.finish(job.returncode)
+        if job.format_cache is not None:
+            try:
+                clips = "--download-sections" in job.cmd
+                job.format_cache.ingest(job.job_id, None if clips else output_profile(job.cmd), produced)
+            except Exception as e:  # A broken cache must never fail the download
+                job.emit("warning", f"WARNING: could not update the format cache: {e}")
+
+        if job._tagging or job._thumbnails or job._subtitles:
+            # yt-dlp is done with the network - the next job can have the slot
+            self._release_slot(job)
+            if job._tagging:
+                job.emit("tagging", len(job._tagging))
+            try:
+                await asyncio.gather(*job._tagging, *job._thumbnails, *job._subtitles)
+            except asyncio.CancelledError:
+                pass  # Cancelled while tagging; started tracks still get finished
+
+        if job.cancel_requested:
+            self._finish(job, JOB_CANCELLED)
+            return
+
+        # Retries are queued before this job finishes, so a watcher never
+        # sees the batch as done while a retry is still on its way
+        self._handle_failures(job)
+        if all(r["status"] == "ok" for r in job.results.values()):
+            self.host_throttle.reward(job.host)
+        if any(r["status"] == "failed" for r in job.results.values()):
+            self._finish(job, JOB_FAILED)
+        else:
+            job.percent = 1.0
+            self._finish(job, JOB_DONE)
+
+    def _handle_failures(self, job):
+        """Classify failed URLs and queue retries according to RETRY_POLICIES."""
+        for url, result in job.results.items():
+            if result["status"] != "failed":
+                continue
+            category = classify_failure(result["errors"])
+            result["category"] = category
+            policy = RETRY_POLICIES[category]
+            if not job.auto_retry or policy["action"] == "skip":
+                continue
+            if job.attempt >= policy.get("max_attempts", 1):
+                continue
+
+            delay = 0.0
+            if policy["action"] == "backoff":
+                delay = backoff_delay(job.attempt, policy["base_delay"])
+                # The host itself was already slowed down while the job ran
+                delay = max(delay, self.host_throttle.ready_at(job.host) - time.time())
+            # "requeue" retries simply join the back of the queue, after the
+            # rest of the batch
+            retry = self.submit(job.cmd, [url], priority=job.priority, batch_id=job.batch_id,
+                                manifest=job.manifest, auto_retry=True, attempt=job.attempt + 1,
+                                not_before=time.time() + delay, tag_files=job.tag_files,
+                                thumbnails=job.thumbnails, subtitles=job.subtitle_stage is not None,
+                                owner=job.owner)
+            result["status"] = "retrying"
+            result["retry_job"] = retry.job_id
+            job.emit("retry", {"url": url, "category": category, "delay": delay, "attempt": retry.attempt})
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Format Cache
+Remembers the format list yt-dlp negotiated for every video (keyed by
+extractor + ID, signed URLs dropped), so MeowDown can pick formats and
+estimate download sizes locally - e.g. "this batch is ~14 GB" - before
+starting, and check the size limit without any extra requests.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# =============================================================================
+# 🐱 CONFIGURATION & CONSTANTS
+# =============================================================================
+
+# Format lists rarely change; after this they are negotiated afresh
+FORMAT_CACHE_TTL = 30 * 24 * 3600
+
+# Only these format fields are kept - URLs, headers, cookies and fragment
+# lists expire (or are secret) and are never stored
+FORMAT_FIELDS = ("format_id", "ext", "width", "height", "fps", "vcodec", "acodec",
+                 "tbr", "abr", "vbr", "filesize", "filesize_approx", "protocol")
+
+# Printed by yt-dlp once per video, after format selection
+FORMATS_TEMPLATE = (
+    '{"id": %(id|null)j, "extractor": %(extractor_key|null)j, '
+    '"url": %(original_url|null)j, "webpage_url": %(webpage_url|null)j, '
+    '"title": %(title|null)j, "duration": %(duration|null)j, "selected": %(format_id|null)j, '
+    '"formats": %(formats.:.{' + ",".join(FORMAT_FIELDS) + '}|null)j}'
+)
+
+# MeowDown's MP3 quality levels (--audio-quality) in kbps
+AUDIO_QUALITY_KBPS = {"0": 320, "2": 256, "5": 192, "7": 128, "9": 96}
+
+FILTER_RE = re.compile(r'^\s*(\w+)\s*(<=|>=|!=|<|>|=)\s*(\S+)\s*$')
+
+def parse_size(text):
+    """``"500M"`` -> bytes, read like a size in a yt-dlp format filter (None if it isn't one).
+
+    Units are decimal (``500M`` and ``500MB`` are 500,000,000) unless
+    spelled binary (``500MiB``), as in ``yt_dlp.utils.parse_filesize``.
+    """
+    from yt_dlp.utils import parse_filesize
+
+    text = str(text).strip()
+    if re.fullmatch(r'[0-9.]+', text):
+        try:
+            return int(float(text))
+        except ValueError:
+            return None
+    size = parse_filesize(text)
+    return size if size is not None else parse_filesize(text + "B")  # Filters allow "500M"
+
+# =============================================================================
+# 🎯 LOCAL FORMAT SELECTION
+# =============================================================================
+
+def output_profile(cmd):
+    """What a yt-dlp command produces: ``("audio", kbps)`` or ``("video", selector)``."""
+    if "-x" in cmd:
+        quality = cmd[cmd.index("--audio-quality") + 1] if "--audio-quality" in cmd else "0"
+        return ("audio", AUDIO_QUALITY_KBPS.get(quality, 320))
+    selector = "best"
+    if "-f" in cmd:
+        selector = cmd[cmd.index("-f") + 1]
+    return ("video", selector)
+
+def clip_seconds(cmd, duration):
+    """Seconds of a ``duration``-long video kept by ``cmd``'s time ranges
+    (``--download-sections *a-b``), or None for whole videos and chapters."""
+    sections = [cmd[i + 1] for i, arg in enumerate(cmd[:-1]) if arg == "--download-sections"]
+    if not sections or not duration or not all(s.startswith("*") for s in sections):
+        return None
+    kept = 0.0
+    for section in sections:
+        start, _, end = section[1:].partition("-")
+        try:
+            start = float(start or 0)
+            end = duration if end in ("", "inf") else min(float(end), duration)
+        except ValueError:
+            return None
+        kept += max(0.0, end - start)
+    return kept
+
+def _clipped(size, cmd, duration):
+    """``size`` of a whole video scaled down to the part ``cmd`` keeps."""
+    kept = clip_seconds(cmd, duration)
+    return size if size is None or kept is None else int(size * min(1.0, kept / duration))
+
+def _has_video(fmt):
+    return fmt.get("vcodec") not in (None, "none") or (fmt.get("vcodec") is None and fmt.get("height") is not None)
+
+def _has_audio(fmt):
+    return fmt.get("acodec") != "none"
+
+def _matches(fmt, condition):
+    """Evaluate one yt-dlp style filter such as ``height<=1080`` or ``ext=mp4``."""
+    match = FILTER_RE.match(condition)
+    if not match:
+        return False
+    key, op, expected = match.groups()
+    actual = fmt.get(key)
+    if key == "filesize" and actual is None:
+        actual = fmt.get("filesize_approx")
+    if actual is None:
+        return False  # yt-dlp drops formats missing a filtered field (without '?')
+    if isinstance(actual, (int, float)):
+        expected = parse_size(expected) if key.startswith("filesize") else float(expected)
+        if expected is None:
+            return False
+    else:
+        actual, expected = str(actual), str(expected)
+    return {
+        "<=": actual <= expected, ">=": actual >= expected, "<": actual < expected,
+        ">": actual > expected, "=": actual == expected, "!=": actual != expected,
+    }[op]
+
+def _select_single(formats, selector):
+    """The format one selector without ``/`` or ``+`` picks, or None."""
+    match = re.match(r'^\s*(\w+\*?)((?:\[[^\]]*\])*)\s*$', selector)
+    if not match:
+        return None
+    base = match.group(1)
+    conditions = []
+    for group in re.findall(r'\[([^\]]*)\]', match.group(2)):
+        conditions.extend(part for part in group.split("&") if part.strip())
+
+    if base in ("best", "b", "worst", "w"):
+        candidates = [f for f in formats if _has_video(f) and _has_audio(f)] or list(formats)
+    elif base in ("best*", "b*", "worst*", "w*"):
+        candidates = list(formats)
+    elif base in ("bestvideo", "bv", "worstvideo", "wv"):
+        candidates = [f for f in formats if _has_video(f) and not _has_audio(f)]
+    elif base in ("bestvideo*", "bv*", "worstvideo*", "wv*"):
+        candidates = [f for f in formats if _has_video(f)]
+    elif base in ("bestaudio", "ba", "worstaudio", "wa"):
+        candidates = [f for f in formats if _has_audio(f) and not _has_video(f)]
+    elif base in ("bestaudio*", "ba*", "worstaudio*", "wa*"):
+        candidates = [f for f in formats if _has_audio(f)]
+    else:
+        candidates = [f for f in formats if f.get("format_id") == base]
+
+    candidates = [f for f in candidates if all(_matches(f, c) for c in conditions)]
+    if not candidates:
+        return None
+    return candidates[0] if base.startswith("w") else candidates[-1]
+
+def select_format(formats, selector):
+    """Pick a format the way yt-dlp would for MeowDown's selectors.
+
+    Handles ``best``/``worst``/``bestvideo``/``bestaudio`` (and their ``*``
+    forms) with ``[...]`` filters, ``+`` merges and ``/`` fallbacks. yt-dlp
+    lists formats worst to best, so the last match is the best one. A merge
+    comes back as one format with yt-dlp's merged ID (``137+140``) and its
+    parts under ``requested``. Returns None when nothing matches.
+    """
+    for alternative in selector.split("/"):
+        parts = [_select_single(formats, part) for part in alternative.split("+")]
+        if None in parts:
+            continue
+        if len(parts) == 1:
+            return parts[0]
+        return {"format_id": "+".join(part["format_id"] for part in parts), "requested": parts}
+    return None
+
+def format_size(fmt, duration=None):
+    """Best local size guess for one (possibly merged) format, in bytes (None if unknown)."""
+    if "requested" in fmt:
+        sizes = [format_size(part, duration) for part in fmt["requested"]]
+        return None if None in sizes else sum(sizes)
+    size = fmt.get("filesize") or fmt.get("filesize_approx")
+    if size:
+        return int(size)
+    if fmt.get("tbr") and duration:
+        return int(fmt["tbr"] * 1000 / 8 * duration)
+    return None
+
+# =============================================================================
+# 🗃️ CACHE
+# =============================================================================
+
+class FormatCache:
+    """SQLite-backed cache of negotiated format lists, keyed by extractor + ID."""
+
+    def __init__(self, path, ttl=FORMAT_CACHE_TTL):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.inbox_dir = self.path.parent / "format_inbox"
+        self._lock = threading.Lock()
+        self._rates = {}
+        self._rates_version = 0  # Bumped whenever _rates is cleared
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._db:
+            self._db.execute("""CREATE TABLE IF NOT EXISTS videos (
+                key TEXT PRIMARY KEY, extractor TEXT, video_id TEXT, title TEXT,
+                duration REAL, formats TEXT, observed TEXT, fetched_at REAL)""")
+            self._db.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, key TEXT)")
+        self.prune()
+
+    @staticmethod
+    def video_key(extractor, video_id):
+        return f"{extractor}:{video_id}"
+
+    def ytdlp_args(self, tag):
+        """Arguments that make yt-dlp print each video's format list for :meth:`ingest`."""
+        self.inbox_dir.mkdir(parents=True, exist_ok=True)
+        target = str(self.inbox_dir / f"{tag}.jsonl").replace("%", "%%")
+        return ["--print-to-file", f"video:{FORMATS_TEMPLATE}", target]
+
+    def ingest(self, tag, profile=None, files=()):
+        """Store the format lists a job printed, then delete its inbox file.
+
+        ``files`` are the job's manifest entries; their real sizes are kept
+        per downloaded format (or MP3 bitrate, for ``output_profile`` audio
+        jobs) so later estimates of the same video are exact. Clips are no
+        measure of the whole video; pass no ``profile`` for them. Returns
+        the number of videos stored.
+        """
+        inbox = self.inbox_dir / f"{tag}.jsonl"
+        if not inbox.exists():
+            return 0
+        sizes = {}
+        for entry in files:
+            try:
+                key = self.video_key(entry.get("extractor"), entry.get("id"))
+                sizes[key] = sizes.get(key, 0) + Path(entry["path"]).stat().st_size
+            except (OSError, KeyError, TypeError):
+                pass
+
+        stored = 0
+        now = time.time()
+        with self._lock, self._db:
+            for line in inbox.read_text(encoding='utf-8', errors='replace').splitlines():
+                try:
+                    info = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if not info.get("id") or not info.get("extractor") or not info.get("formats"):
+                    continue  # Flat playlist entries carry no formats
+                key = self.video_key(info["extractor"], info["id"])
+                formats = [{k: f[k] for k in FORMAT_FIELDS if f.get(k) is not None}
+                           for f in info.get("formats") or [] if isinstance(f, dict)]
+                observed = self._observed_locked(key)
+                if profile is not None and key in sizes:
+                    observed[self._observed_key(profile, info.get("selected"))] = sizes[key]
+                self._db.execute(
+                    "INSERT OR REPLACE INTO videos VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, info["extractor"], str(info["id"]), info.get("title"), info.get("duration"),
+                     json.dumps(formats), json.dumps(observed), now))
+                for url in {info.get("url"), info.get("webpage_url")} - {None}:
+                    self._db.execute("INSERT OR REPLACE INTO urls VALUES (?, ?)", (url, key))
+                stored += 1
+            self._rates.clear()
+            self._rates_version += 1
+        try:
+            inbox.unlink()
+        except OSError:
+            pass
+        return stored
+
+    @staticmethod
+    def _observed_key(profile, format_id):
+        if profile[0] == "audio":
+            return f"audio:{profile[1]}"
+        return f"video:{format_id}"
+
+    def _observed_locked(self, key):
+        row = self._db.execute("SELECT observed FROM videos WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else {}
+
+    def lookup(self, url):
+        """Cached entry for a URL (``formats``, ``duration``, ...) or None."""
+        with self._lock:
+            row = self._db.execute("SELECT key FROM urls WHERE url = ?", (url,)).fetchone()
+        return self._entry(row[0]) if row else None
+
+    def lookup_video(self, extractor, video_id):
+        """Cached entry for a video by extractor + ID (e.g. a playlist entry) or None."""
+        return self._entry(self.video_key(extractor, video_id))
+
+    def _entry(self, key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT title, duration, formats, observed, fetched_at FROM videos WHERE key = ?",
+                (key,)).fetchone()
+        if row is None or time.time() - row[4] > self.ttl:
+            return None
+        return {"key": key, "title": row[0], "duration": row[1], "formats": json.loads(row[2]),
+                "observed": json.loads(row[3] or "{}"), "fetched_at": row[4]}
+
+    def _estimate_entry(self, entry, profile):
+        if entry is None:
+            return None
+        if profile[0] == "audio":
+            observed = entry["observed"].get(self._observed_key(profile, None))
+            if observed:
+                return observed
+            return int(profile[1] * 1000 / 8 * entry["duration"]) if entry["duration"] else None
+        fmt = select_format(entry["formats"], profile[1])
+        if fmt is None:
+            return None
+        return entry["observed"].get(self._observed_key(profile, fmt["format_id"])) or format_size(fmt, entry["duration"])
+
+    def estimate(self, url, cmd):
+        """Estimated output size in bytes of downloading ``url`` with ``cmd`` (None if unknown)."""
+        entry = self.lookup(url)
+        return _clipped(self._estimate_entry(entry, output_profile(cmd)), cmd, entry and entry["duration"])
+
+    def estimate_video(self, extractor, video_id, cmd, duration=None):
+        """Size estimate for one video as ``(bytes, exact)``, or ``(None, False)``.
+
+        Videos seen before are estimated from their own formats (``exact``);
+        others from ``duration`` and the typical bitrate of this site's
+        cached videos under the same command.
+        """
+        entry = self.lookup_video(extractor, video_id)
+        size = self._estimate_entry(entry, output_profile(cmd))
+        if size:
+            return _clipped(size, cmd, entry["duration"]), True
+        if not duration:
+            return None, False
+        profile = output_profile(cmd)
+        rate = profile[1] * 1000 / 8 if profile[0] == "audio" else self.typical_rate(extractor, cmd)
+        return (_clipped(int(rate * duration), cmd, duration), False) if rate else (None, False)
+
+    def typical_rate(self, extractor, cmd, sample=100):
+        """Median bytes per second of recently cached videos from ``extractor`` (None if unknown)."""
+        profile = output_profile(cmd)
+        with self._lock:
+            if (extractor, profile) in self._rates:
+                return self._rates[(extractor, profile)]
+            version = self._rates_version
+            keys = [row[0] for row in self._db.execute(
+                """SELECT key FROM videos WHERE extractor = ? AND duration > 0
+                   ORDER BY fetched_at DESC LIMIT ?""", (extractor, sample))]
+        rates = []
+        for key in keys:
+            entry = self._entry(key)
+            size = self._estimate_entry(entry, profile)
+            if size:
+                rates.append(size / entry["duration"])
+        rates.sort()
+        rate = rates[len(rates) // 2] if rates else None
+        with self._lock:
+            if self._rates_version == version:  # Not computed from what ingest() since replaced
+                self._rates[(extractor, profile)] = rate
+        return rate
+
+    def estimate_batch(self, urls, cmd, max_bytes=None):
+        """Size estimate for several URLs.
+
+        Returns ``{"urls", "known", "bytes", "too_big"}`` where ``too_big``
+        lists URLs whose estimate is over ``max_bytes``.
+        """
+        known, total, too_big = 0, 0, []
+        for url in urls:
+            size = self.estimate(url, cmd)
+            if size is None:
+                continue
+            known += 1
+            total += size
+            if max_bytes and size > max_bytes:
+                too_big.append(url)
+        return {"urls": len(urls), "known": known, "bytes": total, "too_big": too_big}
+
+    def prune(self):
+        """Forget entries older than the TTL."""
+        cutoff = time.time() - self.ttl
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM videos WHERE fetched_at < ?", (cutoff,))
+            self._db.execute("DELETE FROM urls WHERE key NOT IN (SELECT key FROM videos)")
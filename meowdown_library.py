@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Library Index
+A SQLite index of every file MeowDown has produced - title, uploader,
+duration, format, size, source URL and the info.json when one was written -
+so downloads can be browsed and searched without rescanning big folders.
+Filled incrementally from job manifests; a reconcile scan (in the
+background if need be) picks up files that were added, removed or renamed
+behind MeowDown's back, and a full one also those rewritten in place.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+
+from meowdown_engine import MANIFEST_DIR_NAME
+
+# =============================================================================
+# 🐱 CONFIGURATION & CONSTANTS
+# =============================================================================
+
+# Files the reconcile scan treats as library items
+MEDIA_EXTENSIONS = {
+    ".mp4", ".mkv", ".webm", ".mov", ".avi", ".flv", ".m4v", ".ts",
+    ".mp3", ".m4a", ".aac", ".opus", ".ogg", ".flac", ".wav",
+}
+
+SEARCH_LIMIT = 50
+
+# =============================================================================
+# 📚 LIBRARY
+# =============================================================================
+
+def _info_json_path(path):
+    """Where yt-dlp's ``--write-info-json`` puts the metadata for ``path``."""
+    return path.with_suffix(".info.json")
+
+def _read_info_json(path):
+    """The info.json next to ``path`` as a dict, or None."""
+    try:
+        with open(_info_json_path(path), encoding='utf-8') as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return info if isinstance(info, dict) else None
+
+def _fts_query(text):
+    """Turn free text into an FTS5 query matching every word as a prefix."""
+    words = [word.replace('"', '""') for word in text.split()]
+    return " ".join(f'"{word}"*' for word in words)
+
+class LibraryIndex:
+    """SQLite index of downloaded files, searchable by title, uploader and name."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._scanning = set()
+        self._scanned = {}
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""CREATE TABLE IF NOT EXISTS items (
+                id INTEGER PRIMARY KEY, path TEXT UNIQUE, root TEXT, dir TEXT, name TEXT,
+                title TEXT, uploader TEXT, duration REAL, format TEXT, ext TEXT,
+                size INTEGER, mtime REAL, url TEXT, extractor TEXT, video_id TEXT,
+                source TEXT, added_at REAL, info BLOB)""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS items_dir ON items (dir)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS items_root_added ON items (root, added_at)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS manifests (path TEXT PRIMARY KEY, offset INTEGER)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, parent TEXT, mtime REAL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent)")
+            self.has_fts = self._create_fts()
+
+    def _create_fts(self):
+        """Full-text index kept in sync by triggers; False if SQLite lacks FTS5."""
+        try:
+            self._db.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+                title, uploader, name, content='items', content_rowid='id')""")
+        except sqlite3.OperationalError:
+            return False
+        self._db.executescript("""
+            CREATE TRIGGER IF NOT EXISTS items_ai AFTER INSERT ON items BEGIN
+                INSERT INTO items_fts (rowid, title, uploader, name)
+                VALUES (new.id, new.title, new.uploader, new.name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS items_ad AFTER DELETE ON items BEGIN
+                INSERT INTO items_fts (items_fts, rowid, title, uploader, name)
+                VALUES ('delete', old.id, old.title, old.uploader, old.name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS items_au AFTER UPDATE ON items BEGIN
+                INSERT INTO items_fts (items_fts, rowid, title, uploader, name)
+                VALUES ('delete', old.id, old.title, old.uploader, old.name);
+                INSERT INTO items_fts (rowid, title, uploader, name)
+                VALUES (new.id, new.title, new.uploader, new.name);
+            END;
+        """)
+        return True
+
+    # --- filling the index ---------------------------------------------------
+
+    def add_entries(self, root, entries, source="manifest"):
+        """Index files described by manifest entries (``path`` plus optional metadata)."""
+        rows = [row for row in (self._row(root, entry, source) for entry in entries) if row]
+        with self._lock, self._db:
+            self._upsert_locked(rows)
+        return len(rows)
+
+    def _row(self, root, entry, source):
+        path = Path(entry["path"])
+        try:
+            stat = path.stat()
+        except OSError:
+            return None  # Already moved or deleted
+        info = _read_info_json(path) or {}
+        return {
+            "path": str(path), "root": str(root), "dir": str(path.parent), "name": path.name,
+            "title": entry.get("title") or info.get("title") or path.stem,
+            "uploader": entry.get("uploader") or info.get("uploader") or info.get("channel"),
+            "duration": entry.get("duration") or info.get("duration"),
+            "format": entry.get("format") or info.get("format"),
+            "ext": path.suffix.lstrip(".").lower(),
+            "size": stat.st_size, "mtime": stat.st_mtime,
+            "url": entry.get("url") or info.get("webpage_url") or info.get("original_url"),
+            "extractor": entry.get("extractor") or info.get("extractor_key"),
+            "video_id": entry.get("id") or info.get("id"),
+            "source": source, "added_at": time.time(),
+            "info": zlib.compress(json.dumps(info).encode('utf-8')) if info else None,
+        }
+
+    def _upsert_locked(self, rows):
+        if not rows:
+            return
+        columns = list(rows[0])
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c not in ("path", "added_at"))
+        self._db.executemany(
+            f"INSERT INTO items ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT(path) DO UPDATE SET {updates}",
+            [tuple(row[c] for c in columns) for row in rows])
+
+    def sync_manifests(self, root):
+        """Index whatever the job manifests under ``root`` recorded since the last sync.
+
+        Only the new tail of each manifest is read, so this is cheap enough
+        to run on every page load. Returns the number of files indexed.
+        """
+        root = Path(root)
+        manifest_dir = root / MANIFEST_DIR_NAME
+        if not manifest_dir.is_dir():
+            return 0
+        with self._lock:
+            offsets = dict(self._db.execute("SELECT path, offset FROM manifests"))
+
+        indexed = 0
+        for manifest in manifest_dir.glob("*.jsonl"):
+            offset = offsets.get(str(manifest), 0)
+            try:
+                if manifest.stat().st_size <= offset:
+                    continue
+                with open(manifest, 'rb') as f:
+                    f.seek(offset)
+                    chunk = f.read()
+            except OSError:
+                continue
+            end = chunk.rfind(b"\n")
+            if end < 0:
+                continue  # Only a partial line so far
+
+            entries = []
+            for raw in chunk[:end].splitlines():
+                try:
+                    entry = json.loads(raw.decode('utf-8'))
+                except (UnicodeDecodeError, ValueError):
+                    continue
+                if isinstance(entry, dict) and entry.get("path"):
+                    entries.append(entry)
+            indexed += self.add_entries(root, entries)
+            with self._lock, self._db:
+                self._db.execute("INSERT OR REPLACE INTO manifests VALUES (?, ?)",
+                                 (str(manifest), offset + end + 1))
+        return indexed
+
+    def reconcile(self, root, full=False):
+        """Bring the index in line with what is really on disk under ``root``.
+
+        Folders whose mtime hasn't changed since the last scan are not
+        listed again (adding, removing or renaming a file changes it), so a
+        rescan of a big, mostly untouched library is quick. A file rewritten
+        in place leaves its folder's mtime alone, though: only ``full``,
+        which lists every folder and compares every file's size and mtime,
+        picks those up. Returns ``{"added", "updated", "removed"}``.
+        """
+        root = Path(root)
+        counts = {"added": 0, "updated": 0, "removed": 0}
+        with self._lock:
+            known_dirs = {row[0]: row[1] for row in self._db.execute("SELECT path, mtime FROM dirs")}
+
+        stack = [root]
+        while stack:
+            folder = stack.pop()
+            try:
+                mtime = folder.stat().st_mtime
+            except OSError:
+                self._forget_dir(str(folder), counts)
+                continue
+            if not full and known_dirs.get(str(folder)) == mtime:
+                with self._lock:
+                    children = [row[0] for row in self._db.execute(
+                        "SELECT path FROM dirs WHERE parent = ?", (str(folder),))]
+                stack.extend(Path(child) for child in children)
+                continue
+            stack.extend(self._scan_dir(root, folder, mtime, counts))
+        return counts
+
+    def reconcile_in_background(self, root, full=False):
+        """Run :meth:`reconcile` on a thread of its own; False if ``root`` is already being scanned.
+
+        :meth:`scan_status` tells when it is done.
+        """
+        key = str(root)
+        with self._lock:
+            if key in self._scanning:
+                return False
+            self._scanning.add(key)
+
+        def scan():
+            counts = None
+            try:
+                counts = self.reconcile(root, full=full)
+            except (OSError, sqlite3.Error):
+                pass
+            finally:
+                with self._lock:
+                    self._scanning.discard(key)
+                    self._scanned[key] = counts
+
+        threading.Thread(target=scan, name="meowdown-library-scan", daemon=True).start()
+        return True
+
+    def scan_status(self, root):
+        """``(running, counts)``: whether ``root`` is being scanned and what its last scan found."""
+        with self._lock:
+            return str(root) in self._scanning, self._scanned.get(str(root))
+
+    def _scan_dir(self, root, folder, mtime, counts):
+        """List one folder, update its items and return its subfolders."""
+        subdirs, files = [], {}
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name != MANIFEST_DIR_NAME and not entry.name.startswith("."):
+                            subdirs.append(Path(entry.path))
+                    elif Path(entry.name).suffix.lower() in MEDIA_EXTENSIONS:
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        files[entry.path] = (stat.st_size, stat.st_mtime)
+        except OSError:
+            return []
+
+        with self._lock:
+            known = {row[0]: (row[1], row[2]) for row in self._db.execute(
+                "SELECT path, size, mtime FROM items WHERE dir = ?", (str(folder),))}
+            old_subdirs = {row[0] for row in self._db.execute(
+                "SELECT path FROM dirs WHERE parent = ?", (str(folder),))}
+
+        # New files get a full row; changed ones keep their metadata and only
+        # have their size and mtime refreshed
+        rows = [row for row in (self._row(root, {"path": path}, "scan")
+                                for path in files if path not in known) if row]
+        changed = [(size, mtime, path) for path, (size, mtime) in files.items()
+                   if path in known and known[path] != (size, mtime)]
+        gone = [path for path in known if path not in files]
+        counts["added"] += len(rows)
+        counts["updated"] += len(changed)
+        counts["removed"] += len(gone)
+
+        with self._lock, self._db:
+            self._upsert_locked(rows)
+            self._db.executemany("UPDATE items SET size = ?, mtime = ? WHERE path = ?", changed)
+            self._db.executemany("DELETE FROM items WHERE path = ?", [(path,) for path in gone])
+            self._db.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?)",
+                             (str(folder), str(folder.parent), mtime))
+        for vanished in old_subdirs - {str(path) for path in subdirs}:
+            self._forget_dir(vanished, counts)
+        return subdirs
+
+    def _forget_dir(self, folder, counts):
+        """Drop a folder that no longer exists, with everything indexed below it."""
+        prefix = folder.rstrip(os.sep) + os.sep
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "DELETE FROM items WHERE dir = ? OR substr(dir, 1, ?) = ?", (folder, len(prefix), prefix))
+            counts["removed"] += cursor.rowcount
+            self._db.execute("DELETE FROM dirs WHERE path = ? OR substr(path, 1, ?) = ?",
+                             (folder, len(prefix), prefix))
+
+    # --- querying --------------------------------------------------------------
+
+    def search(self, text="", root=None, limit=SEARCH_LIMIT):
+        """Items matching every word of ``text`` (as prefixes), newest first."""
+        columns = ("i.id, i.path, i.title, i.uploader, i.duration, i.format, i.ext, "
+                   "i.size, i.url, i.extractor, i.video_id, i.added_at")
+        where, params = [], []
+        if root is not None:
+            where.append("i.root = ?")
+            params.append(str(root))
+        text = text.strip()
+        if text and self.has_fts:
+            sql = (f"SELECT {columns} FROM items_fts f JOIN items i ON i.id = f.rowid "
+                   f"WHERE items_fts MATCH ? {''.join(' AND ' + w for w in where)} ORDER BY f.rowid DESC LIMIT ?")
+            params = [_fts_query(text)] + params
+        else:
+            for word in text.split():
+                where.append("(i.title LIKE ? OR i.uploader LIKE ? OR i.name LIKE ?)")
+                params.extend([f"%{word}%"] * 3)
+            sql = (f"SELECT {columns} FROM items i {'WHERE ' + ' AND '.join(where) if where else ''} "
+                   f"ORDER BY i.added_at DESC LIMIT ?")
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, params + [limit])]
+
+    def info(self, item_id):
+        """The stored info.json of an item as a dict, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT info FROM items WHERE id = ?", (item_id,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return json.loads(zlib.decompress(row[0]))
+
+    def stats(self, root=None):
+        """``{"items", "bytes", "seconds"}`` for the whole library or one root."""
+        sql = "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(duration), 0) FROM items"
+        params = ()
+        if root is not None:
+            sql += " WHERE root = ?"
+            params = (str(root),)
+        with self._lock:
+            items, size, seconds = self._db.execute(sql, params).fetchone()
+        return {"items": items, "bytes": size, "seconds": seconds}
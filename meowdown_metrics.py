@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Metrics
+Per-job phase timings, per-host aggregates, a JSON-lines trace log and a
+Prometheus text endpoint for the download engine.
+"""
+
+import bisect
+import json
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# =============================================================================
+# 🐱 CONFIGURATION & CONSTANTS
+# =============================================================================
+
+PHASES = ("queue_wait", "extractor", "ttfb", "transfer", "postprocess", "total")
+
+# Histogram buckets (seconds) shared by every phase
+HISTOGRAM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+# Rotate the JSON-lines log once it grows past this size
+MAX_LOG_BYTES = 10 * 1024 * 1024
+
+SIZE_RE = re.compile(r'of\s+~?\s*([\d.]+)\s*([KMGTP]?i?B)\b')
+SIZE_UNITS = {
+    "B": 1, "KB": 1000, "MB": 1000 ** 2, "GB": 1000 ** 3, "TB": 1000 ** 4,
+    "KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3, "TiB": 1024 ** 4,
+}
+
+# yt-dlp post-processor prefixes (everything that happens after the transfer)
+POSTPROCESS_RE = re.compile(
+    r'^\[(?:ExtractAudio|EmbedThumbnail|Metadata|ffmpeg|Merger|Fixup\w*|ThumbnailsConvertor|'
+    r'VideoConvertor|VideoRemuxer|SponsorBlock|ModifyChapters|EmbedSubtitle|SubtitlesConvertor)\]'
+)
+
+def parse_progress_size(line):
+    """Total size in bytes from a yt-dlp progress line, or None."""
+    match = SIZE_RE.search(line)
+    if not match:
+        return None
+    try:
+        return int(float(match.group(1)) * SIZE_UNITS.get(match.group(2), 1))
+    except ValueError:
+        return None
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of numbers (None when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(q * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+# =============================================================================
+# ⏱️ PER-JOB TIMINGS
+# =============================================================================
+
+class JobMetrics:
+    """Phase timeline of a single download job, fed from its output lines."""
+
+    def __init__(self, created_at):
+        self.created_at = created_at
+        self.started_at = None
+        self.extracted_at = None
+        self.first_byte_at = None
+        self.finished_at = None
+        self.transfer_seconds = 0.0
+        self.postprocess_seconds = 0.0
+        self.bytes = 0
+        self.files = 0
+        self._file_size = 0
+        self._transfer_started = None
+        self._postprocess_started = None
+
+    def start(self, now=None):
+        self.started_at = now or time.time()
+
+    def observe(self, kind, value, line, now=None):
+        """Update the timeline from one classified output line."""
+        now = now or time.time()
+
+        if POSTPROCESS_RE.match(line.strip()):
+            self._close_transfer(now)
+            if self._postprocess_started is None:
+                self._postprocess_started = now
+            return
+
+        if kind in ("found", "already", "progress") and self.extracted_at is None:
+            self.extracted_at = now
+
+        if kind == "found":
+            # A new file starts downloading
+            self._close_postprocess(now)
+            self._close_transfer(now)
+            self._file_size = 0
+        elif kind == "progress":
+            if not self._file_size or value >= 1.0:
+                self._file_size = parse_progress_size(line) or 0
+            if value > 0 and self.first_byte_at is None:
+                self.first_byte_at = now
+            if self._transfer_started is None and value < 1.0:
+                self._transfer_started = now
+            if value >= 1.0:
+                self._close_transfer(now)
+
+    def finish(self, now=None):
+        now = now or time.time()
+        self._close_transfer(now)
+        self._close_postprocess(now)
+        self.finished_at = now
+
+    def _close_transfer(self, now):
+        if self._transfer_started is not None:
+            self.transfer_seconds += now - self._transfer_started
+            self.bytes += self._file_size
+            self.files += 1
+            self._transfer_started = None
+            self._file_size = 0
+
+    def _close_postprocess(self, now):
+        if self._postprocess_started is not None:
+            self.postprocess_seconds += now - self._postprocess_started
+            self._postprocess_started = None
+
+    def phases(self):
+        """Seconds spent in each phase (None for phases that never happened)."""
+        def span(start, end):
+            return round(end - start, 3) if start is not None and end is not None else None
+
+        return {
+            "queue_wait": span(self.created_at, self.started_at),
+            "extractor": span(self.started_at, self.extracted_at),
+            "ttfb": span(self.started_at, self.first_byte_at),
+            "transfer": round(self.transfer_seconds, 3) if self.files else None,
+            "postprocess": round(self.postprocess_seconds, 3) if self.postprocess_seconds else None,
+            "total": span(self.started_at or self.created_at, self.finished_at),
+        }
+
+# =============================================================================
+# 📈 REGISTRY
+# =============================================================================
+
+class _Histogram:
+    """Cumulative Prometheus-style histogram."""
+
+    def __init__(self):
+        self.buckets = [0] * len(HISTOGRAM_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        index = bisect.bisect_left(HISTOGRAM_BUCKETS, value)
+        for i in range(index, len(self.buckets)):
+            self.buckets[i] += 1
+
+class MetricsRegistry:
+    """Collects finished-job records and serves them as Prometheus text or JSON."""
+
+    def __init__(self, log_path=None, recent_limit=2000):
+        self.log_path = Path(log_path) if log_path else None
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=recent_limit)
+        self._counters = {}
+        self._histograms = {}
+        if self.log_path:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def record(self, job):
+        """Record a finished job (called by the engine) and return its record."""
+        metrics = job.metrics
+        record = {
+            "ts": round(metrics.finished_at or time.time(), 3),
+            "job_id": job.job_id,
+            "batch_id": job.batch_id,
+            "host": job.host,
+            "urls": len(job.urls),
+            "attempt": job.attempt,
+            "retries": job.attempt - 1,
+            "outcome": job.state,
+            "bytes": metrics.bytes,
+            "files": metrics.files,
+            "phases": metrics.phases(),
+            "trace": {
+                "created": metrics.created_at,
+                "started": metrics.started_at,
+                "extracted": metrics.extracted_at,
+                "first_byte": metrics.first_byte_at,
+                "finished": metrics.finished_at,
+            },
+        }
+
+        with self._lock:
+            self._recent.append(record)
+            host = job.host or "unknown"
+            self._inc(("meowdown_jobs_total", (("host", host), ("outcome", job.state))))
+            self._inc(("meowdown_bytes_total", (("host", host),)), metrics.bytes)
+            self._inc(("meowdown_files_total", (("host", host),)), metrics.files)
+            if job.attempt > 1:
+                self._inc(("meowdown_retries_total", (("host", host),)))
+            for phase, seconds in record["phases"].items():
+                if seconds is not None:
+                    key = (f"meowdown_{phase}_seconds", (("host", host),))
+                    self._histograms.setdefault(key, _Histogram()).observe(seconds)
+            self._write_log(record)
+        return record
+
+    def _inc(self, key, amount=1):
+        self._counters[key] = self._counters.get(key, 0) + amount
+
+    def _write_log(self, record):
+        if not self.log_path:
+            return
+        try:
+            if self.log_path.exists() and self.log_path.stat().st_size > MAX_LOG_BYTES:
+                self.log_path.replace(self.log_path.with_suffix(self.log_path.suffix + ".1"))
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError:
+            pass  # Metrics must never break a download
+
+    # --- queries -------------------------------------------------------------
+
+    def recent(self, window=None):
+        """Job records, optionally only those finished in the last ``window`` seconds."""
+        with self._lock:
+            records = list(self._recent)
+        if window is None:
+            return records
+        cutoff = time.time() - window
+        return [r for r in records if r["ts"] >= cutoff]
+
+    def summary(self, window=300):
+        """Dashboard numbers: throughput and p50/p95 phase durations."""
+        records = self.recent(window)
+        total_bytes = sum(r["bytes"] for r in records)
+        result = {
+            "jobs": len(records),
+            "failed": sum(1 for r in records if r["outcome"] == "failed"),
+            "bytes": total_bytes,
+            "bytes_per_second": total_bytes / window if window else 0.0,
+            "jobs_per_minute": len(records) * 60.0 / window if window else 0.0,
+        }
+        for phase in PHASES:
+            values = [r["phases"][phase] for r in records if r["phases"].get(phase) is not None]
+            result[f"{phase}_p50"] = percentile(values, 0.50)
+            result[f"{phase}_p95"] = percentile(values, 0.95)
+        return result
+
+    def render_prometheus(self, gauges=None):
+        """Everything recorded so far in the Prometheus text exposition format."""
+        lines = []
+
+        def labels(pairs):
+            if not pairs:
+                return ""
+            inner = ",".join(f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                             for k, v in pairs)
+            return "{" + inner + "}"
+
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (list(h.buckets), h.count, h.sum) for key, h in self._histograms.items()}
+
+        for name in sorted({key[0] for key in counters}):
+            lines.append(f"# TYPE {name} counter")
+            for (metric, pairs), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{labels(pairs)} {value}")
+
+        for name in sorted({key[0] for key in histograms}):
+            lines.append(f"# TYPE {name} histogram")
+            for (metric, pairs), (buckets, count, total) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                for bound, bucket_count in zip(HISTOGRAM_BUCKETS, buckets):
+                    lines.append(f"{name}_bucket{labels(pairs + (('le', bound),))} {bucket_count}")
+                lines.append(f"{name}_bucket{labels(pairs + (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{labels(pairs)} {round(total, 6)}")
+                lines.append(f"{name}_count{labels(pairs)} {count}")
+
+        for name, value in sorted((gauges or {}).items()):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+# =============================================================================
+# 🌐 METRICS ENDPOINT
+# =============================================================================
+
+def start_metrics_server(registry, gauges=None, host="127.0.0.1", port=9464):
+    """Serve ``/metrics`` (Prometheus text) and ``/metrics.json`` on a background thread.
+
+    ``gauges`` is an optional callable returning ``{name: value}`` for
+    point-in-time values such as active jobs. Returns the server, or None if
+    the port is not available.
+    """
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            current = gauges() if gauges else {}
+            if self.path.split("?")[0] == "/metrics":
+                body = registry.render_prometheus(current).encode('utf-8')
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            elif self.path.split("?")[0] == "/metrics.json":
+                payload = {"gauges": current, "summary": registry.summary(), "recent": registry.recent(300)}
+                body = json.dumps(payload).encode('utf-8')
+                content_type = "application/json"
+            else:
+                self.send_error(404, "Not found")
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError:
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="meowdown-metrics", daemon=True).start()
+    return server
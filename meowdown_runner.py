@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Process Runner
+One asyncio event loop (on a background thread) that runs and watches every
+yt-dlp/FFmpeg child process: line-by-line output, timeouts, pause/resume and
+clean cancellation, without a thread per pipe. Usable from the Streamlit UI
+and from headless code alike.
+"""
+
+import asyncio
+import locale
+import os
+import platform
+import re
+import signal
+import subprocess
+import sys
+import threading
+import warnings
+
+# Optional imports - graceful fallback if not available
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+    psutil = None
+
+# =============================================================================
+# 🐱 CONFIGURATION & CONSTANTS
+# =============================================================================
+
+# How long a child gets to shut down cleanly (yt-dlp keeps its .part files)
+CANCEL_GRACE_SECONDS = 5.0
+
+# Output is read in chunks and split on \n and \r (FFmpeg redraws its
+# progress line with \r). Overlong lines are cut so one chatty child can't
+# grow the buffer without bound.
+READ_CHUNK_BYTES = 64 * 1024
+MAX_LINE_BYTES = 64 * 1024
+LINE_BREAK_RE = re.compile(rb'\r\n|\r|\n')
+
+TIMEOUT_TOTAL = "timeout"
+TIMEOUT_IDLE = "idle"
+
+# =============================================================================
+# 🛠️ PROCESS GROUPS
+# =============================================================================
+
+def process_group_kwargs():
+    """Popen arguments that put a child in its own process group/session."""
+    if platform.system() == "Windows":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+def _process_tree(proc):
+    """psutil handles for a process and all of its children (Windows pause support)."""
+    parent = psutil.Process(proc.pid)
+    return [parent] + parent.children(recursive=True)
+
+def suspend_process_tree(proc):
+    """Freeze a process and its children (yt-dlp, ffmpeg...). Returns True on success."""
+    try:
+        if platform.system() != "Windows":
+            os.killpg(proc.pid, signal.SIGSTOP)
+            return True
+        if HAS_PSUTIL:
+            for child in _process_tree(proc):
+                child.suspend()
+            return True
+    except Exception:
+        pass
+    return False
+
+def resume_process_tree(proc):
+    """Thaw a process tree frozen by :func:`suspend_process_tree`."""
+    try:
+        if platform.system() != "Windows":
+            os.killpg(proc.pid, signal.SIGCONT)
+            return True
+        if HAS_PSUTIL:
+            for child in _process_tree(proc):
+                child.resume()
+            return True
+    except Exception:
+        pass
+    return False
+
+async def terminate_process_tree(proc, grace=CANCEL_GRACE_SECONDS):
+    """Stop an asyncio child's process tree, giving it a chance to exit cleanly first.
+
+    yt-dlp treats an interrupt like Ctrl+C and leaves its ``.part`` files in
+    place, so a cancelled download can be resumed later. Anything still alive
+    after ``grace`` seconds is killed.
+    """
+    if proc.returncode is not None:
+        return
+    try:
+        if platform.system() == "Windows":
+            proc.send_signal(signal.CTRL_BREAK_EVENT)
+        else:
+            os.killpg(proc.pid, signal.SIGINT)
+            os.killpg(proc.pid, signal.SIGCONT)  # A paused tree can't handle the interrupt
+        await asyncio.wait_for(proc.wait(), grace)
+        return
+    except (ProcessLookupError, OSError):
+        return
+    except asyncio.TimeoutError:
+        pass
+
+    try:
+        if platform.system() == "Windows":
+            killer = await asyncio.create_subprocess_exec(
+                "taskkill", "/T", "/F", "/PID", str(proc.pid),
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+            await killer.wait()
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, OSError):
+        pass
+    await proc.wait()
+
+def _use_pidfd_child_watcher(loop):
+    """Watch children with pidfds on Linux instead of a waitpid thread per child.
+
+    Python 3.12+ already does this by default.
+    """
+    if sys.version_info >= (3, 12) or platform.system() != "Linux" or not hasattr(asyncio, "PidfdChildWatcher"):
+        return
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except (AttributeError, OSError):
+        return  # Kernel without pidfd support
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        watcher = asyncio.PidfdChildWatcher()
+        watcher.attach_loop(loop)
+        asyncio.set_child_watcher(watcher)
+
+# =============================================================================
+# 🏃 RUNNER
+# =============================================================================
+
+class ProcessResult:
+    """Outcome of :meth:`ProcessRunner.run`."""
+
+    def __init__(self, returncode, timed_out=None, duration=0.0, lines=0):
+        self.returncode = returncode
+        self.timed_out = timed_out  # None, TIMEOUT_TOTAL or TIMEOUT_IDLE
+        self.duration = duration
+        self.lines = lines
+
+    @property
+    def ok(self):
+        return self.returncode == 0 and self.timed_out is None
+
+    def __repr__(self):
+        return f"ProcessResult(returncode={self.returncode}, timed_out={self.timed_out!r}, lines={self.lines})"
+
+class ProcessRunner:
+    """Runs child processes on a single asyncio loop in a daemon thread.
+
+    ``run`` is a coroutine for code already on the loop; ``submit`` returns a
+    :class:`concurrent.futures.Future` (cancel it to stop the child cleanly)
+    and ``run_sync`` blocks, for plain threads such as Streamlit reruns.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self.encoding = locale.getpreferredencoding(False) or "utf-8"
+
+    @property
+    def loop(self):
+        """The runner's event loop, started on first use."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                _use_pidfd_child_watcher(self._loop)
+                self._thread = threading.Thread(target=self._loop.run_forever,
+                                                name="meowdown-process-runner", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def submit(self, cmd, **kwargs):
+        """Start :meth:`run` on the loop and return a concurrent Future for its result."""
+        return self.submit_coroutine(self.run(cmd, **kwargs))
+
+    def submit_coroutine(self, coro):
+        """Schedule any coroutine on the runner's loop."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run_sync(self, cmd, **kwargs):
+        """Run ``cmd`` to completion from a non-loop thread and return its result."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("run_sync() would deadlock on the runner's own loop; await run() instead")
+        return self.submit(cmd, **kwargs).result()
+
+    def shutdown(self):
+        with self._lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join(timeout=5)
+                self._loop = None
+                self._thread = None
+
+    async def run(self, cmd, on_line=None, on_start=None, timeout=None, idle_timeout=None,
+                  is_idle_allowed=None, grace=CANCEL_GRACE_SECONDS, **popen_kwargs):
+        """Run ``cmd``, feeding each output line (stdout and stderr) to ``on_line``.
+
+        ``on_line`` may be a plain function or a coroutine function; the pipe
+        is not read any further until it returns, so a slow consumer pauses
+        the child instead of piling up output. ``on_start`` receives the
+        :class:`asyncio.subprocess.Process`. The child is stopped after
+        ``timeout`` seconds in total or ``idle_timeout`` seconds without
+        output (unless ``is_idle_allowed()`` says the silence is expected,
+        e.g. while paused). Cancelling the task stops the child and re-raises
+        :class:`asyncio.CancelledError`.
+        """
+        proc = await asyncio.create_subprocess_exec(
+            *[str(part) for part in cmd], stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+            **{**process_group_kwargs(), **popen_kwargs})
+        if on_start is not None:
+            on_start(proc)
+        return await self.watch(proc, on_line=on_line, timeout=timeout, idle_timeout=idle_timeout,
+                                is_idle_allowed=is_idle_allowed, grace=grace)
+
+    async def watch(self, proc, on_line=None, timeout=None, idle_timeout=None, is_idle_allowed=None,
+                    grace=CANCEL_GRACE_SECONDS, until=None):
+        """Follow a started child's output with :meth:`run`'s timeouts and cancellation.
+
+        Normally this lasts until the child exits. A long-lived child (such
+        as a pooled yt-dlp worker) can instead end a run with a marker line:
+        ``until(line)`` returns the run's return code for it, or None for
+        ordinary output. The marker line is not passed to ``on_line`` and
+        the child is left running.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        state = {"last_output": loop.time(), "lines": 0, "returncode": None}
+        reader = asyncio.ensure_future(self._pump(proc.stdout, on_line, state, until))
+        timed_out = None
+        try:
+            while not reader.done():
+                now = loop.time()
+                checks = []
+                if timeout is not None:
+                    checks.append(started + timeout - now)
+                if idle_timeout is not None:
+                    checks.append(state["last_output"] + idle_timeout - now)
+                wait = max(0.0, min(checks)) if checks else None
+                await asyncio.wait({reader}, timeout=wait)
+                if reader.done():
+                    break
+
+                now = loop.time()
+                if timeout is not None and now - started >= timeout:
+                    timed_out = TIMEOUT_TOTAL
+                elif idle_timeout is not None and now - state["last_output"] >= idle_timeout:
+                    if is_idle_allowed is not None and is_idle_allowed():
+                        state["last_output"] = now
+                        continue
+                    timed_out = TIMEOUT_IDLE
+                if timed_out:
+                    await terminate_process_tree(proc, grace)
+                    break
+
+            if timed_out is None and reader.result():
+                returncode = state["returncode"]  # Ended by the marker line; the child lives on
+            else:
+                returncode = await proc.wait()
+                await reader  # Drain whatever is left (and surface consumer errors)
+        except asyncio.CancelledError:
+            reader.cancel()
+            await terminate_process_tree(proc, grace)
+            raise
+        return ProcessResult(returncode, timed_out, loop.time() - started, state["lines"])
+
+    async def _pump(self, stream, on_line, state, until=None):
+        """Read ``stream`` chunk by chunk and hand complete lines to ``on_line``.
+
+        Returns True if it stopped at an ``until`` marker line rather than EOF.
+        """
+        loop = asyncio.get_running_loop()
+        deliver_async = asyncio.iscoroutinefunction(on_line)
+        buffer = b""
+        while True:
+            chunk = await stream.read(READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            state["last_output"] = loop.time()
+            parts = LINE_BREAK_RE.split(buffer + chunk)
+            buffer = parts.pop()
+            if len(buffer) > MAX_LINE_BYTES:
+                parts.append(buffer[:MAX_LINE_BYTES])
+                buffer = b""
+            for part in parts:
+                if part:
+                    if until is not None:
+                        returncode = until(part.decode(self.encoding, errors='replace'))
+                        if returncode is not None:
+                            state["returncode"] = returncode
+                            return True
+                    state["lines"] += 1
+                    if on_line is not None:
+                        line = part.decode(self.encoding, errors='replace')
+                        if deliver_async:
+                            await on_line(line)
+                        else:
+                            on_line(line)
+        if buffer:
+            state["lines"] += 1
+            if on_line is not None:
+                line = buffer.decode(self.encoding, errors='replace')
+                if deliver_async:
+                    await on_line(line)
+                else:
+                    on_line(line)
+        return False
+
+_shared_runner = None
+_shared_lock = threading.Lock()
+
+def shared_runner():
+    """The process-wide runner used by the engine, the UI and headless tools."""
+    global _shared_runner
+    with _shared_lock:
+        if _shared_runner is None:
+            _shared_runner = ProcessRunner()
+        return _shared_runner
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Segmented Downloader
+Fetches one progressive media file as byte ranges over several pooled HTTP
+connections, for CDNs that throttle each connection. Ranges are written
+straight into a preallocated file at their offsets, and the progress of
+every range is saved next to it, so an interrupted download resumes each
+range where it stopped.
+
+yt-dlp uses it as the ``meowdown`` downloader (``--downloader
+http:meowdown``, with ``-N`` connections) once :func:`register` has run in
+its process. The worker pool registers it on start-up; run as a script,
+this file is yt-dlp with the downloader registered.
+"""
+
+import http.client
+import json
+import queue
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+from pathlib import Path
+
+# =============================================================================
+# 🐱 CONFIGURATION & CONSTANTS
+# =============================================================================
+
+DOWNLOADER_NAME = "meowdown"
+SEGMENTED_SCRIPT = Path(__file__).resolve()
+
+SEGMENT_CONNECTIONS = 8
+
+# Each connection works through a few ranges, so a slow one near the end
+# leaves less of the file behind; files under two ranges use one stream
+SEGMENTS_PER_CONNECTION = 4
+SEGMENT_MIN_BYTES = 1024 * 1024
+
+SEGMENT_READ_BYTES = 64 * 1024
+SEGMENT_RETRIES = 5
+SEGMENT_TIMEOUT = 30
+STATE_SAVE_SECONDS = 1.0
+PROGRESS_SECONDS = 0.5
+
+STATE_SUFFIX = ".segments"
+
+def split_ranges(size, connections=SEGMENT_CONNECTIONS, min_bytes=SEGMENT_MIN_BYTES):
+    """Inclusive ``[start, end]`` byte ranges covering ``size`` bytes."""
+    count = max(1, min(connections * SEGMENTS_PER_CONNECTION, size // min_bytes))
+    step = -(-size // count)
+    return [[start, min(start + step, size) - 1] for start in range(0, size, step)]
+
+def probe(url, headers=None, timeout=SEGMENT_TIMEOUT):
+    """``(final_url, size, ranges)`` of a download: where redirects end, its
+    length (None if unknown) and whether the server serves byte ranges."""
+    request = urllib.request.Request(url, headers={**(headers or {}), "Range": "bytes=0-0"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        final_url = response.geturl()
+        content_range = response.headers.get("Content-Range", "")
+        if response.status == 206 and "/" in content_range:
+            total = content_range.rsplit("/", 1)[1].strip()
+            return final_url, int(total) if total.isdigit() else None, total.isdigit()
+        length = response.headers.get("Content-Length")
+        return final_url, int(length) if length and length.isdigit() else None, False
+
+# =============================================================================
+# 🧵 SEGMENTED DOWNLOAD
+# =============================================================================
+
+class SegmentedDownload:
+    """One file downloaded as byte ranges by ``connections`` threads.
+
+    Each thread keeps its own keep-alive connection and takes the next
+    unfinished range until none are left. ``rate_limit`` (bytes/s) is
+    shared by all connections. ``progress(downloaded, total, speed)`` is
+    called from :meth:`run`'s thread about twice a second. Servers without
+    range support, and small files, are fetched as one stream.
+    """
+
+    def __init__(self, url, path, headers=None, connections=SEGMENT_CONNECTIONS, rate_limit=None,
+                 progress=None, min_bytes=SEGMENT_MIN_BYTES):
+        self.url = url
+        self.path = Path(path)
+        self.state_path = self.path.with_name(self.path.name + STATE_SUFFIX)
+        self.headers = dict(headers or {})
+        self.connections = max(1, int(connections))
+        self.rate_limit = rate_limit
+        self.progress = progress
+        self.min_bytes = min_bytes
+        self.size = None
+        self.segments = []
+        self.resumed_bytes = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._errors = []
+        self._transferred = 0
+        self._started = None
+        self._reported = 0
+
+    @property
+    def downloaded(self):
+        with self._lock:
+            return sum(done for _, _, done in self.segments)
+
+    def run(self):
+        """Download the file (blocking); returns its size. Raises on failure."""
+        final_url, self.size, ranges = probe(self.url, self.headers)
+        self._started = time.monotonic()
+        if not ranges or not self.size or self.size < 2 * self.min_bytes:
+            return self._run_single(final_url)
+
+        self.segments = self._load_state() or [[start, end, 0] for start, end in
+                                               split_ranges(self.size, self.connections, self.min_bytes)]
+        self.resumed_bytes = self.downloaded
+        if not self.resumed_bytes or not self.path.exists():
+            with open(self.path, 'wb') as f:
+                f.truncate(self.size)  # Sparse where the filesystem allows it
+            for segment in self.segments:
+                segment[2] = 0
+            self.resumed_bytes = 0
+
+        pending = queue.Queue()
+        for index, (start, end, done) in enumerate(self.segments):
+            if start + done <= end:
+                pending.put(index)
+        threads = [threading.Thread(target=self._worker, args=(final_url, pending), daemon=True,
+                                    name=f"meowdown-segment-{n}")
+                   for n in range(min(self.connections, pending.qsize()))]
+        for thread in threads:
+            thread.start()
+        try:
+            saved = time.monotonic()
+            while any(thread.is_alive() for thread in threads):
+                self._stop.wait(PROGRESS_SECONDS)
+                self._report()
+                if time.monotonic() - saved >= STATE_SAVE_SECONDS:
+                    self._save_state()
+                    saved = time.monotonic()
+        except BaseException:
+            self._stop.set()  # Cancelled: keep what we have for the next attempt
+            for thread in threads:
+                thread.join()
+            self._save_state()
+            raise
+        self._save_state()
+        if self._errors:
+            raise self._errors[0]
+        if self.downloaded != self.size:
+            raise OSError(f"download ended at {self.downloaded} of {self.size} bytes")
+        self._report()
+        self.state_path.unlink(missing_ok=True)
+        return self.size
+
+    # --- internals ------------------------------------------------------------
+
+    def _connect(self, url):
+        parts = urllib.parse.urlsplit(url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+        return connection_class(parts.netloc, timeout=SEGMENT_TIMEOUT), target
+
+    def _worker(self, url, pending):
+        connection, target = self._connect(url)
+        try:
+            with open(self.path, 'r+b') as f:
+                while not self._stop.is_set():
+                    try:
+                        index = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    connection = self._fetch_segment(connection, url, target, f, index)
+        except Exception as e:
+            self._errors.append(e)
+            self._stop.set()
+        finally:
+            connection.close()
+
+    def _fetch_segment(self, connection, url, target, f, index):
+        """Fill one range, retrying (on a new connection) from where it stopped."""
+        for attempt in range(SEGMENT_RETRIES + 1):
+            start, end, done = self.segments[index]
+            if start + done > end or self._stop.is_set():
+                return connection
+            try:
+                connection.request("GET", target, headers={**self.headers, "Range": f"bytes={start + done}-{end}"})
+                response = connection.getresponse()
+                if response.status != 206:
+                    response.read()
+                    raise OSError(f"HTTP {response.status} {response.reason} for a byte range")
+                f.seek(start + done)
+                while not self._stop.is_set():
+                    data = response.read(min(SEGMENT_READ_BYTES, end - start - done + 1))
+                    if not data:
+                        break
+                    f.write(data)
+                    done += len(data)
+                    with self._lock:
+                        self.segments[index][2] = done
+                        self._transferred += len(data)
+                    self._throttle()
+                    if start + done > end:
+                        break
+                if start + done > end:
+                    return connection
+                if not self._stop.is_set():
+                    raise OSError("connection closed in the middle of a range")
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                if attempt == SEGMENT_RETRIES or self._stop.is_set():
+                    raise
+                time.sleep(min(2 ** attempt, 10))
+                connection, target = self._connect(url)
+        return connection
+
+    def _throttle(self):
+        """Sleep while all connections together are ahead of ``rate_limit``."""
+        if not self.rate_limit:
+            return
+        with self._lock:
+            ahead = self._transferred / self.rate_limit - (time.monotonic() - self._started)
+        if ahead > 0:
+            time.sleep(ahead)
+
+    def _run_single(self, url):
+        """Plain sequential download for servers (or files) that don't warrant ranges."""
+        request = urllib.request.Request(url, headers=self.headers)
+        with urllib.request.urlopen(request, timeout=SEGMENT_TIMEOUT) as response, open(self.path, 'wb') as f:
+            self.segments = [[0, (self.size or 0) - 1, 0]]
+            while True:
+                data = response.read(SEGMENT_READ_BYTES)
+                if not data:
+                    break
+                f.write(data)
+                with self._lock:
+                    self.segments[0][2] += len(data)
+                    self._transferred += len(data)
+                self._throttle()
+                self._report(throttled=True)
+        self.size = self.downloaded
+        self._report()
+        return self.size
+
+    def _report(self, throttled=False):
+        if self.progress is None:
+            return
+        now = time.monotonic()
+        if throttled and now - self._reported < PROGRESS_SECONDS:
+            return
+        self._reported = now
+        elapsed = max(now - self._started, 1e-6)
+        self.progress(self.downloaded, self.size, self._transferred / elapsed)
+
+    def _load_state(self):
+        try:
+            state = json.loads(self.state_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        if state.get("size") != self.size or not self.path.exists() or self.path.stat().st_size != self.size:
+            return None  # A different file now - start over
+        return state.get("segments")
+
+    def _save_state(self):
+        with self._lock:
+            state = {"url": self.url, "size": self.size, "segments": [list(s) for s in self.segments]}
+        temp = self.state_path.with_name(self.state_path.name + ".tmp")
+        temp.write_text(json.dumps(state), encoding='utf-8')
+        temp.replace(self.state_path)
+
+# =============================================================================
+# 🔌 YT-DLP INTEGRATION
+# =============================================================================
+
+def register():
+    """Make ``--downloader meowdown`` available to yt-dlp in this process."""
+    from yt_dlp.downloader import external
+
+    if DOWNLOADER_NAME in external._BY_NAME:
+        return
+
+    class MeowdownFD(external.ExternalFD):
+        SUPPORTED_PROTOCOLS = ('http', 'https')
+
+        @classmethod
+        def available(cls, path=None):
+            return DOWNLOADER_NAME  # Built in, nothing to look for on PATH
+
+        @classmethod
+        def supports(cls, info_dict):
+            return (super().supports(info_dict) and 'fragments' not in info_dict
+                    and not info_dict.get('is_live'))
+
+        def _call_downloader(self, tmpfilename, info_dict):
+            headers = dict(info_dict.get('http_headers') or {})
+            cookie_header = self.ydl.cookiejar.get_cookie_header(info_dict['url'])
+            if cookie_header:
+                headers['Cookie'] = cookie_header
+            started = time.time()
+
+            def progress(downloaded, total, speed):
+                self._hook_progress({
+                    'status': 'downloading', 'filename': info_dict.get('_filename', tmpfilename),
+                    'tmpfilename': tmpfilename, 'downloaded_bytes': downloaded, 'total_bytes': total,
+                    'speed': speed, 'elapsed': time.time() - started,
+                    'eta': (total - downloaded) / speed if total and speed else None,
+                }, info_dict)
+
+            download = SegmentedDownload(
+                info_dict['url'], tmpfilename, headers=headers, progress=progress,
+                connections=self.params.get('concurrent_fragment_downloads') or SEGMENT_CONNECTIONS,
+                rate_limit=self.params.get('ratelimit'))
+            try:
+                download.run()
+            except (OSError, http.client.HTTPException) as e:
+                self.report_error(f'[{DOWNLOADER_NAME}] {e}')
+                return 1
+            return 0
+
+    external._BY_NAME[DOWNLOADER_NAME] = MeowdownFD
+
+def main(argv=None):
+    """yt-dlp's command line with the segmented downloader registered."""
+    register()
+    import yt_dlp
+    yt_dlp.main(argv)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Staging
+Keeps a download's intermediate I/O off a slow download folder (a network
+share or a spinning disk). yt-dlp works in a local scratch directory
+(tmpfs or an SSD): ``.part`` files, fragments, thumbnails, extracted audio
+and merge inputs all live there, and every finished file is published into
+the download folder in one piece - an atomic rename when both are on the
+same filesystem, otherwise a streaming copy under a hidden name that is
+renamed into place once complete. A file in the download folder is never
+seen half-written, and one that is already there is never replaced: right
+before each video downloads, a hook links an existing final file into the
+scratch folder so yt-dlp skips it as already downloaded, just like it
+would without staging.
+
+Each download batch gets its own directory in the scratch root, removed
+when the batch finishes; directories left behind by a crash are garbage
+collected once they have been untouched for a day.
+"""
+
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+# =============================================================================
+# 🐱 CONFIGURATION & CONSTANTS
+# =============================================================================
+
+# Batch directories nobody has touched for this long are removed
+STAGING_STALE_SECONDS = 24 * 3600
+
+# Hidden name a file is copied under before it is renamed into place
+PARTIAL_PREFIX = ".meowdown-partial-"
+
+LEASE_NAME = ".lease"
+OUT_DIR_NAME = "out"
+TEMP_DIR_NAME = "tmp"
+
+# Run by yt-dlp (``--exec before_dl:``) to link existing final files in
+STAGING_SCRIPT = Path(__file__).resolve()
+
+def _device(path):
+    """Device of ``path``, or of its nearest existing parent."""
+    path = Path(path).absolute()
+    while not path.exists() and path.parent != path:
+        path = path.parent
+    return path.stat().st_dev
+
+def _final_ext(cmd):
+    """Extension yt-dlp converts downloads to (``final_ext``), or None."""
+    def value(option):
+        return cmd[cmd.index(option) + 1] if option in cmd[:-1] else None
+
+    ext = value("--remux-video") or value("--recode-video")
+    if ext is None and "-x" in cmd:
+        ext = value("--audio-format")
+    return ext if ext and ext.isalnum() and ext != "best" else None
+
+def link_existing(out_dir, dest_path, final_ext, path):
+    """Link the file ``path`` (in ``out_dir``) stands for in ``dest_path``, if there is one.
+
+    yt-dlp then finds it in place and skips the download, as it does for
+    files in the download folder without staging.
+    """
+    relative = Path(path).relative_to(out_dir)
+    candidates = [relative]
+    if final_ext:
+        candidates.append(relative.with_suffix(f".{final_ext}"))
+    for candidate in candidates:
+        existing = Path(dest_path) / candidate
+        if not existing.is_file():
+            continue
+        link = Path(out_dir) / candidate
+        link.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            link.symlink_to(existing)
+        except OSError:
+            try:
+                os.link(existing, link)  # No symlinks (Windows without the privilege)
+            except OSError:
+                pass
+        return
+
+def _rename_new(source, target):
+    """Rename ``source`` to ``target`` unless ``target`` exists; False if it did."""
+    try:
+        os.link(source, target)  # Unlike a rename, fails if the target appeared meanwhile
+    except FileExistsError:
+        return False
+    except OSError:
+        os.replace(source, target)  # No hard links on this filesystem
+        return True
+    os.unlink(source)
+    return True
+
+def publish_file(source, target):
+    """Move ``source`` to ``target`` so that ``target`` only ever appears complete.
+
+    Same filesystem: one atomic rename. Otherwise the file is streamed into
+    a hidden partial file next to ``target``, flushed to disk and renamed
+    into place; ``source`` is removed afterwards. An existing ``target`` is
+    kept and ``source`` dropped: returns None then.
+    """
+    source, target = Path(source), Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if source.is_symlink() or target.exists():
+        source.unlink()
+        return None
+    if _device(source) == _device(target.parent):
+        if _rename_new(source, target):
+            return target
+        source.unlink()
+        return None
+
+    partial = target.with_name(f"{PARTIAL_PREFIX}{uuid.uuid4().hex[:8]}-{target.name}")
+    try:
+        shutil.copyfile(source, partial)  # Streams (sendfile / fcopyfile where the OS has it)
+        shutil.copystat(source, partial)
+        with open(partial, 'ab') as f:
+            os.fsync(f.fileno())
+        published = _rename_new(partial, target)
+    finally:
+        partial.unlink(missing_ok=True)
+    source.unlink()
+    return target if published else None
+
+# =============================================================================
+# 📦 STAGING AREA
+# =============================================================================
+
+class StagingArea:
+    """Per-batch scratch directories under ``root`` and the moves out of them.
+
+    A batch directory holds yt-dlp's ``tmp`` (``-P temp:``) and ``out``
+    (``-P home:``) folders; yt-dlp's own last step renames finished files
+    from one to the other on the scratch disk, and :meth:`publish` moves
+    everything in ``out`` into the download folder.
+    """
+
+    def __init__(self, root, stale_after=STAGING_STALE_SECONDS):
+        self.root = Path(root).expanduser()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        self._batch_locks = {}
+
+    def batch_dir(self, batch_id):
+        """The batch's scratch directory (created, and its lease renewed)."""
+        path = self.root / batch_id
+        (path / TEMP_DIR_NAME).mkdir(parents=True, exist_ok=True)
+        (path / OUT_DIR_NAME).mkdir(exist_ok=True)
+        self.touch(batch_id)
+        return path
+
+    def touch(self, batch_id):
+        """Renew a batch's lease so garbage collection leaves it alone."""
+        try:
+            (self.root / batch_id / LEASE_NAME).touch()
+        except FileNotFoundError:
+            pass
+
+    def command(self, cmd, dest_path, batch_id):
+        """``cmd`` with its output template moved under the batch's scratch folders.
+
+        The template is made relative to ``dest_path`` (yt-dlp ignores
+        ``--paths`` for absolute templates); templates outside it are left
+        alone and those downloads aren't staged. Videos already in
+        ``dest_path`` are linked in by :func:`link_existing` before they
+        download.
+        """
+        from yt_dlp.utils import shell_quote
+
+        cmd = list(cmd)
+        if "-o" not in cmd:
+            return cmd
+        position = cmd.index("-o") + 1
+        template = Path(cmd[position])
+        try:
+            cmd[position] = str(template.relative_to(Path(dest_path)))
+        except ValueError:
+            return cmd
+        batch = self.batch_dir(batch_id)
+        hook = shell_quote([sys.executable, str(STAGING_SCRIPT), str(batch / OUT_DIR_NAME),
+                            str(dest_path), _final_ext(cmd) or ""], shell=True)
+        return cmd + ["-P", f"home:{batch / OUT_DIR_NAME}", "-P", f"temp:{batch / TEMP_DIR_NAME}",
+                      "--exec", f"before_dl:{hook} {{}}"]
+
+    def final_path(self, batch_id, dest_path, path):
+        """Where a staged file ends up in ``dest_path`` (other paths are returned as they are)."""
+        try:
+            return Path(dest_path) / Path(path).relative_to(self.root / batch_id / OUT_DIR_NAME)
+        except ValueError:
+            return Path(path)
+
+    def publish(self, batch_id, dest_path):
+        """Move every finished file of a batch into ``dest_path``; returns the published paths.
+
+        Safe to call from several threads: a batch is published by one of
+        them at a time, and a file another call already moved is skipped.
+        Files already in ``dest_path`` are left as they are.
+        """
+        out = self.root / batch_id / OUT_DIR_NAME
+        with self._lock:
+            lock = self._batch_locks.setdefault(batch_id, threading.Lock())
+        published = []
+        with lock:
+            self.touch(batch_id)
+            for source in sorted(p for p in out.rglob("*") if p.is_file()):
+                try:
+                    target = publish_file(source, self.final_path(batch_id, dest_path, source))
+                except FileNotFoundError:
+                    continue
+                if target is not None:
+                    published.append(target)
+        return published
+
+    def release(self, batch_id):
+        """Remove a finished batch's scratch directory."""
+        with self._lock:
+            self._batch_locks.pop(batch_id, None)
+        shutil.rmtree(self.root / batch_id, ignore_errors=True)
+
+    def collect_garbage(self, active=()):
+        """Remove batch directories untouched for ``stale_after`` seconds; returns how many.
+
+        ``active`` batch IDs are always kept.
+        """
+        removed = 0
+        cutoff = time.time() - self.stale_after
+        for path in self.root.iterdir():
+            if not path.is_dir() or path.name in active:
+                continue
+            lease = path / LEASE_NAME
+            try:
+                touched = (lease if lease.exists() else path).stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if touched < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        return removed
+
+if __name__ == "__main__":
+    link_existing(*sys.argv[1:])
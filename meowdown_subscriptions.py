@@ -0,0 +1,537 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Subscriptions
+Keeps channels and playlists mirrored without pasting their URLs again.
+A subscription is a URL, the app's download options and how often to look
+for new videos; a scheduler polls the due ones in the background and
+queues only the videos it hasn't seen before on the DownloadEngine.
+
+Polling stays cheap with thousands of subscriptions: a conditional request
+(ETag / Last-Modified, or a hash of the page) skips listings that can't have
+changed, listings are flat (no per-video metadata is resolved) and stop
+where the download would stop (``--playlist-end``), polls run a few at a
+time with jitter and every host gets a pause between two polls.
+
+Usage:
+    python meowdown_subscriptions.py add --dest ~/Downloads/Mirror --every 6h URL
+    python meowdown_subscriptions.py list
+    python meowdown_subscriptions.py run --concurrency 4
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+from meowdown_cluster import archive_key
+from meowdown_engine import (
+    JOB_CANCELLED,
+    DownloadEngine,
+    JobManifest,
+    backoff_delay,
+    build_download_command,
+    get_data_dir,
+    plan_download,
+    url_host,
+)
+from meowdown_staging import StagingArea
+
+# =============================================================================
+# 🐱 CONFIGURATION & CONSTANTS
+# =============================================================================
+
+SUBSCRIPTION_INTERVAL = 6 * 3600
+
+# Every next poll lands up to this fraction of the interval early or late,
+# so subscriptions added together don't stay in lockstep
+SUBSCRIPTION_JITTER = 0.1
+
+# New subscriptions get their first poll within this many seconds
+SUBSCRIPTION_FIRST_SPREAD = 60.0
+
+SUBSCRIPTION_CONCURRENCY = 4
+SUBSCRIPTION_HOST_SPACING = 5.0
+SUBSCRIPTION_TICK_SECONDS = 1.0
+
+# A failed poll is tried again after an exponential backoff from this delay
+# (never later than its normal interval)
+SUBSCRIPTION_RETRY_SECONDS = 300.0
+
+# A video whose download keeps failing is given up after this many runs
+SUBSCRIPTION_MAX_ATTEMPTS = 3
+
+# The change probe hashes at most this much of a page without validators
+SUBSCRIPTION_PROBE_TIMEOUT = 15.0
+SUBSCRIPTION_PROBE_BYTES = 8 * 1024 * 1024
+SUBSCRIPTION_USER_AGENT = "Mozilla/5.0 (compatible; MeowDown)"
+
+# Per-request choices that don't carry over to later polls
+TRANSIENT_OPTIONS = ("plan_entries", "batch_mode", "batch_urls", "send_to_cluster")
+
+SEEN_QUEUED = "queued"
+SEEN_DONE = "done"
+SEEN_FAILED = "failed"
+
+INTERVAL_RE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*$', re.I)
+INTERVAL_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+def parse_interval(text):
+    """``"90s"``, ``"30m"``, ``"6h"``, ``"1d"`` or plain seconds -> seconds."""
+    match = INTERVAL_RE.match(str(text))
+    if not match or float(match.group(1)) <= 0:
+        raise ValueError(f"not an interval: {text!r}")
+    return float(match.group(1)) * INTERVAL_UNITS[match.group(2).lower()]
+
+def jittered(interval, jitter=SUBSCRIPTION_JITTER):
+    return interval * random.uniform(1 - jitter, 1 + jitter)
+
+# =============================================================================
+# 🔎 CHANGE PROBE
+# =============================================================================
+
+def probe_listing(url, etag=None, last_modified=None, body_hash=None, timeout=SUBSCRIPTION_PROBE_TIMEOUT):
+    """Conditional GET of a subscription's page: did it change since the last poll?
+
+    Returns ``{"status", "changed", "etag", "last_modified", "hash"}``. A
+    304 or an identical body counts as unchanged; anything the probe can't
+    tell (network errors, odd status codes) counts as changed, so the flat
+    listing decides.
+    """
+    headers = {"User-Agent": SUBSCRIPTION_USER_AGENT}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    result = {"status": None, "changed": True, "etag": None, "last_modified": None, "hash": None}
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=timeout) as response:
+            digest = hashlib.sha256()
+            remaining = SUBSCRIPTION_PROBE_BYTES
+            while remaining > 0:
+                block = response.read(min(remaining, 64 * 1024))
+                if not block:
+                    break
+                digest.update(block)
+                remaining -= len(block)
+            result.update(status=response.status, etag=response.headers.get("ETag"),
+                          last_modified=response.headers.get("Last-Modified"), hash=digest.hexdigest())
+            result["changed"] = body_hash is None or result["hash"] != body_hash
+    except urllib.error.HTTPError as e:
+        result["status"] = e.code
+        if e.code == 304:
+            result.update(changed=False, etag=e.headers.get("ETag") or etag,
+                          last_modified=e.headers.get("Last-Modified") or last_modified, hash=body_hash)
+    except (urllib.error.URLError, OSError, ValueError):
+        pass
+    return result
+
+# =============================================================================
+# 🗃️ REGISTRY
+# =============================================================================
+
+class SubscriptionRegistry:
+    """Subscriptions, their schedule and the videos each one has seen, in one SQLite file."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), isolation_level=None, check_same_thread=False)
+        with self._write():
+            self._db.execute("""CREATE TABLE IF NOT EXISTS subscriptions (
+                sub_id TEXT PRIMARY KEY, url TEXT, dest TEXT, format_type TEXT, options TEXT,
+                interval REAL, enabled INTEGER DEFAULT 1, backfill INTEGER DEFAULT 1,
+                probing INTEGER DEFAULT 1, etag TEXT, last_modified TEXT, body_hash TEXT,
+                next_run REAL, last_run REAL, last_status TEXT DEFAULT 'new', last_error TEXT,
+                failures INTEGER DEFAULT 0, listed INTEGER, queued_total INTEGER DEFAULT 0,
+                created_at REAL)""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS subscriptions_due ON subscriptions (enabled, next_run)")
+            self._db.execute("""CREATE TABLE IF NOT EXISTS seen (
+                sub_id TEXT, key TEXT, state TEXT, attempts INTEGER DEFAULT 0, batch_id TEXT,
+                updated_at REAL, PRIMARY KEY (sub_id, key)) WITHOUT ROWID""")
+
+    @contextmanager
+    def _write(self):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            cursor = self._db.execute(sql, params)
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _decode(row):
+        row["options"] = json.loads(row["options"] or "{}")
+        row["enabled"], row["backfill"], row["probing"] = \
+            bool(row["enabled"]), bool(row["backfill"]), bool(row["probing"])
+        return row
+
+    # --- subscriptions --------------------------------------------------------
+
+    def add(self, url, dest, format_type="mp4", options=None, interval=SUBSCRIPTION_INTERVAL, backfill=True):
+        """Subscribe to a channel or playlist; returns the subscription ID.
+
+        ``options`` are the app's download options (JSON-serialisable);
+        one-off choices such as a plan preview's picks are dropped. With
+        ``backfill=False`` the first poll only remembers what is already
+        there and later polls fetch what comes after it.
+        """
+        options = {k: v for k, v in (options or {}).items() if k not in TRANSIENT_OPTIONS}
+        if not options.get('channel_mode'):
+            options['is_playlist'] = True
+        sub_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._write():
+            self._db.execute(
+                "INSERT INTO subscriptions (sub_id, url, dest, format_type, options, interval, backfill, "
+                "next_run, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (sub_id, url, str(dest), format_type, json.dumps(options), float(interval), int(backfill),
+                 now + random.uniform(0, SUBSCRIPTION_FIRST_SPREAD), now))
+        return sub_id
+
+    def remove(self, sub_id):
+        with self._write():
+            self._db.execute("DELETE FROM subscriptions WHERE sub_id = ?", (sub_id,))
+            self._db.execute("DELETE FROM seen WHERE sub_id = ?", (sub_id,))
+
+    def set_enabled(self, sub_id, enabled):
+        with self._write():
+            self._db.execute("UPDATE subscriptions SET enabled = ? WHERE sub_id = ?", (int(enabled), sub_id))
+
+    def run_now(self, sub_id):
+        """Make a subscription due straight away."""
+        with self._write():
+            self._db.execute("UPDATE subscriptions SET next_run = 0 WHERE sub_id = ?", (sub_id,))
+
+    def get(self, sub_id):
+        rows = self._query("SELECT * FROM subscriptions WHERE sub_id = ?", (sub_id,))
+        return self._decode(rows[0]) if rows else None
+
+    def subscriptions(self):
+        return [self._decode(row) for row in self._query("SELECT * FROM subscriptions ORDER BY created_at")]
+
+    def due(self, now=None, limit=100):
+        """Enabled subscriptions whose next poll is due, most overdue first."""
+        rows = self._query("SELECT * FROM subscriptions WHERE enabled = 1 AND next_run <= ? "
+                           "ORDER BY next_run LIMIT ?", (now or time.time(), limit))
+        return [self._decode(row) for row in rows]
+
+    def next_due(self):
+        """When the next enabled subscription is due, or None."""
+        rows = self._query("SELECT MIN(next_run) AS at FROM subscriptions WHERE enabled = 1")
+        return rows[0]["at"]
+
+    def finish_poll(self, sub_id, status, error=None, probe=None, listed=None, queued=0, probing=None):
+        """Record a poll's outcome and schedule the next one.
+
+        ``probe`` holds the validators to send next time; leave it out when
+        the listing failed, so the next poll lists again.
+        """
+        now = time.time()
+        with self._write():
+            rows = self._db.execute("SELECT interval, failures FROM subscriptions WHERE sub_id = ?",
+                                    (sub_id,)).fetchall()
+            if not rows:
+                return  # Removed while it was being polled
+            interval, failures = rows[0]
+            failures = failures + 1 if error else 0
+            delay = min(interval, backoff_delay(failures, SUBSCRIPTION_RETRY_SECONDS)) if error else jittered(interval)
+            self._db.execute(
+                "UPDATE subscriptions SET last_run = ?, next_run = ?, last_status = ?, last_error = ?, "
+                "failures = ?, listed = COALESCE(?, listed), queued_total = queued_total + ? WHERE sub_id = ?",
+                (now, now + delay, status, error, failures, listed, queued, sub_id))
+            if probe is not None:
+                self._db.execute("UPDATE subscriptions SET etag = ?, last_modified = ?, body_hash = ? "
+                                 "WHERE sub_id = ?", (probe["etag"], probe["last_modified"], probe["hash"], sub_id))
+            if probing is not None:
+                self._db.execute("UPDATE subscriptions SET probing = ? WHERE sub_id = ?", (int(probing), sub_id))
+
+    # --- seen videos ----------------------------------------------------------
+
+    def seen(self, sub_id, keys):
+        """``{key: (state, attempts)}`` for the ``keys`` this subscription has seen."""
+        keys = list(keys)
+        found = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self._query(f"SELECT key, state, attempts FROM seen WHERE sub_id = ? AND key IN "
+                               f"({','.join('?' * len(chunk))})", [sub_id, *chunk])
+            found.update((row["key"], (row["state"], row["attempts"])) for row in rows)
+        return found
+
+    def mark(self, sub_id, keys, state, batch_id=None, attempt=False):
+        """Set the state of ``keys``; ``attempt`` counts one more download run for them."""
+        now = time.time()
+        with self._write():
+            self._db.executemany(
+                "INSERT INTO seen (sub_id, key, state, attempts, batch_id, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (sub_id, key) DO UPDATE SET state = excluded.state, "
+                "attempts = attempts + ?, batch_id = COALESCE(excluded.batch_id, batch_id), "
+                "updated_at = excluded.updated_at",
+                [(sub_id, key, state, int(attempt), batch_id, now, int(attempt)) for key in keys])
+
+    def has_retries(self, sub_id):
+        """True if some of the subscription's videos failed and may be tried again."""
+        return bool(self._query("SELECT 1 AS x FROM seen WHERE sub_id = ? AND state = ? AND attempts < ? LIMIT 1",
+                                (sub_id, SEEN_FAILED, SUBSCRIPTION_MAX_ATTEMPTS)))
+
+    def requeue_interrupted(self):
+        """Downloads queued by a scheduler that is gone count as failed (and are retried)."""
+        with self._write():
+            return self._db.execute("UPDATE seen SET state = ? WHERE state = ?",
+                                    (SEEN_FAILED, SEEN_QUEUED)).rowcount
+
+# =============================================================================
+# ⏰ SCHEDULER
+# =============================================================================
+
+class SubscriptionScheduler:
+    """Polls due subscriptions and queues their new videos on ``engine``.
+
+    At most ``concurrency`` polls run at once, and two polls of the same host
+    start at least ``host_spacing`` seconds apart (longer while the engine
+    holds the host back after a rate limit). Downloads run on the engine
+    like any other job; the app's after-download steps (mixes, compression)
+    are not applied to them. ``probe=False`` lists every due subscription
+    without the change probe, for comparison.
+    """
+
+    def __init__(self, registry, engine, concurrency=SUBSCRIPTION_CONCURRENCY,
+                 host_spacing=SUBSCRIPTION_HOST_SPACING, probe=True):
+        self.registry = registry
+        self.engine = engine
+        self.probe = probe
+        self.concurrency = max(1, concurrency)
+        self.host_spacing = host_spacing
+        self._pool = ThreadPoolExecutor(self.concurrency, thread_name_prefix="meowdown-subscription")
+        self._lock = threading.Lock()
+        self._polling = set()
+        self._host_ready = {}
+        self._pending = {}  # batch ID -> (sub ID, manifest, keys)
+        self._stop = threading.Event()
+        self._wake = threading.Event()  # A poll finished, so a slot is free
+        self._thread = None
+        registry.requeue_interrupted()
+
+    def start(self):
+        """Poll in a background thread until :meth:`stop`."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="meowdown-subscriptions", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def run(self, until_idle=False):
+        """Poll until :meth:`stop` (or, with ``until_idle``, until nothing is due or downloading)."""
+        while not self._stop.is_set():
+            self.tick()
+            if until_idle and self.idle():
+                break
+            self._wake.wait(SUBSCRIPTION_TICK_SECONDS)
+            self._wake.clear()
+
+    def idle(self):
+        with self._lock:
+            busy = self._polling or self._pending
+        return not busy and not self.registry.due(limit=1)
+
+    def tick(self):
+        """Settle finished downloads and start the polls that may start now."""
+        self._collect_finished()
+        now = time.time()
+        with self._lock:
+            free = self.concurrency - len(self._polling)
+            if free <= 0:
+                return
+            # Look a little past the free slots: some hosts may still be resting
+            for sub in self.registry.due(now, limit=free * 4 + len(self._polling)):
+                if free == 0:
+                    break
+                host = url_host(sub["url"])
+                if sub["sub_id"] in self._polling or \
+                        max(self._host_ready.get(host, 0.0), self.engine.host_throttle.ready_at(host)) > now:
+                    continue
+                self._host_ready[host] = now + self.host_spacing
+                self._polling.add(sub["sub_id"])
+                self._pool.submit(self._poll_guarded, sub)
+                free -= 1
+
+    def _poll_guarded(self, sub):
+        try:
+            self.poll(sub)
+        except Exception as e:
+            self.registry.finish_poll(sub["sub_id"], "failed", error=str(e))
+        finally:
+            with self._lock:
+                self._polling.discard(sub["sub_id"])
+            self._wake.set()
+
+    def poll(self, sub):
+        """Poll one subscription now; returns the number of videos queued."""
+        sub_id, url = sub["sub_id"], sub["url"]
+        probe = None
+        if self.probe and sub["probing"]:
+            probe = probe_listing(url, sub["etag"], sub["last_modified"], sub["body_hash"])
+            if probe["status"] == 429:
+                delay = self.engine.host_throttle.penalize(url_host(url))
+                self.registry.finish_poll(sub_id, "rate_limited", error=f"HTTP 429, host paused {delay:.0f}s")
+                return 0
+            if not probe["changed"] and not self.registry.has_retries(sub_id):
+                self.registry.finish_poll(sub_id, "unchanged", probe=probe)
+                return 0
+
+        dest = Path(sub["dest"])
+        dest.mkdir(parents=True, exist_ok=True)
+        options = sub["options"]
+        cmd = build_download_command(dest, sub["format_type"], options)
+        plan = plan_download([url], cmd, runner=self.engine.runner)
+        if plan["errors"] and not plan["entries"]:
+            self.registry.finish_poll(sub_id, "failed", error=next(iter(plan["errors"].values()))[-1][:300])
+            return 0
+
+        entries = {archive_key(e["extractor"], e["id"]): e for e in plan["entries"] if e.get("id")}
+        seen = self.registry.seen(sub_id, entries)
+        first_poll = sub["listed"] is None and not seen
+        archived = [key for key, entry in entries.items() if entry["archived"] and key not in seen]
+        new = {key: entry for key, entry in entries.items()
+               if not entry["archived"] and (key not in seen or (seen[key][0] == SEEN_FAILED
+                                                                 and seen[key][1] < SUBSCRIPTION_MAX_ATTEMPTS))}
+        if archived:
+            self.registry.mark(sub_id, archived, SEEN_DONE)
+        if first_poll and not sub["backfill"]:
+            self.registry.mark(sub_id, list(new), SEEN_DONE)
+            new = {}
+
+        if new:
+            manifest = JobManifest(dest)
+            # Marked before submitting so a fast finish can't be settled first
+            self.registry.mark(sub_id, list(new), SEEN_QUEUED, batch_id=manifest.job_id, attempt=True)
+            with self._lock:
+                self._pending[manifest.job_id] = (sub_id, manifest, list(new))
+            try:
+                self.engine.submit_download([url], dest, sub["format_type"],
+                                            dict(options, plan_entries=list(new.values())), manifest=manifest)
+            except Exception:
+                with self._lock:
+                    self._pending.pop(manifest.job_id, None)
+                self.registry.mark(sub_id, list(new), SEEN_FAILED)
+                raise
+
+        # A page that changes on every request (no validators, different hash)
+        # while nothing new appears isn't worth probing any more
+        dynamic = (probe is not None and probe["status"] == 200 and not probe["etag"]
+                   and not probe["last_modified"] and sub["body_hash"] is not None and not new)
+        error = "; ".join(lines[-1][:200] for lines in plan["errors"].values()) or None
+        self.registry.finish_poll(sub_id, "queued" if new else "checked", error=error,
+                                  probe=probe if probe and not error else None, listed=len(entries),
+                                  queued=len(new), probing=False if dynamic else None)
+        return len(new)
+
+    def _collect_finished(self):
+        """Mark the videos of finished subscription downloads done, or failed to retry later."""
+        with self._lock:
+            pending = list(self._pending.items())
+        for batch_id, (sub_id, manifest, keys) in pending:
+            jobs = self.engine.jobs(batch_id=batch_id)
+            if jobs and not all(job.finished for job in jobs):
+                continue
+            results = {}
+            for job in jobs:  # Retries come later and override what they retried
+                results.update(job.results)
+            broken = any(job.state == JOB_CANCELLED for job in jobs) or \
+                any(result.get("status") == "failed" for result in results.values())
+            manifest.poll()
+            downloaded = {archive_key(entry.get("extractor"), entry["id"])
+                          for entry in manifest.entries if entry.get("id")}
+            done = [key for key in keys if key in downloaded or not broken]  # Otherwise skipped by a filter
+            failed = [key for key in keys if key not in done]
+            if done:
+                self.registry.mark(sub_id, done, SEEN_DONE)
+            if failed:
+                self.registry.mark(sub_id, failed, SEEN_FAILED)
+            with self._lock:
+                self._pending.pop(batch_id, None)
+
+# =============================================================================
+# 🖥️ COMMAND LINE
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--registry", default=str(get_data_dir() / "subscriptions.sqlite3"),
+                        help="Subscription database")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="Subscribe to a channel or playlist")
+    add.add_argument("--dest", required=True)
+    add.add_argument("--format", default="mp4", help="mp4, mp3_complete, best, video_720p, ...")
+    add.add_argument("--every", default="6h", help="Poll interval (30m, 6h, 1d, ...)")
+    add.add_argument("--channel", action="store_true", help="Treat the URL as a channel")
+    add.add_argument("--limit", type=int, default=50, help="Newest videos to look at per poll")
+    add.add_argument("--no-backfill", action="store_true", help="Skip the videos that are already there")
+    add.add_argument("url")
+
+    commands.add_parser("list", help="Show subscriptions and their last poll")
+    remove = commands.add_parser("remove", help="Unsubscribe")
+    remove.add_argument("sub_id")
+
+    run = commands.add_parser("run", help="Poll due subscriptions and download what's new")
+    run.add_argument("--concurrency", type=int, default=SUBSCRIPTION_CONCURRENCY, help="Polls at once")
+    run.add_argument("--host-spacing", type=float, default=SUBSCRIPTION_HOST_SPACING,
+                     help="Seconds between two polls of one host")
+    run.add_argument("--downloads", type=int, default=2, help="Downloads at once")
+    run.add_argument("--once", action="store_true", help="Poll every subscription now, then exit when done")
+    run.add_argument("--staging-dir", help="Local scratch folder to download in before moving files into place")
+    args = parser.parse_args(argv)
+
+    registry = SubscriptionRegistry(args.registry)
+    if args.command == "add":
+        options = {"channel_mode": args.channel, "channel_limit": args.limit, "max_downloads": args.limit}
+        print(registry.add(args.url, Path(args.dest).expanduser(), args.format, options,
+                           interval=parse_interval(args.every), backfill=not args.no_backfill))
+    elif args.command == "list":
+        for sub in registry.subscriptions():
+            next_in = max(0, (sub["next_run"] or 0) - time.time())
+            print(f"{sub['sub_id']}  {'on ' if sub['enabled'] else 'off'}  {sub['last_status']:<12}  "
+                  f"next in {next_in / 60:6.1f} min  {sub['queued_total']:>5} queued  {sub['url']}")
+    elif args.command == "remove":
+        registry.remove(args.sub_id)
+    else:
+        engine = DownloadEngine(max_workers=args.downloads, log_dir=get_data_dir() / "logs",
+                                staging=StagingArea(args.staging_dir) if args.staging_dir else None)
+        scheduler = SubscriptionScheduler(registry, engine, concurrency=args.concurrency,
+                                          host_spacing=args.host_spacing)
+        print(f"MeowDown subscriptions from {args.registry}", flush=True)
+        if args.once:
+            for sub in registry.subscriptions():
+                if sub["enabled"]:
+                    registry.run_now(sub["sub_id"])
+        try:
+            scheduler.run(until_idle=args.once)
+        except KeyboardInterrupt:
+            scheduler.stop()
+
+if __name__ == "__main__":
+    sys.exit(main())
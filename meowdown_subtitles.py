@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Subtitles
+Subtitles as their own stage of a download job: yt-dlp only prints which
+subtitles a video has, then MeowDown fetches them while the media is still
+transferring, prefers manual subtitles over automatic captions, converts
+WebVTT to SRT in a pool of worker processes and caches the result per
+video and language, so downloading the same video again never fetches its
+subtitles twice.
+"""
+
+import json
+import multiprocessing
+import re
+import threading
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+# =============================================================================
+# 🐱 CONFIGURATION & CONSTANTS
+# =============================================================================
+
+SUBTITLE_LANGS = ("en", "en-US")
+SUBTITLE_FETCH_TIMEOUT = 30
+SUBTITLE_FETCH_WORKERS = 8
+SUBTITLE_CONVERT_WORKERS = 2
+
+USER_AGENT = "Mozilla/5.0 (MeowDown subtitle stage)"
+
+# Subtitle formats the stage can turn into SRT, best first
+SUBTITLE_EXTS = ("vtt", "srt")
+
+# Languages yt-dlp can pick out of a dict in an output template (no hyphens)
+TEMPLATE_SAFE_LANG_RE = re.compile(r'^\w+$')
+
+VTT_TIMING_RE = re.compile(r'^((?:\d+:)?\d{2}:\d{2}[.,]\d{3})\s+-->\s+((?:\d+:)?\d{2}:\d{2}[.,]\d{3})')
+VTT_TAG_RE = re.compile(r'<[^>]*>')
+
+def subtitle_template(langs=SUBTITLE_LANGS):
+    """Template printed once per video: its manual subtitles and the automatic captions for ``langs``.
+
+    Manual subtitle lists are short, so they are printed whole and filtered
+    here; automatic captions exist in every language, so only the wanted
+    ones are printed (languages with a hyphen can't be picked in a template
+    and are only used when they are manual).
+    """
+    auto = ",".join(lang for lang in langs if TEMPLATE_SAFE_LANG_RE.match(lang))
+    auto_field = f'%(automatic_captions.{{{auto}}}|null)j' if auto else 'null'
+    return ('{"id": %(id|null)j, "extractor": %(extractor_key|null)j, '
+            '"subtitles": %(subtitles|null)j, "automatic_captions": ' + auto_field + '}')
+
+# =============================================================================
+# 📝 CONVERSION
+# =============================================================================
+
+def _srt_time(stamp):
+    """``01:02.500`` / ``1:01:02.500`` -> ``00:01:02,500`` / ``01:01:02,500``."""
+    parts = stamp.replace(",", ".").split(":")
+    if len(parts) == 2:
+        parts.insert(0, "0")
+    hours, minutes, seconds = parts
+    return f"{int(hours):02d}:{minutes}:{seconds.replace('.', ',')}"
+
+def vtt_to_srt(text):
+    """Convert WebVTT to SRT.
+
+    Drops the header, NOTE/STYLE/REGION blocks, cue settings and inline
+    tags, and the repeated line of rolling automatic captions.
+    """
+    if not text.lstrip("\ufeff").startswith("WEBVTT"):
+        return text  # Already SRT (or something the player will have to cope with)
+    cues = []
+    previous = []
+    for block in re.split(r'\r?\n\s*\r?\n', text.lstrip("\ufeff")):
+        lines = block.strip().splitlines()
+        while lines and not VTT_TIMING_RE.match(lines[0]):
+            lines.pop(0)  # WEBVTT header, NOTE/STYLE blocks, cue identifiers
+        if not lines:
+            continue
+        start, end = VTT_TIMING_RE.match(lines[0]).groups()
+        text_lines = [VTT_TAG_RE.sub("", line).strip() for line in lines[1:]]
+        text_lines = [line for line in text_lines if line]
+        if text_lines and previous and text_lines[0] == previous[-1]:
+            text_lines = text_lines[1:]  # Rolling captions repeat the last line
+        if not text_lines:
+            continue
+        previous = text_lines
+        cues.append(f"{len(cues) + 1}\n{_srt_time(start)} --> {_srt_time(end)}\n" + "\n".join(text_lines))
+    return "\n\n".join(cues) + "\n"
+
+def convert_subtitle(source, dest):
+    """Convert a fetched subtitle file to SRT at ``dest``. Runs in a pool worker."""
+    text = Path(source).read_text(encoding='utf-8', errors='replace')
+    temp = Path(dest).with_suffix(".part")
+    temp.write_text(vtt_to_srt(text), encoding='utf-8')
+    temp.replace(dest)
+    Path(source).unlink(missing_ok=True)
+    return str(dest)
+
+# =============================================================================
+# 🎞️ SUBTITLE STAGE
+# =============================================================================
+
+def safe_path_part(value):
+    """A video ID or extractor name usable as a folder name."""
+    return re.sub(r'[\\/:*?"<>|]', "_", str(value))
+
+def pick_subtitles(info, langs=SUBTITLE_LANGS):
+    """``{lang: (kind, ext, url)}`` for ``langs``, manual subtitles before automatic captions."""
+    picked = {}
+    for lang in langs:
+        for kind, field in (("manual", "subtitles"), ("auto", "automatic_captions")):
+            tracks = (info.get(field) or {}).get(lang) or []
+            by_ext = {track.get("ext"): track.get("url") for track in tracks if isinstance(track, dict)}
+            ext = next((ext for ext in SUBTITLE_EXTS if by_ext.get(ext)), None)
+            if ext:
+                picked[lang] = (kind, ext, by_ext[ext])
+                break
+    return picked
+
+class SubtitleStage:
+    """Fetches, converts and caches subtitles for download jobs.
+
+    Jobs add :meth:`ytdlp_args` to their command, feed :meth:`poll` while
+    yt-dlp runs and call :meth:`prepare` for each video it announces; that
+    starts the fetches right away, on a thread pool, before the media is
+    done. Converted files live in ``<directory>/<extractor>/<id>/<lang>.<kind>.srt``.
+    """
+
+    def __init__(self, directory, langs=SUBTITLE_LANGS, fetch_workers=SUBTITLE_FETCH_WORKERS,
+                 convert_workers=SUBTITLE_CONVERT_WORKERS):
+        self.directory = Path(directory)
+        self.langs = tuple(langs)
+        self.inbox_dir = self.directory / "inbox"
+        self.inbox_dir.mkdir(parents=True, exist_ok=True)
+        self.fetches = 0
+        self.convert_workers = convert_workers
+        self._lock = threading.Lock()
+        self._cursors = {}
+        self._inflight = {}
+        self._fetcher = ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix="meowdown-subs")
+        self._converter = None
+
+    def ytdlp_args(self, tag):
+        """Arguments that make yt-dlp print each video's subtitle list for :meth:`poll`."""
+        target = str(self.inbox_dir / f"{tag}.jsonl").replace("%", "%%")
+        return ["--print-to-file", f"video:{subtitle_template(self.langs)}", target]
+
+    def poll(self, tag):
+        """Videos announced since the last poll of this job's inbox."""
+        inbox = self.inbox_dir / f"{tag}.jsonl"
+        with self._lock:
+            offset = self._cursors.get(tag, 0)
+            try:
+                with open(inbox, 'rb') as f:
+                    f.seek(offset)
+                    data = f.read()
+            except OSError:
+                return []
+            complete = data[:data.rfind(b"\n") + 1]  # Leave a half-written line for next time
+            self._cursors[tag] = offset + len(complete)
+        infos = []
+        for line in complete.decode('utf-8', errors='replace').splitlines():
+            try:
+                info = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if info.get("id") and info.get("extractor"):
+                infos.append(info)
+        return infos
+
+    def finish(self, tag):
+        """Forget a job's inbox once it is done."""
+        with self._lock:
+            self._cursors.pop(tag, None)
+        (self.inbox_dir / f"{tag}.jsonl").unlink(missing_ok=True)
+
+    def video_dir(self, extractor, video_id):
+        return self.directory / safe_path_part(extractor) / safe_path_part(video_id)
+
+    def cached(self, extractor, video_id):
+        """``{lang: path}`` of the SRT files already cached for a video (manual preferred)."""
+        folder = self.video_dir(extractor, video_id)
+        found = {}
+        for lang in self.langs:
+            for kind in ("manual", "auto"):
+                path = folder / f"{lang}.{kind}.srt"
+                if path.exists():
+                    found[lang] = path
+                    break
+        return found
+
+    def prepare(self, info):
+        """Start fetching a video's subtitles; returns a Future of ``{lang: srt_path}``.
+
+        Languages that are already cached are not fetched again, and a video
+        that is being prepared shares the Future that is already running.
+        """
+        key = (info["extractor"], info["id"])
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            future = self._fetcher.submit(self._prepare, info)
+            self._inflight[key] = future
+        future.add_done_callback(lambda _: self._forget_inflight(key))
+        return future
+
+    def shutdown(self):
+        self._fetcher.shutdown(wait=True)
+        with self._lock:
+            if self._converter is not None:
+                self._converter.shutdown(wait=True)
+                self._converter = None
+
+    # --- internals ------------------------------------------------------------
+
+    def _forget_inflight(self, key):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def _convert_pool(self):
+        with self._lock:
+            if self._converter is None:
+                self._converter = ProcessPoolExecutor(
+                    max_workers=self.convert_workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._converter
+
+    def _prepare(self, info):
+        found = self.cached(info["extractor"], info["id"])
+        wanted = {lang: track for lang, track in pick_subtitles(info, self.langs).items() if lang not in found}
+        if not wanted:
+            return found
+        folder = self.video_dir(info["extractor"], info["id"])
+        folder.mkdir(parents=True, exist_ok=True)
+        conversions = {}
+        for lang, (kind, ext, url) in wanted.items():
+            raw = folder / f"{lang}.{kind}.{ext}.download"
+            request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+            with urllib.request.urlopen(request, timeout=SUBTITLE_FETCH_TIMEOUT) as response:
+                raw.write_bytes(response.read())
+            self.fetches += 1
+            conversions[lang] = self._convert_pool().submit(convert_subtitle, raw, folder / f"{lang}.{kind}.srt")
+        for lang, conversion in conversions.items():
+            found[lang] = Path(conversion.result())
+        return found
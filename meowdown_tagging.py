@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Tagging
+Writes MP3 tags and cover art in-process with mutagen, in a pool of worker
+processes, instead of asking yt-dlp to remux every track with FFmpeg while
+it still holds a download slot. The engine hands each finished track to
+the pool as soon as it lands.
+"""
+
+import io
+import multiprocessing
+import os
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Optional imports - graceful fallback if not available
+try:
+    from mutagen.id3 import APIC, ID3, TALB, TDRC, TIT2, TPE1, TRCK, WOAS, ID3NoHeaderError
+    HAS_MUTAGEN = True
+except ImportError:
+    HAS_MUTAGEN = False
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+    Image = None
+
+# =============================================================================
+# 🐱 CONFIGURATION & CONSTANTS
+# =============================================================================
+
+# Tagging is CPU work, so one worker per core
+TAGGING_WORKERS = os.cpu_count() or 2
+
+# Cover art formats players understand without conversion
+COVER_MIME_TYPES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png"}
+
+# =============================================================================
+# 🏷️ TAGGING
+# =============================================================================
+
+def tags_from_entry(entry):
+    """ID3-ready tags from a job manifest entry (what ``--embed-metadata`` would write)."""
+    date = str(entry.get("date") or "")
+    return {
+        "title": entry.get("title"),
+        "artist": entry.get("artist") or entry.get("uploader"),
+        "album": entry.get("album"),
+        "track": entry.get("track_number"),
+        "year": date[:4] if date[:4].isdigit() else None,
+        "url": entry.get("url"),
+    }
+
+def cover_art(thumbnail, ffmpeg_path=None):
+    """``(mime, bytes)`` of a thumbnail as JPEG/PNG, converting other formats; None on failure."""
+    thumbnail = Path(thumbnail)
+    suffix = thumbnail.suffix.lower()
+    try:
+        if suffix in COVER_MIME_TYPES:
+            return COVER_MIME_TYPES[suffix], thumbnail.read_bytes()
+        if HAS_PIL:
+            with Image.open(thumbnail) as image:
+                buffer = io.BytesIO()
+                image.convert("RGB").save(buffer, "JPEG", quality=90)
+                return "image/jpeg", buffer.getvalue()
+        if ffmpeg_path:
+            # WebP without Pillow: still FFmpeg, but in the pool, not a download slot
+            result = subprocess.run(
+                [str(ffmpeg_path), "-loglevel", "error", "-i", str(thumbnail),
+                 "-f", "image2pipe", "-vcodec", "mjpeg", "-"],
+                capture_output=True, timeout=60)
+            if result.returncode == 0 and result.stdout:
+                return "image/jpeg", result.stdout
+    except (OSError, ValueError, subprocess.SubprocessError):
+        pass
+    return None
+
+def tag_mp3(path, tags, thumbnail=None, ffmpeg_path=None, cover=None):
+    """Write ID3v2.3 tags (and cover art) into ``path``, then delete the loose thumbnail.
+
+    ``cover`` is a ready JPEG from the thumbnail cache and is used instead
+    of (and never deleted like) ``thumbnail``. Runs in a pool worker;
+    returns ``path``.
+    """
+    try:
+        id3 = ID3(path)
+    except ID3NoHeaderError:
+        id3 = ID3()
+
+    frames = ((TIT2, "title"), (TPE1, "artist"), (TALB, "album"), (TRCK, "track"), (TDRC, "year"))
+    for frame, key in frames:
+        if tags.get(key):
+            id3.setall(frame.__name__, [frame(encoding=3, text=str(tags[key]))])
+    if tags.get("url"):
+        id3.setall("WOAS", [WOAS(url=tags["url"])])
+
+    art_source = cover if cover and Path(cover).exists() else thumbnail
+    if art_source and Path(art_source).exists():
+        art = cover_art(art_source, ffmpeg_path)
+        if art is not None:
+            id3.setall("APIC", [APIC(encoding=3, mime=art[0], type=3, desc="Cover", data=art[1])])
+
+    id3.save(path, v2_version=3)
+    if thumbnail:
+        try:
+            os.remove(thumbnail)  # Embedded now, like --embed-thumbnail leaves no file behind
+        except OSError:
+            pass
+    return path
+
+class TaggingPool:
+    """Worker processes that tag finished MP3s off the download slots.
+
+    The pool is started on first use and uses the ``spawn`` start method,
+    which is safe from Streamlit's threads and works on every platform.
+    """
+
+    def __init__(self, workers=TAGGING_WORKERS, ffmpeg_path=None):
+        self.workers = workers
+        self.ffmpeg_path = str(ffmpeg_path) if ffmpeg_path else None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, entry, cover=None):
+        """Tag the file of a manifest entry; returns a :class:`concurrent.futures.Future`.
+
+        ``cover`` is an album art file to embed instead of the entry's own thumbnail.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor.submit(tag_mp3, entry["path"], tags_from_entry(entry),
+                                         entry.get("thumbnail"), self.ffmpeg_path,
+                                         str(cover) if cover else None)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Thumbnails
+Content-addressed cache of thumbnails and album art shared by every job.
+Each thumbnail URL is fetched once and each converted cover is made once,
+then reused across tracks, videos and re-downloads. The cache is trimmed
+to a byte budget, least recently used first.
+"""
+
+import hashlib
+import io
+import shutil
+import sqlite3
+import subprocess
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Optional imports - graceful fallback if not available
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+    Image = None
+
+# =============================================================================
+# 🐱 CONFIGURATION & CONSTANTS
+# =============================================================================
+
+THUMBNAIL_CACHE_BYTES = 256 * 1024 * 1024
+THUMBNAIL_FETCH_TIMEOUT = 30
+THUMBNAIL_WORKERS = 4
+
+# Album art is scaled down to fit this many pixels on its longest side
+COVER_MAX_SIDE = 1200
+
+USER_AGENT = "Mozilla/5.0 (MeowDown thumbnail cache)"
+
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF8", "gif"),
+)
+
+def sniff_extension(data, default="bin"):
+    """File extension for image bytes, from their magic number."""
+    for signature, ext in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return ext
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    return default
+
+# =============================================================================
+# 🖼️ THUMBNAIL CACHE
+# =============================================================================
+
+class ThumbnailCache:
+    """Thumbnails stored once by SHA-256 of their content, with an LRU byte budget.
+
+    ``urls`` maps a thumbnail URL to the hash of what it served, ``variants``
+    maps a source hash plus a target (``jpg`` or ``jpg@1200``) to the hash
+    of the converted image and ``blobs`` holds the size and last use of
+    every stored file. Fetches and conversions run on a small thread pool;
+    concurrent requests for the same thumbnail share one fetch.
+    """
+
+    def __init__(self, directory, max_bytes=THUMBNAIL_CACHE_BYTES, ffmpeg_path=None,
+                 workers=THUMBNAIL_WORKERS):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ffmpeg_path = str(ffmpeg_path) if ffmpeg_path else None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="meowdown-thumbs")
+        self.fetches = 0
+        self.conversions = 0
+        self._db = sqlite3.connect(str(self.directory / "index.sqlite3"), check_same_thread=False)
+        with self._db:
+            self._db.execute("""CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY, ext TEXT, size INTEGER, last_used REAL)""")
+            self._db.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, hash TEXT)")
+            self._db.execute("""CREATE TABLE IF NOT EXISTS variants (
+                source TEXT, target TEXT, hash TEXT, PRIMARY KEY (source, target))""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS blobs_lru ON blobs (last_used)")
+        self._total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    # --- public API ---------------------------------------------------------
+
+    def prepare(self, url, max_side=None):
+        """Start fetching/converting ``url`` to JPEG; returns a Future of the cached file's path.
+
+        ``max_side`` scales the image down to fit (album art); None keeps
+        its size. Only the first caller for a given URL and size does the
+        work, the others wait for the same Future.
+        """
+        key = (url, max_side)
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            future = self._executor.submit(self.get, url, max_side)
+            self._inflight[key] = future
+        future.add_done_callback(lambda _: self._forget_inflight(key))
+        return future
+
+    def get(self, url, max_side=None):
+        """Path of ``url`` as a cached JPEG (blocking); fetches and converts only on a miss."""
+        target = f"jpg@{max_side}" if max_side else "jpg"
+        with self._lock:
+            source = self._lookup_locked("SELECT hash FROM urls WHERE url = ?", (url,))
+            variant = self._lookup_locked(
+                "SELECT hash FROM variants WHERE source = ? AND target = ?", (source, target))
+            if variant is not None:
+                try:
+                    return self._touch_locked(variant)
+                except FileNotFoundError:
+                    pass  # Evicted or deleted by hand - make it again
+            source_path = self._blob_path_locked(source) if source else None
+
+        if source_path is not None and source_path.exists():
+            data = source_path.read_bytes()
+        else:
+            data = self._fetch(url)
+            source = self._store(data)
+            with self._lock, self._db:
+                self._db.execute("INSERT OR REPLACE INTO urls VALUES (?, ?)", (url, source))
+
+        converted = self._convert(data, max_side)
+        variant = source if converted is None else self._store(converted)
+        with self._lock:
+            with self._db:
+                self._db.execute("INSERT OR REPLACE INTO variants VALUES (?, ?, ?)", (source, target, variant))
+            path = self._touch_locked(variant)
+            self._evict_locked(keep={source, variant})
+        return path
+
+    def save(self, url, dest):
+        """Write ``url``'s thumbnail as JPEG to ``dest`` (next to a video), from the cache."""
+        dest = Path(dest)
+        if not dest.exists():
+            shutil.copyfile(self.get(url), dest)
+        return dest
+
+    def blob_path(self, digest):
+        with self._lock:
+            return self._blob_path_locked(digest)
+
+    def stats(self):
+        """Cached files and bytes, plus how many fetches and conversions this process did."""
+        with self._lock:
+            files = self._db.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+            return {"files": files, "bytes": self._total, "max_bytes": self.max_bytes,
+                    "fetches": self.fetches, "conversions": self.conversions}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    # --- internals ------------------------------------------------------------
+
+    def _forget_inflight(self, key):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def _lookup_locked(self, query, params):
+        """First column of the first row, or None."""
+        row = self._db.execute(query, params).fetchone()
+        return row[0] if row else None
+
+    def _blob_path_locked(self, digest):
+        ext = self._lookup_locked("SELECT ext FROM blobs WHERE hash = ?", (digest,)) or "bin"
+        return self.directory / digest[:2] / f"{digest}.{ext}"
+
+    def _touch_locked(self, digest):
+        """Mark a blob as used now and return its path; raises FileNotFoundError if it vanished."""
+        path = self._blob_path_locked(digest)
+        if not path.exists():
+            self._drop_locked([digest])
+            raise FileNotFoundError(f"thumbnail {digest} is no longer cached")
+        with self._db:
+            self._db.execute("UPDATE blobs SET last_used = ? WHERE hash = ?", (time.time(), digest))
+        return path
+
+    def _fetch(self, url):
+        request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+        with urllib.request.urlopen(request, timeout=THUMBNAIL_FETCH_TIMEOUT) as response:
+            data = response.read()
+        self.fetches += 1
+        return data
+
+    def _store(self, data):
+        """Store bytes under their SHA-256 (once) and return the hash."""
+        digest = hashlib.sha256(data).hexdigest()
+        ext = sniff_extension(data)
+        path = self.directory / digest[:2] / f"{digest}.{ext}"
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            temp = path.with_name(f"{path.name}.{threading.get_ident()}.part")
+            temp.write_bytes(data)
+            temp.replace(path)
+        with self._lock, self._db:
+            known = self._lookup_locked("SELECT size FROM blobs WHERE hash = ?", (digest,))
+            if known is None:
+                self._total += len(data)
+            self._db.execute("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?)",
+                             (digest, ext, len(data), time.time()))
+        return digest
+
+    def _convert(self, data, max_side):
+        """JPEG bytes of ``data`` fitted into ``max_side``; None if it can be used as it is."""
+        if sniff_extension(data) == "jpg" and not max_side:
+            return None
+        if HAS_PIL:
+            try:
+                with Image.open(io.BytesIO(data)) as image:
+                    if sniff_extension(data) == "jpg" and max(image.size) <= max_side:
+                        return None
+                    image = image.convert("RGB")
+                    if max_side:
+                        image.thumbnail((max_side, max_side))
+                    buffer = io.BytesIO()
+                    image.save(buffer, "JPEG", quality=90)
+                self.conversions += 1
+                return buffer.getvalue()
+            except (OSError, ValueError):
+                return None
+        if self.ffmpeg_path and Path(self.ffmpeg_path).exists():
+            cmd = [self.ffmpeg_path, "-loglevel", "error", "-i", "pipe:0", "-frames:v", "1"]
+            if max_side:
+                cmd += ["-vf", f"scale=w='min(iw,{max_side})':h='min(ih,{max_side})'"
+                               ":force_original_aspect_ratio=decrease"]
+            try:
+                result = subprocess.run(cmd + ["-f", "image2pipe", "-vcodec", "mjpeg", "-"],
+                                        input=data, capture_output=True, timeout=60)
+            except (OSError, subprocess.SubprocessError):
+                return None
+            if result.returncode == 0 and result.stdout:
+                self.conversions += 1
+                return result.stdout
+        return None  # Nothing to convert with - the original will have to do
+
+    def _evict_locked(self, keep=()):
+        """Delete least recently used blobs until the cache fits its byte budget."""
+        if self._total <= self.max_bytes:
+            return
+        victims = []
+        excess = self._total - self.max_bytes
+        for digest, size in self._db.execute("SELECT hash, size FROM blobs ORDER BY last_used"):
+            if excess <= 0:
+                break
+            if digest not in keep:
+                victims.append(digest)
+                excess -= size
+        self._drop_locked(victims)
+
+    def _drop_locked(self, digests):
+        with self._db:
+            for digest in digests:
+                row = self._db.execute("SELECT ext, size FROM blobs WHERE hash = ?", (digest,)).fetchone()
+                if row is not None:
+                    (self.directory / digest[:2] / f"{digest}.{row[0]}").unlink(missing_ok=True)
+                    self._total -= row[1]
+                self._db.execute("DELETE FROM blobs WHERE hash = ?", (digest,))
+                self._db.execute("DELETE FROM urls WHERE hash = ?", (digest,))
+                self._db.execute("DELETE FROM variants WHERE hash = ? OR source = ?", (digest, digest))
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Compression
+Re-encodes downloaded videos smaller with libx264 on every core. One x264
+encode of a long video keeps only a few cores busy at the usual presets,
+so the video is split at its keyframes into chunks (a stream copy), the
+chunks are encoded side by side - one FFmpeg per core - and joined again
+with a stream copy, while the audio is encoded once alongside them. The
+result replaces the original only if its duration matches and it came out
+smaller. CPU-only: no hardware encoders are needed.
+"""
+
+import asyncio
+import os
+import re
+import shutil
+import uuid
+from pathlib import Path
+
+from meowdown_runner import shared_runner
+
+# =============================================================================
+# 🐱 CONFIGURATION & CONSTANTS
+# =============================================================================
+
+COMPRESS_PRESET = "medium"
+COMPRESS_CRF = 28
+COMPRESS_AUDIO_BITRATE = "128k"
+
+# A few chunks per worker so a slow one near the end leaves little behind;
+# very short chunks would mostly be x264 start-up
+CHUNKS_PER_WORKER = 3
+CHUNK_MIN_SECONDS = 10
+
+# The joined result may be this far off the original's duration
+DURATION_TOLERANCE_SECONDS = 0.5
+DURATION_TOLERANCE_RATIO = 0.01
+
+VIDEO_EXTENSIONS = {".mp4", ".mkv", ".webm", ".mov", ".avi", ".flv", ".m4v", ".ts"}
+
+DURATION_RE = re.compile(r'^\s*Duration:\s*(\d+):(\d{2}):(\d{2}(?:\.\d+)?)')
+TIME_RE = re.compile(r'\btime=\s*(\d+):(\d{2}):(\d{2}(?:\.\d+)?)')
+STREAM_RE = re.compile(r'^\s*Stream #\d+:\d+.*?: (Video|Audio): (.*)$')
+
+def available_cpus():
+    """Cores this process may run on (its CPU affinity, where the OS has one)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+class CompressionError(RuntimeError):
+    """A compression step failed; the original file is left untouched."""
+
+def _seconds(match):
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+def probe_media(ffmpeg_path, path, runner=None):
+    """``{"duration", "video", "audio"}`` of a media file, read from FFmpeg's banner.
+
+    ``video`` is False for audio files (a cover picture doesn't count).
+    """
+    lines = []
+    (runner or shared_runner()).run_sync([ffmpeg_path, "-hide_banner", "-nostdin", "-i", path],
+                                         on_line=lines.append)
+    info = {"duration": None, "video": False, "audio": False}
+    for line in lines:
+        match = DURATION_RE.match(line)
+        if match and info["duration"] is None:
+            info["duration"] = _seconds(match)
+        match = STREAM_RE.match(line)
+        if match and match.group(1) == "Audio":
+            info["audio"] = True
+        elif match and "attached pic" not in line:
+            info["video"] = True
+    return info
+
+def durations_match(expected, actual):
+    """True if ``actual`` is within the tolerance of ``expected`` seconds."""
+    if expected is None or actual is None:
+        return False
+    return abs(expected - actual) <= max(DURATION_TOLERANCE_SECONDS, expected * DURATION_TOLERANCE_RATIO)
+
+# =============================================================================
+# 🗜️ COMPRESSOR
+# =============================================================================
+
+class Compressor:
+    """Chunked libx264 compression of video files.
+
+    ``workers`` FFmpeg encodes run at once (one per available core by
+    default), each with ``cores // workers`` x264 threads. ``chunked=False`` in
+    :meth:`compress` is the plain one-process encode, for comparison and
+    for videos too short to split.
+    """
+
+    def __init__(self, ffmpeg_path, workers=None, preset=COMPRESS_PRESET, crf=COMPRESS_CRF,
+                 audio_bitrate=COMPRESS_AUDIO_BITRATE, runner=None):
+        self.ffmpeg_path = str(ffmpeg_path)
+        self.workers = max(1, int(workers or available_cpus()))
+        self.preset = preset
+        self.crf = crf
+        self.audio_bitrate = audio_bitrate
+        self.runner = runner or shared_runner()
+
+    def compress(self, path, chunked=True, replace=True, progress=None):
+        """Compress one video; returns a result dict.
+
+        The result has ``path`` (the file to keep), ``original_bytes``,
+        ``bytes``, ``duration``, ``chunks`` and ``replaced``. With
+        ``replace`` the original is swapped for the smaller ``.mp4`` (and
+        kept if compression didn't save anything, or if another file
+        already has the ``.mp4`` name); otherwise the compressed copy is
+        left next to it. ``progress(fraction)`` is called as chunks are
+        encoded. Raises :class:`CompressionError`.
+        """
+        path = Path(path)
+        target = path.with_suffix(".mp4")
+        if replace and target != path and target.exists():
+            raise CompressionError(f"{path.name}: {target.name} is already there - keeping the original")
+        info = probe_media(self.ffmpeg_path, path, self.runner)
+        if not info["video"] or not info["duration"]:
+            raise CompressionError(f"{path.name} has no video to compress")
+
+        work = path.parent / f".meowdown-compress-{uuid.uuid4().hex[:8]}"
+        work.mkdir()
+        try:
+            output = work / "compressed.mp4"
+            chunks = self._chunk_seconds(info["duration"]) if chunked else None
+            if chunks:
+                count = self.runner.submit_coroutine(
+                    self._encode_chunked(path, info, chunks, work, output, progress)).result()
+            else:
+                self._run(self._single_command(path, info, output), info["duration"], progress)
+                count = 1
+
+            encoded = probe_media(self.ffmpeg_path, output, self.runner)
+            if not durations_match(info["duration"], encoded["duration"]):
+                raise CompressionError(f"{path.name}: compressed copy lasts {encoded['duration']}s, "
+                                       f"not {info['duration']}s - keeping the original")
+
+            result = {"path": path, "original_bytes": path.stat().st_size, "bytes": output.stat().st_size,
+                      "duration": encoded["duration"], "chunks": count, "replaced": False}
+            if not replace:
+                result["path"] = path.with_name(f"{path.stem}.compressed.mp4")
+                os.replace(output, result["path"])
+            elif result["bytes"] < result["original_bytes"]:
+                if target == path:
+                    os.replace(output, target)
+                else:
+                    try:
+                        os.link(output, target)  # Unlike a rename, never replaces a file that appeared meanwhile
+                    except FileExistsError:
+                        raise CompressionError(f"{path.name}: {target.name} is already there - "
+                                               f"keeping the original") from None
+                    except OSError:
+                        os.replace(output, target)  # No hard links on this filesystem (FAT)
+                    path.unlink()
+                result.update(path=target, replaced=True)
+            else:
+                result["bytes"] = result["original_bytes"]  # Already as small as it gets
+            return result
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+
+    # --- internals ------------------------------------------------------------
+
+    def _chunk_seconds(self, duration):
+        """Chunk length for ``duration``, or None if splitting wouldn't pay off."""
+        if self.workers < 2 or duration < 2 * CHUNK_MIN_SECONDS:
+            return None
+        return max(CHUNK_MIN_SECONDS, duration / (self.workers * CHUNKS_PER_WORKER))
+
+    def _video_args(self, threads=None):
+        args = ["-c:v", "libx264", "-preset", self.preset, "-crf", str(self.crf), "-pix_fmt", "yuv420p"]
+        if threads:
+            args += ["-threads", str(threads)]
+        return args
+
+    def _single_command(self, path, info, output):
+        cmd = [self.ffmpeg_path, "-hide_banner", "-nostdin", "-y", "-i", path, "-map", "0:V:0"]
+        if info["audio"]:
+            cmd += ["-map", "0:a:0", "-c:a", "aac", "-b:a", self.audio_bitrate]
+        return cmd + self._video_args() + ["-movflags", "+faststart", output]
+
+    def _run(self, cmd, duration, progress):
+        done = self.runner.run_sync(cmd, on_line=self._progress_reader(duration, progress))
+        if not done.ok:
+            raise CompressionError(f"FFmpeg exited with code {done.returncode}")
+
+    @staticmethod
+    def _progress_reader(total, progress, offset=None):
+        """``on_line`` that turns FFmpeg's ``time=`` into overall progress.
+
+        ``offset`` is a shared ``{"done": {chunk: seconds}}`` for chunked
+        encodes, keyed by the chunk being read.
+        """
+        def on_line(line):
+            match = TIME_RE.search(line)
+            if match is None or progress is None:
+                return
+            if offset is None:
+                progress(min(1.0, _seconds(match) / total))
+            else:
+                offset["done"][offset["key"]] = _seconds(match)
+                progress(min(1.0, sum(offset["done"].values()) / total))
+        return on_line
+
+    async def _ffmpeg(self, cmd, on_line=None):
+        result = await self.runner.run(cmd, on_line=on_line)
+        if not result.ok:
+            raise CompressionError(f"FFmpeg exited with code {result.returncode}: {' '.join(map(str, cmd[-1:]))}")
+
+    async def _encode_chunked(self, path, info, chunk_seconds, work, output, progress):
+        """Split, encode the chunks ``workers`` at a time, then join; returns the chunk count."""
+        ffmpeg = [self.ffmpeg_path, "-hide_banner", "-nostdin", "-y"]
+        # The segment muxer only cuts at keyframes, so every chunk starts with one
+        await self._ffmpeg(ffmpeg + ["-i", path, "-map", "0:V:0", "-c", "copy", "-f", "segment",
+                                     "-segment_time", f"{chunk_seconds:.3f}", "-reset_timestamps", "1",
+                                     work / "chunk-%05d.mkv"])
+        chunks = sorted(work.glob("chunk-*.mkv"))
+        if not chunks:
+            raise CompressionError(f"{path.name} could not be split")
+
+        slots = asyncio.Semaphore(self.workers)
+        threads = max(1, available_cpus() // self.workers)
+        done = {"done": {}}
+
+        async def encode(source, target, args, key):
+            async with slots:
+                reader = self._progress_reader(info["duration"], progress, {**done, "key": key} if key else None)
+                await self._ffmpeg(ffmpeg + ["-i", source] + args + [target],
+                                   on_line=reader if key else None)
+
+        encoded = [work / f"encoded-{n:05d}.mkv" for n in range(len(chunks))]
+        tasks = [encode(source, target, ["-map", "0:v:0"] + self._video_args(threads), source.name)
+                 for source, target in zip(chunks, encoded)]
+        audio = work / "audio.m4a"
+        if info["audio"]:
+            tasks.append(encode(path, audio, ["-map", "0:a:0", "-vn", "-c:a", "aac", "-b:a", self.audio_bitrate],
+                                None))
+        pending = [asyncio.ensure_future(task) for task in tasks]
+        try:
+            await asyncio.gather(*pending)
+        except BaseException:
+            for task in pending:
+                task.cancel()  # Stops the other encodes' FFmpegs too
+            await asyncio.gather(*pending, return_exceptions=True)
+            raise
+
+        listing = work / "chunks.txt"
+        listing.write_text("".join(f"file '{target.name}'\n" for target in encoded), encoding='utf-8')
+        join = ffmpeg + ["-f", "concat", "-safe", "0", "-i", listing]
+        if info["audio"]:
+            join += ["-i", audio, "-map", "0:v:0", "-map", "1:a:0"]
+        await self._ffmpeg(join + ["-c", "copy", "-movflags", "+faststart", output])
+        return len(chunks)
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+🐱 MeowDown Worker Pool
+Long-lived yt-dlp worker processes that already have Python and yt-dlp's
+extractors loaded. A job is one line of JSON on a worker's stdin; its output
+streams back over stdout exactly like a fresh ``python -m yt_dlp`` would
+print it, followed by a marker line with the return code. Each job still
+runs in a separate process (one per core), so extraction and
+post-processing keep using every core, but a job no longer waits for an
+interpreter to start and yt-dlp to import.
+
+Like multiprocessing's forkserver, a worker runs every job in a fork of
+itself: each job starts from the freshly loaded state and whatever yt-dlp
+changes at module level (registered postprocessors and downloaders, the
+segmented downloader's entry in ``external._BY_NAME``, caches) goes away
+with the job. Where there is no fork (Windows) a worker runs one job itself
+and is then replaced; its successor starts loading as that job begins.
+
+Run as a script, this file is the worker.
+"""
+
+import asyncio
+import json
+import os
+import signal
+import sys
+import traceback
+from pathlib import Path
+
+from meowdown_runner import CANCEL_GRACE_SECONDS, process_group_kwargs, shared_runner
+from meowdown_segments import SEGMENTED_SCRIPT, register as register_segmented_downloader
+
+# Optional imports - graceful fallback if not available
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+    psutil = None
+
+# =============================================================================
+# 🐱 CONFIGURATION & CONSTANTS
+# =============================================================================
+
+# At most this many workers are alive at once (busy or idle)
+WORKER_POOL_SIZE = max(2, min(os.cpu_count() or 2, 8))
+
+HAS_FORK = hasattr(os, "fork")
+
+# Forking workers are replaced after this many jobs, or once they have grown
+# by this much since start-up, so leaks in long batches can't pile up; one
+# that runs jobs in-process is used up by a single job, which would leave
+# yt-dlp's module-level state behind for the next
+WORKER_MAX_JOBS = 25 if HAS_FORK else 1
+WORKER_MAX_GROWTH_BYTES = 256 * 1024 * 1024
+
+WORKER_START_TIMEOUT = 60
+WORKER_SCRIPT = Path(__file__).resolve()
+
+# Prefix of the worker's own status lines (never printed by yt-dlp)
+MARKER = "\x1emeowdown-worker "
+
+def parse_marker(line):
+    """The status dict of a worker marker line, or None for ordinary output."""
+    if not line.startswith(MARKER):
+        return None
+    try:
+        return json.loads(line[len(MARKER):])
+    except json.JSONDecodeError:
+        return None
+
+# =============================================================================
+# 👷 WORKER PROCESS
+# =============================================================================
+
+def _rss():
+    """Resident memory of this process in bytes, if it can be measured."""
+    if HAS_PSUTIL:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def _report(**status):
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.write(sys.stdout.fileno(), f"{MARKER}{json.dumps(status)}\n".encode('utf-8'))
+
+def _run_job(argv):
+    """Run one yt-dlp command line in this process; returns its exit code."""
+    import yt_dlp
+    try:
+        yt_dlp.main(argv)
+        return 0
+    except SystemExit as e:
+        if isinstance(e.code, str):
+            print(e.code, file=sys.stderr)  # What the interpreter prints for sys.exit("...")
+            return 1
+        return e.code or 0
+    except Exception:
+        traceback.print_exc()
+        return 1
+
+def _run_forked(argv):
+    """Run one yt-dlp command line in a fork of this worker; returns its exit code."""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid == 0:
+        returncode = 1
+        try:
+            returncode = _run_job(argv)
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(returncode if isinstance(returncode, int) else 1)
+    while True:
+        try:
+            _, status = os.waitpid(pid, 0)
+            return os.waitstatus_to_exitcode(status)
+        except KeyboardInterrupt:
+            continue  # The job got the interrupt too (same process group) and is stopping
+
+def worker_main():
+    """Preload yt-dlp, then run jobs from stdin until it closes or a job is interrupted."""
+    interrupted = []
+
+    def on_interrupt(signum, frame):
+        interrupted.append(signum)
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGINT, on_interrupt)
+
+    import yt_dlp  # noqa: F401
+    from yt_dlp.extractor import gen_extractor_classes
+    import yt_dlp.postprocessor  # noqa: F401
+    gen_extractor_classes()
+    register_segmented_downloader()
+    _report(ready=True, pid=os.getpid(), rss=_rss())
+
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        returncode = (_run_forked if HAS_FORK else _run_job)(job["argv"])
+        _report(returncode=returncode, rss=_rss())
+        if interrupted:
+            break  # Cancelled: exit like a one-shot yt-dlp would
+    sys.stdout.flush()
+
+# =============================================================================
+# 🏊 WORKER POOL
+# =============================================================================
+
+class _Worker:
+    def __init__(self, proc, rss):
+        self.proc = proc
+        self.base_rss = rss
+        self.jobs = 0
+
+class WorkerPool:
+    """Pre-started yt-dlp workers shared by the download engine.
+
+    :meth:`run` has the signature of :meth:`ProcessRunner.run` and takes the
+    same ``[python, "-m", "yt_dlp", ...]`` commands, or ones started through
+    the segmented downloader's launcher (see :meth:`accepts`);
+    ``on_start`` gets the worker's process, so pause and cancel work as they
+    do for a one-shot child. As many idle workers are kept warm as jobs have
+    run at once (``prewarm`` sets the starting point), up to ``size``;
+    beyond that jobs fall back to a fresh process. Everything runs on the
+    runner's event loop.
+    """
+
+    def __init__(self, size=WORKER_POOL_SIZE, max_jobs=WORKER_MAX_JOBS,
+                 max_growth=WORKER_MAX_GROWTH_BYTES, python=sys.executable, runner=None):
+        self.size = size
+        self.max_jobs = max_jobs
+        self.max_growth = max_growth
+        self.python = str(python)
+        self.runner = runner or shared_runner()
+        self._idle = []
+        self._busy = 0
+        self._spawning = set()
+        self._retiring = 0
+        self._target = 0
+        self.started = 0
+        self.retired = 0
+        self.warm_jobs = 0
+        self.cold_jobs = 0
+
+    def accepts(self, cmd):
+        """True for commands that run yt-dlp with this pool's Python."""
+        return self._ytdlp_argv(cmd) is not None
+
+    def prewarm(self, count=1):
+        """Start ``count`` idle workers in the background."""
+        async def fill():
+            self._target = min(self.size, max(self._target, count))
+            self._top_up()
+        self.runner.submit_coroutine(fill())
+
+    def stats(self):
+        return {"idle": len(self._idle), "busy": self._busy, "starting": len(self._spawning),
+                "started": self.started, "retired": self.retired,
+                "warm_jobs": self.warm_jobs, "cold_jobs": self.cold_jobs}
+
+    def shutdown(self):
+        """Let every idle worker exit (busy ones finish their job first)."""
+        async def close():
+            self._target = 0
+            while self._idle:
+                self._retire(self._idle.pop())
+        self.runner.submit_coroutine(close()).result()
+
+    async def run(self, cmd, on_line=None, on_start=None, timeout=None, idle_timeout=None,
+                  is_idle_allowed=None, grace=CANCEL_GRACE_SECONDS):
+        """Run a yt-dlp command on a worker; returns a :class:`ProcessResult`."""
+        self._busy += 1
+        try:
+            worker = await self._acquire()
+        except Exception:
+            worker = None  # Couldn't start one - a plain child will do
+        if worker is None:
+            self._busy -= 1
+            self.cold_jobs += 1
+            return await self.runner.run(cmd, on_line=on_line, on_start=on_start, timeout=timeout,
+                                         idle_timeout=idle_timeout, is_idle_allowed=is_idle_allowed, grace=grace)
+
+        report = {}
+
+        def until(line):
+            status = parse_marker(line)
+            if status is None or "returncode" not in status:
+                return None
+            report.update(status)
+            return status["returncode"]
+
+        last_job = worker.jobs + 1 >= self.max_jobs
+        if last_job:
+            self._retiring += 1
+            self._top_up()  # Its replacement starts now, not when the next job needs it
+        try:
+            worker.jobs += 1
+            if on_start is not None:
+                on_start(worker.proc)
+            job = {"argv": self._ytdlp_argv(cmd)}
+            worker.proc.stdin.write(json.dumps(job).encode('utf-8') + b"\n")
+            await worker.proc.stdin.drain()
+            return await self.runner.watch(worker.proc, on_line=on_line, timeout=timeout,
+                                           idle_timeout=idle_timeout, is_idle_allowed=is_idle_allowed,
+                                           grace=grace, until=until)
+        finally:
+            self._busy -= 1
+            if last_job:
+                self._retiring -= 1
+            self._release(worker, report)
+            self._top_up()
+
+    # --- internals ------------------------------------------------------------
+
+    def _ytdlp_argv(self, cmd):
+        """yt-dlp's own arguments in ``cmd``, or None if it isn't a yt-dlp command."""
+        parts = [str(part) for part in cmd]
+        if parts[:3] == [self.python, "-m", "yt_dlp"]:
+            return parts[3:]
+        if parts[:2] == [self.python, str(SEGMENTED_SCRIPT)]:
+            return parts[2:]  # Workers have the segmented downloader registered
+        return None
+
+    async def _acquire(self):
+        """An idle worker, a freshly started one, or None when the pool is full."""
+        self._target = min(self.size, max(self._target, self._busy))
+        while True:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.proc.returncode is None:
+                    self.warm_jobs += 1
+                    return worker
+            if not self._spawning:
+                break
+            # One is already on its way - quicker than starting another
+            await asyncio.wait(set(self._spawning), return_when=asyncio.FIRST_COMPLETED)
+        if self._busy > self.size:
+            return None
+        worker = await self._spawn()
+        self.cold_jobs += 1
+        return worker
+
+    async def _spawn(self):
+        proc = await asyncio.create_subprocess_exec(
+            self.python, str(WORKER_SCRIPT), stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+            **process_group_kwargs())
+        try:
+            status = await asyncio.wait_for(self._wait_ready(proc), WORKER_START_TIMEOUT)
+        except BaseException:
+            if proc.returncode is None:
+                proc.kill()
+            await proc.wait()
+            raise
+        self.started += 1
+        return _Worker(proc, status.get("rss"))
+
+    @staticmethod
+    async def _wait_ready(proc):
+        while True:
+            line = await proc.stdout.readline()
+            if not line:
+                raise RuntimeError("yt-dlp worker exited while starting")
+            status = parse_marker(line.decode('utf-8', errors='replace').rstrip("\r\n"))
+            if status and status.get("ready"):
+                return status
+
+    def _release(self, worker, report):
+        """Put a worker back in the pool, or retire it if it is used up."""
+        grown = (report.get("rss") or 0) - (worker.base_rss or 0)
+        if (worker.proc.returncode is not None or not report or worker.jobs >= self.max_jobs
+                or (worker.base_rss and grown > self.max_growth)
+                or len(self._idle) + self._busy >= self.size):
+            self._retire(worker)
+        else:
+            self._idle.append(worker)
+
+    def _retire(self, worker):
+        self.retired += 1
+        if worker.proc.returncode is None:
+            worker.proc.stdin.close()  # The worker exits once its stdin ends
+        asyncio.ensure_future(worker.proc.wait())
+
+    def _top_up(self):
+        """Start idle workers in the background until the warm target is met."""
+        staying = self._busy - self._retiring
+        missing = self._target - staying - len(self._idle) - len(self._spawning)
+        for _ in range(max(0, missing)):
+            task = asyncio.ensure_future(self._add_idle())
+            self._spawning.add(task)
+            task.add_done_callback(self._spawning.discard)
+
+    async def _add_idle(self):
+        try:
+            worker = await self._spawn()
+        except Exception:
+            return  # The next job starts a worker itself
+        if len(self._idle) < max(self._target, 1):
+            self._idle.append(worker)
+        else:
+            self._retire(worker)
+
+if __name__ == "__main__":
+    worker_main()